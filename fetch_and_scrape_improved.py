@@ -96,7 +96,7 @@ def parse_args():
     parser.add_argument('search_term', nargs='?', default="leilão imóveis", 
                         help='Termo de busca para encontrar sites de leilão')
     parser.add_argument('--depth', type=int, default=2, 
-                        help='Profundidade de navegação (1=apenas lista, 2=lista+detalhes, 3+=paginação/categorias)')
+                        help='Profundidade de navegação (1=apenas lista, 2=lista+detalhes, 3+=categorias); as páginas seguintes das listagens são seguidas em qualquer profundidade')
     parser.add_argument('--max-items', type=int, default=5, 
                         help='Número máximo de itens para extrair por site')
     parser.add_argument('--debug', action='store_true', 
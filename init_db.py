@@ -1,14 +1,17 @@
 """
 Script para inicializar o banco de dados com o esquema correto.
 """
-from myproject.database.models import Base, engine
+from myproject.database.connection import engine
+from myproject.database.migrations import migrate
 
 def initialize_database():
     """
-    Cria todas as tabelas definidas nos modelos.
+    Cria as tabelas e aplica as migrações pendentes do esquema.
     """
     print("Inicializando banco de dados...")
-    Base.metadata.create_all(engine)
+    applied = migrate(engine)
+    if applied:
+        print(f"Migrações aplicadas: {', '.join(str(version) for version in applied)}")
     print("Banco de dados inicializado com sucesso!")
 
 if __name__ == "__main__":
@@ -12,6 +12,31 @@ GOOGLE_CSE_ID = os.getenv('GOOGLE_CSE_ID')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///auction.db')
 
+# Ajustes do banco: SQLite (WAL, espera por lock, sincronização, mmap) e pool do PostgreSQL
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '30000'))
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')  # OFF, NORMAL, FULL ou EXTRA
+SQLITE_MMAP_MB = float(os.getenv('SQLITE_MMAP_MB', '256'))
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+
 # Configurações do Ollama
 OLLAMA_API_URL = os.getenv('OLLAMA_API_URL', 'http://localhost:11434')
-OLLAMA_MODEL = os.getenv('OLLAMA_MODEL', 'deepseek-coder')
\ No newline at end of file
+OLLAMA_MODEL = os.getenv('OLLAMA_MODEL', 'deepseek-coder')
+
+# Cache persistente de respostas do LLM
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', str(Path(__file__).resolve().parent.parent / 'cache' / 'llm_responses.db'))
+LLM_CACHE_TTL_DAYS = float(os.getenv('LLM_CACHE_TTL_DAYS', '7'))
+LLM_CACHE_MAX_MB = float(os.getenv('LLM_CACHE_MAX_MB', '64'))
+
+# Filtro de Bloom persistente das URLs já gravadas (links conhecidos não são baixados)
+URL_FILTER_PATH = os.getenv('URL_FILTER_PATH', str(Path(__file__).resolve().parent.parent / 'cache' / 'url_filter.bloom'))
+
+# Fila persistente de screenshots (processada fora dos callbacks do spider)
+SCREENSHOT_QUEUE_PATH = os.getenv('SCREENSHOT_QUEUE_PATH', str(Path(__file__).resolve().parent.parent / 'cache' / 'screenshot_queue.db'))
+SCREENSHOT_DIR = os.getenv('SCREENSHOT_DIR', 'prints')
+SCREENSHOT_FORMAT = os.getenv('SCREENSHOT_FORMAT', 'webp')  # 'webp' ou 'jpeg'
+SCREENSHOT_QUALITY = int(os.getenv('SCREENSHOT_QUALITY', '60'))
+SCREENSHOT_MAX_WIDTH = int(os.getenv('SCREENSHOT_MAX_WIDTH', '1280'))
+SCREENSHOT_THUMB_WIDTH = int(os.getenv('SCREENSHOT_THUMB_WIDTH', '320'))
+SCREENSHOT_DEDUPE = os.getenv('SCREENSHOT_DEDUPE', 'pixels')  # 'pixels' ou 'perceptual'
+SCREENSHOT_RETENTION_DAYS = float(os.getenv('SCREENSHOT_RETENTION_DAYS', '90'))
+SCREENSHOT_MAX_MB = float(os.getenv('SCREENSHOT_MAX_MB', '2048'))
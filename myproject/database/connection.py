@@ -1,9 +1,137 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from myproject.config import DATABASE_URL
+"""
+Engine e sessões do banco de dados.
 
-engine = create_engine(DATABASE_URL)
+O banco é definido por DATABASE_URL (padrão: sqlite:///auction.db). No SQLite
+cada conexão é aberta em modo WAL (leitores não bloqueiam o escritor), com
+busy_timeout, synchronous e mmap_size configuráveis, o que evita os erros
+"database is locked" quando spider, pipeline e threads de screenshots gravam
+ao mesmo tempo. No PostgreSQL (postgresql+psycopg2:// ou postgresql+psycopg://,
+driver instalado à parte) o mesmo código é usado, com pool de conexões e
+inserções em massa por COPY (copy_rows, usadas pelo pipeline apenas com
+ITEM_POSTGRES_COPY ligado).
+
+get_scoped_session retorna a sessão da thread atual, compartilhada pelos
+componentes que rodam nela (spider, cache de seletores, buffer write-behind).
+"""
+import io
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker, scoped_session
+from myproject.config import (DATABASE_URL, DB_POOL_SIZE, SQLITE_BUSY_TIMEOUT_MS, SQLITE_MMAP_MB,
+                              SQLITE_SYNCHRONOUS)
+
+SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+
+def sqlite_pragmas(busy_timeout_ms=SQLITE_BUSY_TIMEOUT_MS, synchronous=SQLITE_SYNCHRONOUS, mmap_mb=SQLITE_MMAP_MB):
+    """
+    Monta os PRAGMAs aplicados a cada conexão SQLite.
+
+    Returns:
+        list: Comandos PRAGMA, na ordem de execução
+    """
+    synchronous = synchronous.upper()
+    if synchronous not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"Nível de synchronous inválido: {synchronous} (use {', '.join(SYNCHRONOUS_LEVELS)})")
+    return [
+        'PRAGMA journal_mode=WAL',
+        f'PRAGMA busy_timeout={int(busy_timeout_ms)}',
+        # Em WAL, NORMAL só sincroniza nos checkpoints e continua à prova de corrupção
+        f'PRAGMA synchronous={synchronous}',
+        f'PRAGMA mmap_size={int(mmap_mb * 1024 * 1024)}',
+        'PRAGMA temp_store=MEMORY',
+    ]
+
+
+def create_db_engine(url=DATABASE_URL, **pragma_options):
+    """
+    Cria o engine ajustado para o banco da URL.
+
+    Args:
+        url: URL do SQLAlchemy (sqlite:///arquivo.db ou postgresql+psycopg2://...)
+        pragma_options: Substituem busy_timeout_ms, synchronous e mmap_mb no SQLite
+
+    Returns:
+        Engine
+    """
+    if url.startswith('sqlite'):
+        pragmas = sqlite_pragmas(**pragma_options)
+        busy_timeout_ms = pragma_options.get('busy_timeout_ms', SQLITE_BUSY_TIMEOUT_MS)
+        engine = create_engine(url, connect_args={'timeout': busy_timeout_ms / 1000, 'check_same_thread': False})
+
+        @event.listens_for(engine, 'connect')
+        def _configure_sqlite(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
+
+        return engine
+
+    return create_engine(url, pool_size=DB_POOL_SIZE, max_overflow=DB_POOL_SIZE, pool_pre_ping=True)
+
+
+def _copy_value(value):
+    """Formata um valor para o CSV do COPY: NULL sem aspas, textos entre aspas."""
+    if value is None:
+        return ''
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return repr(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_rows(conn, table, rows):
+    """
+    Insere linhas em massa com COPY ... FROM STDIN (PostgreSQL).
+
+    Args:
+        conn: Connection do SQLAlchemy (em transação)
+        table: Table de destino (ex.: uma tabela temporária de staging)
+        rows: Lista de dicionários com as mesmas chaves
+
+    Returns:
+        int: Número de linhas copiadas
+    """
+    if not rows:
+        return 0
+    columns = list(rows[0])
+
+    # CSV com textos entre aspas: vazio sem aspas é NULL, "" é string vazia
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(','.join(_copy_value(row[column]) for column in columns))
+        buffer.write('\n')
+
+    column_list = ', '.join(f'"{column}"' for column in columns)
+    sql = f'COPY {table.name} ({column_list}) FROM STDIN WITH (FORMAT csv)'
+
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, 'copy_expert'):
+            # psycopg2
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+        else:
+            # psycopg 3
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+    return len(rows)
+
+
+engine = create_db_engine(DATABASE_URL)
 Session = sessionmaker(bind=engine)
+ScopedSession = scoped_session(Session)
 
 def get_session():
-    return Session()
\ No newline at end of file
+    return Session()
+
+def get_scoped_session():
+    """Retorna a sessão da thread atual, compartilhada pelos componentes dessa thread."""
+    return ScopedSession()
+
+def remove_scoped_session():
+    """Fecha e descarta a sessão da thread atual."""
+    ScopedSession.remove()
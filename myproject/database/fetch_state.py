@@ -0,0 +1,272 @@
+"""
+Estado de download das páginas de detalhe para re-coletas incrementais.
+
+Para cada URL que gerou um item ficam gravados o ETag, o Last-Modified e o
+hash do corpo normalizado da última resposta. Nas re-coletas o spider envia
+If-None-Match/If-Modified-Since; quando o servidor responde 304, ou quando o
+corpo tem o mesmo hash do já processado, a página não passa pela
+classificação, pela extração nem pelo pipeline. O mesmo hash encontrado em
+outra URL (ex.: parâmetros de sessão diferentes) indica uma página duplicada.
+
+O estado só é gravado depois que a página gera um item, para que uma extração
+que falhou seja repetida na próxima execução. As gravações são acumuladas e
+aplicadas em lote.
+"""
+import re
+import hashlib
+import logging
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from myproject.database.models import PageFetchState
+
+logger = logging.getLogger(__name__)
+
+# Linhas pendentes que disparam a gravação
+DEFAULT_MAX_PENDING = 100
+
+# Estados de URLs lidos do banco por consulta
+LOAD_CHUNK_SIZE = 500
+
+# INSERT ... ON CONFLICT de cada banco suportado
+DIALECT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+# Identificadores de sessão que mudam entre visitas sem mudar o conteúdo
+_SESSION_PARAM_RE = re.compile(
+    rb'(;jsessionid=|[?&](?:amp;)?(?:jsessionid|phpsessid|sessionid|session_id|sid|cfid|cftoken)=)[^"\'&\s<>#]*',
+    re.IGNORECASE,
+)
+_WHITESPACE_RE = re.compile(rb'\s+')
+_TAG_GAP_RE = re.compile(rb'>\s+<')
+
+# Motivos para não processar uma resposta
+NOT_MODIFIED = 'not_modified'
+UNCHANGED = 'unchanged'
+DUPLICATE = 'duplicate'
+
+
+def body_hash(body):
+    """
+    Calcula o hash do corpo da página sem identificadores de sessão e espaços de formatação.
+
+    Args:
+        body: Corpo da resposta (bytes)
+
+    Returns:
+        str: Hash hexadecimal de 128 bits
+    """
+    normalized = _SESSION_PARAM_RE.sub(rb'\1', body or b'')
+    normalized = _TAG_GAP_RE.sub(b'><', normalized)
+    normalized = _WHITESPACE_RE.sub(b' ', normalized).strip()
+    return hashlib.blake2b(normalized, digest_size=16).hexdigest()
+
+
+def _header(response, name):
+    value = response.headers.get(name)
+    if value is None:
+        return None
+    return value.decode('latin-1') if isinstance(value, bytes) else str(value)
+
+
+class FetchStateStore:
+    """
+    Lê e grava o estado de download das páginas de detalhe.
+
+    Args:
+        engine: Engine do SQLAlchemy
+        max_pending: Linhas pendentes que disparam a gravação
+        dedupe: Considera duplicada uma página com o mesmo hash de outra URL
+    """
+
+    def __init__(self, engine, max_pending=DEFAULT_MAX_PENDING, dedupe=True):
+        self.engine = engine
+        self.max_pending = max_pending
+        self.dedupe = dedupe
+        self._states = {}
+        self._hashes = {}
+        self._pending = {}
+
+        # Estatísticas
+        self.conditional_requests = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.duplicates = 0
+        self.changed = 0
+        self.rows_written = 0
+        self.failed = 0
+
+    def load(self, urls):
+        """
+        Lê do banco, em uma consulta por bloco, o estado das URLs ainda não consultadas.
+
+        Args:
+            urls: URLs que serão agendadas
+        """
+        missing = [url for url in dict.fromkeys(urls) if url not in self._states]
+        if not missing:
+            return
+        table = PageFetchState.__table__
+        with self.engine.connect() as conn:
+            for start in range(0, len(missing), LOAD_CHUNK_SIZE):
+                chunk = missing[start:start + LOAD_CHUNK_SIZE]
+                for row in conn.execute(select(table).where(table.c.url.in_(chunk))).mappings():
+                    self._states[row['url']] = dict(row)
+        for url in missing:
+            self._states.setdefault(url, None)
+
+    def conditional_headers(self, url):
+        """
+        Retorna os cabeçalhos condicionais da URL (vazio se ela nunca gerou item).
+
+        Returns:
+            dict: If-None-Match e/ou If-Modified-Since
+        """
+        if url not in self._states:
+            self.load([url])
+        state = self._states.get(url)
+        headers = {}
+        if state:
+            if state.get('etag'):
+                headers['If-None-Match'] = state['etag']
+            if state.get('last_modified'):
+                headers['If-Modified-Since'] = state['last_modified']
+        if headers:
+            self.conditional_requests += 1
+        return headers
+
+    def check(self, response):
+        """
+        Verifica se a resposta traz conteúdo que ainda não foi processado.
+
+        Args:
+            response: Resposta do Scrapy
+
+        Returns:
+            str: NOT_MODIFIED, UNCHANGED ou DUPLICATE se a página deve ser ignorada;
+                None se ela deve ser processada
+        """
+        url = response.url
+        if response.status == 304:
+            self.not_modified += 1
+            self.touch(url)
+            return NOT_MODIFIED
+
+        digest = body_hash(response.body)
+        response.meta['body_hash'] = digest
+        if url not in self._states:
+            self.load([url])
+        state = self._states.get(url)
+        if state and state.get('body_hash') == digest:
+            self.unchanged += 1
+            self.touch(url, response)
+            return UNCHANGED
+
+        if self.dedupe and self._find_duplicate(url, digest):
+            self.duplicates += 1
+            return DUPLICATE
+
+        self.changed += 1
+        return None
+
+    def _find_duplicate(self, url, digest):
+        other = self._hashes.get(digest)
+        if other is not None:
+            return other != url
+        table = PageFetchState.__table__
+        with self.engine.connect() as conn:
+            other = conn.execute(
+                select(table.c.url).where(table.c.body_hash == digest, table.c.url != url).limit(1)
+            ).scalar()
+        if other is not None:
+            self._hashes[digest] = other
+            logger.info(f"Página {url} tem o mesmo conteúdo de {other}")
+        return other is not None
+
+    def record(self, response):
+        """
+        Registra a resposta processada (validadores e hash do corpo).
+
+        Args:
+            response: Resposta que gerou um item
+        """
+        now = datetime.now()
+        digest = response.meta.get('body_hash') or body_hash(response.body)
+        state = {
+            'url': response.url,
+            'etag': _header(response, 'ETag'),
+            'last_modified': _header(response, 'Last-Modified'),
+            'body_hash': digest,
+            'fetched_at': now,
+            'checked_at': now,
+        }
+        self._states[response.url] = state
+        self._hashes.setdefault(digest, response.url)
+        self._queue(state)
+
+    def touch(self, url, response=None):
+        """Atualiza a data de verificação (e validadores novos) de uma página sem mudança."""
+        state = self._states.get(url)
+        if not state:
+            return
+        state = dict(state, checked_at=datetime.now())
+        if response is not None:
+            state['etag'] = _header(response, 'ETag') or state.get('etag')
+            state['last_modified'] = _header(response, 'Last-Modified') or state.get('last_modified')
+        self._states[url] = state
+        self._queue(state)
+
+    def _queue(self, state):
+        self._pending[state['url']] = {key: state.get(key) for key in
+                                       ('url', 'etag', 'last_modified', 'body_hash', 'fetched_at', 'checked_at')}
+        if len(self._pending) >= self.max_pending:
+            self.flush()
+
+    def flush(self):
+        """
+        Grava as linhas pendentes com um INSERT ... ON CONFLICT(url) DO UPDATE.
+
+        Returns:
+            int: Linhas gravadas
+        """
+        if not self._pending:
+            return 0
+        rows = list(self._pending.values())
+        self._pending = {}
+        dialect = self.engine.dialect.name
+        if dialect not in DIALECT_INSERTS:
+            logger.error(f"Banco sem suporte a upsert do estado de download: {dialect}")
+            self.failed += len(rows)
+            return 0
+
+        table = PageFetchState.__table__
+        stmt = DIALECT_INSERTS[dialect](table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['url'],
+            set_={column: stmt.excluded[column] for column in
+                  ('etag', 'last_modified', 'body_hash', 'fetched_at', 'checked_at')},
+        )
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(stmt, rows)
+        except Exception as e:
+            logger.error(f"Erro ao gravar estado de download de {len(rows)} páginas: {str(e)}")
+            self.failed += len(rows)
+            return 0
+        self.rows_written += len(rows)
+        return len(rows)
+
+    def get_stats(self):
+        """Retorna as estatísticas das re-coletas incrementais."""
+        return {
+            'conditional_requests': self.conditional_requests,
+            'not_modified': self.not_modified,
+            'unchanged': self.unchanged,
+            'duplicates': self.duplicates,
+            'changed': self.changed,
+            'rows_written': self.rows_written,
+            'failed': self.failed,
+            'pending': len(self._pending),
+        }
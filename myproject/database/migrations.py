@@ -0,0 +1,192 @@
+"""
+Migrações versionadas do esquema do banco.
+
+Cada migração tem um número de versão e uma função idempotente que recebe o
+engine. A versão aplicada fica na tabela schema_version; migrate aplica, em
+ordem, as migrações acima dela. Bancos anteriores ao controle de versões
+(versão 0) passam por todas, e como os passos verificam o que já existe, nada
+é recriado.
+
+Para uma nova alteração de esquema, acrescente uma Migration ao final de
+MIGRATIONS com a próxima versão; não altere migrações já publicadas.
+
+check_query_plans confere, pelo plano de execução do banco, que as consultas
+frequentes do spider e do browse_data usam os índices criados aqui.
+"""
+import logging
+from datetime import datetime
+from collections import namedtuple
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, select, text
+from myproject.database.models import Base, AuctionData, AuctionPriceHistory, DomainThrottleParams, DomainYield, PageFetchState, SelectorCache
+from myproject.database.price_history import ensure_tracking_schema
+from myproject.database.typed_columns import ensure_typed_columns
+
+logger = logging.getLogger(__name__)
+
+Migration = namedtuple('Migration', ['version', 'description', 'apply'])
+
+_version_metadata = MetaData()
+schema_version = Table(
+    'schema_version', _version_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('description', String),
+    Column('applied_at', DateTime),
+)
+
+# Índices compostos das consultas frequentes (declarados nos modelos)
+HOT_PATH_INDEXES = (
+    ('selector_cache', 'ix_selector_cache_lookup'),
+    ('auction_data', 'ix_auction_data_extracted_at'),
+    ('auction_data', 'ix_auction_data_domain_extracted'),
+    ('auction_price_history', 'ix_auction_price_history_url_recorded'),
+)
+
+# Consultas frequentes: nome -> (SQL, parâmetros, índice esperado no plano)
+HOT_QUERIES = {
+    'selector_cache_lookup': (
+        'SELECT * FROM selector_cache WHERE domain = :domain AND page_type = :page_type '
+        'AND is_valid = :is_valid ORDER BY success_rate DESC',
+        {'domain': 'a.com', 'page_type': 'detail', 'is_valid': True},
+        'ix_selector_cache_lookup',
+    ),
+    'auction_recent': (
+        'SELECT * FROM auction_data ORDER BY extracted_at DESC LIMIT 50',
+        {},
+        'ix_auction_data_extracted_at',
+    ),
+    'auction_recent_by_domain': (
+        'SELECT * FROM auction_data WHERE source_domain = :domain ORDER BY extracted_at DESC LIMIT 50',
+        {'domain': 'a.com'},
+        'ix_auction_data_domain_extracted',
+    ),
+    'auction_price_range': (
+        'SELECT * FROM auction_data WHERE price_cents BETWEEN :low AND :high',
+        {'low': 10000000, 'high': 50000000},
+        'ix_auction_data_price_cents',
+    ),
+    'price_history': (
+        'SELECT * FROM auction_price_history WHERE url = :url ORDER BY recorded_at, id',
+        {'url': 'https://a.com/imovel/1'},
+        'ix_auction_price_history_url_recorded',
+    ),
+    'fetch_state_by_hash': (
+        'SELECT url FROM page_fetch_state WHERE body_hash = :hash AND url != :url LIMIT 1',
+        {'hash': '0' * 32, 'url': 'https://a.com/imovel/1'},
+        'ix_page_fetch_state_body_hash',
+    ),
+}
+
+QueryPlan = namedtuple('QueryPlan', ['name', 'index', 'uses_index', 'plan'])
+
+
+def create_tables(engine):
+    """Cria as tabelas que ainda não existem (esquema atual dos modelos)."""
+    Base.metadata.create_all(engine)
+
+
+def create_hot_path_indexes(engine):
+    """Cria os índices compostos das consultas frequentes em bancos existentes."""
+    tables = {table.name: table for table in (SelectorCache.__table__, AuctionData.__table__,
+                                              AuctionPriceHistory.__table__)}
+    for table_name, index_name in HOT_PATH_INDEXES:
+        index = next(index for index in tables[table_name].indexes if index.name == index_name)
+        index.create(engine, checkfirst=True)
+
+
+def create_fetch_state_table(engine):
+    """Cria a tabela do estado de download das páginas (re-coletas incrementais)."""
+    PageFetchState.__table__.create(engine, checkfirst=True)
+
+
+def create_throttle_table(engine):
+    """Cria a tabela dos parâmetros de throttling aprendidos por domínio."""
+    DomainThrottleParams.__table__.create(engine, checkfirst=True)
+
+
+def create_yield_table(engine):
+    """Cria a tabela de custo e rendimento por domínio."""
+    DomainYield.__table__.create(engine, checkfirst=True)
+
+
+MIGRATIONS = (
+    Migration(1, 'Tabelas iniciais', create_tables),
+    Migration(2, 'content_hash e histórico de preços', ensure_tracking_schema),
+    Migration(3, 'Colunas tipadas price_cents, area_m2 e auction_at', ensure_typed_columns),
+    Migration(4, 'Índices compostos das consultas frequentes', create_hot_path_indexes),
+    Migration(5, 'Estado de download das páginas (ETag, Last-Modified e hash)', create_fetch_state_table),
+    Migration(6, 'Parâmetros de throttling por domínio', create_throttle_table),
+    Migration(7, 'Custo e rendimento por domínio', create_yield_table),
+)
+
+
+def current_version(engine):
+    """
+    Retorna a versão do esquema aplicada no banco.
+
+    Returns:
+        int: Última versão aplicada (0 se o banco nunca foi migrado)
+    """
+    schema_version.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def migrate(engine, target=None):
+    """
+    Aplica as migrações pendentes, em ordem.
+
+    Args:
+        engine: Engine do SQLAlchemy
+        target: Versão final (padrão: a mais recente)
+
+    Returns:
+        list: Versões aplicadas nesta chamada
+    """
+    version = current_version(engine)
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= version or (target is not None and migration.version > target):
+            continue
+        logger.info(f"Aplicando migração {migration.version}: {migration.description}")
+        migration.apply(engine)
+        with engine.begin() as conn:
+            conn.execute(schema_version.insert().values(
+                version=migration.version,
+                description=migration.description,
+                applied_at=datetime.now(),
+            ))
+        applied.append(migration.version)
+    if applied:
+        logger.info(f"Esquema do banco na versão {applied[-1]}")
+    return applied
+
+
+def explain(conn, sql, params):
+    """
+    Retorna o plano de execução de uma consulta como texto.
+
+    Returns:
+        str: Passos do plano, um por linha
+    """
+    if conn.dialect.name == 'sqlite':
+        rows = conn.execute(text(f'EXPLAIN QUERY PLAN {sql}'), params).all()
+        return '\n'.join(str(row[-1]) for row in rows)
+    rows = conn.execute(text(f'EXPLAIN {sql}'), params).all()
+    return '\n'.join(str(row[0]) for row in rows)
+
+
+def check_query_plans(engine, queries=None):
+    """
+    Confere se as consultas frequentes usam os índices esperados.
+
+    Returns:
+        list: QueryPlan de cada consulta (uses_index False indica varredura da tabela)
+    """
+    results = []
+    with engine.connect() as conn:
+        for name, (sql, params, index) in (queries or HOT_QUERIES).items():
+            plan = explain(conn, sql, params)
+            results.append(QueryPlan(name, index, index in plan, plan))
+            if index not in plan:
+                logger.warning(f"Consulta {name} não usa o índice {index}: {plan}")
+    return results
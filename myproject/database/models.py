@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from myproject.database.connection import engine
 from datetime import datetime
@@ -23,6 +23,10 @@ class ProblemSite(Base):
 
 class SelectorCache(Base):
     __tablename__ = 'selector_cache'
+    __table_args__ = (
+        # Busca do spider por domínio/tipo de página entre os seletores válidos, melhores primeiro
+        Index('ix_selector_cache_lookup', 'domain', 'page_type', 'is_valid', 'success_rate'),
+    )
     id = Column(Integer, primary_key=True)
     url = Column(String, unique=True)
     domain = Column(String, index=True)
@@ -34,8 +38,26 @@ class SelectorCache(Base):
     use_count = Column(Integer, default=1)
     is_valid = Column(Boolean, default=True)
 
+class PageTemplate(Base):
+    __tablename__ = 'page_templates'
+    id = Column(Integer, primary_key=True)
+    fingerprint = Column(String, unique=True)  # Hash do esqueleto de tags/classes
+    domain = Column(String, index=True)  # Domínio onde o modelo foi visto primeiro
+    page_type = Column(String)  # 'list' ou 'detail'
+    selectors = Column(Text)  # JSON string
+    success_rate = Column(Float, default=0.5)  # Taxa de sucesso (0-1)
+    created_at = Column(DateTime, default=datetime.now)
+    last_used = Column(DateTime, default=datetime.now)
+    use_count = Column(Integer, default=1)
+    is_valid = Column(Boolean, default=True)
+
 class AuctionData(Base):
     __tablename__ = 'auction_data'
+    __table_args__ = (
+        # Imóveis mais recentes, no geral e por site (browse_data e relatórios)
+        Index('ix_auction_data_extracted_at', 'extracted_at'),
+        Index('ix_auction_data_domain_extracted', 'source_domain', 'extracted_at'),
+    )
     id = Column(Integer, primary_key=True)
     url = Column(String, unique=True)
     
@@ -57,8 +79,69 @@ class AuctionData(Base):
     
     # Caminho do screenshot
     screenshot_path = Column(String, nullable=True)
+
+    # Valores tipados e indexados de price, area e auction_date (consultas por faixa)
+    price_cents = Column(Integer, nullable=True, index=True)
+    area_m2 = Column(Float, nullable=True, index=True)
+    auction_at = Column(DateTime, nullable=True, index=True)
+
+    # Hash dos campos normalizados (re-coletas sem mudança não são gravadas)
+    content_hash = Column(String, nullable=True)
     
     # Adições futuras
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
-    success_bid = Column(String, nullable=True)  # Valor do lance vencedor, se disponível
\ No newline at end of file
+    success_bid = Column(String, nullable=True)  # Valor do lance vencedor, se disponível
+
+class AuctionPriceHistory(Base):
+    __tablename__ = 'auction_price_history'
+    __table_args__ = (
+        # Histórico de um imóvel em ordem cronológica
+        Index('ix_auction_price_history_url_recorded', 'url', 'recorded_at'),
+    )
+    id = Column(Integer, primary_key=True)
+    url = Column(String)
+    price = Column(String)
+    previous_price = Column(String, nullable=True)  # Preço gravado antes da mudança (None na primeira coleta)
+    auction_date = Column(String)
+    title = Column(String)
+    content_hash = Column(String)
+    recorded_at = Column(DateTime, default=datetime.now)
+
+class PageFetchState(Base):
+    __tablename__ = 'page_fetch_state'
+    id = Column(Integer, primary_key=True)
+    url = Column(String, unique=True)
+    etag = Column(String, nullable=True)  # Validadores da última resposta (requisições condicionais)
+    last_modified = Column(String, nullable=True)
+    body_hash = Column(String, index=True)  # Hash do corpo normalizado (detecta páginas iguais em outras URLs)
+    fetched_at = Column(DateTime, default=datetime.now)  # Última vez que o conteúdo mudou
+    checked_at = Column(DateTime, default=datetime.now)  # Última verificação (inclusive 304)
+
+class DomainThrottleParams(Base):
+    __tablename__ = 'domain_throttle'
+    id = Column(Integer, primary_key=True)
+    domain = Column(String, unique=True)
+    delay = Column(Float)  # Atraso aprendido entre requisições (segundos)
+    concurrency = Column(Integer)  # Requisições simultâneas aprendidas
+    latency_p50 = Column(Float, nullable=True)
+    latency_p90 = Column(Float, nullable=True)
+    error_rate = Column(Float, nullable=True)
+    samples = Column(Integer, default=0)  # Respostas observadas na última coleta
+    updated_at = Column(DateTime, default=datetime.now)
+
+class DomainYield(Base):
+    __tablename__ = 'domain_yield'
+    id = Column(Integer, primary_key=True)
+    domain = Column(String, unique=True)
+    # Totais com o histórico reduzido à metade a cada coleta
+    requests = Column(Float, default=0.0)
+    bytes = Column(Float, default=0.0)
+    llm_seconds = Column(Float, default=0.0)
+    items = Column(Float, default=0.0)
+    # Última coleta
+    last_requests = Column(Integer, default=0)
+    last_items = Column(Integer, default=0)
+    demoted = Column(Boolean, default=False)  # Rebaixado por rendimento baixo ao final da última coleta
+    runs = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.now)
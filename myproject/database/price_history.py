@@ -0,0 +1,139 @@
+"""
+Detecção de mudanças e histórico de preços dos imóveis.
+
+Cada item coletado recebe um hash dos campos normalizados. O pipeline compara
+esse hash com o gravado em auction_data: re-coletas sem mudança não geram
+escrita, e cada mudança (inclusive a primeira coleta) acrescenta uma linha em
+auction_price_history, que nunca é alterada. Assim a redução de preço entre a
+1ª e a 2ª praça fica registrada.
+"""
+import re
+import hashlib
+import logging
+from sqlalchemy import inspect, select, text
+from myproject.database.models import AuctionData, AuctionPriceHistory
+
+logger = logging.getLogger(__name__)
+
+# Campos que definem o conteúdo de um imóvel (metadados como extracted_at e
+# screenshot_path não contam como mudança)
+HASHED_FIELDS = ('title', 'price', 'description', 'address', 'auction_date',
+                 'area', 'property_type', 'image_url')
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_value(value):
+    """Normaliza um campo para o hash: sem espaços repetidos e em minúsculas."""
+    if value is None:
+        return ''
+    return _WHITESPACE_RE.sub(' ', str(value)).strip().lower()
+
+
+def content_hash(row):
+    """
+    Calcula o hash do conteúdo de um imóvel.
+
+    Args:
+        row: Dicionário com os campos de HASHED_FIELDS (ausentes contam como vazios)
+
+    Returns:
+        str: Hash hexadecimal de 128 bits
+    """
+    payload = '\x1f'.join(normalize_value(row.get(field)) for field in HASHED_FIELDS)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def ensure_tracking_schema(engine):
+    """
+    Acrescenta a coluna content_hash e a tabela de histórico em bancos criados
+    antes do controle de mudanças (create_all não altera tabelas existentes).
+
+    Returns:
+        bool: True se o esquema foi alterado
+    """
+    inspector = inspect(engine)
+    changed = False
+    if inspector.has_table(AuctionData.__tablename__):
+        columns = {column['name'] for column in inspector.get_columns(AuctionData.__tablename__)}
+        if 'content_hash' not in columns:
+            with engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {AuctionData.__tablename__} ADD COLUMN content_hash VARCHAR'))
+            logger.info("Coluna content_hash adicionada a auction_data")
+            changed = True
+    if not inspector.has_table(AuctionPriceHistory.__tablename__):
+        AuctionPriceHistory.__table__.create(engine, checkfirst=True)
+        changed = True
+    return changed
+
+
+def load_current_state(conn, urls):
+    """
+    Lê o hash e o preço gravados para as URLs (uma consulta por lote).
+
+    Returns:
+        dict: url -> (content_hash, price)
+    """
+    if not urls:
+        return {}
+    table = AuctionData.__table__
+    result = conn.execute(
+        select(table.c.url, table.c.content_hash, table.c.price).where(table.c.url.in_(list(urls)))
+    )
+    return {url: (stored_hash, price) for url, stored_hash, price in result}
+
+
+def history_rows(rows, current):
+    """
+    Monta as linhas de auction_price_history para os imóveis que mudaram.
+
+    Args:
+        rows: Linhas gravadas em auction_data (com content_hash)
+        current: Estado anterior, como retornado por load_current_state
+
+    Returns:
+        list: Dicionários para inserção em auction_price_history
+    """
+    history = []
+    for row in rows:
+        previous_price = current.get(row['url'], (None, None))[1]
+        history.append({
+            'url': row['url'],
+            'price': row.get('price'),
+            'previous_price': previous_price,
+            'auction_date': row.get('auction_date'),
+            'title': row.get('title'),
+            'content_hash': row['content_hash'],
+            'recorded_at': row.get('extracted_at'),
+        })
+    return history
+
+
+def get_latest_price(session, url):
+    """
+    Retorna o registro mais recente do histórico de um imóvel.
+
+    Returns:
+        AuctionPriceHistory ou None
+    """
+    return (
+        session.query(AuctionPriceHistory)
+        .filter(AuctionPriceHistory.url == url)
+        .order_by(AuctionPriceHistory.recorded_at.desc(), AuctionPriceHistory.id.desc())
+        .first()
+    )
+
+
+def get_price_history(session, url):
+    """
+    Retorna o histórico completo de um imóvel, do mais antigo para o mais recente.
+
+    Returns:
+        list: Registros de AuctionPriceHistory
+    """
+    return (
+        session.query(AuctionPriceHistory)
+        .filter(AuctionPriceHistory.url == url)
+        .order_by(AuctionPriceHistory.recorded_at, AuctionPriceHistory.id)
+        .all()
+    )
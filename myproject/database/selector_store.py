@@ -0,0 +1,358 @@
+"""
+Cache em memória (read-through, LRU) para ScrapingRule, SelectorCache e PageTemplate.
+
+As regras e os seletores em cache são carregados do banco na abertura do
+spider e mantidos decodificados em memória, indexados por (domínio, tipo de
+página). Em regime estável nenhuma consulta de seletores chega ao banco; as
+entradas ausentes são lidas sob demanda e as mais antigas são descartadas
+quando o limite é atingido.
+
+Cada par guarda no máximo max_urls_per_entry seletores por URL; acima do
+limite os de menor taxa de sucesso são descartados da memória (continuam no
+banco), o que também limita a busca do melhor seletor do domínio.
+
+Os seletores por modelo de página (impressão digital estrutural) são
+carregados por inteiro: são poucos e valem para qualquer domínio.
+"""
+import json
+import heapq
+import logging
+from collections import OrderedDict
+from myproject.database.models import ScrapingRule, SelectorCache, PageTemplate
+
+logger = logging.getLogger(__name__)
+
+# Número máximo de pares (domínio, tipo de página) mantidos em memória
+DEFAULT_MAX_ENTRIES = 1024
+
+# Número máximo de seletores por URL mantidos em memória para cada par
+DEFAULT_MAX_URLS_PER_ENTRY = 200
+
+# Taxa de sucesso mínima para reutilizar seletores de outra URL do mesmo domínio
+DOMAIN_REUSE_MIN_SUCCESS = 0.7
+
+# Taxa de sucesso abaixo da qual os seletores de um modelo deixam de ser reutilizados
+TEMPLATE_MIN_SUCCESS = 0.3
+
+PAGE_TYPES = ('list', 'detail')
+
+
+def decode_rule(rule, page_type):
+    """
+    Decodifica os seletores de uma ScrapingRule para o tipo de página.
+
+    Returns:
+        Para 'list': str com o seletor; para 'detail': dict de seletores; ou None
+    """
+    if rule is None:
+        return None
+    if page_type == 'list':
+        return rule.list_selector or None
+    if not rule.detail_selectors:
+        return None
+    try:
+        return json.loads(rule.detail_selectors)
+    except json.JSONDecodeError:
+        logger.warning(f"Erro ao decodificar seletores para {rule.domain}: {rule.detail_selectors}")
+        return None
+
+
+def decode_cached_selectors(selectors_json, page_type):
+    """
+    Decodifica o JSON de uma linha de SelectorCache.
+
+    Para listas retorna a string do seletor em vez do dicionário, como o spider espera.
+    """
+    try:
+        selectors = json.loads(selectors_json)
+    except (TypeError, json.JSONDecodeError):
+        return None
+    if page_type == 'list' and isinstance(selectors, dict) and 'list_selector' in selectors:
+        return selectors['list_selector']
+    return selectors
+
+
+class SelectorEntry:
+    """Seletores conhecidos para um par (domínio, tipo de página)."""
+
+    __slots__ = ('rule', 'urls')
+
+    def __init__(self, rule=None):
+        # Seletores da ScrapingRule do domínio (decodificados)
+        self.rule = rule
+        # url -> {'selectors', 'success_rate', 'use_count'}
+        self.urls = {}
+
+    def best_similar(self):
+        """Retorna o registro com maior taxa de sucesso acima do mínimo de reutilização."""
+        best = None
+        for record in self.urls.values():
+            if record['success_rate'] > DOMAIN_REUSE_MIN_SUCCESS:
+                if best is None or record['success_rate'] > best['success_rate']:
+                    best = record
+        return best
+
+    def add(self, url, record, max_urls):
+        """
+        Guarda o registro da URL; acima do limite, descarta o de menor taxa de sucesso.
+
+        Returns:
+            int: Registros descartados
+        """
+        self.urls[url] = record
+        if len(self.urls) <= max_urls:
+            return 0
+        # O registro recém-gravado é mantido mesmo com taxa baixa
+        worst = min((other for other in self.urls if other != url),
+                    key=lambda other: self.urls[other]['success_rate'])
+        del self.urls[worst]
+        return 1
+
+    def trim(self, max_urls):
+        """
+        Mantém apenas os max_urls registros de maior taxa de sucesso.
+
+        Returns:
+            int: Registros descartados
+        """
+        excess = len(self.urls) - max_urls
+        if excess <= 0:
+            return 0
+        kept = heapq.nlargest(max_urls, self.urls.items(), key=lambda item: item[1]['success_rate'])
+        self.urls = dict(kept)
+        return excess
+
+
+class SelectorStore:
+    """
+    Cache read-through de seletores indexado por (domínio, tipo de página).
+
+    Args:
+        session: Sessão SQLAlchemy usada nas leituras sob demanda
+        max_entries: Número máximo de pares mantidos em memória
+        max_urls_per_entry: Número máximo de seletores por URL mantidos em cada par
+    """
+
+    def __init__(self, session, max_entries=DEFAULT_MAX_ENTRIES, max_urls_per_entry=DEFAULT_MAX_URLS_PER_ENTRY):
+        self.session = session
+        self.max_entries = max_entries
+        self.max_urls_per_entry = max_urls_per_entry
+        self._entries = OrderedDict()
+        # impressão digital -> {'page_type', 'selectors', 'success_rate', 'use_count'}
+        self._templates = {}
+
+        # Estatísticas
+        self.hits = 0
+        self.misses = 0
+        self.db_reads = 0
+        self.evictions = 0
+        self.url_evictions = 0
+        self.template_hits = 0
+        self.template_misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _add_cache_row(self, entry, row):
+        selectors = decode_cached_selectors(row.selectors, row.page_type)
+        if selectors:
+            entry.urls[row.url] = {
+                'selectors': selectors,
+                'success_rate': row.success_rate or 0.0,
+                'use_count': row.use_count or 0,
+            }
+
+    def load_all(self):
+        """
+        Carrega todas as regras e seletores válidos do banco.
+
+        Returns:
+            int: Número de pares (domínio, tipo de página) carregados
+        """
+        entries = {}
+
+        for rule in self.session.query(ScrapingRule).all():
+            for page_type in PAGE_TYPES:
+                entries[(rule.domain, page_type)] = SelectorEntry(decode_rule(rule, page_type))
+
+        for row in self.session.query(SelectorCache).filter_by(is_valid=True).all():
+            key = (row.domain, row.page_type)
+            if key not in entries:
+                entries[key] = SelectorEntry()
+            self._add_cache_row(entries[key], row)
+        for entry in entries.values():
+            self.url_evictions += entry.trim(self.max_urls_per_entry)
+
+        templates = {}
+        for row in self.session.query(PageTemplate).filter_by(is_valid=True).all():
+            selectors = decode_cached_selectors(row.selectors, row.page_type)
+            if selectors:
+                templates[row.fingerprint] = {
+                    'page_type': row.page_type,
+                    'selectors': selectors,
+                    'success_rate': row.success_rate if row.success_rate is not None else 0.5,
+                    'use_count': row.use_count or 0,
+                }
+
+        self.db_reads += 3
+
+        # Garante que domínios conhecidos tenham os dois tipos de página (evita leituras futuras)
+        for domain in {domain for domain, _ in entries}:
+            for page_type in PAGE_TYPES:
+                entries.setdefault((domain, page_type), SelectorEntry())
+
+        self._entries.clear()
+        for key, entry in entries.items():
+            self._store(key, entry)
+        self._templates = templates
+
+        logger.info(f"Cache de seletores carregado: {len(self._entries)} entradas, {len(templates)} modelos de página")
+        return len(self._entries)
+
+    def _entry(self, domain, page_type):
+        """Obtém a entrada do par, lendo do banco se ainda não estiver em memória."""
+        key = (domain, page_type)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        self.db_reads += 1
+        rule = self.session.query(ScrapingRule).filter_by(domain=domain).first()
+        entry = SelectorEntry(decode_rule(rule, page_type))
+
+        rows = self.session.query(SelectorCache).filter_by(
+            domain=domain,
+            page_type=page_type,
+            is_valid=True
+        ).all()
+        for row in rows:
+            self._add_cache_row(entry, row)
+        self.url_evictions += entry.trim(self.max_urls_per_entry)
+
+        self._store(key, entry)
+        return entry
+
+    def get_rule(self, domain, page_type):
+        """Retorna os seletores da ScrapingRule do domínio para o tipo de página."""
+        return self._entry(domain, page_type).rule
+
+    def get_cached(self, url, domain, page_type):
+        """
+        Busca seletores em cache para a URL exata ou, na falta dela, de uma URL
+        do mesmo domínio com taxa de sucesso alta.
+
+        Returns:
+            tuple: (seletores, exato) ou (None, False)
+        """
+        entry = self._entry(domain, page_type)
+        record = entry.urls.get(url)
+        if record:
+            return record['selectors'], True
+
+        record = entry.best_similar()
+        if record:
+            return record['selectors'], False
+        return None, False
+
+    def find_url(self, url, domain):
+        """
+        Retorna o registro em cache de uma URL (qualquer tipo de página).
+
+        Returns:
+            dict: Registro com 'selectors', 'success_rate' e 'use_count', ou None
+        """
+        for page_type in PAGE_TYPES:
+            record = self._entry(domain, page_type).urls.get(url)
+            if record:
+                return record
+        return None
+
+    def set_rule(self, domain, page_type, selectors):
+        """Atualiza em memória os seletores da regra após uma gravação no banco."""
+        self._entry(domain, page_type).rule = selectors
+
+    def set_cached(self, url, domain, page_type, selectors, success_rate=0.5, use_count=1):
+        """Atualiza em memória o seletor em cache de uma URL após uma gravação no banco."""
+        if page_type == 'list' and isinstance(selectors, dict) and 'list_selector' in selectors:
+            selectors = selectors['list_selector']
+        record = {
+            'selectors': selectors,
+            'success_rate': success_rate,
+            'use_count': use_count,
+        }
+        self.url_evictions += self._entry(domain, page_type).add(url, record, self.max_urls_per_entry)
+
+    def remove_url(self, url, domain):
+        """Remove o seletor em cache de uma URL (por exemplo, ao ser invalidado)."""
+        for page_type in PAGE_TYPES:
+            entry = self._entries.get((domain, page_type))
+            if entry:
+                entry.urls.pop(url, None)
+
+    def get_template(self, fingerprint, page_type):
+        """
+        Busca os seletores associados a um modelo de página.
+
+        Returns:
+            Seletores do modelo ou None se o modelo é desconhecido, de outro
+            tipo de página ou com taxa de sucesso baixa
+        """
+        record = self._templates.get(fingerprint) if fingerprint else None
+        if (record and record['page_type'] == page_type
+                and record['success_rate'] >= TEMPLATE_MIN_SUCCESS):
+            self.template_hits += 1
+            return record['selectors']
+        self.template_misses += 1
+        return None
+
+    def find_template(self, fingerprint):
+        """Retorna o registro de um modelo de página (qualquer tipo) ou None."""
+        return self._templates.get(fingerprint) if fingerprint else None
+
+    def set_template(self, fingerprint, page_type, selectors, success_rate=0.5, use_count=1):
+        """Atualiza em memória os seletores de um modelo de página após uma gravação no banco."""
+        if page_type == 'list' and isinstance(selectors, dict) and 'list_selector' in selectors:
+            selectors = selectors['list_selector']
+        self._templates[fingerprint] = {
+            'page_type': page_type,
+            'selectors': selectors,
+            'success_rate': success_rate,
+            'use_count': use_count,
+        }
+
+    def invalidate(self, domain=None):
+        """
+        Descarta entradas em memória para forçar nova leitura do banco.
+
+        Args:
+            domain: Domínio a invalidar (None invalida tudo)
+        """
+        if domain is None:
+            self._entries.clear()
+            return
+        for page_type in PAGE_TYPES:
+            self._entries.pop((domain, page_type), None)
+
+    def get_stats(self):
+        """Retorna as estatísticas do cache."""
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'db_reads': self.db_reads,
+            'evictions': self.evictions,
+            'url_evictions': self.url_evictions,
+            'templates': len(self._templates),
+            'template_hits': self.template_hits,
+            'template_misses': self.template_misses,
+        }
@@ -0,0 +1,104 @@
+"""
+Colunas tipadas de auction_data: price_cents, area_m2 e auction_at.
+
+Os textos coletados (price, area, auction_date) continuam gravados como
+vieram; as colunas tipadas, indexadas, são preenchidas pelo pipeline e
+permitem consultas por faixa com busca no índice. Para linhas gravadas antes
+delas existirem, backfill_typed_columns percorre a tabela em blocos pela
+chave primária, com uma transação curta por bloco.
+"""
+import logging
+from sqlalchemy import bindparam, inspect, or_, select, text
+from myproject.database.models import AuctionData
+from myproject.utils.value_parsers import typed_values
+
+logger = logging.getLogger(__name__)
+
+# Linhas lidas e atualizadas por transação no preenchimento
+DEFAULT_CHUNK_SIZE = 500
+
+TYPED_COLUMNS = ('price_cents', 'area_m2', 'auction_at')
+
+
+def ensure_typed_columns(engine):
+    """
+    Acrescenta as colunas tipadas e seus índices em bancos criados antes delas.
+
+    Returns:
+        bool: True se o esquema foi alterado
+    """
+    table_name = AuctionData.__tablename__
+    inspector = inspect(engine)
+    if not inspector.has_table(table_name):
+        return False
+
+    columns = {column['name'] for column in inspector.get_columns(table_name)}
+    indexes = {index['name'] for index in inspector.get_indexes(table_name)}
+    changed = False
+    with engine.begin() as conn:
+        for column in TYPED_COLUMNS:
+            if column not in columns:
+                # Tipo no dialeto do banco (ex.: DATETIME no SQLite, TIMESTAMP no PostgreSQL)
+                sql_type = AuctionData.__table__.c[column].type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {column} {sql_type}'))
+                changed = True
+            index_name = f'ix_{table_name}_{column}'
+            if index_name not in indexes:
+                conn.execute(text(f'CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({column})'))
+                changed = True
+    if changed:
+        logger.info("Colunas tipadas de auction_data criadas")
+    return changed
+
+
+def backfill_typed_columns(engine, chunk_size=DEFAULT_CHUNK_SIZE, only_missing=True):
+    """
+    Preenche price_cents, area_m2 e auction_at das linhas existentes.
+
+    Args:
+        engine: Engine do SQLAlchemy
+        chunk_size: Linhas por bloco (uma transação por bloco)
+        only_missing: Processa apenas linhas com alguma coluna tipada vazia
+
+    Returns:
+        dict: Linhas lidas e atualizadas e blocos processados
+    """
+    table = AuctionData.__table__
+    query = select(table.c.id, table.c.price, table.c.area, table.c.auction_date,
+                   table.c.price_cents, table.c.area_m2, table.c.auction_at)
+    if only_missing:
+        query = query.where(or_(table.c.price_cents.is_(None), table.c.area_m2.is_(None),
+                                table.c.auction_at.is_(None)))
+    update = (
+        table.update()
+        .where(table.c.id == bindparam('row_id'))
+        .values({column: bindparam(f'new_{column}') for column in TYPED_COLUMNS})
+    )
+
+    stats = {'scanned': 0, 'updated': 0, 'chunks': 0}
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(query.where(table.c.id > last_id).order_by(table.c.id).limit(chunk_size)).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            changes = []
+            for row in rows:
+                values = typed_values(row.price, row.area, row.auction_date)
+                current = {'price_cents': row.price_cents, 'area_m2': row.area_m2, 'auction_at': row.auction_at}
+                if values != current:
+                    change = {f'new_{column}': value for column, value in values.items()}
+                    change['row_id'] = row.id
+                    changes.append(change)
+            if changes:
+                conn.execute(update, changes)
+
+        stats['scanned'] += len(rows)
+        stats['updated'] += len(changes)
+        stats['chunks'] += 1
+        logger.debug(f"Bloco até id {last_id}: {len(changes)} de {len(rows)} linhas atualizadas")
+
+    logger.info(f"Preenchimento das colunas tipadas: {stats}")
+    return stats
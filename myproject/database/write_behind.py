@@ -0,0 +1,237 @@
+"""
+Buffer write-behind para as gravações de controle do spider.
+
+Atualizações de contadores, taxas de sucesso, sites problemáticos e seletores
+em cache são acumuladas em memória e gravadas em uma única transação quando o
+buffer atinge o tamanho máximo, quando o intervalo de tempo expira ou no
+fechamento do spider. Atualizações repetidas da mesma linha são mescladas
+(a última escrita de cada campo vence e os incrementos são somados).
+
+Se a transação do lote falhar, as linhas são gravadas uma a uma para que uma
+linha inválida não descarte as demais; as que ainda falharem voltam ao buffer
+e são tentadas de novo na próxima gravação, até MAX_ATTEMPTS vezes.
+"""
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Número de linhas pendentes que dispara a gravação
+DEFAULT_MAX_PENDING = 100
+
+# Intervalo máximo (segundos) entre gravações quando há pendências
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+# Gravações de uma linha que falham antes de ela ser descartada
+MAX_ATTEMPTS = 3
+
+
+class PendingWrite:
+    """Gravação pendente de uma linha identificada por (modelo, coluna-chave, valor)."""
+
+    __slots__ = ('model', 'key_field', 'key_value', 'upsert', 'values', 'increments', 'insert_values',
+                 'attempts')
+
+    def __init__(self, model, key_field, key_value):
+        self.model = model
+        self.key_field = key_field
+        self.key_value = key_value
+        # Se True, a linha é criada quando não existir
+        self.upsert = False
+        # Campos atribuídos (a última escrita vence)
+        self.values = {}
+        # Campos incrementados (os deltas são somados)
+        self.increments = {}
+        # Campos usados apenas na criação da linha
+        self.insert_values = {}
+        # Gravações que falharam
+        self.attempts = 0
+
+    @property
+    def key(self):
+        return (self.model.__tablename__, self.key_field, self.key_value)
+
+    def merge_newer(self, newer):
+        """Incorpora uma gravação posterior da mesma linha (os valores dela vencem)."""
+        self.upsert = self.upsert or newer.upsert
+        self.values.update(newer.values)
+        for field, delta in newer.increments.items():
+            self.increments[field] = self.increments.get(field, 0) + delta
+        for field, value in newer.insert_values.items():
+            self.insert_values.setdefault(field, value)
+
+
+class WriteBehindBuffer:
+    """
+    Acumula gravações e as aplica em lote.
+
+    Args:
+        session: Sessão SQLAlchemy usada nas gravações
+        max_pending: Número de linhas pendentes que dispara a gravação
+        flush_interval: Intervalo máximo (segundos) entre gravações
+    """
+
+    def __init__(self, session, max_pending=DEFAULT_MAX_PENDING, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.session = session
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._last_flush = time.monotonic()
+
+        # Estatísticas
+        self.queued = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.retried = 0
+        self.failed = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def _pending_write(self, model, key_field, key_value):
+        key = (model.__tablename__, key_field, key_value)
+        self.queued += 1
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = PendingWrite(model, key_field, key_value)
+            self._pending[key] = pending
+        else:
+            self.coalesced += 1
+        return pending
+
+    def update(self, model, key_field, key_value, values=None, increments=None):
+        """
+        Agenda a atualização de uma linha existente.
+
+        Args:
+            model: Classe do modelo SQLAlchemy
+            key_field: Nome da coluna usada para localizar a linha
+            key_value: Valor da coluna-chave
+            values: Campos a atribuir
+            increments: Campos a incrementar (campo -> delta)
+        """
+        pending = self._pending_write(model, key_field, key_value)
+        pending.values.update(values or {})
+        for field, delta in (increments or {}).items():
+            pending.increments[field] = pending.increments.get(field, 0) + delta
+        self.maybe_flush()
+
+    def upsert(self, model, key_field, key_value, values=None, increments=None, insert_values=None):
+        """
+        Agenda a atualização de uma linha, criando-a se não existir.
+
+        Na criação, os incrementos são usados como valor inicial do campo e
+        insert_values complementa os campos que só existem na inserção.
+        """
+        pending = self._pending_write(model, key_field, key_value)
+        pending.upsert = True
+        pending.values.update(values or {})
+        for field, delta in (increments or {}).items():
+            pending.increments[field] = pending.increments.get(field, 0) + delta
+        for field, value in (insert_values or {}).items():
+            pending.insert_values.setdefault(field, value)
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        """Grava as pendências se o limite de tamanho ou de tempo foi atingido."""
+        if not self._pending:
+            return False
+        if len(self._pending) >= self.max_pending or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        """
+        Grava todas as pendências em uma única transação.
+
+        Returns:
+            int: Número de linhas gravadas
+        """
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return 0
+
+        pending_writes = list(self._pending.values())
+        self._pending = {}
+        self.flushes += 1
+
+        try:
+            self._apply(pending_writes)
+            self.session.commit()
+            self.rows_written += len(pending_writes)
+            logger.debug(f"Buffer write-behind gravou {len(pending_writes)} linhas")
+            return len(pending_writes)
+        except Exception as e:
+            logger.error(f"Erro ao gravar buffer write-behind ({len(pending_writes)} linhas), "
+                         f"gravando uma a uma: {str(e)}")
+            self.session.rollback()
+
+        written = 0
+        for pending in pending_writes:
+            try:
+                self._apply([pending])
+                self.session.commit()
+                written += 1
+            except Exception as e:
+                self.session.rollback()
+                self._requeue(pending, e)
+        self.rows_written += written
+        return written
+
+    def _apply(self, pending_writes):
+        """Aplica as gravações à sessão, sem confirmar a transação."""
+        # Agrupa por (modelo, coluna-chave) para buscar as linhas em uma consulta
+        groups = {}
+        for pending in pending_writes:
+            groups.setdefault((pending.model, pending.key_field), []).append(pending)
+
+        for (model, key_field), writes in groups.items():
+            column = getattr(model, key_field)
+            rows = self.session.query(model).filter(column.in_([w.key_value for w in writes])).all()
+            existing = {getattr(row, key_field): row for row in rows}
+
+            for pending in writes:
+                row = existing.get(pending.key_value)
+                if row is None:
+                    if not pending.upsert:
+                        continue
+                    fields = dict(pending.insert_values)
+                    fields.update(pending.values)
+                    fields.update(pending.increments)
+                    fields[key_field] = pending.key_value
+                    row = model(**fields)
+                    self.session.add(row)
+                    existing[pending.key_value] = row
+                else:
+                    for field, value in pending.values.items():
+                        setattr(row, field, value)
+                    for field, delta in pending.increments.items():
+                        setattr(row, field, (getattr(row, field) or 0) + delta)
+
+    def _requeue(self, pending, error):
+        """Devolve ao buffer uma linha que falhou, ou a descarta depois de MAX_ATTEMPTS tentativas."""
+        pending.attempts += 1
+        if pending.attempts >= MAX_ATTEMPTS:
+            self.failed += 1
+            logger.error(f"Linha {pending.key} descartada após {pending.attempts} tentativas: {str(error)}")
+            return
+        self.retried += 1
+        logger.warning(f"Linha {pending.key} volta ao buffer write-behind: {str(error)}")
+        newer = self._pending.get(pending.key)
+        if newer is not None:
+            pending.merge_newer(newer)
+        self._pending[pending.key] = pending
+
+    def get_stats(self):
+        """Retorna os contadores do buffer."""
+        return {
+            'queued': self.queued,
+            'coalesced': self.coalesced,
+            'flushes': self.flushes,
+            'rows_written': self.rows_written,
+            'retried': self.retried,
+            'failed': self.failed,
+            'pending': len(self._pending),
+        }
@@ -1,13 +1,11 @@
 import requests
-from myproject.config import OLLAMA_API_URL, OLLAMA_MODEL
+from myproject.config import OLLAMA_API_URL, OLLAMA_MODEL, LLM_CACHE_PATH, LLM_CACHE_TTL_DAYS, LLM_CACHE_MAX_MB
+from myproject.llm.response_store import LlmResponseStore, response_key
 import json
 import re
 import logging
 import time
 from urllib.parse import urljoin
-import os
-import hashlib
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -18,10 +16,13 @@ class LlmApi:
     def __init__(self):
         self.api_url = OLLAMA_API_URL
         self.model = OLLAMA_MODEL
-        self.cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'cache', 'llm_responses')
         
-        # Cria o diretório de cache se não existir
-        os.makedirs(self.cache_dir, exist_ok=True)
+        # Cache persistente de respostas (chave: prompt completo, modelo e opções)
+        self.cache = LlmResponseStore(
+            LLM_CACHE_PATH,
+            ttl=LLM_CACHE_TTL_DAYS * 24 * 3600,
+            max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024)
+        )
         
         # Reduzir verbosidade do requests
         logging.getLogger("requests").setLevel(logging.WARNING)
@@ -33,56 +34,21 @@ class LlmApi:
             return text[:max_length] + "... [truncado]"
         return text
     
-    def _get_cache_key(self, prompt):
-        """Gera uma chave de cache baseada no prompt."""
-        # Usa apenas os primeiros 500 caracteres do prompt para a chave
-        # Isso ajuda a identificar prompts similares sem criar chaves muito longas
-        prompt_hash = hashlib.md5(prompt[:500].encode('utf-8')).hexdigest()
-        return prompt_hash
+    def _get_cache_key(self, prompt, options=None):
+        """Gera a chave de cache a partir do prompt completo, do modelo e das opções."""
+        return response_key(prompt, self.model, options)
     
-    def _get_from_cache(self, prompt):
+    def _get_from_cache(self, prompt, options=None):
         """Tenta obter uma resposta do cache."""
-        cache_key = self._get_cache_key(prompt)
-        cache_file = os.path.join(self.cache_dir, f"{cache_key}.json")
-        
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-                
-                # Verifica se o cache não está expirado (7 dias)
-                cache_time = datetime.fromisoformat(cache_data.get('timestamp', '2000-01-01'))
-                current_time = datetime.now()
-                
-                # Se o cache tiver menos de 7 dias, usa-o
-                if (current_time - cache_time).days < 7:
-                    logger.info(f"Usando resposta em cache para prompt: {self._truncate_text(prompt)}")
-                    return cache_data.get('response')
-            except Exception as e:
-                logger.warning(f"Erro ao ler cache: {str(e)}")
-        
-        return None
+        response = self.cache.get(self._get_cache_key(prompt, options))
+        if response:
+            logger.info(f"Usando resposta em cache para prompt: {self._truncate_text(prompt)}")
+        return response
     
-    def _save_to_cache(self, prompt, response):
+    def _save_to_cache(self, prompt, response, options=None):
         """Salva uma resposta no cache."""
-        if not response:
-            return
-            
-        try:
-            cache_key = self._get_cache_key(prompt)
-            cache_file = os.path.join(self.cache_dir, f"{cache_key}.json")
-            
-            cache_data = {
-                'timestamp': datetime.now().isoformat(),
-                'response': response
-            }
-            
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-                
-            logger.info(f"Resposta salva no cache: {cache_file}")
-        except Exception as e:
-            logger.warning(f"Erro ao salvar no cache: {str(e)}")
+        if response:
+            self.cache.set(self._get_cache_key(prompt, options), response)
     
     def generate(self, prompt):
         """
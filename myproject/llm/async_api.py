@@ -0,0 +1,184 @@
+"""
+Cliente assíncrono (baseado em Deferreds do Twisted) para a API do LLM.
+
+As chamadas rodam no próprio reactor do Scrapy: enquanto o Ollama processa um
+prompt, os demais downloads continuam. O número de chamadas simultâneas é
+limitado por um semáforo e as novas tentativas usam backoff exponencial sem
+bloquear o reactor.
+"""
+import json
+import random
+import logging
+from io import BytesIO
+from urllib.parse import urljoin
+from twisted.internet import defer, task
+from twisted.web.client import Agent, HTTPConnectionPool, FileBodyProducer, readBody
+from twisted.web.http_headers import Headers
+from myproject.llm.api import LlmApi, parse_llm_response
+
+logger = logging.getLogger(__name__)
+
+# Limites padrão (podem ser sobrescritos pelas configurações LLM_* do Scrapy)
+DEFAULT_MAX_CONCURRENCY = 2
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_DELAY = 2.0
+DEFAULT_MAX_RETRY_DELAY = 30.0
+DEFAULT_TIMEOUT = 60
+
+# Códigos HTTP que justificam nova tentativa
+RETRY_HTTP_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class AsyncLlmApi(LlmApi):
+    """
+    Versão não bloqueante de LlmApi.
+
+    generate() e call_api() retornam Deferreds; em callbacks async do Scrapy use
+    scrapy.utils.defer.maybe_deferred_to_future para aguardá-los.
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, max_retries=DEFAULT_MAX_RETRIES,
+                 retry_delay=DEFAULT_RETRY_DELAY, max_retry_delay=DEFAULT_MAX_RETRY_DELAY,
+                 timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.timeout = timeout
+        self.set_max_concurrency(max_concurrency)
+        self._reactor = None
+        self._agent = None
+
+        # Estatísticas
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def set_max_concurrency(self, max_concurrency):
+        """Define o número máximo de chamadas simultâneas (antes da primeira chamada)."""
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._semaphore = defer.DeferredSemaphore(self.max_concurrency)
+
+    def _get_agent(self):
+        # O reactor é importado apenas no primeiro uso para não instalar o
+        # reactor padrão antes de o Scrapy escolher o seu
+        if self._agent is None:
+            from twisted.internet import reactor
+            pool = HTTPConnectionPool(reactor, persistent=True)
+            pool.maxPersistentPerHost = self.max_concurrency
+            self._reactor = reactor
+            self._agent = Agent(reactor, connectTimeout=10, pool=pool)
+        return self._agent
+
+    @defer.inlineCallbacks
+    def _post(self, endpoint, payload):
+        """Envia o payload e retorna (status, corpo) sem bloquear o reactor."""
+        agent = self._get_agent()
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            body = FileBodyProducer(BytesIO(json.dumps(payload).encode('utf-8')))
+            response = yield agent.request(
+                b'POST',
+                endpoint.encode('utf-8'),
+                Headers({b'Content-Type': [b'application/json']}),
+                body
+            )
+            content = yield readBody(response)
+            return response.code, content
+        finally:
+            self.in_flight -= 1
+
+    def _timed_post(self, endpoint, payload):
+        # O timeout conta a partir da liberação do semáforo, não da fila
+        return self._post(endpoint, payload).addTimeout(self.timeout, self._reactor)
+
+    def _attempt(self, endpoint, payload):
+        self._get_agent()
+        return self._semaphore.run(self._timed_post, endpoint, payload)
+
+    @defer.inlineCallbacks
+    def call_api(self, prompt, options=None):
+        """
+        Chama a API do LLM com o prompt fornecido.
+
+        Args:
+            prompt: Texto do prompt
+            options: Opções do modelo repassadas ao Ollama (ex.: {'temperature': 0.3})
+
+        Returns:
+            Deferred: Texto da resposta ou None após esgotar as tentativas
+        """
+        endpoint = urljoin(self.api_url, "api/generate")
+        logger.debug(f"Enviando prompt para LLM: {self._truncate_text(prompt)}")
+
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False
+        }
+        if options:
+            payload["options"] = options
+
+        self.calls += 1
+        delay = self.retry_delay
+
+        for attempt in range(self.max_retries):
+            try:
+                code, content = yield self._attempt(endpoint, payload)
+
+                if code == 200:
+                    response_text = json.loads(content).get('response', '')
+                    logger.info("Resposta do LLM recebida com sucesso")
+                    logger.debug(f"Resposta do LLM: {self._truncate_text(response_text)}")
+                    return response_text
+
+                logger.error(f"Erro na API do LLM: {code} - {self._truncate_text(content.decode('utf-8', 'ignore'))}")
+                if code not in RETRY_HTTP_CODES:
+                    break
+            except defer.TimeoutError:
+                logger.error(f"Timeout de {self.timeout}s na API do LLM")
+            except Exception as e:
+                logger.error(f"Erro de conexão com a API do LLM: {str(e)}")
+
+            if attempt < self.max_retries - 1:
+                # Backoff exponencial com jitter, sem bloquear o reactor
+                wait = delay * (1 + random.random() * 0.25)
+                logger.info(f"Tentando novamente em {wait:.1f} segundos...")
+                self.retries += 1
+                yield task.deferLater(self._reactor, wait, lambda: None)
+                delay = min(delay * 2, self.max_retry_delay)
+
+        self.failures += 1
+        logger.error(f"Falha após {self.max_retries} tentativas de chamar a API do LLM")
+        return None
+
+    @defer.inlineCallbacks
+    def generate(self, prompt, options=None):
+        """
+        Chama a API do LLM e retorna o resultado já parseado como JSON.
+
+        Returns:
+            Deferred: dict com o JSON extraído da resposta
+        """
+        cached_response = self._get_from_cache(prompt, options)
+        if cached_response:
+            return parse_llm_response(cached_response)
+
+        response_text = yield self.call_api(prompt, options)
+
+        if response_text:
+            self._save_to_cache(prompt, response_text, options)
+
+        return parse_llm_response(response_text)
+
+    def get_stats(self):
+        """Retorna as estatísticas das chamadas."""
+        return {
+            'calls': self.calls,
+            'retries': self.retries,
+            'failures': self.failures,
+            'max_in_flight': self.max_in_flight,
+        }
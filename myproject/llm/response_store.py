@@ -0,0 +1,194 @@
+"""
+Armazenamento persistente das respostas do LLM.
+
+As respostas ficam em um único arquivo SQLite, indexadas por um hash SHA-256
+do prompt completo, do modelo e das opções. Os valores são comprimidos com
+zlib, expiram após o TTL e, quando o tamanho total ultrapassa o limite, as
+entradas usadas há mais tempo são descartadas (LRU).
+"""
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Validade padrão de uma resposta (7 dias)
+DEFAULT_TTL = 7 * 24 * 3600
+
+# Tamanho máximo padrão dos valores comprimidos (64 MB)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_responses_accessed_at ON llm_responses (accessed_at);
+"""
+
+
+def response_key(prompt, model=None, options=None):
+    """
+    Calcula a chave de uma resposta a partir do prompt completo, do modelo e das opções.
+
+    Returns:
+        str: Hash SHA-256 em hexadecimal
+    """
+    material = json.dumps(
+        {'model': model, 'options': options or {}, 'prompt': prompt},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class LlmResponseStore:
+    """
+    Cache de respostas do LLM em SQLite com TTL e limite de tamanho.
+
+    Args:
+        path: Caminho do arquivo SQLite (':memory:' para testes)
+        ttl: Validade das respostas em segundos
+        max_bytes: Tamanho máximo somado dos valores comprimidos
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+
+        # Estatísticas
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.writes = 0
+
+    def _connect(self):
+        # A conexão é aberta no primeiro uso e mantida durante toda a execução
+        if self._conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.executescript(_SCHEMA)
+            row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()
+            self._total_bytes = row[0]
+        return self._conn
+
+    def get(self, key):
+        """
+        Busca uma resposta pela chave.
+
+        Returns:
+            str: Resposta armazenada ou None se ausente ou expirada
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value, size, created_at FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row is None:
+                    self.misses += 1
+                    return None
+
+                value, size, created_at = row
+                if now - created_at >= self.ttl:
+                    conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                    self._total_bytes -= size
+                    self.expired += 1
+                    self.misses += 1
+                    return None
+
+                conn.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return zlib.decompress(value).decode('utf-8')
+            except Exception as e:
+                logger.warning(f"Erro ao ler cache de respostas do LLM: {str(e)}")
+                self.misses += 1
+                return None
+
+    def set(self, key, response):
+        """Armazena uma resposta, descartando as menos usadas se o limite for excedido."""
+        if not response:
+            return
+
+        value = zlib.compress(response.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                old = conn.execute("SELECT size FROM llm_responses WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, value, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), now, now)
+                )
+                self._total_bytes += len(value) - (old[0] if old else 0)
+                self.writes += 1
+                self._evict(conn)
+            except Exception as e:
+                logger.warning(f"Erro ao salvar no cache de respostas do LLM: {str(e)}")
+
+    def _evict(self, conn):
+        """Remove entradas expiradas e, se necessário, as usadas há mais tempo."""
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        cursor = conn.execute("DELETE FROM llm_responses WHERE created_at <= ?", (time.time() - self.ttl,))
+        self.expired += max(cursor.rowcount, 0)
+
+        self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        # Percorre da menos recente para a mais recente até caber no limite
+        excess = self._total_bytes - self.max_bytes
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM llm_responses ORDER BY accessed_at"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+
+        conn.executemany("DELETE FROM llm_responses WHERE key = ?", victims)
+        self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        self.evictions += len(victims)
+        logger.info(f"Cache de respostas do LLM: {len(victims)} entradas descartadas por tamanho")
+
+    def clear(self):
+        """Remove todas as respostas armazenadas."""
+        with self._lock:
+            self._connect().execute("DELETE FROM llm_responses")
+            self._total_bytes = 0
+
+    def close(self):
+        """Fecha a conexão com o arquivo."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self):
+        """Retorna as estatísticas do cache."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'writes': self.writes,
+            'bytes': self._total_bytes,
+        }
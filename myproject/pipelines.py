@@ -1,18 +1,137 @@
-from myproject.database.connection import get_session
-from myproject.database.models import AuctionData
+from myproject.database.connection import engine as default_engine, copy_rows
+from myproject.database.models import AuctionData, AuctionPriceHistory
+from myproject.database.migrations import migrate
+from myproject.database.price_history import content_hash, load_current_state, history_rows
+from myproject.utils.value_parsers import typed_values
+from sqlalchemy import column, func, select, table as table_clause, text
+from sqlalchemy.dialects import postgresql, sqlite
 from urllib.parse import urlparse
 from datetime import datetime
 import re
+import time
+import queue
 import logging
+import threading
+
+# Itens por lote e segundos máximos entre gravações
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+# Lotes aguardando a thread de gravação antes de o process_item esperar por ela
+WRITER_QUEUE_SIZE = 8
+
+# INSERT ... ON CONFLICT de cada banco suportado
+DIALECT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+# Tabela temporária que recebe o lote por COPY no PostgreSQL
+STAGING_TABLE = 'auction_data_stage'
+
+# Campos de texto do item gravados em auction_data (além de url, price e metadados)
+TEXT_FIELDS = ('title', 'description', 'address', 'auction_date', 'area',
+               'property_type', 'image_url', 'screenshot_path')
+
 
 class DatabasePipeline:
-    def open_spider(self, spider):
-        self.session = get_session()
+    """
+    Grava os itens em auction_data em lotes.
+
+    Os itens ficam em memória (deduplicados por URL) e são gravados com um único
+    INSERT ... ON CONFLICT(url) DO UPDATE por lote, em uma transação, quando o lote
+    atinge batch_size, quando passam flush_interval segundos ou no close_spider.
+    Um campo vazio no item não apaga o valor já gravado (ex.: screenshot_path
+    preenchido depois pela fila de screenshots).
+
+    Antes de gravar, o hash do conteúdo de cada item é comparado com o gravado:
+    itens sem mudança não geram escrita e cada mudança é registrada em
+    auction_price_history (ver myproject.database.price_history).
+
+    Args:
+        engine: Engine do SQLAlchemy (padrão: myproject.database.connection.engine)
+        batch_size: Itens por lote
+        flush_interval: Segundos máximos entre gravações
+        writer_thread: Grava os lotes em uma thread dedicada, fora do reactor
+        use_copy: No PostgreSQL, envia o lote por COPY para uma tabela temporária
+            e faz o upsert a partir dela (experimental, desligado por padrão)
+    """
+
+    def __init__(self, engine=None, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 writer_thread=False, use_copy=False):
+        self.engine = engine or default_engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.writer_thread = writer_thread
+        self.use_copy = use_copy and self.engine.dialect.name == 'postgresql'
         self.logger = logging.getLogger(__name__)
+        self.crawler = None
+        self.spider = None
+
+        self._buffer = {}
+        self._last_flush = time.monotonic()
+        self._statement = None
+        self._queue = None
+        self._thread = None
+        self._flush_task = None
+        self._lock = threading.Lock()
+
+        # Estatísticas
+        self.items = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.rows_written = 0
+        self.unchanged = 0
+        self.failed = 0
+        self.write_time = 0.0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = cls(
+            batch_size=crawler.settings.getint('ITEM_BATCH_SIZE', DEFAULT_BATCH_SIZE),
+            flush_interval=crawler.settings.getfloat('ITEM_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL),
+            writer_thread=crawler.settings.getbool('ITEM_WRITER_THREAD', False),
+            use_copy=crawler.settings.getbool('ITEM_POSTGRES_COPY', False),
+        )
+        pipeline.crawler = crawler
+        return pipeline
+
+    def open_spider(self, spider):
+        self.spider = spider
+        try:
+            migrate(self.engine)
+        except Exception as e:
+            self.logger.error(f"Erro ao migrar o esquema do banco: {str(e)}")
+        self._statement = self._build_upsert()
+        self._last_flush = time.monotonic()
+
+        if self.writer_thread:
+            self._queue = queue.Queue(maxsize=WRITER_QUEUE_SIZE)
+            self._thread = threading.Thread(target=self._writer_loop, name='item-writer', daemon=True)
+            self._thread.start()
+
+        # Gravação por tempo mesmo quando não chegam novos itens
+        if self.crawler is not None and self.flush_interval:
+            from twisted.internet import task
+            self._flush_task = task.LoopingCall(self.maybe_flush)
+            self._flush_task.start(self.flush_interval, now=False)
 
     def close_spider(self, spider):
-        self.session.close()
-        
+        if self._flush_task is not None and self._flush_task.running:
+            self._flush_task.stop()
+        self.flush()
+
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+        stats = self.get_stats()
+        self.logger.info(f"Pipeline de itens: {stats}")
+        if self.crawler is not None and self.crawler.stats is not None:
+            for key, value in stats.items():
+                self.crawler.stats.set_value(f'item_pipeline/{key}', value)
+
     def clean_price(self, price_str):
         """
         Remove caracteres não numéricos e converte o preço para um formato padronizado.
@@ -20,10 +139,10 @@ class DatabasePipeline:
         """
         if not price_str:
             return price_str
-            
+
         # Remove símbolos de moeda e pontuação irrelevante
         clean = re.sub(r'[^\d,.]', '', price_str)
-        
+
         # Trata formatos brasileiros (1.234.567,89)
         if ',' in clean and '.' in clean:
             # Formato brasileiro (pontos como separadores de milhar e vírgula decimal)
@@ -32,7 +151,7 @@ class DatabasePipeline:
         elif ',' in clean:
             # Apenas vírgula como decimal
             clean = clean.replace(',', '.')
-            
+
         # Tenta converter para float para garantir que é um número válido
         try:
             value = float(clean)
@@ -40,50 +159,193 @@ class DatabasePipeline:
         except ValueError:
             self.logger.warning(f"Não foi possível converter o preço: {price_str}")
             return price_str
-            
+
     def extract_domain(self, url):
         """
         Extrai o domínio de uma URL.
         """
         return urlparse(url).netloc
 
+    def _build_upsert(self, columns=None):
+        """
+        Monta o INSERT ... ON CONFLICT(url) DO UPDATE para o banco do engine.
+
+        Args:
+            columns: Se informado, insere a partir da tabela de staging (COPY)
+                com essas colunas em vez de usar os valores do lote
+
+        Returns:
+            Insert: Comando executado com a lista de linhas de cada lote
+        """
+        dialect = self.engine.dialect.name
+        if dialect not in DIALECT_INSERTS:
+            raise ValueError(f"Banco sem suporte a upsert no pipeline: {dialect} (use {', '.join(DIALECT_INSERTS)})")
+
+        table = AuctionData.__table__
+        stmt = DIALECT_INSERTS[dialect](table)
+        if columns:
+            staging = table_clause(STAGING_TABLE, *[column(name) for name in columns])
+            stmt = stmt.from_select(columns, select(*staging.c))
+        excluded = stmt.excluded
+
+        # Valores vazios do item mantêm o que já está gravado
+        updates = {
+            field: func.coalesce(func.nullif(excluded[field], ''), table.c[field])
+            for field in TEXT_FIELDS + ('price',)
+        }
+        for field in ('price_cents', 'area_m2', 'auction_at'):
+            updates[field] = func.coalesce(excluded[field], table.c[field])
+        updates['extracted_at'] = excluded.extracted_at
+        updates['source_domain'] = excluded.source_domain
+        updates['content_hash'] = excluded.content_hash
+        return stmt.on_conflict_do_update(
+            index_elements=['url'],
+            set_=updates,
+            where=table.c.content_hash.is_distinct_from(excluded.content_hash),
+        )
+
+    def _row_from_item(self, item, url):
+        row = {field: item.get(field, '') for field in TEXT_FIELDS}
+        row['url'] = url
+        row['price'] = self.clean_price(item.get('price', ''))
+        row['extracted_at'] = datetime.now()
+        row['source_domain'] = self.extract_domain(url)
+        row['content_hash'] = content_hash(row)
+        # Valores tipados calculados do texto original (o preço limpo perde o formato)
+        row.update(typed_values(item.get('price'), item.get('area'), item.get('auction_date')))
+        return row
+
     def process_item(self, item, spider):
         try:
-            # Valores padrão para campos obrigatórios
             url = item.get('url', '')
-            
+
             if not url:
                 self.logger.error("Item sem URL ignorado")
                 return item
-                
-            # Verifica se o item já existe no banco de dados
-            existing = self.session.query(AuctionData).filter_by(url=url).first()
-            if existing:
-                self.logger.info(f"Item já existe no banco de dados: {url}")
-                return item
-                
-            # Cria o objeto AuctionData com todos os campos possíveis
-            auction = AuctionData(
-                url=url,
-                title=item.get('title', ''),
-                price=self.clean_price(item.get('price', '')),
-                description=item.get('description', ''),
-                address=item.get('address', ''),
-                auction_date=item.get('auction_date', ''),
-                area=item.get('area', ''),
-                property_type=item.get('property_type', ''),
-                image_url=item.get('image_url', ''),
-                screenshot_path=item.get('screenshot_path', ''),
-                extracted_at=datetime.now(),
-                source_domain=self.extract_domain(url)
-            )
-            
-            self.session.add(auction)
-            self.session.commit()
-            self.logger.info(f"Item salvo com sucesso: {url}")
-            
+
+            # A mesma URL no lote é gravada uma vez, com os dados mais recentes
+            if url in self._buffer:
+                self.coalesced += 1
+            self._buffer[url] = self._row_from_item(item, url)
+            self.items += 1
+            self.maybe_flush()
+
         except Exception as e:
-            self.logger.error(f"Erro ao salvar item: {str(e)}")
-            self.session.rollback()
-            
-        return item
\ No newline at end of file
+            self.logger.error(f"Erro ao preparar item: {str(e)}")
+
+        return item
+
+    def maybe_flush(self):
+        """Grava o lote se o limite de tamanho ou de tempo foi atingido."""
+        if not self._buffer:
+            return False
+        if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        """
+        Envia o lote atual para gravação (direta ou pela thread de gravação).
+
+        Returns:
+            int: Número de itens do lote
+        """
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return 0
+
+        rows = list(self._buffer.values())
+        self._buffer = {}
+
+        if self._thread is not None:
+            self._queue.put(rows)
+        else:
+            self._write_batch(rows)
+        return len(rows)
+
+    def _writer_loop(self):
+        """Grava os lotes recebidos pela fila até receber None."""
+        while True:
+            rows = self._queue.get()
+            if rows is None:
+                break
+            self._write_batch(rows)
+
+    def _write_rows(self, conn, rows, current):
+        """Grava as linhas alteradas e o histórico delas na transação de conn."""
+        if self.use_copy:
+            # O lote chega ao servidor por COPY e o upsert roda inteiro no banco
+            conn.execute(text(f'CREATE TEMP TABLE {STAGING_TABLE} '
+                              f'(LIKE {AuctionData.__tablename__} INCLUDING DEFAULTS) ON COMMIT DROP'))
+            copy_rows(conn, table_clause(STAGING_TABLE), rows)
+            conn.execute(self._build_upsert(columns=list(rows[0])))
+            copy_rows(conn, AuctionPriceHistory.__table__, history_rows(rows, current))
+            return
+        conn.execute(self._statement, rows)
+        conn.execute(AuctionPriceHistory.__table__.insert(), history_rows(rows, current))
+
+    def _write_batch(self, rows):
+        """
+        Grava em uma transação os itens do lote que mudaram. Itens com o mesmo
+        hash já gravado são descartados sem escrita. Se o lote falhar, grava as
+        linhas uma a uma para que um item inválido não descarte os demais.
+
+        Returns:
+            int: Número de linhas gravadas
+        """
+        if self._statement is None:
+            self._statement = self._build_upsert()
+
+        start = time.perf_counter()
+        changed = rows
+        failed_urls = set()
+        try:
+            with self.engine.connect() as conn:
+                current = load_current_state(conn, [row['url'] for row in rows])
+            changed = [row for row in rows if current.get(row['url'], (None,))[0] != row['content_hash']]
+            if changed:
+                with self.engine.begin() as conn:
+                    self._write_rows(conn, changed, current)
+            written = len(changed)
+        except Exception as e:
+            self.logger.error(f"Erro ao gravar lote de {len(changed)} itens, gravando um a um: {str(e)}")
+            written = 0
+            for row in changed:
+                try:
+                    with self.engine.begin() as conn:
+                        current = load_current_state(conn, [row['url']])
+                        if current.get(row['url'], (None,))[0] != row['content_hash']:
+                            self._write_rows(conn, [row], current)
+                    written += 1
+                except Exception as e:
+                    failed_urls.add(row['url'])
+                    self.logger.error(f"Erro ao salvar item {row['url']}: {str(e)}")
+
+        # Imóveis no banco entram no filtro de URLs do spider (não são baixados de novo)
+        url_filter = getattr(self.spider, 'url_filter', None)
+        if url_filter is not None:
+            url_filter.update(row['url'] for row in rows if row['url'] not in failed_urls)
+
+        with self._lock:
+            self.batches += 1
+            self.rows_written += written
+            self.unchanged += len(rows) - len(changed)
+            self.failed += len(changed) - written
+            self.write_time += time.perf_counter() - start
+        self.logger.debug(f"Lote de {written} itens gravado")
+        return written
+
+    def get_stats(self):
+        """Retorna os contadores do pipeline."""
+        with self._lock:
+            return {
+                'items': self.items,
+                'coalesced': self.coalesced,
+                'batches': self.batches,
+                'rows_written': self.rows_written,
+                'unchanged': self.unchanged,
+                'failed': self.failed,
+                'pending': len(self._buffer),
+                'write_time': round(self.write_time, 3),
+            }
@@ -14,12 +14,36 @@ ITEM_PIPELINES = {
     'myproject.pipelines.DatabasePipeline': 300,
 }
 
+# Gravação dos itens em lotes (INSERT ... ON CONFLICT por lote)
+ITEM_BATCH_SIZE = 200  # Itens por lote
+ITEM_FLUSH_INTERVAL = 5.0  # Segundos máximos entre gravações
+ITEM_WRITER_THREAD = False  # Grava os lotes em uma thread dedicada, fora do reactor
+# No PostgreSQL, envia os lotes por COPY (tabela temporária + upsert). Experimental: ainda não foi
+# validado contra um servidor real; até lá os lotes usam o INSERT ... ON CONFLICT
+ITEM_POSTGRES_COPY = False
+
 # Configurações de desempenho e anti-bloqueio
 DOWNLOAD_DELAY = 1.5  # Delay entre requisições para o mesmo domínio
 DOWNLOAD_TIMEOUT = 30  # Timeout para requisições
 CONCURRENT_REQUESTS_PER_DOMAIN = 4  # Limita requisições por domínio
 CONCURRENT_REQUESTS = 16  # Máximo de requisições simultâneas
 
+# Throttling adaptativo por domínio: DOWNLOAD_DELAY e CONCURRENT_REQUESTS_PER_DOMAIN são só o
+# ponto de partida; cada domínio é ajustado pela latência (p90), pela taxa de erros e por
+# 429/503/Retry-After, e os parâmetros aprendidos são reaproveitados na próxima coleta
+# (não ative o AUTOTHROTTLE junto)
+THROTTLE_ENABLED = True
+THROTTLE_MIN_DELAY = 0.25
+THROTTLE_MAX_DELAY = 60.0
+THROTTLE_MIN_CONCURRENCY = 1
+THROTTLE_MAX_CONCURRENCY = 8
+THROTTLE_TARGET_LATENCY = 2.0  # p90 da latência (segundos) abaixo do qual o domínio recebe mais carga
+THROTTLE_DOMAIN_LIMITS = {
+    # Pisos e tetos por domínio (vale para subdomínios), ex.:
+    # 'gov.br': {'min_delay': 0.1, 'max_concurrency': 16},
+    # 'leiloeiro-pequeno.com.br': {'min_delay': 3.0, 'max_concurrency': 1},
+}
+
 # Retry e tratamento de erros
 RETRY_ENABLED = True
 RETRY_TIMES = 3  # Máximo de retentativas
@@ -28,7 +52,58 @@ RETRY_HTTP_CODES = [500, 502, 503, 504, 408, 429]  # Códigos para retentativa
 # Cache
 HTTPCACHE_ENABLED = True
 HTTPCACHE_EXPIRATION_SECS = 86400  # 24 horas
-HTTPCACHE_IGNORE_HTTP_CODES = [403, 404, 500, 502, 503]
+HTTPCACHE_IGNORE_HTTP_CODES = [304, 403, 404, 500, 502, 503]
+
+# Re-coletas incrementais das páginas de detalhe: envia If-None-Match/If-Modified-Since com os
+# validadores gravados e ignora respostas 304 ou com o mesmo hash de corpo já processado
+CONDITIONAL_GET_ENABLED = True
+CONTENT_HASH_DEDUPE = True  # Ignora páginas com o mesmo conteúdo de outra URL (ex.: parâmetros de sessão)
+
+# Cache em memória de regras e seletores (pares domínio/tipo de página)
+SELECTOR_CACHE_MAX_ENTRIES = 1024
+
+# Gravações de controle do spider em lote (linhas pendentes / segundos entre gravações)
+WRITE_BEHIND_MAX_PENDING = 100
+WRITE_BEHIND_FLUSH_INTERVAL = 5.0
+
+# Cliente do LLM (não bloqueante): chamadas simultâneas, tentativas e backoff
+LLM_MAX_CONCURRENCY = 2
+LLM_MAX_RETRIES = 3
+LLM_RETRY_DELAY = 2.0  # Atraso inicial entre tentativas (dobra a cada falha)
+LLM_MAX_RETRY_DELAY = 30.0
+LLM_TIMEOUT = 60
+
+# Pool de navegadores (screenshots e CAPTCHA): tamanho, reciclagem e espera pelo carregamento
+WEBDRIVER_POOL_SIZE = 2
+WEBDRIVER_MAX_PAGES = 50  # Páginas por navegador antes de reabri-lo
+WEBDRIVER_MAX_MEMORY_MB = 1024
+WEBDRIVER_READY_TIMEOUT = 10  # Teto da espera por document.readyState e rede ociosa
+# WEBDRIVER_WARMUP = True  # Abre os navegadores na abertura do spider (padrão: TAKE_SCREENSHOTS)
+
+# Screenshots das páginas de detalhe (fila persistente processada em outras threads)
+# TAKE_SCREENSHOTS = True  # Padrão: variável de ambiente TAKE_SCREENSHOTS
+SCREENSHOT_SAMPLING = 'first_n'  # 'all', 'first_n', 'failed' ou 'first_n_or_failed'
+SCREENSHOT_PER_DOMAIN = 3  # Limite por domínio nos modos first_n
+SCREENSHOT_WORKERS = 0  # Threads de captura (0 = WEBDRIVER_POOL_SIZE - 1, um navegador reservado aos CAPTCHAs)
+
+# Filtro de URLs já gravadas: links de detalhe conhecidos não são agendados. Desligado por padrão:
+# as re-coletas revisitam os imóveis conhecidos (requisições condicionais, histórico de preços da
+# 1ª/2ª praça); ligue apenas em coletas que buscam somente imóveis novos
+URL_FILTER_ENABLED = False
+URL_FILTER_CAPACITY = 1000000
+URL_FILTER_ERROR_RATE = 0.001
+URL_FILTER_VERIFY = True  # Confirma no banco (uma consulta por listagem) os links que o filtro indica
+
+# Paginação das listagens: a regra (?page=N, /pagina/N, link "Próxima") é aprendida por domínio e
+# as páginas seguintes são agendadas até o orçamento ou até uma página sem imóveis novos
+PAGINATION_ENABLED = True
+PAGINATION_MAX_PAGES = 20  # Páginas de listagem seguidas por domínio
+
+# Prioridade das requisições pelo rendimento de cada domínio (itens por resposta): detalhes antes
+# de listagens, domínios produtivos antes dos demais e rebaixamento dos que quase não geram itens
+YIELD_PRIORITY_ENABLED = True
+YIELD_DEMOTE_THRESHOLD = 0.02  # Itens por resposta abaixo dos quais o domínio é rebaixado
+YIELD_MIN_REQUESTS = 50  # Respostas observadas (somando as coletas anteriores) antes de rebaixar
 
 # Cookies e cabeçalhos
 COOKIES_ENABLED = True  # Habilita cookies para sites que exigem
@@ -1,4 +1,7 @@
 import scrapy
+from scrapy import signals
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet import task, threads
 from urllib.parse import urlparse
 import json
 import logging
@@ -7,16 +10,30 @@ import time
 from datetime import datetime
 from urllib.parse import urljoin
 import traceback
-from myproject.llm.api import call_llm_api, parse_llm_response, LlmApi
-from myproject.database.connection import get_session
-from myproject.database.models import ScrapingRule, ProblemSite, SelectorCache
+from myproject.llm.async_api import AsyncLlmApi
+from myproject.database.connection import get_scoped_session, remove_scoped_session
+from myproject.database.models import ScrapingRule, ProblemSite, SelectorCache, PageTemplate
+from myproject.database.selector_store import SelectorStore
+from myproject.database.write_behind import WriteBehindBuffer
+from myproject.database.fetch_state import FetchStateStore
 from myproject.items import AuctionItem
-from myproject.utils.screenshot import capture_property_screenshot
+from myproject.utils.screenshot import ScreenshotManager
+from myproject.utils.screenshot_queue import ScreenshotQueue, ScreenshotSamplingPolicy, ScreenshotWorker
+from myproject.utils.webdriver_pool import WebDriverPool
+from myproject.utils.page_classifier import page_classifier
+from myproject.utils.url_matcher import DetailUrlMatcher
+from myproject.utils.single_flight import SingleFlight
+from myproject.utils.page_analysis import PageAnalysis
+from myproject.utils.captcha_detector import captcha_detector
+from myproject.utils.html_condenser import condense_html
+from myproject.utils.extraction_plan import ExtractionPlanCache
+from myproject.utils.pagination import PaginationFollower
+from myproject.utils.domain_yield import DomainYieldTracker, format_report
+from myproject.utils.domain_throttle import DomainThrottle, parse_retry_after
+from myproject.utils.url_filter import DEFAULT_CAPACITY, DEFAULT_ERROR_RATE, confirm_known, load_or_rebuild, normalize_url
+from myproject.config import SCREENSHOT_QUEUE_PATH, SCREENSHOT_DIR, URL_FILTER_PATH
 import os
-from selenium import webdriver
 import glob
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -28,7 +45,6 @@ class AuctionSpider(scrapy.Spider):
     
     # Define limites e configurações para evitar sobrecarregar servidores
     custom_settings = {
-        'CONCURRENT_REQUESTS': 4,  # Limita o número de requisições simultâneas
         'DOWNLOAD_TIMEOUT': 30,    # Timeout em segundos
         'RETRY_TIMES': 2,          # Número de tentativas de retry
         'ROBOTSTXT_OBEY': True,    # Respeita o robots.txt
@@ -43,18 +59,448 @@ class AuctionSpider(scrapy.Spider):
         self.start_urls = start_urls or []
         self.max_items_per_site = int(max_items_per_site)
         self.config_depth = int(config_depth)  # Salva a profundidade configurada
-        self.session = get_session()
+        # Sessão da thread do reactor, compartilhada pelo cache de seletores e pelo buffer write-behind
+        self.session = get_scoped_session()
         self.logger.setLevel(logging.INFO)
         
         # Contadores para limitar o número de itens por site
         self.items_count = {}
         
-        # Inicializa a API do LLM
-        from myproject.llm.api import LlmApi
-        self.llm_api = LlmApi()
+        # Inicializa a API do LLM (não bloqueante, roda no reactor do Scrapy)
+        self.llm_api = AsyncLlmApi()
+        
+        # Classificador de tipo de página (padrões pré-compilados)
+        self.page_classifier = page_classifier
+        
+        # Identificação de URLs de detalhe (aprende modelos por domínio)
+        self.url_matcher = DetailUrlMatcher()
+        
+        # Cache em memória de regras e seletores (carregado na abertura do spider)
+        self.selector_store = SelectorStore(self.session)
+        
+        # Buffer write-behind para as gravações de controle (contadores, taxas, sites problemáticos)
+        self.write_buffer = WriteBehindBuffer(self.session)
+        self._write_flush_task = None
+        
+        # Gerações de seletores em andamento por (domínio, tipo de página)
+        self.selector_flight = SingleFlight()
+        
+        # Planos de extração compilados por conjunto de seletores
+        self.extraction_plans = ExtractionPlanCache()
+        
+        # Navegadores reutilizados por screenshots e páginas de CAPTCHA
+        self.webdriver_pool = WebDriverPool()
+        
+        # Screenshots das páginas de detalhe: enfileirados e capturados em outras threads
+        self.take_screenshots = os.environ.get('TAKE_SCREENSHOTS', 'false').lower() == 'true'
+        self.webdriver_warmup = self.take_screenshots
+        self.screenshot_sampling = 'first_n'
+        self.screenshot_per_domain = 3
+        self.screenshot_workers = 0  # 0 = tamanho do pool de navegadores menos um (reservado aos CAPTCHAs)
+        self.screenshot_queue = None
+        self.screenshot_policy = None
+        self.screenshot_worker = None
+        
+        # Filtro de URLs já gravadas (carregado na abertura do spider)
+        self.url_filter_enabled = False
+        self.url_filter_path = URL_FILTER_PATH
+        self.url_filter_capacity = DEFAULT_CAPACITY
+        self.url_filter_error_rate = DEFAULT_ERROR_RATE
+        self.url_filter_verify = True
+        self.url_filter = None
+        
+        # Estado de download das páginas de detalhe (requisições condicionais e hash do corpo)
+        self.conditional_get_enabled = True
+        self.content_hash_dedupe = True
+        self.fetch_state = None
+        
+        # Atraso e concorrência ajustados por domínio (parâmetros aprendidos carregados na abertura)
+        self.throttle_enabled = True
+        self.throttle = DomainThrottle()
+        
+        # Paginação das listagens (regra aprendida por domínio, orçamento de páginas por domínio)
+        self.pagination_enabled = True
+        self.pagination = PaginationFollower()
+        
+        # Custo (respostas, bytes, segundos de LLM) e itens por domínio, que definem as prioridades
+        self.yield_priority_enabled = True
+        self.yield_tracker = DomainYieldTracker()
         
         self.logger.info(f"Spider inicializado com {len(self.start_urls)} URLs, limite de {self.max_items_per_site} itens por site e profundidade {self.config_depth}")
         
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        """
+        Cria o spider e conecta os sinais de abertura e fechamento.
+        """
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.selector_store.max_entries = crawler.settings.getint('SELECTOR_CACHE_MAX_ENTRIES', spider.selector_store.max_entries)
+        spider.write_buffer.max_pending = crawler.settings.getint('WRITE_BEHIND_MAX_PENDING', spider.write_buffer.max_pending)
+        spider.write_buffer.flush_interval = crawler.settings.getfloat('WRITE_BEHIND_FLUSH_INTERVAL', spider.write_buffer.flush_interval)
+        spider.llm_api.set_max_concurrency(crawler.settings.getint('LLM_MAX_CONCURRENCY', spider.llm_api.max_concurrency))
+        spider.llm_api.max_retries = crawler.settings.getint('LLM_MAX_RETRIES', spider.llm_api.max_retries)
+        spider.llm_api.retry_delay = crawler.settings.getfloat('LLM_RETRY_DELAY', spider.llm_api.retry_delay)
+        spider.llm_api.max_retry_delay = crawler.settings.getfloat('LLM_MAX_RETRY_DELAY', spider.llm_api.max_retry_delay)
+        spider.llm_api.timeout = crawler.settings.getfloat('LLM_TIMEOUT', spider.llm_api.timeout)
+        spider.webdriver_pool.size = crawler.settings.getint('WEBDRIVER_POOL_SIZE', spider.webdriver_pool.size)
+        spider.webdriver_pool.max_pages = crawler.settings.getint('WEBDRIVER_MAX_PAGES', spider.webdriver_pool.max_pages)
+        spider.webdriver_pool.max_memory_mb = crawler.settings.getint('WEBDRIVER_MAX_MEMORY_MB', spider.webdriver_pool.max_memory_mb)
+        spider.webdriver_pool.ready_timeout = crawler.settings.getfloat('WEBDRIVER_READY_TIMEOUT', spider.webdriver_pool.ready_timeout)
+        spider.take_screenshots = crawler.settings.getbool('TAKE_SCREENSHOTS', spider.take_screenshots)
+        spider.webdriver_warmup = crawler.settings.getbool('WEBDRIVER_WARMUP', spider.take_screenshots)
+        spider.screenshot_sampling = crawler.settings.get('SCREENSHOT_SAMPLING', spider.screenshot_sampling)
+        spider.screenshot_per_domain = crawler.settings.getint('SCREENSHOT_PER_DOMAIN', spider.screenshot_per_domain)
+        spider.screenshot_workers = crawler.settings.getint('SCREENSHOT_WORKERS', spider.screenshot_workers)
+        spider.url_filter_enabled = crawler.settings.getbool('URL_FILTER_ENABLED', spider.url_filter_enabled)
+        spider.url_filter_path = crawler.settings.get('URL_FILTER_PATH', spider.url_filter_path)
+        spider.url_filter_capacity = crawler.settings.getint('URL_FILTER_CAPACITY', spider.url_filter_capacity)
+        spider.url_filter_error_rate = crawler.settings.getfloat('URL_FILTER_ERROR_RATE', spider.url_filter_error_rate)
+        spider.url_filter_verify = crawler.settings.getbool('URL_FILTER_VERIFY', spider.url_filter_verify)
+        spider.conditional_get_enabled = crawler.settings.getbool('CONDITIONAL_GET_ENABLED', spider.conditional_get_enabled)
+        spider.content_hash_dedupe = crawler.settings.getbool('CONTENT_HASH_DEDUPE', spider.content_hash_dedupe)
+        spider.throttle_enabled = crawler.settings.getbool('THROTTLE_ENABLED', spider.throttle_enabled)
+        spider.pagination_enabled = crawler.settings.getbool('PAGINATION_ENABLED', spider.pagination_enabled)
+        spider.pagination.max_pages = crawler.settings.getint('PAGINATION_MAX_PAGES', spider.pagination.max_pages)
+        spider.yield_priority_enabled = crawler.settings.getbool('YIELD_PRIORITY_ENABLED', spider.yield_priority_enabled)
+        spider.yield_tracker.demote_threshold = crawler.settings.getfloat('YIELD_DEMOTE_THRESHOLD', spider.yield_tracker.demote_threshold)
+        spider.yield_tracker.min_requests = crawler.settings.getint('YIELD_MIN_REQUESTS', spider.yield_tracker.min_requests)
+        crawler.signals.connect(spider._on_response_received, signal=signals.response_received)
+        spider.throttle = DomainThrottle(
+            start_delay=crawler.settings.getfloat('DOWNLOAD_DELAY', spider.throttle.start_delay),
+            start_concurrency=crawler.settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN', spider.throttle.start_concurrency),
+            min_delay=crawler.settings.getfloat('THROTTLE_MIN_DELAY', spider.throttle.min_delay),
+            max_delay=crawler.settings.getfloat('THROTTLE_MAX_DELAY', spider.throttle.max_delay),
+            min_concurrency=crawler.settings.getint('THROTTLE_MIN_CONCURRENCY', spider.throttle.min_concurrency),
+            max_concurrency=crawler.settings.getint('THROTTLE_MAX_CONCURRENCY', spider.throttle.max_concurrency),
+            target_latency=crawler.settings.getfloat('THROTTLE_TARGET_LATENCY', spider.throttle.target_latency),
+            domain_limits=crawler.settings.getdict('THROTTLE_DOMAIN_LIMITS'),
+        )
+        if spider.throttle_enabled:
+            crawler.signals.connect(spider._on_request_reached_downloader, signal=signals.request_reached_downloader)
+            crawler.signals.connect(spider._on_response_downloaded, signal=signals.response_downloaded)
+        crawler.signals.connect(spider.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(spider.spider_closed, signal=signals.spider_closed)
+        return spider
+        
+    def spider_opened(self, spider):
+        """
+        Carrega as regras e seletores em memória antes das primeiras requisições.
+        """
+        try:
+            self.selector_store.load_all()
+        except Exception as e:
+            self.logger.error(f"Erro ao carregar cache de seletores: {str(e)}")
+            self.session.rollback()
+        
+        # Gravação por tempo mesmo quando o spider não agenda novas escritas
+        self._write_flush_task = task.LoopingCall(self.write_buffer.maybe_flush)
+        self._write_flush_task.start(self.write_buffer.flush_interval, now=False)
+        
+        if self.url_filter_enabled:
+            try:
+                self.url_filter = load_or_rebuild(self.url_filter_path, self.session.get_bind(),
+                                                  capacity=self.url_filter_capacity,
+                                                  error_rate=self.url_filter_error_rate)
+            except Exception as e:
+                self.logger.error(f"Erro ao carregar filtro de URLs: {str(e)}")
+        
+        if self.conditional_get_enabled:
+            self.fetch_state = FetchStateStore(self.session.get_bind(), dedupe=self.content_hash_dedupe)
+        
+        try:
+            self.yield_tracker.load(self.session.get_bind())
+        except Exception as e:
+            self.logger.error(f"Erro ao carregar rendimento por domínio: {str(e)}")
+        
+        if self.throttle_enabled:
+            try:
+                self.throttle.load(self.session.get_bind())
+            except Exception as e:
+                self.logger.error(f"Erro ao carregar parâmetros de throttling: {str(e)}")
+        
+        if self.take_screenshots:
+            self._start_screenshot_worker()
+        
+        if self.webdriver_warmup:
+            # Abre os navegadores em outra thread para não bloquear o reactor
+            d = threads.deferToThread(self.webdriver_pool.warm_up)
+            d.addErrback(lambda failure: self.logger.error(f"Erro ao aquecer pool de navegadores: {failure.getErrorMessage()}"))
+            
+    def spider_closed(self, spider, reason):
+        """
+        Grava as pendências do buffer write-behind e registra as estatísticas ao final da execução.
+        """
+        if self._write_flush_task is not None and self._write_flush_task.running:
+            self._write_flush_task.stop()
+        self.write_buffer.flush()
+        if self.screenshot_worker:
+            # Os screenshots ainda pendentes ficam na fila para a próxima execução
+            self.screenshot_worker.stop()
+            store = self.screenshot_worker.manager.store
+            store.enforce_budget()
+            for prefix, stats in (('screenshots', self.screenshot_worker.get_stats()),
+                                  ('screenshot_store', store.get_stats())):
+                self.logger.info(f"Estatísticas {prefix}: {stats}")
+                if self.crawler.stats:
+                    for key, value in stats.items():
+                        self.crawler.stats.set_value(f'{prefix}/{key}', value)
+            self.screenshot_queue.close()
+        self.webdriver_pool.close()
+        
+        if self.url_filter is not None:
+            try:
+                self.url_filter.save(self.url_filter_path)
+            except Exception as e:
+                self.logger.error(f"Erro ao salvar filtro de URLs: {str(e)}")
+            self.logger.info(f"Estatísticas url_filter: {self.url_filter.get_stats()}")
+            if self.crawler.stats:
+                for key, value in self.url_filter.get_stats().items():
+                    self.crawler.stats.set_value(f'url_filter/{key}', value)
+        
+        if self.fetch_state is not None:
+            self.fetch_state.flush()
+            self.logger.info(f"Estatísticas fetch_state: {self.fetch_state.get_stats()}")
+            if self.crawler.stats:
+                for key, value in self.fetch_state.get_stats().items():
+                    self.crawler.stats.set_value(f'fetch_state/{key}', value)
+        
+        if self.throttle_enabled:
+            try:
+                self.throttle.save(self.session.get_bind())
+            except Exception as e:
+                self.logger.error(f"Erro ao gravar parâmetros de throttling: {str(e)}")
+            self.logger.info(f"Parâmetros de throttling por domínio: {self.throttle.describe()}")
+        
+        try:
+            self.yield_tracker.save(self.session.get_bind())
+        except Exception as e:
+            self.logger.error(f"Erro ao gravar rendimento por domínio: {str(e)}")
+        report_rows = self.yield_tracker.report_rows()
+        if report_rows:
+            self.logger.info(f"Custo e rendimento por domínio:\n{format_report(report_rows)}")
+        
+        for prefix, stats in (('selector_store', self.selector_store.get_stats()),
+                              ('write_behind', self.write_buffer.get_stats()),
+                              ('llm', self.llm_api.get_stats()),
+                              ('llm_cache', self.llm_api.cache.get_stats()),
+                              ('single_flight', self.selector_flight.get_stats()),
+                              ('extraction_plans', self.extraction_plans.get_stats()),
+                              ('webdriver', self.webdriver_pool.get_stats()),
+                              ('throttle', self.throttle.get_stats()),
+                              ('pagination', self.pagination.get_stats()),
+                              ('domain_yield', self.yield_tracker.get_stats())):
+            self.logger.info(f"Estatísticas {prefix}: {stats}")
+            if self.crawler.stats:
+                for key, value in stats.items():
+                    self.crawler.stats.set_value(f'{prefix}/{key}', value)
+        remove_scoped_session()
+        
+    def _skip_known_urls(self, urls):
+        """
+        Remove da lista os links de imóveis que já estão no banco, segundo o filtro de URLs.
+        
+        Os links que o filtro indica são confirmados no banco em uma única consulta
+        (URL_FILTER_VERIFY), o que evita perder imóveis novos por falso positivo.
+        
+        Args:
+            urls: Links de detalhe encontrados na listagem
+            
+        Returns:
+            list: Links que ainda devem ser agendados
+        """
+        if self.url_filter is None or not urls:
+            return urls
+        
+        candidates = {normalize_url(url) for url in urls if self.url_filter.might_contain(url)}
+        if not candidates:
+            return urls
+        
+        if self.url_filter_verify:
+            try:
+                known = confirm_known(self.session.get_bind(), candidates)
+            except Exception as e:
+                self.logger.error(f"Erro ao confirmar URLs conhecidas: {str(e)}")
+                return urls
+            self.url_filter.record_confirmation(len(candidates), len(known))
+        else:
+            known = candidates
+        
+        remaining = [url for url in urls if normalize_url(url) not in known]
+        self.url_filter.skipped += len(urls) - len(remaining)
+        if known:
+            self.logger.info(f"{len(urls) - len(remaining)} links de imóveis já gravados ignorados")
+        return remaining
+        
+    def _download_slot(self, request):
+        """
+        Retorna a chave e o slot do downloader de uma requisição (None se ainda não existir).
+        """
+        key = request.meta.get('download_slot')
+        engine = getattr(getattr(self, 'crawler', None), 'engine', None)
+        if key is None or engine is None or engine.downloader is None:
+            return key, None
+        return key, engine.downloader.slots.get(key)
+        
+    def _on_request_reached_downloader(self, request, spider):
+        """
+        Aplica ao slot do domínio o atraso e a concorrência atuais antes do download.
+        """
+        key, slot = self._download_slot(request)
+        if slot is not None:
+            self.throttle.apply(slot, key)
+        
+    def _on_response_downloaded(self, response, request, spider):
+        """
+        Ajusta o atraso e a concorrência do domínio pela latência, pelo status e pelo Retry-After.
+        """
+        key, slot = self._download_slot(request)
+        if key is None:
+            return
+        retry_after = None
+        if response.status in (429, 503):
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        self.throttle.observe(key, request.meta.get('download_latency'), response.status, retry_after)
+        if slot is not None:
+            self.throttle.apply(slot, key)
+        
+    def _on_response_received(self, response, request, spider):
+        """
+        Contabiliza a resposta (e os bytes baixados) no domínio da requisição.
+        """
+        domain = request.meta.get('domain') or urlparse(request.url).netloc
+        is_detail = bool(request.meta.get('is_detail_page') or request.meta.get('page_type') == 'detail')
+        self.yield_tracker.record_response(domain, len(response.body), is_detail)
+        
+    def _request_priority(self, domain, is_detail):
+        """
+        Prioridade da requisição: detalhes antes de listagens e domínios de maior rendimento primeiro.
+        """
+        if not self.yield_priority_enabled:
+            return 0
+        return self.yield_tracker.priority(domain, is_detail)
+        
+    def _next_listing_request(self, response, domain, current_depth, detail_links):
+        """
+        Cria a requisição da próxima página da listagem.
+        
+        A próxima página mantém a profundidade de navegação da primeira (crawl_depth)
+        e reinicia a profundidade do Scrapy, para que o DEPTH_LIMIT não corte a
+        paginação; o limite passa a ser o orçamento de páginas por domínio.
+        
+        Args:
+            response: Resposta da listagem atual
+            domain: Domínio da listagem
+            current_depth: Profundidade de navegação da listagem
+            detail_links: Links de detalhe da página ainda não gravados
+            
+        Returns:
+            scrapy.Request: Requisição da próxima página ou None
+        """
+        if not self.pagination_enabled or self.items_count.get(domain, 0) >= self.max_items_per_site:
+            return None
+        try:
+            next_url = self.pagination.next_page(response, domain, detail_links)
+        except Exception as e:
+            self.logger.error(f"Erro ao detectar paginação em {response.url}: {str(e)}")
+            return None
+        if not next_url:
+            return None
+        
+        self.logger.info(f"Agendando próxima página da listagem: {next_url}")
+        meta = {
+            'domain': domain,
+            'page_type': 'list',
+            'crawl_depth': current_depth,
+            'depth_reset': True,
+            'pagination': True,
+        }
+        if response.meta.get('manual_cookies'):
+            meta['manual_cookies'] = True
+            if response.meta.get('cookies_file'):
+                meta['cookies_file'] = response.meta.get('cookies_file')
+        # Sem errback: um 404 depois da última página não indica problema no site
+        return scrapy.Request(url=next_url, callback=self.parse, meta=meta,
+                              priority=self._request_priority(domain, False))
+        
+    def _conditional_request(self, url, meta):
+        """
+        Acrescenta à requisição de uma página de detalhe os cabeçalhos condicionais gravados.
+        
+        Args:
+            url: URL da página de detalhe
+            meta: Metadados da requisição (recebem o status 304 como tratado)
+            
+        Returns:
+            dict: Cabeçalhos If-None-Match/If-Modified-Since (vazio se não houver validadores)
+        """
+        if self.fetch_state is None:
+            return {}
+        try:
+            headers = self.fetch_state.conditional_headers(url)
+        except Exception as e:
+            self.logger.error(f"Erro ao ler estado de download de {url}: {str(e)}")
+            return {}
+        if headers:
+            meta['handle_httpstatus_list'] = list(meta.get('handle_httpstatus_list', [])) + [304]
+        return headers
+        
+    def _skip_unchanged(self, response):
+        """
+        Verifica se a página de detalhe já foi processada com o mesmo conteúdo.
+        
+        Respostas 304, corpos com o hash já gravado para a URL e páginas iguais às
+        de outra URL não passam pela classificação, pela extração nem pelo pipeline.
+        
+        Returns:
+            bool: True se a resposta deve ser ignorada
+        """
+        if self.fetch_state is None or response.meta.get('fetch_state_checked'):
+            return False
+        if not (response.meta.get('is_detail_page') or response.meta.get('page_type') == 'detail'):
+            return False
+        response.meta['fetch_state_checked'] = True
+        try:
+            reason = self.fetch_state.check(response)
+        except Exception as e:
+            self.logger.error(f"Erro ao verificar estado de download de {response.url}: {str(e)}")
+            return False
+        if reason:
+            self.logger.info(f"Página de detalhes sem mudança ignorada ({reason}): {response.url}")
+            return True
+        return False
+        
+    def _start_screenshot_worker(self):
+        """
+        Abre a fila persistente de screenshots e inicia as threads de captura.
+        """
+        try:
+            self.screenshot_queue = ScreenshotQueue(SCREENSHOT_QUEUE_PATH)
+            recovered = self.screenshot_queue.recover()
+            if recovered:
+                self.logger.info(f"{recovered} screenshots interrompidos voltaram para a fila")
+            self.screenshot_policy = ScreenshotSamplingPolicy(
+                self.screenshot_sampling, self.screenshot_per_domain, self.screenshot_queue
+            )
+            manager = ScreenshotManager(output_dir=SCREENSHOT_DIR, pool=self.webdriver_pool)
+            # Um navegador fica livre para os screenshots de CAPTCHA
+            workers = self.screenshot_workers or max(1, self.webdriver_pool.size - 1)
+            self.screenshot_worker = ScreenshotWorker(self.screenshot_queue, manager, workers=workers)
+            self.screenshot_worker.start()
+        except Exception as e:
+            self.logger.error(f"Erro ao iniciar a fila de screenshots: {str(e)}")
+            self.screenshot_queue = self.screenshot_policy = self.screenshot_worker = None
+            
+    def _enqueue_screenshot(self, url, domain, extraction_ok):
+        """
+        Enfileira o screenshot da página se a política de amostragem o selecionar.
+        """
+        if self.screenshot_policy is None:
+            return
+        reason = self.screenshot_policy.should_capture(domain, extraction_ok)
+        if reason and self.screenshot_queue.enqueue(url, domain, reason, backfill=extraction_ok):
+            self.logger.debug(f"Screenshot de {url} enfileirado ({reason})")
+            self.screenshot_worker.notify()
+        
     def start_requests(self):
         """
         Inicia as requisições e adiciona tratamento de erros.
@@ -111,7 +557,8 @@ class AuctionSpider(scrapy.Spider):
                     callback=self.parse,
                     errback=self.errback_httpbin,
                     cookies=cookies,  # Usa os cookies se disponíveis
-                    meta=meta
+                    meta=meta,
+                    priority=self._request_priority(domain, False)  # Domínios produtivos nas coletas anteriores primeiro
                 )
             except Exception as e:
                 self.logger.error(f"Erro ao iniciar requisição para {url}: {str(e)}")
@@ -207,148 +654,59 @@ class AuctionSpider(scrapy.Spider):
         
         self.logger.error(f"Erro ao processar {url}: {repr(failure)}")
         self._register_problem_site(domain, repr(failure))
+        
+        # Falhas sem resposta (timeouts, conexão recusada) contam como erro do domínio
+        if self.throttle_enabled and getattr(failure.value, 'response', None) is None:
+            key, slot = self._download_slot(request)
+            self.throttle.observe_failure(key or urlparse(url).hostname)
+            if slot is not None:
+                self.throttle.apply(slot, key)
 
     def _register_problem_site(self, domain, error_message):
         """
         Registra um site problemático no banco de dados
         """
         try:
-            problem_site = self.session.query(ProblemSite).filter_by(domain=domain).first()
-            
-            if problem_site:
-                problem_site.attempts += 1
-                problem_site.last_error = error_message
-            else:
-                problem_site = ProblemSite(domain=domain, attempts=1, last_error=error_message)
-                self.session.add(problem_site)
-                
-            self.session.commit()
+            # Gravação adiada: tentativas repetidas do mesmo domínio são somadas
+            self.write_buffer.upsert(
+                ProblemSite, 'domain', domain,
+                values={'last_error': error_message},
+                increments={'attempts': 1}
+            )
         except Exception as e:
             self.logger.error(f"Erro ao registrar site problemático: {str(e)}")
 
-    def _detect_page_type(self, html_content, url):
+    def _detect_page_type(self, response, url):
         """
         Detecta se uma página é uma listagem ou uma página de detalhes
         baseado em padrões comuns encontrados em sites de leilão.
         
         Args:
-            html_content: Conteúdo HTML da página
+            response: Resposta do Scrapy (a análise do conteúdo é compartilhada)
             url: URL da página
             
         Returns:
             str: 'list' ou 'detail'
         """
+        analysis = PageAnalysis.of(response)
+        
         # Verifica se o conteúdo HTML é válido
-        if not html_content or not isinstance(html_content, str):
+        if not analysis.is_text or not analysis.text:
             self.logger.warning(f"Conteúdo HTML inválido para {url}")
             return 'list'  # Valor padrão seguro
             
-        # Padrões comuns em URLs de páginas de detalhe
-        detail_url_patterns = [
-            r'/imovel/\d+', r'/detalhe', r'/detalhes', r'/item/\d+', r'/lote/\d+',
-            r'/auction/\d+', r'/leilao/\d+', r'/lance/\d+', r'/bem/\d+',
-            r'/property/\d+', r'/ficha', r'/info', r'/produto/\d+',
-            r'/imovel-', r'/lote-', r'/bem-', r'/propriedade-', r'/id-\d+',
-            r'/codigo-\d+', r'/ref-\d+', r'/oferta/\d+', r'/oportunidade/\d+'
-        ]
-        
         # Verifica se a URL parece ser de uma página de detalhes
-        for pattern in detail_url_patterns:
-            if re.search(pattern, url):
-                self.logger.info(f"URL {url} corresponde ao padrão de detalhe: {pattern}")
-                return 'detail'
-        
-        # Padrões comuns em conteúdo HTML de páginas de listagem
-        list_patterns = [
-            r'class=".*?lista.*?"', r'class=".*?grid.*?"', r'class=".*?results.*?"',
-            r'class=".*?catalog.*?"', r'class=".*?listing.*?"', r'class=".*?search.*?results.*?"',
-            r'class=".*?cards.*?"', r'class=".*?properties.*?"', r'class=".*?imoveis.*?"',
-            r'<div[^>]*id=".*?lista.*?"', r'<div[^>]*id=".*?grid.*?"', r'<div[^>]*id=".*?results.*?"',
-            r'class=".*?pagination.*?"', r'class=".*?paginacao.*?"', r'class=".*?pages.*?"',
-            r'class=".*?resultados.*?"', r'class=".*?busca.*?"', r'class=".*?search.*?"'
-        ]
-        
-        # Padrões comuns em conteúdo HTML de páginas de detalhes
-        detail_patterns = [
-            r'class=".*?detalhe.*?"', r'class=".*?produto.*?"', r'class=".*?imovel.*?info.*?"',
-            r'<h1.*?>.*?</h1>', r'class=".*?price.*?"', r'class=".*?valor.*?"',
-            r'class=".*?property.*?detail.*?"', r'class=".*?auction-details.*?"',
-            r'class=".*?product-info.*?"', r'class=".*?item-detail.*?"',
-            r'<div[^>]*id=".*?detalhe.*?"', r'<div[^>]*id=".*?produto.*?"',
-            r'class=".*?caracteristicas.*?"', r'class=".*?especificacoes.*?"',
-            r'class=".*?ficha.*?tecnica.*?"', r'class=".*?descricao.*?imovel.*?"',
-            r'class=".*?galeria.*?"', r'class=".*?gallery.*?"', r'class=".*?fotos.*?"',
-            r'class=".*?lances.*?"', r'class=".*?ofertas.*?"', r'class=".*?bid.*?"'
-        ]
+        detail_pattern = self.url_matcher.match(url)
+        if detail_pattern:
+            self.logger.info(f"URL {url} corresponde ao padrão de detalhe: {detail_pattern}")
+            return 'detail'
         
-        # Usa try/except para evitar erros em expressões regulares com conteúdo inválido
+        # Classifica o conteúdo com o classificador de passagem única
         try:
-            # Conta quantos padrões de cada tipo foram encontrados
-            list_matches = sum(1 for pattern in list_patterns if re.search(pattern, html_content, re.IGNORECASE))
-            detail_matches = sum(1 for pattern in detail_patterns if re.search(pattern, html_content, re.IGNORECASE))
-            
-            # Verifica se há elementos que indicam uma página de detalhes
-            has_price_element = bool(re.search(r'R\$\s*[\d\.,]+', html_content))
-            has_property_details = bool(re.search(r'(área|area)\s*:?\s*\d+\s*(m²|m2)', html_content, re.IGNORECASE))
-            has_auction_date = bool(re.search(r'(data\s*do\s*leilão|leilão\s*em|data\s*:)', html_content, re.IGNORECASE))
-            
-            # Adiciona pontos extras para elementos específicos de páginas de detalhes
-            if has_price_element:
-                detail_matches += 2
-            if has_property_details:
-                detail_matches += 2
-            if has_auction_date:
-                detail_matches += 2
-            
-            # Verifica se há múltiplos cards/itens na página (indicativo de listagem)
-            multiple_items_pattern = r'(<div[^>]*class="[^"]*(?:card|item|produto|imovel|property)[^"]*".*?){3,}'
-            has_multiple_items = bool(re.search(multiple_items_pattern, html_content, re.DOTALL | re.IGNORECASE))
-            
-            if has_multiple_items:
-                list_matches += 3  # Dá mais peso para múltiplos itens
-            
-            # Verifica se há paginação (indicativo de listagem)
-            pagination_pattern = r'class="[^"]*(?:pag(?:ination|inacao|e)|pages|numeros)[^"]*"'
-            has_pagination = bool(re.search(pagination_pattern, html_content, re.IGNORECASE))
-            
-            if has_pagination:
-                list_matches += 2
-                
-            # Verifica se há elementos de navegação entre resultados (indicativo de listagem)
-            navigation_pattern = r'(?:próxima|proxima|próximo|proximo|anterior|seguinte|next|prev|previous)'
-            has_navigation = bool(re.search(navigation_pattern, html_content, re.IGNORECASE))
-            
-            if has_navigation:
-                list_matches += 1
-                
-            # Verifica se há elementos de filtro ou ordenação (indicativo de listagem)
-            filter_pattern = r'(?:filtrar|ordenar|filtros|filtro por|ordernar por|classificar)'
-            has_filters = bool(re.search(filter_pattern, html_content, re.IGNORECASE))
-            
-            if has_filters:
-                list_matches += 1
-                
-            # Verifica se há elementos de compartilhamento ou contato (indicativo de detalhes)
-            share_pattern = r'(?:compartilhar|compartilhe|enviar|contato|contate|whatsapp|email|telefone)'
-            has_share = bool(re.search(share_pattern, html_content, re.IGNORECASE))
-            
-            if has_share:
-                detail_matches += 1
-                
-            # Verifica se há elementos de galeria de imagens (indicativo de detalhes)
-            gallery_pattern = r'(?:galeria|slideshow|carrossel|carousel|slider|slide)'
-            has_gallery = bool(re.search(gallery_pattern, html_content, re.IGNORECASE))
-            
-            if has_gallery:
-                detail_matches += 1
-            
-            # Se encontrou mais padrões de detalhe que de lista, considera página de detalhe
-            self.logger.info(f"Análise de página para {url}: list_matches={list_matches}, detail_matches={detail_matches}")
-            
-            if detail_matches > list_matches:
-                return 'detail'
-            else:
-                return 'list'
+            result = analysis.classification
+            self.logger.info(f"Análise de página para {url}: list_matches={result.list_score}, detail_matches={result.detail_score}")
+            self.logger.debug(f"Features de classificação para {url}: {result.features}")
+            return result.page_type
         except Exception as e:
             self.logger.error(f"Erro ao analisar padrões HTML para {url}: {str(e)}")
             return 'list'  # Valor padrão seguro
@@ -357,69 +715,16 @@ class AuctionSpider(scrapy.Spider):
         """
         Verifica se a resposta é texto e não um binário.
         """
-        try:
-            # Verifica o Content-Type no cabeçalho
-            content_type = response.headers.get('Content-Type', b'').decode('utf-8', 'ignore').lower()
-            
-            # Tipos de conteúdo de texto comuns
-            text_types = ['text/html', 'text/plain', 'application/json', 'application/xml', 
-                         'text/xml', 'application/javascript', 'text/css']
-            
-            # Verifica se algum dos tipos de texto está no Content-Type
-            is_text = any(text_type in content_type for text_type in text_types)
-            
-            # Tenta acessar o texto para confirmar (isso pode lançar uma exceção se não for texto)
-            if is_text:
-                # Apenas tenta acessar para ver se funciona, não armazena o resultado
-                _ = response.text
-                return True
-            return False
-        except AttributeError:
-            # Se ocorrer um AttributeError, a resposta não é texto
-            return False
-        except Exception as e:
-            self.logger.warning(f"Erro ao verificar se a resposta é texto: {str(e)}")
-            return False
+        return PageAnalysis.of(response).is_text
 
     def _is_captcha_page(self, response):
         """
         Detecta se a página atual contém um CAPTCHA ou mecanismo de verificação anti-bot.
         """
-        # Verifica se a resposta é texto antes de tentar acessar o conteúdo
-        if not self._is_text_response(response):
-            return False
-            
-        # Busca por padrões comuns em páginas de CAPTCHA ou verificação
-        captcha_patterns = [
-            'captcha', 'recaptcha', 'validate', 'verification', 
-            'robot', 'human', 'bot check', 'security check',
-            'perfdrive', 'cloudflare', 'ddos', 'protection',
-            'verify you are human'
-        ]
-        
-        # Verifica no HTML e URL
-        page_text = response.text.lower()
-        url_text = response.url.lower()
-        
-        # Verifica se algum padrão está presente
-        for pattern in captcha_patterns:
-            if pattern in page_text or pattern in url_text:
-                return True
-                
-        # Verifica elementos específicos de CAPTCHA
-        captcha_selectors = [
-            'iframe[src*="captcha"]', 
-            'iframe[src*="recaptcha"]',
-            'div.g-recaptcha',
-            'div[class*="captcha"]',
-            'input[name*="captcha"]'
-        ]
-        
-        for selector in captcha_selectors:
-            if response.css(selector):
-                return True
-                
-        return False
+        verdict = PageAnalysis.of(response).captcha
+        if verdict.is_captcha:
+            self.logger.debug(f"Sinais de CAPTCHA em {response.url} (pontos {verdict.score}): {', '.join(verdict.reasons)}")
+        return verdict.is_captcha
         
     def _handle_captcha(self, response):
         """
@@ -440,8 +745,10 @@ class AuctionSpider(scrapy.Spider):
         screenshot_path = os.path.join('prints', f"{domain_safe}_{timestamp}_captcha.png")
         
         try:
-            # Captura um screenshot da página de CAPTCHA
-            self._take_screenshot(url, screenshot_path)
+            # Captura o screenshot em outra thread: esperar por um navegador livre e pelo
+            # carregamento da página não pode bloquear o reactor
+            d = threads.deferToThread(self._take_screenshot, url, screenshot_path)
+            d.addErrback(lambda failure: self.logger.error(f"Erro ao capturar screenshot de CAPTCHA de {url}: {failure.getErrorMessage()}"))
             
             # Salva informações sobre a requisição para resolução manual
             request_file = os.path.join('cookies', f"{domain_safe}_{timestamp}_request.json")
@@ -465,7 +772,7 @@ class AuctionSpider(scrapy.Spider):
             # Exibe instruções para o usuário
             print("\n" + "="*80)
             print(f"CAPTCHA detectado na URL: {url}")
-            print(f"Screenshot salvo em: {screenshot_path}")
+            print(f"Screenshot (em captura) será salvo em: {screenshot_path}")
             print("\nPor favor, siga as instruções abaixo para resolver o CAPTCHA manualmente:")
             print("1. Abra a URL acima em seu navegador")
             print("2. Complete a verificação CAPTCHA/desafio de segurança")
@@ -490,74 +797,54 @@ class AuctionSpider(scrapy.Spider):
         
     def _take_screenshot(self, url, screenshot_path, cookies_file=None):
         """
-        Captura um screenshot da página usando Selenium.
+        Captura um screenshot da página usando um navegador do pool.
         """
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-        
         try:
-            driver = webdriver.Chrome(options=options)
-            driver.set_page_load_timeout(30)  # Timeout de 30 segundos
-            
-            # Primeiro acessa a página para poder definir cookies
-            try:
-                driver.get(url)
-            except TimeoutException:
-                self.logger.warning(f"Timeout ao carregar a página {url}, continuando mesmo assim")
-            except WebDriverException as e:
-                self.logger.error(f"Erro ao carregar a página {url}: {str(e)}")
-                driver.quit()
-                return
-                
-            # Aplica cookies se disponíveis
-            if cookies_file and os.path.exists(cookies_file):
+            with self.webdriver_pool.driver() as driver:
+                # Primeiro acessa a página para poder definir cookies
                 try:
-                    self.logger.info(f"Aplicando cookies do arquivo {cookies_file}")
-                    with open(cookies_file, 'r') as f:
-                        cookies = json.load(f)
-                    self._apply_cookies_to_webdriver(driver, cookies)
+                    driver.get(url)
+                except TimeoutException:
+                    self.logger.warning(f"Timeout ao carregar a página {url}, continuando mesmo assim")
                     
-                    # Recarrega a página com os cookies aplicados
+                # Aplica cookies se disponíveis
+                if cookies_file and os.path.exists(cookies_file):
                     try:
-                        driver.get(url)
-                    except TimeoutException:
-                        self.logger.warning(f"Timeout ao recarregar a página {url} com cookies, continuando mesmo assim")
-                    except WebDriverException as e:
-                        self.logger.error(f"Erro ao recarregar a página {url} com cookies: {str(e)}")
-                        driver.quit()
-                        return
+                        self.logger.info(f"Aplicando cookies do arquivo {cookies_file}")
+                        with open(cookies_file, 'r') as f:
+                            cookies = json.load(f)
+                        self._apply_cookies_to_webdriver(driver, cookies)
                         
-                    # Verifica se ainda estamos na página de CAPTCHA
-                    page_source = driver.page_source.lower()
-                    captcha_terms = ['captcha', 'robot', 'human verification', 'security check']
-                    if any(term in page_source for term in captcha_terms):
-                        self.logger.warning(f"Ainda na página de CAPTCHA mesmo com cookies aplicados: {url}")
-                except Exception as e:
-                    self.logger.error(f"Erro ao aplicar cookies de {cookies_file}: {str(e)}")
-            
-            # Aguarda um pouco para garantir que a página carregue completamente
-            time.sleep(2)
-            
-            # Tenta rolar a página para garantir que todos os elementos sejam carregados
-            try:
-                # Rola até o final da página
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(1)
-                # Rola de volta para o topo
-                driver.execute_script("window.scrollTo(0, 0);")
-                time.sleep(1)
-            except Exception as e:
-                self.logger.warning(f"Erro ao rolar a página {url}: {str(e)}")
-            
-            # Captura o screenshot
-            driver.save_screenshot(screenshot_path)
-            
-            driver.quit()
+                        # Recarrega a página com os cookies aplicados
+                        try:
+                            driver.get(url)
+                        except TimeoutException:
+                            self.logger.warning(f"Timeout ao recarregar a página {url} com cookies, continuando mesmo assim")
+                            
+                        # Verifica se ainda estamos na página de CAPTCHA
+                        self.webdriver_pool.wait_until_ready(driver)
+                        page_source = driver.page_source.lower()
+                        if captcha_detector.detect(body_lower=page_source, url=driver.current_url).is_captcha:
+                            self.logger.warning(f"Ainda na página de CAPTCHA mesmo com cookies aplicados: {url}")
+                    except WebDriverException:
+                        raise
+                    except Exception as e:
+                        self.logger.error(f"Erro ao aplicar cookies de {cookies_file}: {str(e)}")
+                
+                # Aguarda o documento completo e a rede ociosa (com teto)
+                self.webdriver_pool.wait_until_ready(driver)
+                
+                # Rola a página para disparar o carregamento de imagens tardias
+                try:
+                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                    self.webdriver_pool.wait_until_ready(driver, timeout=2)
+                    driver.execute_script("window.scrollTo(0, 0);")
+                except WebDriverException as e:
+                    self.logger.warning(f"Erro ao rolar a página {url}: {str(e)}")
+                
+                # Captura o screenshot
+                driver.save_screenshot(screenshot_path)
+                self.webdriver_pool.record_screenshot()
         except Exception as e:
             self.logger.error(f"Erro ao capturar screenshot de {url}: {str(e)}")
             # Tenta criar um screenshot vazio para evitar erros posteriores
@@ -600,7 +887,7 @@ class AuctionSpider(scrapy.Spider):
         else:
             self.logger.warning(f"Formato de cookies inválido: {type(cookies)}")
 
-    def parse(self, response):
+    async def parse(self, response):
         """
         Analisa a resposta e determina o tipo de página.
         """
@@ -608,6 +895,10 @@ class AuctionSpider(scrapy.Spider):
         domain = response.meta.get('domain') or urlparse(url).netloc
         self.logger.info(f"Analisando página: {url}")
         
+        # Página de detalhe que não mudou desde a última coleta
+        if self._skip_unchanged(response):
+            return
+        
         # Verifica limites de itens por site
         if self.items_count.get(domain, 0) >= self.max_items_per_site:
             self.logger.info(f"Limite de itens atingido para o domínio: {domain}")
@@ -629,8 +920,8 @@ class AuctionSpider(scrapy.Spider):
             
         # Continua com o processamento normal
         try:
-            # Obtém a profundidade atual da navegação
-            current_depth = response.meta.get('depth', 0)
+            # Obtém a profundidade atual da navegação (páginas seguintes de uma listagem mantêm a da primeira)
+            current_depth = response.meta.get('crawl_depth', response.meta.get('depth', 0))
             self.logger.info(f"Processando página com profundidade {current_depth}/{self.config_depth}")
             
             # Obtém o tipo de página atual do meta, se disponível
@@ -639,7 +930,7 @@ class AuctionSpider(scrapy.Spider):
             # Se não houver tipo definido, detecta o tipo de página
             if not current_page_type:
                 # Detecta o tipo de página (lista ou detalhe)
-                page_type = self._detect_page_type(response.text, url)
+                page_type = self._detect_page_type(response, url)
                 self.logger.info(f"Tipo de página detectado para {url}: {page_type}")
                 
                 # Para URLs iniciais (Home), força reconhecimento como lista
@@ -657,7 +948,8 @@ class AuctionSpider(scrapy.Spider):
                 # Se for um detalhe na profundidade máxima, processa
                 if page_type == 'detail' or response.meta.get('is_detail_page', False):
                     self.logger.info(f"Processando página de detalhes na profundidade máxima: {url}")
-                    yield from self.parse_detail(response)
+                    async for result in self.parse_detail(response):
+                        yield result
                 return
 
             # Realiza o processamento com base no tipo de página
@@ -671,32 +963,33 @@ class AuctionSpider(scrapy.Spider):
                 
                 # Verifica se há seletores em cache para esta URL
                 cached_selector = self._get_cached_selector(url, 'list')
+                fingerprint = PageAnalysis.of(response).fingerprint
+                template_selector = None
                 
                 if cached_selector:
                     list_selector = cached_selector
                     self.logger.info(f"Usando seletor de lista em cache para {url}: {list_selector}")
                 else:
-                    # Se não há cache, verifica se há regra para o domínio
-                    rule = self.session.query(ScrapingRule).filter_by(domain=domain).first()
+                    # Se não há cache, verifica se o modelo da página já é conhecido
+                    template_selector = self._get_template_selector(fingerprint, 'list')
+                    rule_selector = None if template_selector else self.selector_store.get_rule(domain, 'list')
                     
-                    if rule and rule.list_selector:
-                        list_selector = rule.list_selector
+                    if template_selector:
+                        list_selector = template_selector
+                        self.logger.info(f"Usando seletor de lista do modelo de página para {url}: {list_selector}")
+                    elif rule_selector:
+                        list_selector = rule_selector
                         self.logger.info(f"Usando seletor de lista existente para {domain}: {list_selector}")
                     else:
                         self.logger.info(f"Gerando novo seletor de lista para {domain}")
-                        list_selector = self._generate_list_selector(response)
+                        list_selector, generated = await self._generate_selectors_once(
+                            domain, 'list', self._generate_list_selector, response
+                        )
                         
-                        if list_selector:
-                            # Salva o seletor para uso futuro
-                            if rule:
-                                rule.list_selector = list_selector
-                            else:
-                                rule = ScrapingRule(domain=domain, list_selector=list_selector)
-                                self.session.add(rule)
-                            self.session.commit()
-                            
-                            # Adiciona ao cache
+                        if list_selector and generated:
+                            # Adiciona ao cache (URL e modelo da página)
                             self._cache_selector(url, domain, 'list', {'list_selector': list_selector})
+                            self._cache_template(fingerprint, domain, 'list', {'list_selector': list_selector})
                 
                 if list_selector:
                     # Extrai links de imóveis
@@ -722,9 +1015,9 @@ class AuctionSpider(scrapy.Spider):
                     
                     # Atualiza a taxa de sucesso do seletor no cache
                     if links:
-                        self._update_selector_success(url, True)
+                        self._update_selector_success(url, True, fingerprint=fingerprint)
                     else:
-                        self._update_selector_success(url, False)
+                        self._update_selector_success(url, False, fingerprint=fingerprint)
                     
                     # Limita o número de links processados para não sobrecarregar
                     max_links = min(len(links), self.max_items_per_site * 2)  # Processamos mais links do que o limite para compensar possíveis falhas
@@ -752,20 +1045,8 @@ class AuctionSpider(scrapy.Spider):
                         
                         # Verifica se o link é do mesmo domínio
                         if urlparse(full_url).netloc == domain:
-                            # Verifica se o link parece ser uma página de detalhes (usando padrões de URL)
-                            is_detail_url = False
-                            detail_url_patterns = [
-                                r'/imovel/\d+', r'/detalhe', r'/detalhes', r'/item/\d+', r'/lote/\d+',
-                                r'/auction/\d+', r'/leilao/\d+', r'/lance/\d+', r'/bem/\d+',
-                                r'/property/\d+', r'/ficha', r'/info', r'/produto/\d+',
-                                r'/imovel-', r'/lote-', r'/bem-', r'/propriedade-', r'/id-\d+',
-                                r'/codigo-\d+', r'/ref-\d+', r'/oferta/\d+', r'/oportunidade/\d+'
-                            ]
-                            
-                            for pattern in detail_url_patterns:
-                                if re.search(pattern, full_url):
-                                    is_detail_url = True
-                                    break
+                            # Verifica se o link parece ser uma página de detalhes (modelos aprendidos e padrões de URL)
+                            is_detail_url = self.url_matcher.is_detail(full_url, domain)
                             
                             # Separa links de detalhe e de listagem
                             if is_detail_url:
@@ -773,6 +1054,17 @@ class AuctionSpider(scrapy.Spider):
                             elif not only_detail_links:  # Só adiciona links de listagem se não estivermos limitados a detalhes
                                 list_links.append(full_url)
                     
+                    # Imóveis já gravados não são baixados de novo
+                    found_detail_links = bool(detail_links)
+                    detail_links = self._skip_known_urls(detail_links)
+                    
+                    # Validadores das páginas de detalhe já coletadas, em uma consulta
+                    if self.fetch_state is not None and detail_links:
+                        try:
+                            self.fetch_state.load(detail_links)
+                        except Exception as e:
+                            self.logger.error(f"Erro ao ler estado de download: {str(e)}")
+                    
                     # Prioriza links de detalhe se estamos prestes a atingir a profundidade máxima
                     if current_depth == self.config_depth - 1 or self.config_depth == 2:
                         valid_links = detail_links  # Só usa links de detalhe
@@ -803,32 +1095,47 @@ class AuctionSpider(scrapy.Spider):
                         # Se for um link de detalhes e estivermos na profundidade certa, usa parse_detail
                         # Caso contrário, usa parse normal para continuar a navegação
                         if is_detail and (current_depth == self.config_depth - 1 or self.config_depth == 2):
+                            meta = {
+                                'domain': domain, 
+                                'is_detail_page': True,  # Marca explicitamente como página de detalhes
+                                'page_type': 'detail',  # Define explicitamente o tipo de página
+                                'depth': current_depth + 1,  # Incrementa a profundidade
+                                'crawl_depth': current_depth + 1,
+                                **cookies_meta
+                            }
                             yield scrapy.Request(
                                 url=full_url,
                                 callback=self.parse_detail,  # Força o uso do parse_detail para garantir extração de dados
-                                meta={
-                                    'domain': domain, 
-                                    'is_detail_page': True,  # Marca explicitamente como página de detalhes
-                                    'page_type': 'detail',  # Define explicitamente o tipo de página
-                                    'depth': current_depth + 1,  # Incrementa a profundidade
-                                    **cookies_meta
-                                }
+                                headers=self._conditional_request(full_url, meta),
+                                meta=meta,
+                                priority=self._request_priority(domain, True)
                             )
                         else:
+                            meta = {
+                                'domain': domain,
+                                'page_type': 'list' if not is_detail else 'detail',
+                                'depth': current_depth + 1,  # Incrementa a profundidade
+                                'crawl_depth': current_depth + 1,
+                                **cookies_meta
+                            }
                             yield scrapy.Request(
                                 url=full_url,
                                 callback=self.parse,  # Usa o parse padrão para continuar navegando
-                                meta={
-                                    'domain': domain,
-                                    'page_type': 'list' if not is_detail else 'detail',
-                                    'depth': current_depth + 1,  # Incrementa a profundidade
-                                    **cookies_meta
-                                }
+                                headers=self._conditional_request(full_url, meta) if is_detail else None,
+                                meta=meta,
+                                priority=self._request_priority(domain, is_detail)
                             )
+                    
+                    # Próxima página da listagem (enquanto trouxer imóveis novos e houver orçamento)
+                    if found_detail_links or response.meta.get('pagination'):
+                        next_page_request = self._next_listing_request(response, domain, current_depth, detail_links)
+                        if next_page_request:
+                            yield next_page_request
             elif page_type == 'detail':
                 # Processa diretamente como página de detalhe
                 self.logger.info(f"Processando {url} como página de detalhes")
-                yield from self.parse_detail(response)
+                async for result in self.parse_detail(response):
+                    yield result
             else:
                 self.logger.warning(f"Tipo de página não reconhecido para {url}")
                 
@@ -852,7 +1159,7 @@ class AuctionSpider(scrapy.Spider):
         
         return clean_text
         
-    def parse_detail(self, response):
+    async def parse_detail(self, response):
         """
         Processa páginas de detalhes de imóveis.
         
@@ -866,19 +1173,24 @@ class AuctionSpider(scrapy.Spider):
         domain = response.meta.get('domain') or urlparse(url).netloc
         self.logger.info(f"Analisando página de detalhes: {url} (domínio: {domain})")
         
+        # Página que não mudou desde a última coleta (304 ou mesmo hash do corpo)
+        if self._skip_unchanged(response):
+            return
+        
         # Verifica se realmente parece ser uma página de detalhes usando a detecção
         is_marked_detail = response.meta.get('is_detail_page', False)
         
         if not is_marked_detail:
             # Só faz essa verificação se não foi explicitamente marcada como detalhe
-            page_type = self._detect_page_type(response.text, url)
+            page_type = self._detect_page_type(response, url)
             if page_type != 'detail':
                 self.logger.warning(f"Página {url} não parece ser uma página de detalhes. Detectado: {page_type}")
                 # Se não for detalhes mas estiver em um nível de profundidade adequado, tenta processar como listagem
-                current_depth = response.meta.get('depth', 1)
+                current_depth = response.meta.get('crawl_depth', response.meta.get('depth', 1))
                 if current_depth < self.config_depth:
                     self.logger.info(f"Tentando processar como listagem: {url}")
-                    yield from self.parse(response)
+                    async for result in self.parse(response):
+                        yield result
                 return
         
         if response.status == 403:
@@ -912,83 +1224,111 @@ class AuctionSpider(scrapy.Spider):
             
             # Verifica se há seletores em cache para esta URL
             cached_selectors = self._get_cached_selector(url, 'detail')
+            fingerprint = PageAnalysis.of(response).fingerprint
             
             if cached_selectors:
                 self.logger.info(f"Usando seletores de detalhe em cache para {url}")
                 selectors = cached_selectors
             else:
-                # Se não há cache, verifica se há regra para o domínio
-                rule = self.session.query(ScrapingRule).filter_by(domain=domain).first()
+                # Se não há cache, verifica se o modelo da página já é conhecido
+                template_selectors = self._get_template_selector(fingerprint, 'detail')
+                rule_selectors = None if template_selectors else self.selector_store.get_rule(domain, 'detail')
                 
-                if rule and rule.detail_selectors:
-                    try:
-                        selectors = json.loads(rule.detail_selectors)
-                        self.logger.info(f"Usando seletores de detalhe existentes para {domain}")
-                    except json.JSONDecodeError:
-                        self.logger.warning(f"Erro ao decodificar seletores para {domain}: {rule.detail_selectors}")
-                        selectors = self._generate_detail_selectors(response, domain)
+                if template_selectors:
+                    selectors = template_selectors
+                    self.logger.info(f"Usando seletores de detalhe do modelo de página para {url}")
+                elif rule_selectors:
+                    selectors = rule_selectors
+                    self.logger.info(f"Usando seletores de detalhe existentes para {domain}")
                 else:
                     self.logger.info(f"Gerando novos seletores de detalhe para {url}")
-                    selectors = self._generate_detail_selectors(response, domain)
+                    selectors, generated = await self._generate_selectors_once(
+                        domain, 'detail', self._generate_detail_selectors, response, domain
+                    )
                     
-                    if selectors:
-                        # Salva o seletor para uso futuro
-                        if rule:
-                            rule.detail_selectors = json.dumps(selectors)
-                        else:
-                            rule = ScrapingRule(
-                                domain=domain,
-                                detail_selectors=json.dumps(selectors)
-                            )
-                            self.session.add(rule)
-                        
-                        try:
-                            self.session.commit()
-                        except Exception as e:
-                            self.logger.error(f"Erro ao salvar seletores para {domain}: {str(e)}")
-                            self.session.rollback()
-                        
-                        # Adiciona ao cache
+                    if selectors and generated:
+                        # Adiciona ao cache (URL e modelo da página)
                         self._cache_selector(url, domain, 'detail', selectors)
+                        self._cache_template(fingerprint, domain, 'detail', selectors)
             
             if selectors:
-                # Tira um screenshot da página para depuração se possível
-                if os.environ.get('TAKE_SCREENSHOTS', 'false').lower() == 'true':
-                    try:
-                        screenshot_path = capture_property_screenshot(url, domain)
-                        if screenshot_path:
-                            self.logger.info(f"Screenshot salvo em {screenshot_path}")
-                    except Exception as e:
-                        self.logger.error(f"Erro ao tirar screenshot: {str(e)}")
-                
                 # Usa o novo método para extrair dados do imóvel
-                property_data = self._extract_property_data(response, selectors)
+                property_data = self._extract_property_data(response, selectors, fingerprint)
+                
+                # Enfileira o screenshot da página (capturado fora do callback)
+                self._enqueue_screenshot(url, domain, extraction_ok=bool(property_data))
                 
                 # Verifica se conseguiu extrair dados essenciais
                 if property_data:
                     # Incrementa contador de itens para este domínio
                     self.items_count[domain] = self.items_count.get(domain, 0) + 1
+                    self.yield_tracker.record_item(domain)
+                    
+                    # Aprende o modelo de URL que produziu o item
+                    template = self.url_matcher.learn(url, domain)
+                    if template:
+                        self.logger.debug(f"Modelo de URL de detalhe para {domain}: {template}")
                     
-                    # Retorna o item
-                    item = AuctionItem(**property_data)
-                    return item
+                    # Validadores e hash do corpo para a próxima re-coleta
+                    if self.fetch_state is not None:
+                        self.fetch_state.record(response)
+                    
+                    # Envia o item para os pipelines
+                    yield AuctionItem(**property_data)
                 else:
                     self.logger.warning(f"Não foi possível extrair dados suficientes de {url}")
-                    return None
             else:
                 self.logger.warning(f"Não foi possível gerar seletores para {url}")
-                return None
+                self._enqueue_screenshot(url, domain, extraction_ok=False)
                 
         except Exception as e:
             self.logger.error(f"Erro ao processar detalhes para {url}: {str(e)}")
             self.logger.error(traceback.format_exc())
-            return None
 
-    def _generate_list_selector(self, response):
+    async def _generate_selectors_once(self, domain, page_type, generate, *args):
+        """
+        Gera seletores com no máximo uma chamada ao LLM por (domínio, tipo de página).
+        
+        A primeira requisição gera e salva a regra; as que chegam enquanto a
+        geração está em andamento aguardam o mesmo resultado.
+        
+        Args:
+            domain: Domínio da página
+            page_type: 'list' ou 'detail'
+            generate: Método assíncrono que gera os seletores
+            *args: Argumentos repassados a generate
+            
+        Returns:
+            tuple: (seletores ou None, True se esta chamada gerou os seletores)
+        """
+        key = (domain, page_type)
+        waiter = self.selector_flight.join(key)
+        if waiter is not None:
+            self.logger.info(f"Aguardando geração de seletores de {page_type} em andamento para {domain}")
+            selectors = await maybe_deferred_to_future(waiter)
+            return selectors, False
+        
+        selectors = None
+        started = time.monotonic()
+        try:
+            selectors = await generate(*args)
+            if selectors:
+                # Salva o seletor para uso futuro
+                self._save_rule(domain, page_type, selectors)
+        finally:
+            self.yield_tracker.record_llm(domain, time.monotonic() - started)
+            waiting = self.selector_flight.release(key, selectors)
+            if waiting:
+                self.logger.info(f"Seletores de {page_type} para {domain} compartilhados com {waiting} requisições")
+        return selectors, True
+
+    async def _generate_list_selector(self, response):
         """Gera um seletor CSS para a lista de imóveis usando LLM."""
-        html = response.text
         url = response.url
         
+        # Versão condensada do HTML (sem scripts/estilos e com cards repetidos reduzidos)
+        html_sample = condense_html(response.text)
+        
         prompt = f"""
         Você é um especialista em web scraping. Analise o HTML abaixo de um site de leilão de imóveis e forneça um seletor CSS preciso para encontrar os links para as páginas de detalhes de cada imóvel.
 
@@ -1025,12 +1365,12 @@ class AuctionSpider(scrapy.Spider):
         Responda APENAS com o JSON solicitado.
 
         HTML do site:
-        {html[:30000]}  # Limitando para evitar tokens excessivos
+        {html_sample}
         """
         
         try:
             self.logger.info(f"Gerando seletor de lista para {url}")
-            response_json = self.llm_api.generate(prompt)
+            response_json = await maybe_deferred_to_future(self.llm_api.generate(prompt))
             
             if not response_json:
                 self.logger.warning(f"API LLM retornou resposta vazia para {url}")
@@ -1215,7 +1555,7 @@ class AuctionSpider(scrapy.Spider):
                     
         return True
 
-    def _generate_detail_selectors(self, response, domain=None):
+    async def _generate_detail_selectors(self, response, domain=None):
         """
         Gera seletores CSS para extrair dados de detalhes de um imóvel usando LLM.
         
@@ -1232,8 +1572,8 @@ class AuctionSpider(scrapy.Spider):
         
         self.logger.info(f"Gerando seletores de detalhes para {url}")
         
-        # Captura uma amostra do HTML para enviar para a API
-        html_sample = self._get_html_sample(response.text)
+        # Versão condensada do HTML para enviar para a API
+        html_sample = condense_html(response.text)
         
         # Define a prompt para o modelo LLM
         prompt = f"""
@@ -1262,11 +1602,11 @@ class AuctionSpider(scrapy.Spider):
         2. Os seletores devem ser o mais específicos possíveis
         3. Forneça APENAS seletores CSS válidos, não descrições ou HTML
         4. Se não conseguir identificar um campo, use null como valor
-        5. Use formato JSON: {"field": "selector"}
+        5. Use formato JSON: {{"field": "selector"}}
         
         Exemplo de resposta:
         ```json
-        {
+        {{
             "title": ".property-title",
             "price": ".property-price",
             "description": ".property-description",
@@ -1276,37 +1616,15 @@ class AuctionSpider(scrapy.Spider):
             "property_type": ".property-type",
             "auction_date": ".auction-date",
             "image_url": ".property-image"
-        }
+        }}
         ```
         """
         
-        # Salva a requisição em cache para depuração
-        cache_dir = "cache/llm_responses"
-        os.makedirs(cache_dir, exist_ok=True)
-        
-        # Cria uma versão simplificada da URL para usar como nome de arquivo
-        url_safe = re.sub(r'[^\w\-_]', '_', url)[:100]
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        cache_file = os.path.join(cache_dir, f"detail_selectors_{domain}_{timestamp}_{url_safe}.json")
-        
         try:
-            # Faz a chamada para a API LLM
-            response_json = call_llm_api(prompt, api_key=os.environ.get('API_KEY_GROK'), temperature=0.3)
-            
-            # Salva a resposta original para depuração
-            with open(cache_file, 'w') as f:
-                json.dump({
-                    'url': url,
-                    'prompt': prompt,
-                    'response': response_json
-                }, f, indent=2)
-                
-            if not response_json:
-                self.logger.warning(f"API LLM retornou resposta vazia para {url}")
-                return self._get_generic_selectors()
-                
-            # Parse da resposta
-            parsed_response = parse_llm_response(response_json)
+            # Faz a chamada para a API LLM sem bloquear o reactor
+            parsed_response = await maybe_deferred_to_future(
+                self.llm_api.generate(prompt, options={'temperature': 0.3})
+            )
             
             if not parsed_response:
                 self.logger.warning(f"Não foi possível interpretar a resposta da API para {url}")
@@ -1367,51 +1685,54 @@ class AuctionSpider(scrapy.Spider):
             Para page_type='detail': dict - Dicionário de seletores ou None
         """
         try:
-            cache_entry = self.session.query(SelectorCache).filter_by(
-                url=url, 
-                page_type=page_type,
-                is_valid=True
-            ).first()
-            
-            if cache_entry:
-                # Atualiza a data de último uso e incrementa o contador
-                cache_entry.last_used = datetime.now()
-                cache_entry.use_count += 1
-                self.session.commit()
-                
-                # Retorna os seletores
-                selectors = json.loads(cache_entry.selectors)
-                
-                # Para lista, retorna a string de seletor em vez do dicionário
-                if page_type == 'list' and 'list_selector' in selectors:
-                    return selectors['list_selector']
-                return selectors
-            
-            # Se não encontrou para a URL exata, tenta encontrar para o mesmo domínio
-            # com uma taxa de sucesso alta (acima de 0.7)
             domain = urlparse(url).netloc
-            similar_entry = self.session.query(SelectorCache).filter_by(
-                domain=domain, 
-                page_type=page_type,
-                is_valid=True
-            ).filter(SelectorCache.success_rate > 0.7).order_by(
-                SelectorCache.success_rate.desc()
-            ).first()
+            selectors, exact = self.selector_store.get_cached(url, domain, page_type)
             
-            if similar_entry:
+            if selectors and exact:
+                # Atualiza a data de último uso e incrementa o contador
+                record = self.selector_store.find_url(url, domain)
+                record['use_count'] += 1
+                self.write_buffer.update(SelectorCache, 'url', url, values={
+                    'last_used': datetime.now(),
+                    'use_count': record['use_count']
+                })
+            elif selectors:
+                # Seletores de outra URL do mesmo domínio com taxa de sucesso alta
                 self.logger.info(f"Usando seletores de URL similar para {url} (domínio: {domain})")
-                selectors = json.loads(similar_entry.selectors)
-                
-                # Para lista, retorna a string de seletor em vez do dicionário
-                if page_type == 'list' and 'list_selector' in selectors:
-                    return selectors['list_selector']
-                return selectors
                 
-            return None
+            return selectors
         except Exception as e:
             self.logger.error(f"Erro ao obter seletores em cache para {url}: {str(e)}")
             return None
 
+    def _save_rule(self, domain, page_type, selectors):
+        """
+        Grava os seletores na ScrapingRule do domínio e atualiza o cache em memória.
+        
+        Args:
+            domain: Domínio do site
+            page_type: Tipo de página ('list' ou 'detail')
+            selectors: Seletor de lista (str) ou dicionário de seletores de detalhe
+        """
+        try:
+            rule = self.session.query(ScrapingRule).filter_by(domain=domain).first()
+            if not rule:
+                rule = ScrapingRule(domain=domain)
+                self.session.add(rule)
+            
+            if page_type == 'list':
+                rule.list_selector = selectors
+            else:
+                rule.detail_selectors = json.dumps(selectors)
+            
+            self.session.commit()
+            self.selector_store.set_rule(domain, page_type, selectors)
+        except Exception as e:
+            self.logger.error(f"Erro ao salvar seletores para {domain}: {str(e)}")
+            self.session.rollback()
+            # Força nova leitura do banco na próxima consulta
+            self.selector_store.invalidate(domain)
+
     def _cache_selector(self, url, domain, page_type, selectors):
         """
         Armazena seletores em cache para uso futuro.
@@ -1427,37 +1748,94 @@ class AuctionSpider(scrapy.Spider):
             if isinstance(selectors, str):
                 selectors = {'list_selector': selectors}
                 
-            # Verifica se já existe em cache
-            existing = self.session.query(SelectorCache).filter_by(
-                url=url, 
-                page_type=page_type
-            ).first()
-            
-            if existing:
-                # Atualiza o existente
-                existing.selectors = json.dumps(selectors)
-                existing.success_rate = 0.5  # Reset da taxa de sucesso
-                existing.timestamp = datetime.now()
-                self.session.commit()
-                self.logger.info(f"Seletores atualizados em cache para {url}")
-            else:
-                # Cria um novo
-                selector_cache = SelectorCache(
-                    domain=domain,
-                    url=url,
-                    page_type=page_type,
-                    selectors=json.dumps(selectors),
-                    success_rate=0.5,  # Começa com 50% de confiança
-                    created_at=datetime.now(),
-                    last_used=datetime.now()
-                )
-                self.session.add(selector_cache)
-                self.session.commit()
-                self.logger.info(f"Seletores armazenados em cache para {url}")
+            # Preserva o contador de usos de uma entrada já conhecida
+            record = self.selector_store.find_url(url, domain)
+            use_count = record['use_count'] if record else 1
+            
+            # Gravação adiada: cria a linha ou atualiza a existente
+            now = datetime.now()
+            self.write_buffer.upsert(
+                SelectorCache, 'url', url,
+                values={
+                    'selectors': json.dumps(selectors),
+                    'success_rate': 0.5  # Começa (ou recomeça) com 50% de confiança
+                },
+                insert_values={
+                    'domain': domain,
+                    'page_type': page_type,
+                    'created_at': now,
+                    'last_used': now,
+                    'use_count': 1
+                }
+            )
+            self.selector_store.set_cached(url, domain, page_type, selectors, use_count=use_count)
+            self.logger.info(f"Seletores armazenados em cache para {url}")
         except Exception as e:
             self.logger.error(f"Erro ao armazenar seletores em cache para {url}: {str(e)}")
 
-    def _update_selector_success(self, url, success, success_rate=None):
+    def _get_template_selector(self, fingerprint, page_type):
+        """
+        Obtém os seletores já usados em páginas com a mesma estrutura.
+        
+        Args:
+            fingerprint: Impressão digital estrutural da página
+            page_type: Tipo de página ('list' ou 'detail')
+            
+        Returns:
+            Seletor (str) ou dicionário de seletores do modelo, ou None
+        """
+        try:
+            selectors = self.selector_store.get_template(fingerprint, page_type)
+            if selectors:
+                record = self.selector_store.find_template(fingerprint)
+                record['use_count'] += 1
+                self.write_buffer.update(PageTemplate, 'fingerprint', fingerprint, values={
+                    'last_used': datetime.now(),
+                    'use_count': record['use_count']
+                })
+            return selectors
+        except Exception as e:
+            self.logger.error(f"Erro ao obter seletores do modelo de página {fingerprint}: {str(e)}")
+            return None
+
+    def _cache_template(self, fingerprint, domain, page_type, selectors):
+        """
+        Associa seletores recém-gerados ao modelo estrutural da página.
+        
+        Args:
+            fingerprint: Impressão digital estrutural da página (None é ignorado)
+            domain: Domínio do site
+            page_type: Tipo de página ('list' ou 'detail')
+            selectors: Seletores a serem armazenados (str ou dict)
+        """
+        if not fingerprint:
+            return
+        try:
+            if isinstance(selectors, str):
+                selectors = {'list_selector': selectors}
+            
+            now = datetime.now()
+            self.write_buffer.upsert(
+                PageTemplate, 'fingerprint', fingerprint,
+                values={
+                    'page_type': page_type,
+                    'selectors': json.dumps(selectors),
+                    'success_rate': 0.5,
+                    'is_valid': True
+                },
+                insert_values={
+                    'domain': domain,
+                    'created_at': now,
+                    'last_used': now,
+                    'use_count': 1
+                }
+            )
+            self.selector_store.set_template(fingerprint, page_type, selectors)
+            self.logger.info(f"Seletores de {page_type} associados ao modelo de página {fingerprint[:12]} ({domain})")
+        except Exception as e:
+            self.logger.error(f"Erro ao armazenar modelo de página para {domain}: {str(e)}")
+
+    def _update_selector_success(self, url, success, success_rate=None, fingerprint=None):
         """
         Atualiza a taxa de sucesso de um seletor em cache.
         
@@ -1465,31 +1843,42 @@ class AuctionSpider(scrapy.Spider):
             url: URL da página
             success: Se a extração foi bem-sucedida
             success_rate: Taxa de sucesso (opcional)
+            fingerprint: Impressão digital estrutural da página (opcional)
         """
         try:
-            # Correto: url já é o nome do campo na classe SelectorCache
-            cache_entry = self.session.query(SelectorCache).filter_by(url=url).first()
+            record = self.selector_store.find_url(url, urlparse(url).netloc)
             
-            if cache_entry:
-                if success_rate is not None:
-                    # Usa a taxa de sucesso fornecida
-                    cache_entry.success_rate = success_rate
-                else:
-                    # Calcula uma média ponderada com o histórico
-                    current_rate = cache_entry.success_rate
-                    use_count = cache_entry.use_count
-                    
-                    # Quanto mais usos, menor o impacto de um único resultado
-                    weight = 1 / (use_count + 1)
-                    new_rate = current_rate * (1 - weight) + (1.0 if success else 0.0) * weight
-                    
-                    cache_entry.success_rate = new_rate
+            if record:
+                new_rate = self._weighted_success_rate(record, success, success_rate)
                 
-                self.session.commit()
-                self.logger.info(f"Taxa de sucesso atualizada para seletor de {url}: {cache_entry.success_rate:.2f}")
+                # Gravação adiada: atualizações sucessivas da mesma URL são mescladas
+                record['success_rate'] = new_rate
+                self.write_buffer.update(SelectorCache, 'url', url, values={'success_rate': new_rate})
+                self.logger.info(f"Taxa de sucesso atualizada para seletor de {url}: {new_rate:.2f}")
+            
+            template = self.selector_store.find_template(fingerprint)
+            if template:
+                new_rate = self._weighted_success_rate(template, success, success_rate)
+                template['success_rate'] = new_rate
+                self.write_buffer.update(PageTemplate, 'fingerprint', fingerprint, values={'success_rate': new_rate})
         except Exception as e:
             self.logger.error(f"Erro ao atualizar taxa de sucesso para {url}: {str(e)}")
 
+    def _weighted_success_rate(self, record, success, success_rate=None):
+        """
+        Calcula a nova taxa de sucesso de um registro de seletores.
+        
+        Returns:
+            float: Taxa fornecida ou média ponderada com o histórico
+        """
+        if success_rate is not None:
+            # Usa a taxa de sucesso fornecida
+            return success_rate
+        
+        # Quanto mais usos, menor o impacto de um único resultado
+        weight = 1 / (record['use_count'] + 1)
+        return record['success_rate'] * (1 - weight) + (1.0 if success else 0.0) * weight
+
     def _invalidate_selector_cache(self, url):
         """
         Marca um seletor em cache como inválido.
@@ -1498,23 +1887,20 @@ class AuctionSpider(scrapy.Spider):
             url: URL da página
         """
         try:
-            # Correto: url já é o nome do campo na classe SelectorCache
-            cache_entry = self.session.query(SelectorCache).filter_by(url=url).first()
-            
-            if cache_entry:
-                cache_entry.is_valid = False
-                self.session.commit()
-                self.logger.info(f"Seletor em cache marcado como inválido para {url}")
+            self.write_buffer.update(SelectorCache, 'url', url, values={'is_valid': False})
+            self.selector_store.remove_url(url, urlparse(url).netloc)
+            self.logger.info(f"Seletor em cache marcado como inválido para {url}")
         except Exception as e:
             self.logger.error(f"Erro ao invalidar seletor em cache para {url}: {str(e)}")
 
-    def _extract_property_data(self, response, selectors):
+    def _extract_property_data(self, response, selectors, fingerprint=None):
         """
         Extrai dados de um imóvel usando seletores CSS.
         
         Args:
             response: Objeto de resposta do Scrapy
             selectors: Dicionário com seletores CSS para cada campo
+            fingerprint: Impressão digital estrutural da página (opcional)
             
         Returns:
             dict: Dados do imóvel extraídos
@@ -1523,86 +1909,24 @@ class AuctionSpider(scrapy.Spider):
         
         self.logger.info(f"Extraindo dados de imóvel em {response.url} com seletores: {selectors}")
         
-        # Função auxiliar para extrair texto de um seletor
-        def extract_text(selector_key):
-            if not selectors.get(selector_key):
-                return None
-                
-            selector = selectors[selector_key]
-            result = None
-            
-            # Tenta diferentes formatos de extração
-            try:
-                # Tenta extrair texto diretamente
-                result = response.css(f"{selector}::text").get()
-                
-                # Se não funcionou, tenta extrair o valor do atributo content (meta tags)
-                if not result:
-                    result = response.css(f"{selector}::attr(content)").get()
-                    
-                # Se ainda não funcionou, tenta extrair o HTML e limpar
-                if not result:
-                    html = response.css(f"{selector}").get()
-                    if html:
-                        # Remove todas as tags HTML para obter apenas o texto
-                        result = re.sub(r'<[^>]+>', ' ', html).strip()
-                
-                # Limpa o resultado se existir
-                if result:
-                    # Remove espaços extras e quebras de linha
-                    result = re.sub(r'\s+', ' ', result).strip()
-                    # Remove caracteres não imprimíveis
-                    result = ''.join(c for c in result if c.isprintable() or c.isspace())
-            except Exception as e:
-                self.logger.error(f"Erro ao extrair {selector_key} com seletor {selector}: {str(e)}")
-                
-            return result
-            
-        # Extrai dados principais
-        title = extract_text('title')
-        price = extract_text('price')
-        description = extract_text('description')
-        address = extract_text('address')
-        location = extract_text('location') or address  # Location pode ser o mesmo que endereço
-        area = extract_text('area')
-        property_type = extract_text('property_type')
-        auction_date = extract_text('auction_date')
-
-        # Tenta extrair imagens (pode haver múltiplas)
-        images = []
-        image_selector = selectors.get('image_url')
+        # Plano compilado para este conjunto de seletores (reutilizado entre páginas)
+        try:
+            plan = self.extraction_plans.get(selectors)
+            extracted = plan.extract(response.selector.root, response.url)
+        except Exception as e:
+            self.logger.error(f"Erro ao extrair dados com seletores {selectors}: {str(e)}")
+            extracted = {'images': []}
         
-        if image_selector:
-            try:
-                # Tenta diferentes atributos para imagens
-                for attr in ['src', 'data-src', 'data-lazy-src', 'data-original']:
-                    imgs = response.css(f"{image_selector}::attr({attr})").getall()
-                    if imgs:
-                        images.extend(imgs)
-                
-                # Se não encontrou nada, tenta seletores mais genéricos para galerias de imagens
-                if not images:
-                    # Tenta encontrar imagens em galerias comuns
-                    gallery_selectors = [
-                        '.gallery img', '.carousel img', '.slider img',
-                        '.photos img', '.images img', '[data-fancybox] img',
-                        '.owl-carousel img', '.swiper-container img'
-                    ]
-                    
-                    for gallery_selector in gallery_selectors:
-                        imgs = response.css(f"{gallery_selector}::attr(src)").getall()
-                        if imgs:
-                            images.extend(imgs)
-                            break
-                
-                # Normaliza URLs de imagens (converte relativos para absolutos)
-                images = [urljoin(response.url, img) for img in images if img]
-                
-                # Remove duplicatas preservando a ordem
-                seen = set()
-                images = [x for x in images if x not in seen and not seen.add(x)]
-            except Exception as e:
-                self.logger.error(f"Erro ao extrair imagens com seletor {image_selector}: {str(e)}")
+        # Extrai dados principais
+        title = extracted.get('title')
+        price = extracted.get('price')
+        description = extracted.get('description')
+        address = extracted.get('address')
+        location = extracted.get('location') or address  # Location pode ser o mesmo que endereço
+        area = extracted.get('area')
+        property_type = extracted.get('property_type')
+        auction_date = extracted.get('auction_date')
+        images = extracted.get('images', [])
         
         # Se não tiver título mas tiver algum outro dado, tenta extrair um título genérico da página
         if not title and (price or description or address):
@@ -1687,114 +2011,10 @@ class AuctionSpider(scrapy.Spider):
         if title or price or description:
             self.logger.info(f"Extração bem-sucedida para {response.url}")
             # Marca o seletor como bem-sucedido no cache
-            self._update_selector_success(response.url, True)
+            self._update_selector_success(response.url, True, fingerprint=fingerprint)
             return property_data
         else:
             self.logger.warning(f"Falha na extração de dados essenciais para {response.url}")
             # Marca o seletor como falho no cache
-            self._update_selector_success(response.url, False)
+            self._update_selector_success(response.url, False, fingerprint=fingerprint)
             return None
-
-    def _get_html_sample(self, html_content):
-        """
-        Extrai uma amostra representativa do HTML para enviar ao LLM.
-        
-        Args:
-            html_content: String com o conteúdo HTML completo
-            
-        Returns:
-            str: Amostra do HTML com as partes mais relevantes
-        """
-        # Limita o tamanho do HTML para evitar tokens excessivos
-        max_sample_size = 15000
-        
-        # Se o HTML já é menor que o limite, retorna ele inteiro
-        if len(html_content) <= max_sample_size:
-            return html_content
-            
-        # Extrai o conteúdo do body
-        body_match = re.search(r'<body[^>]*>(.*?)</body>', html_content, re.DOTALL | re.IGNORECASE)
-        
-        if body_match:
-            body_content = body_match.group(1)
-            
-            # Se o body é menor que o limite, retorna ele inteiro
-            if len(body_content) <= max_sample_size:
-                return f"<body>{body_content}</body>"
-                
-            # Procura por elementos com maior probabilidade de conter informações relevantes
-            # 1. Div principal de conteúdo
-            relevant_patterns = [
-                r'<(div|section|article|main)[^>]*(?:id|class)=["\'](content|main|property|detail|produto|imovel)["\'][^>]*>.*?</\1>',
-                r'<(div|section|article)[^>]*(?:id|class)=["\'](container|wrapper|auction|leilao|details|detalhes)["\'][^>]*>.*?</\1>',
-                r'<h1.*?>.*?</h1>.*?(<div.*?>.*?</div>)',
-                r'<(div|section|article)[^>]*>.*?(?:preço|valor|price|value|imóvel|property).*?</\1>'
-            ]
-            
-            # Tenta encontrar o conteúdo mais relevante
-            relevant_content = ""
-            
-            for pattern in relevant_patterns:
-                matches = re.findall(pattern, body_content, re.DOTALL | re.IGNORECASE)
-                
-                if matches:
-                    # Se encontrou múltiplas correspondências, une-as
-                    if isinstance(matches[0], tuple):
-                        # Quando os grupos são capturados, pegamos o último grupo que contém o conteúdo
-                        for match in matches:
-                            relevant_content += match[-1]
-                    else:
-                        # Quando não há grupos de captura específicos, juntamos tudo
-                        relevant_content += "".join(matches)
-                    
-                    # Se já temos conteúdo suficiente, paramos
-                    if len(relevant_content) >= max_sample_size * 0.5:
-                        break
-            
-            # Se encontrou conteúdo relevante, usa-o
-            if relevant_content and len(relevant_content) > 200:  # Verifica se é significativo
-                # Trunca se necessário
-                if len(relevant_content) > max_sample_size:
-                    relevant_content = relevant_content[:max_sample_size]
-                return f"<body>{relevant_content}</body>"
-        
-        # Se não conseguiu extrair de forma inteligente, pega as primeiras e últimas partes do HTML
-        head_size = min(2000, int(max_sample_size * 0.2))  # 20% para o head
-        
-        # Extrai a parte inicial (incluindo head e início do body)
-        start_content = html_content[:head_size]
-        
-        # Calcula quanto espaço resta para o conteúdo principal e final
-        remaining_size = max_sample_size - head_size
-        middle_size = int(remaining_size * 0.6)  # 60% para o meio
-        end_size = int(remaining_size * 0.4)     # 40% para o final
-        
-        # Tenta encontrar o início do conteúdo principal (após a navegação/menu)
-        start_body_match = re.search(r'<body[^>]*>', html_content, re.IGNORECASE)
-        menu_end_match = re.search(r'</(?:nav|header|menu)[^>]*>', html_content[head_size:], re.IGNORECASE)
-        
-        if start_body_match and menu_end_match:
-            # Calcula a posição para começar a extrair o conteúdo principal
-            body_start = start_body_match.end()
-            menu_end = head_size + menu_end_match.end()
-            
-            # Extrai a parte do meio (após menus/cabeçalhos)
-            middle_content = html_content[menu_end:menu_end + middle_size]
-            
-            # Extrai a parte final (pode conter detalhes importantes)
-            end_offset = max(0, len(html_content) - end_size)
-            end_content = html_content[end_offset:]
-            
-            return f"{start_content}...{middle_content}...{end_content}"
-        
-        # Fallback: divide o HTML em três partes aproximadamente iguais
-        third = len(html_content) // 3
-        
-        start_part = html_content[:third]
-        middle_part = html_content[third:2*third]
-        end_part = html_content[2*third:]
-        
-        # Pega uma amostra de cada parte
-        sample_size = max_sample_size // 3
-        
-        return f"{start_part[:sample_size]}...{middle_part[:sample_size]}...{end_part[:sample_size]}"
@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+"""
+Preenche as colunas tipadas (price_cents, area_m2, auction_at) dos imóveis já gravados.
+Execute com: python -m myproject.tools.backfill_typed_columns --lote 500
+"""
+
+import sys
+import argparse
+import logging
+from myproject.database.connection import engine
+from myproject.database.migrations import migrate
+from myproject.database.typed_columns import DEFAULT_CHUNK_SIZE, backfill_typed_columns
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description='Preenche as colunas tipadas de auction_data')
+    parser.add_argument('--lote', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='Linhas por transação')
+    parser.add_argument('--todas', action='store_true',
+                        help='Recalcula também as linhas já preenchidas')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(name)s] %(levelname)s: %(message)s')
+
+    migrate(engine)
+    stats = backfill_typed_columns(engine, chunk_size=args.lote, only_missing=not args.todas)
+    print(f"Linhas lidas: {stats['scanned']}, atualizadas: {stats['updated']}, blocos: {stats['chunks']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
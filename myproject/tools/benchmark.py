@@ -0,0 +1,722 @@
+#!/usr/bin/env python
+"""
+Benchmarks dos componentes de desempenho do scraper de leilões.
+Execute com: python -m myproject.tools.benchmark --teste classificador
+"""
+
+import os
+import re
+import sys
+import glob
+import time
+import random
+import argparse
+from urllib.parse import urljoin
+
+
+def gerar_pagina_listagem(num_cards=2000, seed=0):
+    """
+    Gera uma página de listagem sintética grande (vários MB com num_cards altos).
+
+    Args:
+        num_cards: Número de cards de imóveis na página
+        seed: Semente para tornar o corpus reprodutível
+
+    Returns:
+        str: HTML da página
+    """
+    rnd = random.Random(seed)
+    cards = []
+    for i in range(num_cards):
+        preco = f"{rnd.randint(50, 3000)}.{rnd.randint(0, 999):03d},00"
+        cards.append(
+            f'<div class="col-md-4 card-imovel" data-id="{i}">'
+            f'<a href="/imovel/{i}" class="link-imovel">'
+            f'<img src="/fotos/{i}.jpg" alt="Imóvel {i}"></a>'
+            f'<div class="card-body"><h3 class="titulo">Apartamento {i} - Centro</h3>'
+            f'<span class="preco-lance">R$ {preco}</span>'
+            f'<p class="descricao-curta">Área: {rnd.randint(30, 400)} m² - 2 quartos</p>'
+            f'</div></div>\n'
+        )
+    return (
+        '<html><head><title>Leilão de Imóveis</title>'
+        '<script>var config = {"tracking": true};</script></head><body>'
+        '<header class="topo"><nav class="menu">Início | Leilões | Contato</nav></header>'
+        '<form class="filtros">Filtrar por cidade <select name="cidade"></select>'
+        'Ordenar por <select name="ordem"></select></form>'
+        '<section id="lista-imoveis" class="grid resultados">'
+        + ''.join(cards) +
+        '</section><ul class="pagination"><li><a href="?page=2">Próxima</a></li></ul>'
+        '</body></html>'
+    )
+
+
+def gerar_pagina_detalhe(seed=0, num_paragrafos=40):
+    """
+    Gera uma página de detalhe sintética com galeria, scripts e descrição longa.
+
+    Args:
+        seed: Semente para tornar o corpus reprodutível
+        num_paragrafos: Número de parágrafos da descrição
+
+    Returns:
+        str: HTML da página
+    """
+    rnd = random.Random(seed)
+    lote = rnd.randint(1000, 99999)
+    paragrafos = ''.join(
+        f'<p>Parágrafo {i} da descrição do imóvel, com {rnd.randint(1, 5)} dormitórios e vaga.</p>'
+        for i in range(num_paragrafos)
+    )
+    fotos = ''.join(f'<img data-src="/fotos/{lote}/{i}.jpg" class="foto">' for i in range(12))
+    return (
+        f'<html><head><title>Lote {lote}</title><meta property="og:title" content="Lote {lote}">'
+        '<script>' + 'var x = 1;' * 200 + '</script></head><body>'
+        '<header class="topo"><nav class="menu">Início | Leilões</nav></header>'
+        f'<main class="detalhe-imovel"><h1 class="titulo-imovel">\n  Casa {lote} - Jardim América\n</h1>'
+        f'<div class="valores"><span class="rotulo">Lance mínimo:</span><span class="preco-lance">R$ {rnd.randint(50, 900)}.000,00</span></div>'
+        f'<div class="descricao">{paragrafos}</div>'
+        f'<div class="endereco"><i class="icone"></i> Rua {lote}, São Paulo - SP</div>'
+        f'<ul class="caracteristicas"><li class="area">{rnd.randint(40, 400)} m²</li><li class="tipo">Casa</li></ul>'
+        f'<div class="data-leilao"><b>1º leilão:</b> 10/11/2025 às 10h</div>'
+        f'<div class="galeria">{fotos}</div></main>'
+        '<footer class="rodape">Contato</footer></body></html>'
+    )
+
+
+# Seletores usados com as páginas de detalhe sintéticas
+SELETORES_DETALHE = {
+    'title': 'h1.titulo-imovel',
+    'price': '.preco-lance',
+    'description': '.descricao',
+    'address': '.endereco',
+    'location': '.localizacao',
+    'area': '.caracteristicas .area',
+    'property_type': '.caracteristicas .tipo',
+    'auction_date': '.data-leilao',
+    'image_url': '.galeria img',
+}
+
+
+def carregar_corpus(diretorio=None, num_paginas=10, num_cards=2000):
+    """
+    Carrega páginas HTML de um diretório ou gera um corpus sintético.
+    """
+    if diretorio:
+        paginas = []
+        for caminho in sorted(glob.glob(os.path.join(diretorio, '*.htm*'))):
+            with open(caminho, 'r', encoding='utf-8', errors='ignore') as f:
+                paginas.append(f.read())
+        return paginas
+    return [gerar_pagina_listagem(num_cards=num_cards, seed=i) for i in range(num_paginas)]
+
+
+def legacy_detect_page_type(html_content):
+    """
+    Reprodução da heurística de regex original de AuctionSpider._detect_page_type
+    (apenas a parte de conteúdo), usada como linha de base no benchmark.
+    """
+    list_patterns = [
+        r'class=".*?lista.*?"', r'class=".*?grid.*?"', r'class=".*?results.*?"',
+        r'class=".*?catalog.*?"', r'class=".*?listing.*?"', r'class=".*?search.*?results.*?"',
+        r'class=".*?cards.*?"', r'class=".*?properties.*?"', r'class=".*?imoveis.*?"',
+        r'<div[^>]*id=".*?lista.*?"', r'<div[^>]*id=".*?grid.*?"', r'<div[^>]*id=".*?results.*?"',
+        r'class=".*?pagination.*?"', r'class=".*?paginacao.*?"', r'class=".*?pages.*?"',
+        r'class=".*?resultados.*?"', r'class=".*?busca.*?"', r'class=".*?search.*?"'
+    ]
+    detail_patterns = [
+        r'class=".*?detalhe.*?"', r'class=".*?produto.*?"', r'class=".*?imovel.*?info.*?"',
+        r'<h1.*?>.*?</h1>', r'class=".*?price.*?"', r'class=".*?valor.*?"',
+        r'class=".*?property.*?detail.*?"', r'class=".*?auction-details.*?"',
+        r'class=".*?product-info.*?"', r'class=".*?item-detail.*?"',
+        r'<div[^>]*id=".*?detalhe.*?"', r'<div[^>]*id=".*?produto.*?"',
+        r'class=".*?caracteristicas.*?"', r'class=".*?especificacoes.*?"',
+        r'class=".*?ficha.*?tecnica.*?"', r'class=".*?descricao.*?imovel.*?"',
+        r'class=".*?galeria.*?"', r'class=".*?gallery.*?"', r'class=".*?fotos.*?"',
+        r'class=".*?lances.*?"', r'class=".*?ofertas.*?"', r'class=".*?bid.*?"'
+    ]
+    list_matches = sum(1 for p in list_patterns if re.search(p, html_content, re.IGNORECASE))
+    detail_matches = sum(1 for p in detail_patterns if re.search(p, html_content, re.IGNORECASE))
+    if re.search(r'R\$\s*[\d\.,]+', html_content):
+        detail_matches += 2
+    if re.search(r'(área|area)\s*:?\s*\d+\s*(m²|m2)', html_content, re.IGNORECASE):
+        detail_matches += 2
+    if re.search(r'(data\s*do\s*leilão|leilão\s*em|data\s*:)', html_content, re.IGNORECASE):
+        detail_matches += 2
+    multiple_items_pattern = r'(<div[^>]*class="[^"]*(?:card|item|produto|imovel|property)[^"]*".*?){3,}'
+    if re.search(multiple_items_pattern, html_content, re.DOTALL | re.IGNORECASE):
+        list_matches += 3
+    if re.search(r'class="[^"]*(?:pag(?:ination|inacao|e)|pages|numeros)[^"]*"', html_content, re.IGNORECASE):
+        list_matches += 2
+    if re.search(r'(?:próxima|proxima|próximo|proximo|anterior|seguinte|next|prev|previous)', html_content, re.IGNORECASE):
+        list_matches += 1
+    if re.search(r'(?:filtrar|ordenar|filtros|filtro por|ordernar por|classificar)', html_content, re.IGNORECASE):
+        list_matches += 1
+    if re.search(r'(?:compartilhar|compartilhe|enviar|contato|contate|whatsapp|email|telefone)', html_content, re.IGNORECASE):
+        detail_matches += 1
+    if re.search(r'(?:galeria|slideshow|carrossel|carousel|slider|slide)', html_content, re.IGNORECASE):
+        detail_matches += 1
+    page_type = 'detail' if detail_matches > list_matches else 'list'
+    return page_type, list_matches, detail_matches
+
+
+def legacy_extract_fields(selector, selectors, base_url):
+    """
+    Reprodução da extração original de AuctionSpider._extract_property_data
+    (campos de texto e imagens), usada como linha de base no benchmark.
+    """
+    def extract_text(selector_key):
+        if not selectors.get(selector_key):
+            return None
+        css = selectors[selector_key]
+        result = selector.css(f"{css}::text").get()
+        if not result:
+            result = selector.css(f"{css}::attr(content)").get()
+        if not result:
+            html = selector.css(f"{css}").get()
+            if html:
+                result = re.sub(r'<[^>]+>', ' ', html).strip()
+        if result:
+            result = re.sub(r'\s+', ' ', result).strip()
+            result = ''.join(c for c in result if c.isprintable() or c.isspace())
+        return result
+
+    data = {field: extract_text(field) for field in
+            ('title', 'price', 'description', 'address', 'location', 'area', 'property_type', 'auction_date')}
+
+    images = []
+    image_selector = selectors.get('image_url')
+    if image_selector:
+        for attr in ['src', 'data-src', 'data-lazy-src', 'data-original']:
+            images.extend(selector.css(f"{image_selector}::attr({attr})").getall())
+        if not images:
+            for gallery_selector in ['.gallery img', '.carousel img', '.slider img', '.photos img',
+                                     '.images img', '[data-fancybox] img', '.owl-carousel img',
+                                     '.swiper-container img']:
+                imgs = selector.css(f"{gallery_selector}::attr(src)").getall()
+                if imgs:
+                    images.extend(imgs)
+                    break
+        images = [urljoin(base_url, img) for img in images if img]
+        seen = set()
+        images = [x for x in images if x not in seen and not seen.add(x)]
+    data['images'] = images
+    return data
+
+
+# Heurística original de CAPTCHA: substrings em toda a página e na URL
+LEGACY_CAPTCHA_PATTERNS = (
+    'captcha', 'recaptcha', 'validate', 'verification',
+    'robot', 'human', 'bot check', 'security check',
+    'perfdrive', 'cloudflare', 'ddos', 'protection',
+    'verify you are human',
+)
+
+LEGACY_CAPTCHA_SELECTORS = (
+    'iframe[src*="captcha"]',
+    'iframe[src*="recaptcha"]',
+    'div.g-recaptcha',
+    'div[class*="captcha"]',
+    'input[name*="captcha"]',
+)
+
+
+def legacy_is_text(response):
+    """Reprodução da verificação original de resposta textual."""
+    from myproject.utils.page_analysis import TEXT_CONTENT_TYPES
+
+    content_type = response.headers.get('Content-Type', b'').decode('utf-8', 'ignore').lower()
+    if any(t in content_type for t in TEXT_CONTENT_TYPES):
+        _ = response.text
+        return True
+    return False
+
+
+def legacy_is_captcha(response):
+    """Reprodução da detecção original de CAPTCHA (_is_captcha_page)."""
+    if not legacy_is_text(response):
+        return False
+    page_text = response.text.lower()
+    if any(p in page_text or p in response.url.lower() for p in LEGACY_CAPTCHA_PATTERNS):
+        return True
+    return any(response.css(s) for s in LEGACY_CAPTCHA_SELECTORS)
+
+
+def legacy_analisar_resposta(response):
+    """
+    Reprodução das etapas originais de parse + parse_detail sobre uma resposta:
+    cada etapa decodifica/copia o texto por conta própria.
+    """
+    from myproject.utils.page_classifier import page_classifier
+    from myproject.utils.dom_fingerprint import dom_fingerprint
+
+    resultado = None
+    # parse e, em seguida, parse_detail repetem as mesmas verificações
+    for _ in range(2):
+        legacy_is_text(response)
+        legacy_is_captcha(response)
+        resultado = (page_classifier.classify(response.text).page_type, dom_fingerprint(response.text))
+    return resultado
+
+
+def analisar_resposta(response):
+    """Mesmas etapas usando a análise compartilhada (PageAnalysis)."""
+    from myproject.utils.page_analysis import PageAnalysis
+
+    resultado = None
+    for _ in range(2):
+        analise = PageAnalysis.of(response)
+        analise.is_text
+        analise.is_captcha
+        resultado = (analise.classification.page_type, analise.fingerprint)
+    return resultado
+
+
+def medir(funcao, paginas, repeticoes=1):
+    """
+    Mede páginas por segundo de uma função aplicada ao corpus.
+
+    Returns:
+        tuple: (páginas/segundo, lista de resultados da última repetição)
+    """
+    resultados = []
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultados = [funcao(pagina) for pagina in paginas]
+    duracao = time.perf_counter() - inicio
+    total = len(paginas) * repeticoes
+    return (total / duracao if duracao > 0 else float('inf')), resultados
+
+
+def benchmark_classificador(args):
+    """Compara o classificador de passagem única com a heurística original."""
+    from myproject.utils.page_classifier import page_classifier
+
+    paginas = carregar_corpus(args.corpus, args.paginas, args.cards)
+    tamanho_medio = sum(len(p) for p in paginas) / max(len(paginas), 1)
+
+    print(f"Corpus: {len(paginas)} páginas, tamanho médio {tamanho_medio / 1024:.0f} KB")
+
+    pps_novo, novos = medir(page_classifier.classify, paginas, args.repeticoes)
+    pps_antigo, antigos = medir(legacy_detect_page_type, paginas, args.repeticoes)
+
+    divergencias = sum(1 for novo, antigo in zip(novos, antigos) if novo.page_type != antigo[0])
+
+    print(f"Heurística original: {pps_antigo:.2f} páginas/s")
+    print(f"Classificador compilado: {pps_novo:.2f} páginas/s")
+    print(f"Aceleração: {pps_novo / pps_antigo:.1f}x")
+    print(f"Divergências de classificação: {divergencias}/{len(paginas)}")
+
+
+def benchmark_condensador(args):
+    """Mede o tempo e a redução de tamanho do condensador de HTML para prompts."""
+    from myproject.utils.html_condenser import condense_html
+
+    paginas = carregar_corpus(args.corpus, args.paginas, args.cards)
+    pps, condensadas = medir(condense_html, paginas, args.repeticoes)
+
+    original = sum(len(p) for p in paginas)
+    # Prompt anterior de listagem: os primeiros 30000 caracteres do HTML bruto
+    truncado = sum(min(len(p), 30000) for p in paginas)
+    condensado = sum(len(c) for c in condensadas)
+
+    print(f"Corpus: {len(paginas)} páginas, tamanho médio {original / max(len(paginas), 1) / 1024:.0f} KB")
+    print(f"Condensador: {pps:.2f} páginas/s ({1000 / pps:.1f} ms/página)")
+    print(f"Tamanho médio condensado: {condensado / max(len(paginas), 1):.0f} caracteres")
+    print(f"Redução frente ao HTML completo: {original / max(condensado, 1):.1f}x")
+    print(f"Redução frente ao prompt anterior (html[:30000]): {truncado / max(condensado, 1):.1f}x")
+
+
+def benchmark_extracao(args):
+    """Compara os planos de extração compilados com a extração original por campo."""
+    from parsel import Selector
+    from myproject.utils.extraction_plan import ExtractionPlanCache
+
+    if args.corpus:
+        paginas = carregar_corpus(args.corpus)
+    else:
+        paginas = [gerar_pagina_detalhe(seed=i) for i in range(args.paginas)]
+
+    # As páginas são analisadas antes da medição, como o Scrapy faz uma vez por resposta
+    seletores = [Selector(text=pagina) for pagina in paginas]
+    base_url = 'https://exemplo.com.br/imovel/1'
+    planos = ExtractionPlanCache()
+
+    repeticoes = max(args.repeticoes, 20)
+    pps_antigo, antigos = medir(lambda sel: legacy_extract_fields(sel, SELETORES_DETALHE, base_url),
+                                seletores, repeticoes)
+    pps_novo, novos = medir(lambda sel: planos.get(SELETORES_DETALHE).extract(sel.root, base_url),
+                            seletores, repeticoes)
+
+    divergencias = sum(1 for novo, antigo in zip(novos, antigos) if novo != antigo)
+
+    print(f"Corpus: {len(paginas)} páginas de detalhe")
+    print(f"Extração original: {pps_antigo:.1f} páginas/s")
+    print(f"Plano compilado: {pps_novo:.1f} páginas/s")
+    print(f"Aceleração: {pps_novo / pps_antigo:.1f}x")
+    print(f"Páginas com resultado diferente: {divergencias}/{len(paginas)}")
+    print(f"Planos: {planos.get_stats()}")
+
+
+def benchmark_analise(args):
+    """Compara CPU e pico de memória da análise compartilhada com as etapas originais."""
+    import gc
+    import tracemalloc
+    from scrapy.http import HtmlResponse
+
+    paginas = carregar_corpus(args.corpus, args.paginas, args.cards)
+
+    def respostas():
+        return [HtmlResponse(url=f'https://exemplo.com.br/leiloes?page={i}', body=p.encode('utf-8'),
+                             encoding='utf-8', headers={'Content-Type': 'text/html; charset=utf-8'})
+                for i, p in enumerate(paginas)]
+
+    def pico(funcao):
+        resposta = respostas()[0]
+        gc.collect()
+        tracemalloc.start()
+        funcao(resposta)
+        _, maximo = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return maximo
+
+    tempos = {}
+    resultados = {}
+    for nome, funcao in (('original', legacy_analisar_resposta), ('compartilhada', analisar_resposta)):
+        total = 0.0
+        for _ in range(args.repeticoes):
+            lote = respostas()
+            inicio = time.perf_counter()
+            resultados[nome] = [funcao(r) for r in lote]
+            total += time.perf_counter() - inicio
+        tempos[nome] = total / args.repeticoes
+
+    print(f"Corpus: {len(paginas)} páginas, tamanho médio {sum(map(len, paginas)) / len(paginas) / 1024:.0f} KB")
+    print(f"Etapas originais: {tempos['original'] / len(paginas) * 1000:.1f} ms/página, "
+          f"pico {pico(legacy_analisar_resposta) / 1024 / 1024:.1f} MB")
+    print(f"Análise compartilhada: {tempos['compartilhada'] / len(paginas) * 1000:.1f} ms/página, "
+          f"pico {pico(analisar_resposta) / 1024 / 1024:.1f} MB")
+    print(f"Aceleração: {tempos['original'] / tempos['compartilhada']:.1f}x")
+    print(f"Resultados iguais: {resultados['original'] == resultados['compartilhada']}")
+
+
+def benchmark_captcha(args):
+    """Compara acerto e vazão do detector de CAPTCHA com a heurística original."""
+    from scrapy.http import HtmlResponse
+    from myproject.tools.captcha_fixtures import CAPTCHA_FIXTURES
+    from myproject.utils.captcha_detector import captcha_detector
+
+    def resposta(exemplo):
+        return HtmlResponse(url=exemplo['url'], status=exemplo['status'], headers=exemplo['headers'],
+                            body=exemplo['body'].encode('utf-8'), encoding='utf-8')
+
+    print(f"Exemplos rotulados: {len(CAPTCHA_FIXTURES)}")
+    for nome, detectar in (('original', legacy_is_captcha),
+                           ('detector', lambda r: captcha_detector.detect_response(r).is_captcha)):
+        falsos_positivos = []
+        falsos_negativos = []
+        for exemplo in CAPTCHA_FIXTURES:
+            veredito = detectar(resposta(exemplo))
+            if veredito and not exemplo['expected']:
+                falsos_positivos.append(exemplo['name'])
+            elif not veredito and exemplo['expected']:
+                falsos_negativos.append(exemplo['name'])
+        print(f"{nome}: falsos positivos {len(falsos_positivos)} {falsos_positivos}, "
+              f"falsos negativos {len(falsos_negativos)} {falsos_negativos}")
+
+    # Vazão sobre o corpus de listagens (caso comum: nenhuma página é desafio)
+    paginas = carregar_corpus(args.corpus, args.paginas, args.cards)
+    respostas = [HtmlResponse(url=f'https://exemplo.com.br/leiloes?page={i}', body=p.encode('utf-8'),
+                              encoding='utf-8', headers={'Content-Type': 'text/html; charset=utf-8'})
+                 for i, p in enumerate(paginas)]
+    # Decodifica os corpos antes da medição, como acontece no spider
+    for r in respostas:
+        r.text
+
+    pps_antigo, _ = medir(legacy_is_captcha, respostas, args.repeticoes)
+    pps_novo, _ = medir(lambda r: captcha_detector.detect_response(r).is_captcha, respostas, args.repeticoes)
+    mb = sum(len(p) for p in paginas) / 1024 / 1024
+
+    print(f"Corpus: {len(paginas)} páginas, {mb:.1f} MB")
+    print(f"Heurística original: {pps_antigo:.1f} páginas/s ({pps_antigo * mb / len(paginas):.1f} MB/s)")
+    print(f"Detector: {pps_novo:.1f} páginas/s ({pps_novo * mb / len(paginas):.1f} MB/s)")
+    print(f"Aceleração: {pps_novo / pps_antigo:.1f}x")
+
+
+def gerar_screenshot(seed=0, largura=1920, altura=1080):
+    """
+    Gera um screenshot sintético de página de detalhe: cabeçalho, blocos de
+    texto e uma foto (ruído colorido).
+
+    Returns:
+        bytes: Imagem PNG, como a retornada pelo Selenium
+    """
+    import io
+    from PIL import Image, ImageDraw
+
+    rnd = random.Random(seed)
+    imagem = Image.new('RGB', (largura, altura), 'white')
+    desenho = ImageDraw.Draw(imagem)
+    desenho.rectangle((0, 0, largura, 90), fill=(20, 60, 120))
+    desenho.text((40, 30), f"Leilão de Imóveis - Lote {seed}", fill='white')
+
+    # Foto do imóvel
+    foto_largura, foto_altura = 760, 480
+    foto = Image.frombytes('RGB', (foto_largura // 8, foto_altura // 8),
+                           bytes(rnd.getrandbits(8) for _ in range(foto_largura // 8 * foto_altura // 8 * 3)))
+    imagem.paste(foto.resize((foto_largura, foto_altura), Image.BILINEAR), (40, 130))
+
+    # Texto da descrição
+    y = 130
+    for linha in range(40):
+        texto = ' '.join(rnd.choice(['Apartamento', 'área', '120 m²', 'lance', 'R$ 350.000,00', 'garagem',
+                                     'matrícula', 'leilão', 'quartos', 'Centro']) for _ in range(8))
+        desenho.text((840, y), texto, fill=(40, 40, 40))
+        y += 22
+    desenho.rectangle((0, altura - 60, largura, altura), fill=(230, 230, 230))
+
+    buffer = io.BytesIO()
+    imagem.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def benchmark_screenshots(args):
+    """Compara o espaço em disco dos PNGs originais com o armazenamento compacto."""
+    import shutil
+    import tempfile
+    from myproject.utils.screenshot_store import ScreenshotStore
+
+    # Parte das páginas é capturada de novo (mesmo imóvel em outra execução)
+    capturas = [gerar_screenshot(seed=i) for i in range(args.paginas)]
+    capturas += capturas[:max(args.paginas // 2, 1)]
+
+    original = sum(len(c) for c in capturas)
+    print(f"Capturas: {len(capturas)} ({args.paginas} páginas distintas), PNG médio {original / len(capturas) / 1024:.0f} KB")
+
+    for formato in ('webp', 'jpeg'):
+        diretorio = tempfile.mkdtemp()
+        try:
+            armazenamento = ScreenshotStore(diretorio, fmt=formato)
+            inicio = time.perf_counter()
+            for captura in capturas:
+                armazenamento.save(captura)
+            duracao = time.perf_counter() - inicio
+            stats = armazenamento.get_stats()
+            gravado = stats['bytes_written']
+            print(f"{formato}: {gravado / len(capturas) / 1024:.0f} KB/captura (com miniatura), "
+                  f"{len(capturas) / duracao:.1f} capturas/s, duplicatas {stats['duplicates']}, "
+                  f"redução {original / gravado:.1f}x, "
+                  f"10 mil itens: {original / len(capturas) * 10000 / 1024 ** 3:.1f} GB -> "
+                  f"{gravado / len(capturas) * 10000 / 1024 ** 3:.2f} GB")
+        finally:
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def gerar_item(i, seed=0):
+    """Gera um item de imóvel sintético, como o emitido pelo spider."""
+    rnd = random.Random(seed * 1000003 + i)
+    return {
+        'url': f'https://leilao{i % 20}.com.br/imovel/{i}',
+        'title': f'Apartamento {i} - Centro',
+        'price': f"R$ {rnd.randint(50, 3000)}.{rnd.randint(0, 999):03d},00",
+        'description': 'Apartamento com 2 quartos, sala, cozinha e vaga de garagem. ' * 5,
+        'address': f'Rua {rnd.randint(1, 500)}, Centro',
+        'auction_date': f'{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/2025',
+        'area': f'{rnd.randint(30, 400)} m²',
+        'property_type': 'Apartamento',
+        'image_url': f'https://leilao{i % 20}.com.br/fotos/{i}.jpg',
+    }
+
+
+def legacy_salvar_item(session, pipeline, item):
+    """Pipeline anterior: SELECT pela URL e um commit por item."""
+    from datetime import datetime
+    from myproject.database.models import AuctionData
+
+    url = item.get('url', '')
+    if session.query(AuctionData).filter_by(url=url).first():
+        return
+    session.add(AuctionData(
+        url=url,
+        title=item.get('title', ''),
+        price=pipeline.clean_price(item.get('price', '')),
+        description=item.get('description', ''),
+        address=item.get('address', ''),
+        auction_date=item.get('auction_date', ''),
+        area=item.get('area', ''),
+        property_type=item.get('property_type', ''),
+        image_url=item.get('image_url', ''),
+        screenshot_path=item.get('screenshot_path', ''),
+        extracted_at=datetime.now(),
+        source_domain=pipeline.extract_domain(url),
+    ))
+    session.commit()
+
+
+def benchmark_pipeline(args):
+    """Compara itens/s do pipeline anterior (commit por item) com o pipeline em lotes."""
+    import shutil
+    import tempfile
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from myproject.database.models import Base
+    from myproject.pipelines import DatabasePipeline
+
+    itens = [gerar_item(i) for i in range(args.paginas * 100)]
+    print(f"Itens: {len(itens)} (cada execução grava todos e depois os reprocessa)")
+
+    def banco():
+        diretorio = tempfile.mkdtemp()
+        engine = create_engine(f"sqlite:///{os.path.join(diretorio, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        return diretorio, engine
+
+    def relatorio(nome, tempos):
+        print(f"{nome}: " + ', '.join(f"{rotulo} {len(itens) / duracao:,.0f} itens/s" for rotulo, duracao in tempos))
+
+    diretorio, engine = banco()
+    try:
+        pipeline = DatabasePipeline(engine=engine)
+        session = sessionmaker(bind=engine)()
+        tempos = []
+        for rotulo in ('novos', 'existentes'):
+            inicio = time.perf_counter()
+            for item in itens:
+                legacy_salvar_item(session, pipeline, item)
+            tempos.append((rotulo, time.perf_counter() - inicio))
+        session.close()
+        relatorio('Anterior (commit por item)', tempos)
+    finally:
+        engine.dispose()
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    for writer_thread in (False, True):
+        diretorio, engine = banco()
+        try:
+            tempos = []
+            for rotulo in ('novos', 'existentes'):
+                pipeline = DatabasePipeline(engine=engine, writer_thread=writer_thread)
+                inicio = time.perf_counter()
+                pipeline.open_spider(None)
+                for item in itens:
+                    pipeline.process_item(item, None)
+                pipeline.close_spider(None)
+                tempos.append((rotulo, time.perf_counter() - inicio))
+            nome = 'Em lotes' + (' (thread de gravação)' if writer_thread else '')
+            relatorio(f"{nome}, lote {pipeline.batch_size}", tempos)
+        finally:
+            engine.dispose()
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def benchmark_contencao(args):
+    """Mede gravações e leituras simultâneas no SQLite com e sem WAL/busy_timeout."""
+    import shutil
+    import tempfile
+    import threading
+    from sqlalchemy import create_engine, select
+    from myproject.database.connection import create_db_engine
+    from myproject.database.models import Base, AuctionData
+    from myproject.pipelines import DatabasePipeline
+
+    escritores, leitores = 4, 4
+    lotes = args.paginas * 5
+    print(f"{escritores} threads gravando {lotes} lotes de 20 itens cada, {leitores} threads lendo")
+
+    for nome, criar in (('Padrão (journal rollback)', lambda url: create_engine(url)),
+                        ('WAL + busy_timeout + synchronous=NORMAL', create_db_engine)):
+        diretorio = tempfile.mkdtemp()
+        engine = criar(f"sqlite:///{os.path.join(diretorio, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        try:
+            pipeline = DatabasePipeline(engine=engine)
+            pipeline.open_spider(None)
+            statement = pipeline._build_upsert()
+            erros, latencias, leituras = [], [], [0]
+            lock = threading.Lock()
+            terminou = threading.Event()
+
+            def escrever(n):
+                for lote in range(lotes):
+                    linhas = [pipeline._row_from_item(gerar_item(i), gerar_item(i)['url'])
+                              for i in range((n * lotes + lote) * 20, (n * lotes + lote + 1) * 20)]
+                    inicio = time.perf_counter()
+                    try:
+                        with engine.begin() as conn:
+                            conn.execute(statement, linhas)
+                    except Exception as e:
+                        with lock:
+                            erros.append(str(e).splitlines()[0])
+                        continue
+                    with lock:
+                        latencias.append(time.perf_counter() - inicio)
+
+            def ler():
+                # Leitura percorrendo o resultado aos poucos, como a listagem do browse_data
+                while not terminou.is_set():
+                    try:
+                        with engine.connect() as conn:
+                            resultado = conn.execute(select(AuctionData.__table__.c.url, AuctionData.__table__.c.price)
+                                                     .order_by(AuctionData.__table__.c.id.desc()).limit(200))
+                            while resultado.fetchmany(20):
+                                time.sleep(0.001)
+                        with lock:
+                            leituras[0] += 1
+                    except Exception as e:
+                        with lock:
+                            erros.append(str(e).splitlines()[0])
+
+            threads_leitura = [threading.Thread(target=ler) for _ in range(leitores)]
+            threads_escrita = [threading.Thread(target=escrever, args=(n,)) for n in range(escritores)]
+            inicio = time.perf_counter()
+            for thread in threads_leitura + threads_escrita:
+                thread.start()
+            for thread in threads_escrita:
+                thread.join()
+            duracao = time.perf_counter() - inicio
+            terminou.set()
+            for thread in threads_leitura:
+                thread.join()
+
+            latencias.sort()
+            p95 = latencias[int(len(latencias) * 0.95)] * 1000 if latencias else 0
+            print(f"{nome}: {len(latencias) * 20 / duracao:,.0f} itens/s gravados, "
+                  f"{leituras[0] / duracao:,.0f} leituras/s, p95 por lote {p95:.1f} ms, "
+                  f"erros {len(erros)}" + (f" ({erros[0]})" if erros else ''))
+        finally:
+            engine.dispose()
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+
+BENCHMARKS = {
+    'classificador': benchmark_classificador,
+    'condensador': benchmark_condensador,
+    'extracao': benchmark_extracao,
+    'analise': benchmark_analise,
+    'captcha': benchmark_captcha,
+    'screenshots': benchmark_screenshots,
+    'pipeline': benchmark_pipeline,
+    'contencao': benchmark_contencao,
+}
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description='Benchmarks do scraper de leilões')
+    parser.add_argument('--teste', choices=sorted(BENCHMARKS), required=True,
+                        help='Componente a ser medido')
+    parser.add_argument('--corpus', default=None,
+                        help='Diretório com páginas HTML gravadas (padrão: corpus sintético)')
+    parser.add_argument('--paginas', type=int, default=10,
+                        help='Número de páginas do corpus sintético')
+    parser.add_argument('--cards', type=int, default=2000,
+                        help='Número de cards por página de listagem sintética')
+    parser.add_argument('--repeticoes', type=int, default=1,
+                        help='Número de repetições da medição')
+
+    args = parser.parse_args()
+    BENCHMARKS[args.teste](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,7 @@ import sys
 from datetime import datetime
 from sqlalchemy.orm import sessionmaker
 from myproject.database.models import AuctionData, ProblemSite, engine
+from myproject.utils.value_parsers import parse_price_cents
 
 def clear_screen():
     """Limpa a tela do terminal"""
@@ -116,6 +117,28 @@ def search_items(session):
         
     input("Pressione Enter para voltar ao menu principal...")
 
+def read_price(prompt):
+    """
+    Lê um preço digitado ("1500000", "1.500.000,00" ou "R$ 1.500.000").
+
+    Returns:
+        int: Valor em centavos, ou None se o campo ficou em branco
+
+    Raises:
+        ValueError: Se o valor não for um número
+    """
+    value = input(prompt).strip()
+    if not value:
+        return None
+    cents = parse_price_cents(value)
+    if cents is None:
+        raise ValueError(value)
+    return cents
+
+def format_cents(cents):
+    """Formata centavos como preço em reais ("R$ 1.500.000,00")."""
+    return "R$ " + f"{cents / 100:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+
 def filter_by_price(session):
     """Filtra itens por faixa de preço"""
     clear_screen()
@@ -128,22 +151,19 @@ def filter_by_price(session):
         return
     
     try:
-        min_price = input("Preço mínimo (deixe em branco para não definir): ").strip()
-        min_price = float(min_price) if min_price else None
-        
-        max_price = input("Preço máximo (deixe em branco para não definir): ").strip()
-        max_price = float(max_price) if max_price else None
+        min_price = read_price("Preço mínimo (deixe em branco para não definir): ")
+        max_price = read_price("Preço máximo (deixe em branco para não definir): ")
         
+        # Faixa sobre a coluna indexada em centavos (busca no índice, sem conversão por linha)
         query = session.query(AuctionData)
         
         if min_price is not None:
-            # Tenta converter o preço para número antes de comparar
-            query = query.filter(AuctionData.price.cast(float) >= min_price)
+            query = query.filter(AuctionData.price_cents >= min_price)
             
         if max_price is not None:
-            query = query.filter(AuctionData.price.cast(float) <= max_price)
+            query = query.filter(AuctionData.price_cents <= max_price)
             
-        items = query.all()
+        items = query.order_by(AuctionData.price_cents).all()
         
         if not items:
             print("\nNenhum item encontrado nessa faixa de preço.\n")
@@ -153,11 +173,11 @@ def filter_by_price(session):
         clear_screen()
         price_range = ""
         if min_price is not None and max_price is not None:
-            price_range = f"ENTRE {min_price} E {max_price}"
+            price_range = f"ENTRE {format_cents(min_price)} E {format_cents(max_price)}"
         elif min_price is not None:
-            price_range = f"ACIMA DE {min_price}"
+            price_range = f"ACIMA DE {format_cents(min_price)}"
         elif max_price is not None:
-            price_range = f"ABAIXO DE {max_price}"
+            price_range = f"ABAIXO DE {format_cents(max_price)}"
             
         print_header(f"IMÓVEIS {price_range}")
         print(f"Total de itens encontrados: {len(items)}\n")
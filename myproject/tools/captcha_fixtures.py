@@ -0,0 +1,244 @@
+"""
+Conjunto rotulado de respostas para o detector de CAPTCHA/anti-bot.
+
+Cada exemplo reproduz a forma de uma resposta real (status, cabeçalhos, URL e
+HTML) com o rótulo esperado. Os negativos incluem páginas de leilão que citam
+palavras genéricas ('human', 'robot', 'validate', 'protection') e que a
+heurística original enviava para o Selenium por engano.
+"""
+from myproject.tools.benchmark import gerar_pagina_listagem, gerar_pagina_detalhe
+
+_CLOUDFLARE_CHALLENGE = (
+    '<!DOCTYPE html><html lang="en-US"><head><title>Just a moment...</title>'
+    '<meta http-equiv="refresh" content="390"><script>(function(){window._cf_chl_opt={cvId: "3"};}());</script>'
+    '</head><body><div class="main-wrapper" role="main"><div class="main-content">'
+    '<h1 class="zone-name-title h1">www.exemplo.com.br</h1>'
+    '<h2 class="h2" id="challenge-running">Checking if the site connection is secure</h2>'
+    '<form id="challenge-form" action="/?__cf_chl_f_tk=abc" method="POST" enctype="application/x-www-form-urlencoded">'
+    '<input type="hidden" name="md" value="xyz"></form></div></div></body></html>'
+)
+
+_RECAPTCHA_GATE = (
+    '<html><head><title>Verificação de segurança</title>'
+    '<script src="https://www.google.com/recaptcha/api.js" async defer></script></head>'
+    '<body><div class="box"><p>Confirme que você não é um robô para continuar.</p>'
+    '<form method="post" action="/verificar"><div class="g-recaptcha" data-sitekey="6Lc..."></div>'
+    '<button type="submit">Continuar</button></form></div></body></html>'
+)
+
+_HCAPTCHA_IFRAME = (
+    '<html><head><title>Acesso</title></head><body>'
+    '<iframe src="https://newassets.hcaptcha.com/captcha/v1/abc/static/hcaptcha.html#frame=checkbox" '
+    'title="Widget containing checkbox for hCaptcha security challenge"></iframe></body></html>'
+)
+
+_DATADOME = (
+    '<html><head><title>exemplo.com.br</title></head><body style="margin:0">'
+    '<p id="cmsg">Please enable JS and disable any ad blocker</p>'
+    '<iframe src="https://geo.captcha-delivery.com/captcha/?initialCid=abc&hash=def" '
+    'width="100%" height="100%" frameborder="0"></iframe></body></html>'
+)
+
+_PERFDRIVE = (
+    '<html><head><title>Radware Bot Manager Captcha</title></head><body>'
+    '<div class="container"><p>We apologize for the inconvenience...</p>'
+    '<form action="/perfdrive/validate" method="post"><input type="hidden" name="ssid" value="1"></form>'
+    '</div></body></html>'
+)
+
+_TURNSTILE = (
+    '<html><head><title>Aguarde</title>'
+    '<script src="https://challenges.cloudflare.com/turnstile/v0/api.js" async></script></head>'
+    '<body><form action="/liberar" method="post"><div class="cf-turnstile" data-sitekey="0x4AAA"></div>'
+    '</form></body></html>'
+)
+
+_PT_BR_ROBOT = (
+    '<html><head><title>Não sou um robô</title></head><body>'
+    '<p>Marque a caixa abaixo para acessar os leilões.</p>'
+    '<form action="/acesso"><input type="checkbox" name="confirmacao"> Confirmo</form></body></html>'
+)
+
+_ACCESS_DENIED = (
+    '<html><head><title>Access Denied</title></head><body><h1>Access Denied</h1>'
+    '<p>You don\'t have permission to access "http://www.exemplo.com.br/" on this server.</p>'
+    '<p>Reference #18.abc</p></body></html>'
+)
+
+_LISTAGEM_PALAVRAS_GENERICAS = (
+    '<html><head><title>Leilões de Imóveis - Proteção ao Arrematante</title></head><body>'
+    '<header class="topo"><nav class="menu"><a href="/">Início</a></nav></header>'
+    '<section class="resultados">'
+    + ''.join(
+        f'<div class="card-imovel"><a href="/imovel/{i}">Casa {i}</a>'
+        f'<span class="preco">R$ {100 + i}.000,00</span>'
+        f'<p>Imóvel com sistema de proteção, robot aspirador incluso e validação de documentos. '
+        f'Human resources: atendimento presencial.</p></div>'
+        for i in range(12)
+    )
+    + '</section><footer><p>Validate seu cadastro. DDoS protection by Cloudflare.</p></footer></body></html>'
+)
+
+_LISTAGEM_CONTATO_RECAPTCHA = gerar_pagina_listagem(60, seed=7).replace(
+    '</body>',
+    '<script src="https://www.google.com/recaptcha/api.js?render=6Lc"></script>'
+    '<form class="contato" action="/contato"><input name="email">'
+    '<div class="g-recaptcha" data-size="invisible"></div></form></body>'
+)
+
+_DETALHE_CONTATO_RECAPTCHA = gerar_pagina_detalhe(seed=3).replace(
+    '</body>',
+    '<form class="proposta" action="/proposta"><input name="valor">'
+    '<div class="g-recaptcha" data-sitekey="6Lc"></div></form></body>'
+)
+
+CAPTCHA_FIXTURES = [
+    # Positivos
+    {
+        'name': 'cloudflare-desafio',
+        'status': 403,
+        'headers': {'Server': 'cloudflare', 'cf-mitigated': 'challenge', 'Content-Type': 'text/html'},
+        'url': 'https://www.exemplo.com.br/leiloes',
+        'body': _CLOUDFLARE_CHALLENGE,
+        'expected': True,
+    },
+    {
+        'name': 'cloudflare-desafio-sem-cabecalho',
+        'status': 503,
+        'headers': {'Server': 'cloudflare', 'Content-Type': 'text/html'},
+        'url': 'https://www.exemplo.com.br/leiloes',
+        'body': _CLOUDFLARE_CHALLENGE,
+        'expected': True,
+    },
+    {
+        'name': 'recaptcha-formulario',
+        'status': 200,
+        'headers': {'Content-Type': 'text/html'},
+        'url': 'https://leiloes.exemplo.com.br/imoveis',
+        'body': _RECAPTCHA_GATE,
+        'expected': True,
+    },
+    {
+        'name': 'hcaptcha-iframe',
+        'status': 200,
+        'headers': {'Content-Type': 'text/html'},
+        'url': 'https://leiloes.exemplo.com.br/',
+        'body': _HCAPTCHA_IFRAME,
+        'expected': True,
+    },
+    {
+        'name': 'datadome',
+        'status': 403,
+        'headers': {'Server': 'nginx', 'X-DataDome': 'protected',
+                    'Set-Cookie': ['datadome=abc; Max-Age=31536000; Path=/'], 'Content-Type': 'text/html'},
+        'url': 'https://www.exemplo.com.br/busca',
+        'body': _DATADOME,
+        'expected': True,
+    },
+    {
+        'name': 'perfdrive-url',
+        'status': 200,
+        'headers': {'Content-Type': 'text/html'},
+        'url': 'https://validate.perfdrive.com/?ssa=abc&ssb=def',
+        'body': _PERFDRIVE,
+        'expected': True,
+    },
+    {
+        'name': 'turnstile',
+        'status': 200,
+        'headers': {'Content-Type': 'text/html'},
+        'url': 'https://www.exemplo.com.br/',
+        'body': _TURNSTILE,
+        'expected': True,
+    },
+    {
+        'name': 'nao-sou-um-robo',
+        'status': 200,
+        'headers': {'Content-Type': 'text/html'},
+        'url': 'https://www.leiloeiro.com.br/acesso',
+        'body': _PT_BR_ROBOT,
+        'expected': True,
+    },
+    {
+        'name': 'akamai-acesso-negado',
+        'status': 403,
+        'headers': {'Server': 'AkamaiGHost', 'Content-Type': 'text/html'},
+        'url': 'https://www.exemplo.com.br/imoveis',
+        'body': _ACCESS_DENIED,
+        'expected': True,
+    },
+    {
+        'name': 'aws-waf-captcha',
+        'status': 405,
+        'headers': {'x-amzn-waf-action': 'captcha', 'Content-Type': 'text/html'},
+        'url': 'https://www.exemplo.com.br/imoveis',
+        'body': '<html><head><title></title></head><body><div id="captcha-container"></div></body></html>',
+        'expected': True,
+    },
+    # Negativos
+    {
+        'name': 'listagem-grande',
+        'status': 200,
+        'headers': {'Content-Type': 'text/html', 'Server': 'cloudflare',
+                    'Set-Cookie': ['__cf_bm=abc; path=/; HttpOnly']},
+        'url': 'https://www.exemplo.com.br/leiloes?page=1',
+        'body': gerar_pagina_listagem(200, seed=1),
+        'expected': False,
+    },
+    {
+        'name': 'listagem-palavras-genericas',
+        'status': 200,
+        'headers': {'Content-Type': 'text/html'},
+        'url': 'https://www.exemplo.com.br/leiloes',
+        'body': _LISTAGEM_PALAVRAS_GENERICAS,
+        'expected': False,
+    },
+    {
+        'name': 'listagem-recaptcha-invisivel',
+        'status': 200,
+        'headers': {'Content-Type': 'text/html'},
+        'url': 'https://www.exemplo.com.br/leiloes',
+        'body': _LISTAGEM_CONTATO_RECAPTCHA,
+        'expected': False,
+    },
+    {
+        'name': 'detalhe-formulario-proposta',
+        'status': 200,
+        'headers': {'Content-Type': 'text/html'},
+        'url': 'https://www.exemplo.com.br/imovel/123',
+        'body': _DETALHE_CONTATO_RECAPTCHA,
+        'expected': False,
+    },
+    {
+        'name': 'detalhe-url-validacao',
+        'status': 200,
+        'headers': {'Content-Type': 'text/html'},
+        'url': 'https://www.exemplo.com.br/imovel/123?validate=1&protection=on',
+        'body': gerar_pagina_detalhe(seed=4),
+        'expected': False,
+    },
+    {
+        'name': 'cloudflare-404',
+        'status': 404,
+        'headers': {'Server': 'cloudflare', 'Content-Type': 'text/html'},
+        'url': 'https://www.exemplo.com.br/imovel/999',
+        'body': '<html><head><title>Página não encontrada</title></head><body><h1>404</h1></body></html>',
+        'expected': False,
+    },
+    {
+        'name': 'nginx-403-simples',
+        'status': 403,
+        'headers': {'Server': 'nginx', 'Content-Type': 'text/html'},
+        'url': 'https://www.exemplo.com.br/admin',
+        'body': '<html><head><title>403 Forbidden</title></head><body><center><h1>403 Forbidden</h1></center></body></html>',
+        'expected': False,
+    },
+    {
+        'name': 'manutencao-503',
+        'status': 503,
+        'headers': {'Server': 'Apache', 'Retry-After': '120', 'Content-Type': 'text/html'},
+        'url': 'https://www.exemplo.com.br/',
+        'body': '<html><head><title>Em manutenção</title></head><body><p>Voltamos em breve.</p></body></html>',
+        'expected': False,
+    },
+]
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""
+Relatório de custo e rendimento por domínio acumulado nas coletas.
+Execute com: python -m myproject.tools.domain_report --rebaixados
+"""
+
+import sys
+import argparse
+from sqlalchemy import select
+from myproject.database.connection import engine
+from myproject.database.migrations import migrate
+from myproject.database.models import DomainYield
+from myproject.utils.domain_yield import PRIOR_ITEMS, PRIOR_REQUESTS, format_report
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description='Custo e rendimento por domínio do scraper de leilões')
+    parser.add_argument('--rebaixados', action='store_true',
+                        help='Mostra apenas os domínios rebaixados na última coleta')
+    parser.add_argument('--limite', type=int, default=50,
+                        help='Número máximo de domínios listados')
+
+    args = parser.parse_args()
+    migrate(engine)
+
+    table = DomainYield.__table__
+    query = select(table)
+    if args.rebaixados:
+        query = query.where(table.c.demoted.is_(True))
+    with engine.connect() as conn:
+        rows = [dict(row) for row in conn.execute(query).mappings()]
+
+    if not rows:
+        print("Nenhum domínio registrado.")
+        return 0
+
+    for row in rows:
+        row['yield_rate'] = ((row['items'] or 0) + PRIOR_ITEMS) / ((row['requests'] or 0) + PRIOR_REQUESTS)
+    rows.sort(key=lambda row: row['yield_rate'], reverse=True)
+    print("Totais com o histórico reduzido à metade a cada coleta")
+    print(format_report(rows[:args.limite]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Servidor HTTP local que imita a API /api/generate do Ollama, com injeção de latência.
+Permite testar offline o comportamento não bloqueante do cliente do LLM.
+Execute com: python -m myproject.tools.fake_ollama --porta 11435 --latencia 5
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Respostas padrão, escolhidas pelo conteúdo do prompt
+LIST_RESPONSE = json.dumps({"list_selector": "a.link-imovel"})
+DETAIL_RESPONSE = json.dumps({
+    "title": "h1",
+    "price": ".preco-lance",
+    "description": ".descricao",
+    "address": ".endereco",
+    "location": ".localizacao",
+    "area": ".area",
+    "property_type": ".tipo",
+    "auction_date": ".data-leilao",
+    "image_url": ".galeria img"
+})
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Responde a POST /api/generate após a latência configurada no servidor."""
+
+    # Mantém conexões persistentes, como o Ollama real
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError:
+            payload = {}
+
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+
+        try:
+            time.sleep(server.latency + random.random() * server.jitter)
+
+            if self.path.rstrip('/') != '/api/generate':
+                self._send(404, {'error': 'not found'})
+            elif random.random() < server.error_rate:
+                self._send(503, {'error': 'modelo sobrecarregado'})
+            else:
+                prompt = payload.get('prompt', '')
+                response_text = LIST_RESPONSE if 'list_selector' in prompt else DETAIL_RESPONSE
+                self._send(200, {
+                    'model': payload.get('model'),
+                    'response': response_text,
+                    'done': True
+                })
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Silencia o log padrão por requisição
+        pass
+
+
+def start_fake_ollama(port=0, latency=1.0, jitter=0.0, error_rate=0.0):
+    """
+    Inicia o servidor em uma thread de segundo plano.
+
+    Args:
+        port: Porta TCP (0 escolhe uma porta livre)
+        latency: Latência fixa em segundos por resposta
+        jitter: Latência adicional aleatória máxima em segundos
+        error_rate: Fração de respostas 503
+
+    Returns:
+        ThreadingHTTPServer: Servidor em execução (url em server.url; pare com shutdown())
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeOllamaHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.jitter = jitter
+    server.error_rate = error_rate
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description='Servidor Ollama falso com injeção de latência')
+    parser.add_argument('--porta', type=int, default=11435, help='Porta TCP (padrão: 11435)')
+    parser.add_argument('--latencia', type=float, default=1.0, help='Latência fixa por resposta em segundos')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Latência adicional aleatória máxima')
+    parser.add_argument('--taxa-erro', type=float, default=0.0, help='Fração de respostas 503')
+
+    args = parser.parse_args()
+    server = start_fake_ollama(args.porta, args.latencia, args.jitter, args.taxa_erro)
+    print(f"Ollama falso em {server.url} (latência {args.latencia}s). Use OLLAMA_API_URL={server.url}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+"""
+Aplica as migrações pendentes do esquema e confere os planos das consultas frequentes.
+Execute com: python -m myproject.tools.migrate --verificar
+"""
+
+import sys
+import argparse
+import logging
+from myproject.database.connection import engine
+from myproject.database.migrations import MIGRATIONS, check_query_plans, current_version, migrate
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description='Migrações do banco do scraper de leilões')
+    parser.add_argument('--versao', type=int, default=None,
+                        help='Versão final (padrão: a mais recente)')
+    parser.add_argument('--verificar', action='store_true',
+                        help='Confere se as consultas frequentes usam os índices')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(name)s] %(levelname)s: %(message)s')
+
+    print(f"Versão atual do esquema: {current_version(engine)} (mais recente: {MIGRATIONS[-1].version})")
+    applied = migrate(engine, target=args.versao)
+    for migration in MIGRATIONS:
+        if migration.version in applied:
+            print(f"  {migration.version}: {migration.description}")
+    print(f"Esquema na versão {current_version(engine)}")
+
+    if not args.verificar:
+        return 0
+
+    failures = 0
+    for result in check_query_plans(engine):
+        status = 'OK' if result.uses_index else 'SEM ÍNDICE'
+        print(f"[{status}] {result.name}: {result.plan.replace(chr(10), ' | ')}")
+        failures += not result.uses_index
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Processa a fila persistente de screenshots fora do spider.
+Execute com: python -m myproject.tools.screenshot_worker --workers 2
+"""
+
+import sys
+import time
+import argparse
+import logging
+from myproject.config import SCREENSHOT_QUEUE_PATH, SCREENSHOT_DIR
+from myproject.utils.screenshot import ScreenshotManager
+from myproject.utils.screenshot_queue import ScreenshotQueue, ScreenshotWorker
+from myproject.utils.webdriver_pool import WebDriverPool
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description='Processa a fila de screenshots do scraper de leilões')
+    parser.add_argument('--fila', default=SCREENSHOT_QUEUE_PATH,
+                        help='Arquivo SQLite da fila de screenshots')
+    parser.add_argument('--saida', default=SCREENSHOT_DIR,
+                        help='Diretório onde os screenshots são salvos')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Número de navegadores/threads simultâneos')
+    parser.add_argument('--espera', type=float, default=10,
+                        help='Tempo máximo de espera pelo carregamento de cada página')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(name)s] %(levelname)s: %(message)s')
+
+    queue = ScreenshotQueue(args.fila)
+    queue.recover()
+    pool = WebDriverPool(size=args.workers, ready_timeout=args.espera)
+    manager = ScreenshotManager(output_dir=args.saida, pool=pool)
+    worker = ScreenshotWorker(queue, manager, workers=args.workers)
+
+    print(f"Fila: {queue.counts()}")
+    try:
+        # Cada thread consome a fila até esvaziá-la
+        worker.start()
+        while queue.counts()['pending'] or queue.counts()['running']:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Interrompido; os screenshots pendentes continuam na fila.")
+    finally:
+        worker.stop()
+        pool.close()
+        print(f"Resultado: {worker.get_stats()}")
+        queue.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""
+Mostra ou reconstrói o filtro de URLs já gravadas usado pelo spider.
+Execute com: python -m myproject.tools.url_filter --reconstruir
+"""
+
+import sys
+import argparse
+import logging
+from myproject.config import URL_FILTER_PATH
+from myproject.database.connection import engine
+from myproject.utils.url_filter import DEFAULT_CAPACITY, DEFAULT_ERROR_RATE, UrlBloomFilter, rebuild_from_db
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description='Filtro de URLs já gravadas do scraper de leilões')
+    parser.add_argument('--arquivo', default=URL_FILTER_PATH,
+                        help='Arquivo do filtro')
+    parser.add_argument('--reconstruir', action='store_true',
+                        help='Reconstrói o filtro a partir de auction_data')
+    parser.add_argument('--capacidade', type=int, default=DEFAULT_CAPACITY,
+                        help='Número de URLs previsto')
+    parser.add_argument('--taxa-erro', type=float, default=DEFAULT_ERROR_RATE,
+                        help='Taxa de falsos positivos desejada')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(name)s] %(levelname)s: %(message)s')
+
+    if args.reconstruir:
+        bloom = rebuild_from_db(engine, capacity=args.capacidade, error_rate=args.taxa_erro)
+        bloom.save(args.arquivo)
+        print(f"Filtro gravado em {args.arquivo}")
+    else:
+        try:
+            bloom = UrlBloomFilter.load(args.arquivo)
+        except (OSError, ValueError) as e:
+            print(f"Erro ao ler o filtro: {str(e)}")
+            return 1
+
+    stats = bloom.get_stats()
+    print(f"URLs: {stats['urls']} de {stats['capacity']}, {stats['size_bytes'] / 1024:.0f} KB, "
+          f"falsos positivos esperados: {stats['estimated_fp_rate']:.4%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""
+Detecção de CAPTCHA e páginas de desafio anti-bot.
+
+A detecção é feita em duas etapas:
+
+1. Caminho rápido: código de status e cabeçalhos (cabeçalhos de desafio,
+   cookies de proteção, assinatura do servidor) e a URL.
+2. Uma única varredura multi-padrão restrita às regiões onde os desafios
+   aparecem: <title>, formulários, iframes e scripts externos. O texto comum
+   da página (descrições, rodapés) não é analisado, o que evita que palavras
+   genéricas como 'human' ou 'protection' marquem listagens normais.
+
+Cada sinal soma pontos e o veredito é positivo a partir de CAPTCHA_THRESHOLD.
+"""
+import re
+from collections import namedtuple
+
+CaptchaVerdict = namedtuple('CaptchaVerdict', ['is_captcha', 'score', 'reasons'])
+
+# Pontuação mínima para considerar a página um desafio
+CAPTCHA_THRESHOLD = 3
+
+# Códigos de status típicos de bloqueio/desafio
+CHALLENGE_STATUS = {403, 429, 503}
+
+# Cabeçalhos que só aparecem em respostas de desafio: nome -> (valor esperado ou None, pontos)
+CHALLENGE_HEADERS = {
+    'cf-mitigated': ('challenge', 4),
+    'cf-chl-bypass': (None, 4),
+    'x-amzn-waf-action': ('captcha', 4),
+    'x-datadome': (None, 1),
+    'x-sucuri-block': (None, 4),
+    'x-px-block': (None, 4),
+}
+
+# Cookies de soluções anti-bot: prefixo -> pontos (só contam com status de bloqueio)
+CHALLENGE_COOKIES = {
+    'datadome': 2,
+    '__cf_chl': 3,
+    'cf_chl': 3,
+    '_px': 1,
+    'ak_bmsc': 1,
+    'incap_ses': 1,
+    'visid_incap': 1,
+}
+
+# Servidores de proteção (só contam com status de bloqueio)
+CHALLENGE_SERVERS = ('cloudflare', 'ddos-guard', 'sucuri', 'akamaighost', 'perfdrive', 'shieldsquare')
+
+# Termos procurados nas regiões: termo -> pontos
+REGION_TERMS = {
+    # Desafios explícitos
+    'captcha': 3, 'g-recaptcha': 3, 'h-captcha': 3, 'hcaptcha': 3, 'turnstile': 3,
+    'cf-challenge': 3, 'challenge-form': 3, 'challenge-platform': 3, 'cf_chl': 3,
+    'px-captcha': 3, 'perfdrive': 3, 'shieldsquare': 3, 'datadome': 3, 'ddos-guard': 3,
+    # Títulos de páginas de verificação
+    'verify you are human': 3, 'are you a robot': 3, 'are you human': 3,
+    'just a moment': 3, 'attention required': 3, 'security check': 2, 'bot check': 3,
+    'access denied': 2, 'acesso negado': 2, 'não sou um robô': 3, 'nao sou um robo': 3,
+    'verificação de segurança': 2, 'verificando seu navegador': 3, 'checking your browser': 3,
+}
+
+# Termos que, em scripts externos, indicam apenas um widget (ex.: reCAPTCHA invisível em formulário de contato)
+SCRIPT_TERM_POINTS = 1
+
+# Páginas grandes ou com muitas tags raramente são desafios (ex.: reCAPTCHA no
+# formulário de proposta de uma página de detalhe); desafios têm poucas dezenas de tags
+CONTENT_RICH_MIN_SIZE = 50000
+CONTENT_RICH_MIN_TAGS = 120
+CONTENT_RICH_PENALTY = 2
+
+# Caracteres analisados de um título ou formulário; sem o limite, cada <form>
+# sem fechamento varreria o corpo até o fim (tempo quadrático)
+MAX_REGION_SIZE = 4000
+
+# Regiões analisadas: título, formulários, iframes e scripts externos
+_REGION_RE = re.compile(
+    rf'<title[^>]*>(?P<title>(?:(?!</title>).){{0,{MAX_REGION_SIZE}}})'
+    rf'|<form\b(?P<form>(?:(?!</form>).){{0,{MAX_REGION_SIZE}}})'
+    r'|<iframe\b(?P<iframe>[^>]*)>'
+    r'|<script\b(?P<script>[^>]*\bsrc\s*=[^>]*)>'
+    r'|<div\b(?P<div>[^>]*(?:captcha|challenge)[^>]*)>',
+    re.DOTALL
+)
+
+# Todos os termos em uma única expressão (os mais longos primeiro)
+_TERMS_RE = re.compile('|'.join(
+    re.escape(term) for term in sorted(REGION_TERMS, key=len, reverse=True)
+))
+
+_URL_RE = re.compile(r'captcha|/cdn-cgi/challenge|challenge-platform|perfdrive|validate\.perfdrive')
+
+
+def normalize_headers(headers):
+    """
+    Converte cabeçalhos (Scrapy Headers ou dict) para {nome minúsculo: [valores str]}.
+    """
+    normalized = {}
+    if not headers:
+        return normalized
+    for name, values in headers.items():
+        if isinstance(name, bytes):
+            name = name.decode('latin-1')
+        if not isinstance(values, (list, tuple)):
+            values = [values]
+        normalized[name.lower()] = [
+            value.decode('latin-1') if isinstance(value, bytes) else str(value)
+            for value in values
+        ]
+    return normalized
+
+
+class CaptchaDetector:
+    """
+    Detector de CAPTCHA/anti-bot com caminho rápido por cabeçalhos.
+
+    Args:
+        threshold: Pontuação mínima para o veredito positivo
+    """
+
+    def __init__(self, threshold=CAPTCHA_THRESHOLD):
+        self.threshold = threshold
+
+    def check_headers(self, status, headers):
+        """
+        Pontua o código de status e os cabeçalhos.
+
+        Returns:
+            tuple: (pontos, lista de motivos)
+        """
+        score = 0
+        reasons = []
+        blocked_status = status in CHALLENGE_STATUS
+
+        for name, (expected, points) in CHALLENGE_HEADERS.items():
+            for value in headers.get(name, ()):
+                if expected is None or expected in value.lower():
+                    score += points
+                    reasons.append(f'header:{name}')
+                    break
+
+        if blocked_status:
+            score += 1
+            reasons.append(f'status:{status}')
+
+            server = ' '.join(headers.get('server', ())).lower()
+            for signature in CHALLENGE_SERVERS:
+                if signature in server:
+                    score += 1
+                    reasons.append(f'server:{signature}')
+                    break
+
+            for cookie in headers.get('set-cookie', ()):
+                cookie_name = cookie.split('=', 1)[0].strip().lower()
+                for prefix, points in CHALLENGE_COOKIES.items():
+                    if cookie_name.startswith(prefix):
+                        score += points
+                        reasons.append(f'cookie:{prefix}')
+                        break
+
+        return score, reasons
+
+    def scan_body(self, body_lower):
+        """
+        Varre título, formulários, iframes e scripts externos em uma única passagem.
+
+        Args:
+            body_lower: HTML em minúsculas
+
+        Returns:
+            tuple: (pontos, lista de motivos)
+        """
+        score = 0
+        reasons = []
+        seen = set()
+
+        for region in _REGION_RE.finditer(body_lower):
+            kind = region.lastgroup
+            content = region.group(kind)
+            for match in _TERMS_RE.finditer(content):
+                term = match.group(0)
+                if (kind, term) in seen:
+                    continue
+                seen.add((kind, term))
+                points = SCRIPT_TERM_POINTS if kind == 'script' else REGION_TERMS[term]
+                score += points
+                reasons.append(f'{kind}:{term}')
+
+        return score, reasons
+
+    @staticmethod
+    def _is_content_rich(body_lower):
+        """Indica se a página tem conteúdo real além do desafio."""
+        return len(body_lower) >= CONTENT_RICH_MIN_SIZE or body_lower.count('<') >= CONTENT_RICH_MIN_TAGS
+
+    def detect(self, status=200, headers=None, body_lower='', url=''):
+        """
+        Avalia se a resposta é uma página de CAPTCHA ou desafio anti-bot.
+
+        Args:
+            status: Código de status HTTP
+            headers: Cabeçalhos já normalizados por normalize_headers
+            body_lower: HTML em minúsculas
+            url: URL da resposta
+
+        Returns:
+            CaptchaVerdict: (is_captcha, score, reasons)
+        """
+        score, reasons = self.check_headers(status, headers or {})
+
+        if url and _URL_RE.search(url.lower()):
+            score += 3
+            reasons.append('url')
+
+        # Cabeçalhos já decidiram: evita a varredura do corpo
+        if score >= self.threshold + 2:
+            return CaptchaVerdict(True, score, reasons)
+
+        if body_lower:
+            body_score, body_reasons = self.scan_body(body_lower)
+            score += body_score
+            reasons.extend(body_reasons)
+
+            if body_score and self._is_content_rich(body_lower):
+                score -= CONTENT_RICH_PENALTY
+                reasons.append('conteudo-extenso')
+
+        return CaptchaVerdict(score >= self.threshold, score, reasons)
+
+    def detect_response(self, response, body_lower=None):
+        """
+        Avalia uma resposta do Scrapy.
+
+        Args:
+            response: Resposta do Scrapy
+            body_lower: HTML em minúsculas já calculado (opcional)
+        """
+        if body_lower is None:
+            try:
+                body_lower = response.text.lower()
+            except AttributeError:
+                body_lower = ''
+        return self.detect(response.status, normalize_headers(response.headers), body_lower, response.url)
+
+
+# Instância compartilhada
+captcha_detector = CaptchaDetector()
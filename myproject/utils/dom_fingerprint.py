@@ -0,0 +1,101 @@
+"""
+Impressão digital estrutural de páginas HTML.
+
+Páginas geradas pelo mesmo modelo (template) do site compartilham o esqueleto
+de tags e classes, mesmo com textos, preços e quantidade de cards diferentes.
+A impressão digital é o hash do conjunto de tokens 'tag.classe'/'tag#id' da
+página, com números removidos, e serve como chave para reutilizar seletores
+entre URLs (e até entre domínios que usam a mesma plataforma).
+"""
+import re
+import hashlib
+
+# Caracteres consumidos de um comentário ou bloco; sem o limite, cada <!-- ou
+# <script> sem fechamento varreria a página até o fim (tempo quadrático)
+MAX_SKIPPED_BLOCK = 100000
+
+# Comentários e blocos cujo conteúdo não faz parte do esqueleto visível são
+# consumidos pela mesma expressão que encontra as tags de abertura, para que a
+# página seja percorrida uma vez sem cópias intermediárias
+_TAG_RE = re.compile(
+    rf'<!--(?:(?!-->).){{0,{MAX_SKIPPED_BLOCK}}}(?:-->)?'
+    rf'|<(script|style|noscript|template)\b(?:(?!</\1\s*>).){{0,{MAX_SKIPPED_BLOCK}}}(?:</\1\s*>)?'
+    r'|<([a-z][a-z0-9-]*)\b([^>]*)>',
+    re.DOTALL
+)
+_CLASS_RE = re.compile(r'\bclass\s*=\s*["\']([^"\']*)["\']')
+_ID_RE = re.compile(r'\bid\s*=\s*["\']([^"\']*)["\']')
+
+# Números em classes/ids costumam variar entre páginas (ex.: lote-123, col-md-4)
+_DIGITS_RE = re.compile(r'\d+')
+
+# Tags de formatação de texto que variam com o conteúdo, não com o modelo
+IGNORED_TAGS = frozenset({'b', 'i', 'u', 'em', 'strong', 'br', 'small', 'sup', 'sub', 'wbr', 'font'})
+
+# Mínimo de tokens para a impressão digital ser considerada confiável
+MIN_TOKENS = 10
+
+
+def _normalize(token):
+    return _DIGITS_RE.sub('', token).strip('-_')
+
+
+def structural_tokens(html, lowered=False):
+    """
+    Extrai o conjunto de tokens estruturais da página.
+
+    Args:
+        html: Conteúdo HTML
+        lowered: True se html já está em minúsculas (evita uma cópia)
+
+    Returns:
+        set: Tokens 'tag', 'tag.classe' e 'tag#id' com números removidos
+    """
+    if not lowered:
+        html = html.lower()
+
+    tokens = set()
+    for match in _TAG_RE.finditer(html):
+        tag = match.group(2)
+        if tag is None or tag in IGNORED_TAGS:
+            continue
+        tokens.add(tag)
+
+        attrs = match.group(3)
+        if not attrs:
+            continue
+
+        class_match = _CLASS_RE.search(attrs)
+        if class_match:
+            for class_name in class_match.group(1).split():
+                class_name = _normalize(class_name)
+                if class_name:
+                    tokens.add(f'{tag}.{class_name}')
+
+        id_match = _ID_RE.search(attrs)
+        if id_match:
+            element_id = _normalize(id_match.group(1).strip())
+            if element_id:
+                tokens.add(f'{tag}#{element_id}')
+
+    return tokens
+
+
+def dom_fingerprint(html, lowered=False):
+    """
+    Calcula a impressão digital estrutural da página.
+
+    Args:
+        html: Conteúdo HTML
+        lowered: True se html já está em minúsculas
+
+    Returns:
+        str: Hash SHA-1 hexadecimal do esqueleto ou None se a página tem
+        estrutura insuficiente (ex.: páginas de erro quase vazias)
+    """
+    if not html:
+        return None
+    tokens = structural_tokens(html, lowered)
+    if len(tokens) < MIN_TOKENS:
+        return None
+    return hashlib.sha1('\n'.join(sorted(tokens)).encode('utf-8')).hexdigest()
@@ -0,0 +1,345 @@
+"""
+Controle adaptativo de concorrência e atraso por domínio.
+
+Cada domínio tem o seu próprio par (atraso entre requisições, requisições
+simultâneas), aplicado ao slot do downloader do Scrapy. O controle segue o
+esquema aumento aditivo / redução multiplicativa:
+
+- a cada ADJUST_EVERY respostas, se a janela recente não tem erros e o p90 da
+  latência está abaixo do alvo, a concorrência sobe 1 e o atraso cai 25%;
+  com erros frequentes ou p90 acima do dobro do alvo, a concorrência cai 1 e
+  o atraso sobe 50%;
+- uma resposta 429/503 corta a concorrência pela metade e dobra o atraso
+  (ou o leva ao Retry-After, se maior) e suspende os aumentos até a próxima
+  janela completa.
+
+Pisos e tetos valem para todos os domínios e podem ser sobrescritos por
+domínio (a chave também vale para os subdomínios, ex.: 'gov.br'). Os
+parâmetros aprendidos são gravados na tabela domain_throttle no fechamento do
+spider e carregados na abertura, para que cada coleta comece já ajustada.
+"""
+import math
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+# Valores padrão de início, pisos e tetos
+DEFAULT_START_DELAY = 1.5
+DEFAULT_START_CONCURRENCY = 4
+DEFAULT_MIN_DELAY = 0.25
+DEFAULT_MAX_DELAY = 60.0
+DEFAULT_MIN_CONCURRENCY = 1
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Latência (segundos) considerada saudável para o p90 da janela
+DEFAULT_TARGET_LATENCY = 2.0
+
+# Respostas observadas por janela e respostas entre ajustes
+WINDOW_SIZE = 20
+ADJUST_EVERY = 10
+
+# Fração de erros na janela que força a redução
+MAX_ERROR_RATE = 0.1
+
+# Status que indicam que o servidor pede menos carga
+BACKOFF_STATUSES = (429, 503)
+
+# Status contados como erro na taxa da janela
+ERROR_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+def parse_retry_after(value, now=None):
+    """
+    Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos.
+
+    Args:
+        value: Valor do cabeçalho (str ou bytes)
+        now: Data atual (para testes)
+
+    Returns:
+        float: Segundos de espera, ou None se o valor for inválido
+    """
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode('latin-1')
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - (now or datetime.now(timezone.utc))).total_seconds())
+
+
+def percentile(values, fraction):
+    """Percentil por posição mais próxima de uma sequência de números."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+class DomainState:
+    """Parâmetros e janela de observações de um domínio."""
+
+    __slots__ = ('domain', 'delay', 'concurrency', 'latencies', 'errors', 'since_adjust',
+                 'samples', 'learned')
+
+    def __init__(self, domain, delay, concurrency, learned=False):
+        self.domain = domain
+        self.delay = delay
+        self.concurrency = concurrency
+        self.latencies = deque(maxlen=WINDOW_SIZE)
+        self.errors = deque(maxlen=WINDOW_SIZE)
+        self.since_adjust = 0
+        self.samples = 0
+        # True se os parâmetros vieram de uma coleta anterior
+        self.learned = learned
+
+    @property
+    def error_rate(self):
+        return sum(self.errors) / len(self.errors) if self.errors else 0.0
+
+
+class DomainThrottle:
+    """
+    Ajusta o atraso e a concorrência de cada domínio pelas respostas observadas.
+
+    Args:
+        start_delay: Atraso inicial de um domínio sem parâmetros aprendidos
+        start_concurrency: Concorrência inicial de um domínio sem parâmetros aprendidos
+        min_delay, max_delay: Piso e teto do atraso (segundos)
+        min_concurrency, max_concurrency: Piso e teto da concorrência
+        target_latency: p90 da latência (segundos) abaixo do qual o domínio pode receber mais carga
+        domain_limits: Pisos/tetos por domínio, ex.: {'gov.br': {'max_concurrency': 16, 'min_delay': 0}}
+    """
+
+    def __init__(self, start_delay=DEFAULT_START_DELAY, start_concurrency=DEFAULT_START_CONCURRENCY,
+                 min_delay=DEFAULT_MIN_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 min_concurrency=DEFAULT_MIN_CONCURRENCY, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 target_latency=DEFAULT_TARGET_LATENCY, domain_limits=None):
+        self.start_delay = start_delay
+        self.start_concurrency = start_concurrency
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.domain_limits = domain_limits or {}
+        self._states = {}
+        self._learned = {}
+
+        # Estatísticas
+        self.responses = 0
+        self.increases = 0
+        self.decreases = 0
+        self.backoffs = 0
+        self.retry_after_hits = 0
+        self.failures = 0
+
+    def limits(self, domain):
+        """
+        Retorna os pisos e tetos do domínio (a chave mais específica vence).
+
+        Returns:
+            tuple: (min_delay, max_delay, min_concurrency, max_concurrency)
+        """
+        override = {}
+        matches = [key for key in self.domain_limits
+                   if domain == key or domain.endswith('.' + key)]
+        for key in sorted(matches, key=len):
+            override.update(self.domain_limits[key])
+        return (
+            float(override.get('min_delay', self.min_delay)),
+            float(override.get('max_delay', self.max_delay)),
+            int(override.get('min_concurrency', self.min_concurrency)),
+            int(override.get('max_concurrency', self.max_concurrency)),
+        )
+
+    def _clamp(self, state):
+        min_delay, max_delay, min_concurrency, max_concurrency = self.limits(state.domain)
+        state.delay = round(min(max(state.delay, min_delay), max_delay), 3)
+        state.concurrency = min(max(state.concurrency, min_concurrency), max_concurrency)
+
+    def state(self, domain):
+        """Retorna o estado do domínio, criado com os parâmetros aprendidos ou iniciais."""
+        state = self._states.get(domain)
+        if state is None:
+            learned = self._learned.get(domain)
+            if learned:
+                state = DomainState(domain, learned['delay'], learned['concurrency'], learned=True)
+            else:
+                state = DomainState(domain, self.start_delay, self.start_concurrency)
+            self._clamp(state)
+            self._states[domain] = state
+        return state
+
+    def observe(self, domain, latency, status, retry_after=None):
+        """
+        Registra uma resposta e ajusta os parâmetros do domínio.
+
+        Args:
+            domain: Domínio (chave do slot do downloader)
+            latency: Latência do download em segundos (None se desconhecida)
+            status: Status HTTP
+            retry_after: Segundos pedidos pelo servidor no Retry-After (respostas 429/503)
+
+        Returns:
+            DomainState: Estado atualizado
+        """
+        state = self.state(domain)
+        self.responses += 1
+        state.samples += 1
+        if latency is not None:
+            state.latencies.append(latency)
+        state.errors.append(status in ERROR_STATUSES)
+
+        if status in BACKOFF_STATUSES:
+            self._back_off(state, retry_after)
+            return state
+
+        state.since_adjust += 1
+        if state.since_adjust >= ADJUST_EVERY:
+            state.since_adjust = 0
+            self._adjust(state)
+        return state
+
+    def observe_failure(self, domain):
+        """Registra uma requisição que falhou sem resposta (timeout, conexão recusada)."""
+        state = self.state(domain)
+        self.failures += 1
+        state.samples += 1
+        state.errors.append(True)
+        state.since_adjust += 1
+        if state.since_adjust >= ADJUST_EVERY:
+            state.since_adjust = 0
+            self._adjust(state)
+        return state
+
+    def _back_off(self, state, retry_after):
+        self.backoffs += 1
+        if retry_after:
+            self.retry_after_hits += 1
+        state.concurrency = state.concurrency // 2
+        state.delay = max(state.delay * 2, retry_after or 0.0, 1.0)
+        # Nenhum aumento antes de uma janela completa sem o sinal
+        state.since_adjust = -ADJUST_EVERY
+        self._clamp(state)
+        logger.info(f"Servidor {state.domain} pediu menos carga: concorrência {state.concurrency}, "
+                    f"atraso {state.delay:.2f}s")
+
+    def _adjust(self, state):
+        p90 = percentile(state.latencies, 0.9)
+        error_rate = state.error_rate
+        delay, concurrency = state.delay, state.concurrency
+        if error_rate > MAX_ERROR_RATE or p90 > 2 * self.target_latency:
+            state.concurrency -= 1
+            state.delay = max(state.delay * 1.5, 0.1)
+            self._clamp(state)
+            if (state.delay, state.concurrency) != (delay, concurrency):
+                self.decreases += 1
+        elif error_rate == 0 and p90 <= self.target_latency:
+            state.concurrency += 1
+            state.delay *= 0.75
+            self._clamp(state)
+            if (state.delay, state.concurrency) != (delay, concurrency):
+                self.increases += 1
+
+    def apply(self, slot, domain):
+        """Aplica os parâmetros do domínio a um slot do downloader do Scrapy."""
+        state = self.state(domain)
+        slot.delay = state.delay
+        slot.concurrency = state.concurrency
+        return state
+
+    def load(self, engine):
+        """
+        Carrega os parâmetros aprendidos nas coletas anteriores.
+
+        Returns:
+            int: Domínios carregados
+        """
+        from sqlalchemy import select
+        from myproject.database.models import DomainThrottleParams
+
+        table = DomainThrottleParams.__table__
+        with engine.connect() as conn:
+            for row in conn.execute(select(table)).mappings():
+                self._learned[row['domain']] = {'delay': row['delay'], 'concurrency': row['concurrency']}
+        logger.info(f"Parâmetros de throttling carregados para {len(self._learned)} domínios")
+        return len(self._learned)
+
+    def save(self, engine):
+        """
+        Grava os parâmetros dos domínios observados nesta coleta.
+
+        Returns:
+            int: Domínios gravados
+        """
+        from sqlalchemy.dialects import postgresql, sqlite
+        from myproject.database.models import DomainThrottleParams
+
+        rows = []
+        now = datetime.now()
+        for state in self._states.values():
+            if not state.samples:
+                continue
+            rows.append({
+                'domain': state.domain,
+                'delay': state.delay,
+                'concurrency': state.concurrency,
+                'latency_p50': percentile(state.latencies, 0.5),
+                'latency_p90': percentile(state.latencies, 0.9),
+                'error_rate': round(state.error_rate, 4),
+                'samples': state.samples,
+                'updated_at': now,
+            })
+        if not rows:
+            return 0
+
+        inserts = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+        dialect = engine.dialect.name
+        if dialect not in inserts:
+            logger.error(f"Banco sem suporte a upsert dos parâmetros de throttling: {dialect}")
+            return 0
+        stmt = inserts[dialect](DomainThrottleParams.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['domain'],
+            set_={column: stmt.excluded[column] for column in rows[0] if column != 'domain'},
+        )
+        with engine.begin() as conn:
+            conn.execute(stmt, rows)
+        return len(rows)
+
+    def get_stats(self):
+        """Retorna as estatísticas do controle e os parâmetros atuais de cada domínio."""
+        return {
+            'domains': len(self._states),
+            'learned_domains': sum(state.learned for state in self._states.values()),
+            'responses': self.responses,
+            'failures': self.failures,
+            'increases': self.increases,
+            'decreases': self.decreases,
+            'backoffs': self.backoffs,
+            'retry_after_hits': self.retry_after_hits,
+        }
+
+    def describe(self):
+        """Resumo dos parâmetros atuais por domínio, para o log de fechamento."""
+        return {
+            domain: {
+                'delay': state.delay,
+                'concurrency': state.concurrency,
+                'p90': round(percentile(state.latencies, 0.9), 3),
+                'error_rate': round(state.error_rate, 3),
+            }
+            for domain, state in self._states.items()
+        }
@@ -0,0 +1,252 @@
+"""
+Contabilidade de custo e rendimento por domínio e prioridade das requisições.
+
+Para cada domínio o spider soma as respostas recebidas, os bytes baixados, os
+segundos gastos no LLM e os itens produzidos. O rendimento (itens por
+resposta) é suavizado com o histórico das coletas anteriores e define a
+prioridade das requisições no agendador do Scrapy:
+
+- páginas de detalhe vêm antes das listagens (DETAIL_PRIORITY);
+- dentro de cada tipo, domínios de rendimento maior vêm antes (até YIELD_BONUS);
+- um domínio com pelo menos min_requests respostas e rendimento abaixo de
+  demote_threshold é rebaixado (DEMOTION_PENALTY): suas requisições ficam
+  atrás das listagens dos demais domínios.
+
+Os totais são gravados na tabela domain_yield no fechamento do spider, com
+os valores anteriores reduzidos à metade a cada coleta para que o histórico
+recente pese mais, e resumidos em um relatório (format_report).
+"""
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Prioridades do agendador (maior = antes)
+DETAIL_PRIORITY = 100
+YIELD_BONUS = 50
+DEMOTION_PENALTY = 200
+
+# Rendimento mínimo (itens por resposta) e respostas observadas antes de rebaixar um domínio
+DEFAULT_DEMOTE_THRESHOLD = 0.02
+DEFAULT_MIN_REQUESTS = 50
+
+# Suavização: um domínio sem histórico começa com 1 item a cada 5 respostas
+PRIOR_ITEMS = 1.0
+PRIOR_REQUESTS = 5.0
+
+# Peso do histórico gravado a cada nova coleta
+HISTORY_DECAY = 0.5
+
+COUNTERS = ('requests', 'bytes', 'llm_seconds', 'items')
+
+
+class DomainCost:
+    """Custos e itens de um domínio nesta coleta e no histórico."""
+
+    __slots__ = ('domain', 'requests', 'detail_requests', 'bytes', 'llm_seconds', 'items',
+                 'history', 'demoted')
+
+    def __init__(self, domain, history=None):
+        self.domain = domain
+        self.requests = 0
+        self.detail_requests = 0
+        self.bytes = 0
+        self.llm_seconds = 0.0
+        self.items = 0
+        # Totais das coletas anteriores (já reduzidos pelo HISTORY_DECAY)
+        self.history = history or dict.fromkeys(COUNTERS, 0.0)
+        self.demoted = False
+
+    def total(self, counter):
+        return getattr(self, counter) + self.history.get(counter, 0.0)
+
+    @property
+    def yield_rate(self):
+        """Itens por resposta, suavizado pelo histórico e pelo valor inicial."""
+        return (self.total('items') + PRIOR_ITEMS) / (self.total('requests') + PRIOR_REQUESTS)
+
+
+class DomainYieldTracker:
+    """
+    Contabiliza custo e rendimento por domínio e calcula as prioridades das requisições.
+
+    Args:
+        demote_threshold: Rendimento (itens por resposta) abaixo do qual o domínio é rebaixado
+        min_requests: Respostas observadas (com o histórico) antes de rebaixar um domínio
+    """
+
+    def __init__(self, demote_threshold=DEFAULT_DEMOTE_THRESHOLD, min_requests=DEFAULT_MIN_REQUESTS):
+        self.demote_threshold = demote_threshold
+        self.min_requests = min_requests
+        self._domains = {}
+        self._history = {}
+
+        # Estatísticas
+        self.demotions = 0
+        self.promotions = 0
+
+    def domain(self, domain):
+        """Retorna os custos do domínio, criados com o histórico carregado."""
+        cost = self._domains.get(domain)
+        if cost is None:
+            cost = DomainCost(domain, self._history.get(domain))
+            self._domains[domain] = cost
+            self._update_demotion(cost)
+        return cost
+
+    def record_response(self, domain, size, is_detail=False):
+        """Registra uma resposta recebida e os bytes baixados."""
+        cost = self.domain(domain)
+        cost.requests += 1
+        cost.bytes += size
+        if is_detail:
+            cost.detail_requests += 1
+        self._update_demotion(cost)
+
+    def record_llm(self, domain, seconds):
+        """Registra o tempo gasto no LLM para páginas do domínio."""
+        self.domain(domain).llm_seconds += seconds
+
+    def record_item(self, domain):
+        """Registra um item produzido pelo domínio."""
+        cost = self.domain(domain)
+        cost.items += 1
+        self._update_demotion(cost)
+
+    def _update_demotion(self, cost):
+        demoted = cost.total('requests') >= self.min_requests and cost.yield_rate < self.demote_threshold
+        if demoted and not cost.demoted:
+            self.demotions += 1
+            logger.info(f"Domínio {cost.domain} rebaixado: {cost.yield_rate:.3f} itens por resposta "
+                        f"em {cost.total('requests'):.0f} respostas")
+        elif cost.demoted and not demoted:
+            self.promotions += 1
+            logger.info(f"Domínio {cost.domain} voltou à prioridade normal")
+        cost.demoted = demoted
+
+    def priority(self, domain, is_detail=False):
+        """
+        Calcula a prioridade de uma requisição do domínio.
+
+        Args:
+            domain: Domínio da requisição
+            is_detail: True para páginas de detalhe
+
+        Returns:
+            int: Prioridade para scrapy.Request (maior = antes)
+        """
+        cost = self.domain(domain)
+        priority = DETAIL_PRIORITY if is_detail else 0
+        priority += round(YIELD_BONUS * min(1.0, cost.yield_rate))
+        if cost.demoted:
+            priority -= DEMOTION_PENALTY
+        return priority
+
+    def load(self, engine):
+        """
+        Carrega os totais das coletas anteriores.
+
+        Returns:
+            int: Domínios carregados
+        """
+        from sqlalchemy import select
+        from myproject.database.models import DomainYield
+
+        table = DomainYield.__table__
+        with engine.connect() as conn:
+            for row in conn.execute(select(table)).mappings():
+                self._history[row['domain']] = {counter: row[counter] or 0.0 for counter in COUNTERS}
+        return len(self._history)
+
+    def save(self, engine):
+        """
+        Soma os custos desta coleta aos totais gravados (com o histórico reduzido).
+
+        Returns:
+            int: Domínios gravados
+        """
+        from sqlalchemy.dialects import postgresql, sqlite
+        from myproject.database.models import DomainYield
+
+        rows = []
+        now = datetime.now()
+        for cost in self._domains.values():
+            if not cost.requests:
+                continue
+            row = {counter: cost.history.get(counter, 0.0) * HISTORY_DECAY + getattr(cost, counter)
+                   for counter in COUNTERS}
+            row.update({
+                'domain': cost.domain,
+                'last_requests': cost.requests,
+                'last_items': cost.items,
+                'demoted': cost.demoted,
+                'updated_at': now,
+            })
+            rows.append(row)
+        if not rows:
+            return 0
+
+        inserts = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+        dialect = engine.dialect.name
+        if dialect not in inserts:
+            logger.error(f"Banco sem suporte a upsert do rendimento por domínio: {dialect}")
+            return 0
+        table = DomainYield.__table__
+        stmt = inserts[dialect](table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['domain'],
+            set_={**{column: stmt.excluded[column] for column in rows[0] if column != 'domain'},
+                  'runs': table.c.runs + 1},
+        )
+        with engine.begin() as conn:
+            conn.execute(stmt, [dict(row, runs=1) for row in rows])
+        return len(rows)
+
+    def report_rows(self):
+        """Linhas do relatório desta coleta, dos domínios de maior rendimento para os de menor."""
+        rows = [{
+            'domain': cost.domain,
+            'requests': cost.requests,
+            'detail_requests': cost.detail_requests,
+            'bytes': cost.bytes,
+            'llm_seconds': cost.llm_seconds,
+            'items': cost.items,
+            'yield_rate': cost.yield_rate,
+            'demoted': cost.demoted,
+        } for cost in self._domains.values() if cost.requests]
+        return sorted(rows, key=lambda row: row['yield_rate'], reverse=True)
+
+    def get_stats(self):
+        """Retorna as estatísticas agregadas da coleta."""
+        costs = list(self._domains.values())
+        return {
+            'domains': len(costs),
+            'requests': sum(cost.requests for cost in costs),
+            'bytes': sum(cost.bytes for cost in costs),
+            'llm_seconds': round(sum(cost.llm_seconds for cost in costs), 3),
+            'items': sum(cost.items for cost in costs),
+            'demoted_domains': sum(cost.demoted for cost in costs),
+            'demotions': self.demotions,
+            'promotions': self.promotions,
+        }
+
+
+def format_report(rows):
+    """
+    Formata o relatório de custo e rendimento por domínio.
+
+    Args:
+        rows: Dicionários com domain, requests, bytes, llm_seconds, items, yield_rate e demoted
+
+    Returns:
+        str: Tabela em texto, uma linha por domínio
+    """
+    header = f"{'Domínio':<40} {'Resp.':>7} {'KB':>9} {'LLM s':>8} {'Itens':>6} {'Itens/resp':>10} {'KB/item':>8}"
+    lines = [header, '-' * len(header)]
+    for row in rows:
+        kb = row['bytes'] / 1024
+        kb_per_item = f"{kb / row['items']:.0f}" if row['items'] else '-'
+        flag = ' (rebaixado)' if row['demoted'] else ''
+        lines.append(f"{row['domain'][:40]:<40} {row['requests']:>7.0f} {kb:>9.0f} {row['llm_seconds']:>8.1f} "
+                     f"{row['items']:>6.0f} {row['yield_rate']:>10.3f} {kb_per_item:>8}{flag}")
+    return '\n'.join(lines)
@@ -0,0 +1,233 @@
+"""
+Planos de extração compilados para as páginas de detalhe.
+
+Um plano converte uma vez o conjunto de seletores CSS de uma regra em objetos
+XPath pré-compilados do lxml. Na extração, cada campo é resolvido com uma
+única consulta à árvore já analisada pelo Scrapy, e o texto, o atributo
+content e o texto completo do elemento são obtidos dos mesmos nós. Os planos
+ficam em cache pelo hash do conjunto de seletores e são reutilizados por
+todas as páginas do domínio.
+"""
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+from urllib.parse import urljoin, urlsplit
+from lxml import etree
+from parsel.csstranslator import HTMLTranslator
+
+logger = logging.getLogger(__name__)
+
+# Campos de texto extraídos pelos seletores da regra
+TEXT_FIELDS = ('title', 'price', 'description', 'address', 'location', 'area', 'property_type', 'auction_date')
+
+# Atributos de imagem, na ordem de preferência
+IMAGE_ATTRIBUTES = ('src', 'data-src', 'data-lazy-src', 'data-original')
+
+# Seletores genéricos de galerias usados quando o seletor de imagem não encontra nada
+GALLERY_SELECTORS = (
+    '.gallery img', '.carousel img', '.slider img',
+    '.photos img', '.images img', '[data-fancybox] img',
+    '.owl-carousel img', '.swiper-container img',
+)
+
+# Número máximo de planos mantidos em cache
+DEFAULT_MAX_PLANS = 256
+
+_translator = HTMLTranslator()
+
+
+def compile_css(selector):
+    """
+    Converte um seletor CSS em XPath pré-compilado.
+
+    Returns:
+        etree.XPath ou None se o seletor for inválido
+    """
+    try:
+        return etree.XPath(_translator.css_to_xpath(selector))
+    except Exception as e:
+        logger.warning(f"Seletor CSS inválido no plano de extração: {selector} ({str(e)})")
+        return None
+
+
+_GALLERY_XPATHS = tuple(xpath for xpath in map(compile_css, GALLERY_SELECTORS) if xpath is not None)
+
+
+def normalize_text(text):
+    """Colapsa espaços e remove caracteres não imprimíveis."""
+    if not text:
+        return text
+    text = ' '.join(text.split())
+    if not text.isprintable():
+        text = ''.join(c for c in text if c.isprintable() or c.isspace())
+    return text
+
+
+def _first_text(nodes):
+    """Equivale a ::text: o primeiro trecho de texto direto não vazio dos nós."""
+    for node in nodes:
+        if isinstance(node, str):
+            if node.strip():
+                return node
+            continue
+        if node.text and node.text.strip():
+            return node.text
+        for child in node:
+            if child.tail and child.tail.strip():
+                return child.tail
+    return None
+
+
+def _first_content(nodes):
+    """Equivale a ::attr(content): usado em meta tags."""
+    for node in nodes:
+        if not isinstance(node, str):
+            content = node.get('content')
+            if content:
+                return content
+    return None
+
+
+def _full_text(nodes):
+    """Texto completo (com descendentes) do primeiro nó."""
+    for node in nodes:
+        if isinstance(node, str):
+            return node
+        return ' '.join(node.itertext())
+    return None
+
+
+class ExtractionPlan:
+    """
+    Seletores de uma regra compilados para extração rápida.
+
+    Args:
+        selectors: Dicionário campo -> seletor CSS
+    """
+
+    def __init__(self, selectors):
+        self.selectors = dict(selectors)
+        self.fields = {}
+        for field in TEXT_FIELDS:
+            selector = self.selectors.get(field)
+            if selector and isinstance(selector, str):
+                xpath = compile_css(selector)
+                if xpath is not None:
+                    self.fields[field] = xpath
+
+        image_selector = self.selectors.get('image_url')
+        self.image_xpath = compile_css(image_selector) if image_selector and isinstance(image_selector, str) else None
+
+    def extract_field(self, root, field):
+        """
+        Extrai o texto de um campo com uma única consulta à árvore.
+
+        Returns:
+            str: Texto normalizado ou None
+        """
+        xpath = self.fields.get(field)
+        if xpath is None:
+            return None
+        nodes = xpath(root)
+        if not nodes:
+            return None
+        result = _first_text(nodes) or _first_content(nodes) or _full_text(nodes)
+        return normalize_text(result) if result else None
+
+    def extract_images(self, root, base_url):
+        """
+        Extrai as URLs absolutas das imagens, sem duplicatas e na ordem encontrada.
+        """
+        images = []
+        if self.image_xpath is not None:
+            nodes = [node for node in self.image_xpath(root) if not isinstance(node, str)]
+            for attribute in IMAGE_ATTRIBUTES:
+                images.extend(value for value in (node.get(attribute) for node in nodes) if value)
+
+            if not images:
+                for xpath in _GALLERY_XPATHS:
+                    images = [value for value in (node.get('src') for node in xpath(root)) if value]
+                    if images:
+                        break
+
+        seen = set()
+        result = []
+        origin = None
+        for image in images:
+            if image.startswith(('http://', 'https://')):
+                pass
+            elif image.startswith('/') and not image.startswith('//') and '/.' not in image:
+                # Caminho absoluto simples: evita o custo de urljoin por imagem
+                if origin is None:
+                    parsed = urlsplit(base_url)
+                    origin = f'{parsed.scheme}://{parsed.netloc}'
+                image = origin + image
+            else:
+                image = urljoin(base_url, image)
+            if image not in seen:
+                seen.add(image)
+                result.append(image)
+        return result
+
+    def extract(self, root, base_url):
+        """
+        Extrai todos os campos de texto e as imagens da página.
+
+        Args:
+            root: Raiz lxml da página (por exemplo response.selector.root)
+            base_url: URL da página, usada para normalizar as imagens
+
+        Returns:
+            dict: Campo -> texto (ou None) e 'images' -> lista de URLs
+        """
+        data = {field: self.extract_field(root, field) for field in TEXT_FIELDS}
+        data['images'] = self.extract_images(root, base_url)
+        return data
+
+
+def selectors_hash(selectors):
+    """Calcula o hash estável de um conjunto de seletores."""
+    material = json.dumps(selectors, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(material.encode('utf-8')).hexdigest()
+
+
+class ExtractionPlanCache:
+    """
+    Cache LRU de planos indexado pelo hash do conjunto de seletores.
+
+    Args:
+        max_plans: Número máximo de planos mantidos
+    """
+
+    def __init__(self, max_plans=DEFAULT_MAX_PLANS):
+        self.max_plans = max_plans
+        self._plans = OrderedDict()
+
+        # Estatísticas
+        self.hits = 0
+        self.compiled = 0
+
+    def get(self, selectors):
+        """Retorna o plano do conjunto de seletores, compilando-o na primeira vez."""
+        key = selectors_hash(selectors)
+        plan = self._plans.get(key)
+        if plan is not None:
+            self._plans.move_to_end(key)
+            self.hits += 1
+            return plan
+
+        plan = ExtractionPlan(selectors)
+        self.compiled += 1
+        self._plans[key] = plan
+        while len(self._plans) > self.max_plans:
+            self._plans.popitem(last=False)
+        return plan
+
+    def get_stats(self):
+        """Retorna as estatísticas do cache de planos."""
+        return {
+            'plans': len(self._plans),
+            'hits': self.hits,
+            'compiled': self.compiled,
+        }
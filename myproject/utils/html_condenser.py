@@ -0,0 +1,209 @@
+"""
+Condensação de HTML para os prompts do LLM.
+
+Em vez de enviar os primeiros N caracteres da página (com scripts, CSS inline
+e SVG), a página é analisada com lxml e reescrita em uma versão compacta:
+
+- nós sem conteúdo (script, style, svg, iframe, comentários...) são removidos;
+- apenas atributos úteis para seletores são mantidos (class, id, href, src...);
+- textos são normalizados e truncados;
+- irmãos repetidos com a mesma tag e classe (cards de listagem) são reduzidos
+  a alguns exemplares, seguidos de um comentário com a quantidade omitida.
+
+Cada nó é visitado uma única vez e há limites de tamanho e de tempo.
+"""
+import re
+import time
+import logging
+from html import escape
+import lxml.html
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+# Limites padrão
+DEFAULT_MAX_CHARS = 12000
+DEFAULT_MAX_SIBLINGS = 3
+DEFAULT_MAX_TEXT = 80
+DEFAULT_TIME_BUDGET = 0.5
+
+# Nós removidos com todo o conteúdo
+REMOVED_TAGS = (
+    'script', 'style', 'noscript', 'svg', 'iframe', 'canvas', 'template',
+    'link', 'meta', 'object', 'embed', 'video', 'audio', 'source', 'picture',
+)
+
+# Atributos preservados (os demais são descartados)
+KEPT_ATTRIBUTES = ('id', 'class', 'href', 'src', 'alt', 'itemprop', 'name', 'type')
+
+# Tamanho máximo de valores de atributo como href/src
+MAX_ATTRIBUTE = 80
+
+# Elementos sem tag de fechamento
+VOID_TAGS = frozenset({'img', 'br', 'hr', 'input', 'area', 'col', 'wbr'})
+
+# Elementos mantidos mesmo sem texto nem atributos
+ALWAYS_KEPT = frozenset({'img', 'a', 'input', 'select', 'table'})
+
+# Verifica o orçamento de tempo a cada N nós
+_TIME_CHECK_INTERVAL = 256
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _clean_text(text, max_text):
+    if not text:
+        return ''
+    text = _WHITESPACE_RE.sub(' ', text).strip()
+    if len(text) > max_text:
+        text = text[:max_text].rstrip() + '…'
+    return escape(text, quote=False)
+
+
+def _attributes(element):
+    parts = []
+    for name in KEPT_ATTRIBUTES:
+        value = element.get(name)
+        if value is None:
+            continue
+        value = _WHITESPACE_RE.sub(' ', value).strip()
+        if not value:
+            continue
+        if len(value) > MAX_ATTRIBUTE:
+            value = value[:MAX_ATTRIBUTE] + '…'
+        parts.append(f' {name}="{escape(value)}"')
+    return ''.join(parts)
+
+
+def _sibling_signature(element):
+    return element.tag, element.get('class')
+
+
+def parse_html(html):
+    """
+    Analisa o HTML com lxml, tolerando declarações de codificação em strings.
+
+    Returns:
+        Elemento raiz ou None se o documento não puder ser analisado
+    """
+    if not html or not html.strip():
+        return None
+    try:
+        if isinstance(html, str):
+            html = html.encode('utf-8')
+        parser = lxml.html.HTMLParser(encoding='utf-8', remove_comments=True)
+        return lxml.html.document_fromstring(html, parser=parser)
+    except (etree.ParserError, ValueError) as e:
+        logger.warning(f"Erro ao analisar HTML para condensação: {str(e)}")
+        return None
+
+
+def condense_html(html, max_chars=DEFAULT_MAX_CHARS, max_siblings=DEFAULT_MAX_SIBLINGS,
+                  max_text=DEFAULT_MAX_TEXT, time_budget=DEFAULT_TIME_BUDGET):
+    """
+    Gera uma versão compacta do HTML com o esqueleto de classes/ids e amostras de texto.
+
+    Args:
+        html: Conteúdo HTML (str ou bytes)
+        max_chars: Tamanho máximo aproximado do resultado
+        max_siblings: Exemplares mantidos de cada grupo de irmãos repetidos
+        max_text: Tamanho máximo de cada trecho de texto
+        time_budget: Tempo máximo em segundos para percorrer a árvore
+
+    Returns:
+        str: HTML condensado (ou o início do HTML original se a análise falhar)
+    """
+    root = parse_html(html)
+    if root is None:
+        return (html or '')[:max_chars] if isinstance(html, str) else ''
+
+    etree.strip_elements(root, *REMOVED_TAGS, with_tail=False)
+
+    out = []
+    size = 0
+
+    title = root.find('.//title')
+    if title is not None and title.text:
+        header = f'<title>{_clean_text(title.text, max_text)}</title>\n'
+        out.append(header)
+        size += len(header)
+
+    body = root.find('body')
+    start = body if body is not None else root
+
+    deadline = time.monotonic() + time_budget
+    visited = 0
+    exhausted = False
+
+    # Pilha de (elemento, fechamento): o fechamento emite a tag final e o texto
+    # seguinte; entradas com fechamento None são trechos literais
+    stack = [(start, False)]
+    while stack:
+        element, closing = stack.pop()
+
+        if closing is None:
+            out.append(element)
+            size += len(element)
+            continue
+
+        if closing:
+            piece = f'</{element.tag}>' + _clean_text(element.tail, max_text)
+            out.append(piece)
+            size += len(piece)
+            continue
+
+        if exhausted:
+            continue
+
+        visited += 1
+        if size >= max_chars or (visited % _TIME_CHECK_INTERVAL == 0 and time.monotonic() > deadline):
+            exhausted = True
+            out.append('<!-- conteúdo restante omitido -->')
+            continue
+
+        tag = element.tag
+        attributes = _attributes(element)
+        text = _clean_text(element.text, max_text)
+        tail = _clean_text(element.tail, max_text)
+
+        # Descarta invólucros vazios sem informação para seletores
+        if not attributes and not text and len(element) == 0 and tag not in ALWAYS_KEPT:
+            if tail:
+                out.append(tail)
+                size += len(tail)
+            continue
+
+        if tag in VOID_TAGS:
+            piece = f'<{tag}{attributes}>{tail}'
+            out.append(piece)
+            size += len(piece)
+            continue
+
+        piece = f'<{tag}{attributes}>{text}'
+        out.append(piece)
+        size += len(piece)
+        stack.append((element, True))
+
+        # Mantém alguns exemplares de cada grupo de irmãos com a mesma tag e classe
+        children = []
+        seen = {}
+        omitted = 0
+        for child in element:
+            if not isinstance(child.tag, str):
+                continue
+            signature = _sibling_signature(child)
+            count = seen.get(signature, 0) + 1
+            seen[signature] = count
+            if count <= max_siblings:
+                children.append(child)
+            else:
+                omitted += 1
+
+        if omitted:
+            # O marcador fica logo antes do fechamento do elemento pai
+            stack.append((f'<!-- +{omitted} elementos semelhantes -->', None))
+        for child in reversed(children):
+            stack.append((child, False))
+
+    return ''.join(out)
+
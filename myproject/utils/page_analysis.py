@@ -0,0 +1,128 @@
+"""
+Análise memoizada de uma resposta.
+
+Uma mesma resposta passa por várias etapas do spider (verificação de tipo de
+conteúdo, detecção de CAPTCHA, classificação, impressão digital, e de novo em
+parse_detail). O objeto PageAnalysis é compartilhado por todas as etapas e
+calcula cada resultado apenas na primeira vez em que é pedido: o texto
+decodificado, a versão em minúsculas, o veredito de conteúdo textual, o
+veredito de CAPTCHA, a classificação e a impressão digital estrutural.
+"""
+import weakref
+import logging
+from functools import cached_property
+from myproject.utils.page_classifier import page_classifier
+from myproject.utils.captcha_detector import captcha_detector, normalize_headers
+from myproject.utils.dom_fingerprint import dom_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Tipos de conteúdo de texto comuns
+TEXT_CONTENT_TYPES = (
+    'text/html', 'text/plain', 'application/json', 'application/xml',
+    'text/xml', 'application/javascript', 'text/css',
+)
+
+# Tamanho dos blocos usados para converter textos não ASCII para minúsculas
+LOWER_CHUNK_SIZE = 64 * 1024
+
+# Análises das respostas ainda em uso (descartadas junto com a resposta)
+_analyses = weakref.WeakKeyDictionary()
+
+
+def lower_text(text):
+    """
+    Converte o texto para minúsculas com pico de memória limitado.
+
+    Em textos não ASCII, str.lower() reserva um buffer temporário de até 12
+    bytes por caractere; convertendo em blocos, o pico fica próximo do tamanho
+    do próprio resultado.
+    """
+    if text.isascii() or len(text) <= LOWER_CHUNK_SIZE:
+        return text.lower()
+    return ''.join(
+        text[start:start + LOWER_CHUNK_SIZE].lower()
+        for start in range(0, len(text), LOWER_CHUNK_SIZE)
+    )
+
+
+class PageAnalysis:
+    """
+    Resultados calculados sob demanda e uma única vez para uma resposta.
+
+    Use PageAnalysis.of(response) para obter a instância compartilhada.
+
+    Args:
+        response: Resposta do Scrapy
+        classifier: Classificador de tipo de página
+        detector: Detector de CAPTCHA/anti-bot
+    """
+
+    def __init__(self, response, classifier=page_classifier, detector=captcha_detector):
+        self.response = response
+        self.classifier = classifier
+        self.detector = detector
+
+    @classmethod
+    def of(cls, response):
+        """Retorna a análise compartilhada da resposta, criando-a no primeiro uso."""
+        analysis = _analyses.get(response)
+        if analysis is None:
+            analysis = cls(response)
+            _analyses[response] = analysis
+        return analysis
+
+    @cached_property
+    def content_type(self):
+        """Content-Type do cabeçalho, em minúsculas."""
+        return self.response.headers.get('Content-Type', b'').decode('utf-8', 'ignore').lower()
+
+    @cached_property
+    def is_text(self):
+        """Indica se a resposta é texto e não um binário."""
+        try:
+            if not any(text_type in self.content_type for text_type in TEXT_CONTENT_TYPES):
+                return False
+            # Decodifica o corpo (lança AttributeError em respostas binárias)
+            self.text
+            return True
+        except AttributeError:
+            return False
+        except Exception as e:
+            logger.warning(f"Erro ao verificar se a resposta é texto: {str(e)}")
+            return False
+
+    @cached_property
+    def text(self):
+        """Corpo decodificado."""
+        return self.response.text
+
+    @cached_property
+    def lower(self):
+        """Corpo decodificado em minúsculas."""
+        return lower_text(self.text)
+
+    @cached_property
+    def captcha(self):
+        """Veredito do detector de CAPTCHA/anti-bot (CaptchaVerdict)."""
+        # Respostas binárias ainda passam pelo caminho rápido de status e cabeçalhos
+        body_lower = self.lower if self.is_text else ''
+        return self.detector.detect(self.response.status, normalize_headers(self.response.headers),
+                                    body_lower, self.response.url)
+
+    @property
+    def is_captcha(self):
+        """Indica se a página contém um CAPTCHA ou verificação anti-bot."""
+        return self.captcha.is_captcha
+
+    @cached_property
+    def classification(self):
+        """Resultado do classificador de tipo de página (ClassificationResult)."""
+        return self.classifier.classify(self.lower, lowered=True)
+
+    @cached_property
+    def fingerprint(self):
+        """Impressão digital estrutural da página (ou None)."""
+        if not self.is_text:
+            return None
+        return dom_fingerprint(self.lower, lowered=True)
@@ -0,0 +1,231 @@
+"""
+Classificador de tipo de página (listagem ou detalhes) em passagem única.
+
+Todos os sinais usados pela heurística do spider são pré-compilados e o
+documento é percorrido uma única vez: cada tag de abertura tem seus atributos
+class/id avaliados contra os sinais de lista/detalhe, e as palavras-chave de
+texto (navegação, filtros, preço, área...) são capturadas pela mesma expressão.
+"""
+import re
+from collections import namedtuple
+
+# Resultado da classificação: tipo, pontuações e o vetor de features usado
+ClassificationResult = namedtuple(
+    'ClassificationResult',
+    ['page_type', 'list_score', 'detail_score', 'features']
+)
+
+# Sinais avaliados no valor do atributo class (nome, expressão sobre o valor)
+LIST_CLASS_SIGNALS = [
+    ('class_lista', r'lista'), ('class_grid', r'grid'), ('class_results', r'results'),
+    ('class_catalog', r'catalog'), ('class_listing', r'listing'),
+    ('class_search_results', r'search.*results'), ('class_cards', r'cards'),
+    ('class_properties', r'properties'), ('class_imoveis', r'imoveis'),
+    ('class_pagination', r'pagination'), ('class_paginacao', r'paginacao'),
+    ('class_pages', r'pages'), ('class_resultados', r'resultados'),
+    ('class_busca', r'busca'), ('class_search', r'search'),
+]
+
+DETAIL_CLASS_SIGNALS = [
+    ('class_detalhe', r'detalhe'), ('class_produto', r'produto'),
+    ('class_imovel_info', r'imovel.*info'), ('class_price', r'price'),
+    ('class_valor', r'valor'), ('class_property_detail', r'property.*detail'),
+    ('class_auction_details', r'auction-details'), ('class_product_info', r'product-info'),
+    ('class_item_detail', r'item-detail'), ('class_caracteristicas', r'caracteristicas'),
+    ('class_especificacoes', r'especificacoes'), ('class_ficha_tecnica', r'ficha.*tecnica'),
+    ('class_descricao_imovel', r'descricao.*imovel'), ('class_galeria', r'galeria'),
+    ('class_gallery', r'gallery'), ('class_fotos', r'fotos'), ('class_lances', r'lances'),
+    ('class_ofertas', r'ofertas'), ('class_bid', r'bid'),
+]
+
+# Sinais avaliados no atributo id de elementos <div>
+LIST_DIV_ID_SIGNALS = [
+    ('div_id_lista', r'lista'), ('div_id_grid', r'grid'), ('div_id_results', r'results'),
+]
+
+DETAIL_DIV_ID_SIGNALS = [
+    ('div_id_detalhe', r'detalhe'), ('div_id_produto', r'produto'),
+]
+
+# Sinais com peso próprio (nome, peso)
+LIST_WEIGHTED_SIGNALS = [
+    ('multiple_items', 3), ('pagination', 2), ('navigation', 1), ('filters', 1),
+]
+
+DETAIL_WEIGHTED_SIGNALS = [
+    ('h1', 1), ('price_text', 2), ('area_text', 2), ('auction_date_text', 2),
+    ('share', 1), ('gallery', 1),
+]
+
+# Número mínimo de cards para considerar a página uma listagem
+MIN_CARDS_FOR_LIST = 3
+
+_CARD_CLASS_RE = re.compile(r'card|item|produto|imovel|property')
+_PAGINATION_CLASS_RE = re.compile(r'pag(?:ination|inacao|e)|pages|numeros')
+
+# Palavras-chave de texto que podem aparecer em qualquer lugar do documento
+_KEYWORD_GROUPS = [
+    ('navigation', r'próxima|proxima|próximo|proximo|anterior|seguinte|next|prev|previous'),
+    ('filters', r'filtrar|ordenar|filtros|filtro por|ordernar por|classificar'),
+    ('share', r'compartilhar|compartilhe|enviar|contato|contate|whatsapp|email|telefone'),
+    ('gallery', r'galeria|slideshow|carrossel|carousel|slider|slide'),
+]
+
+# As expressões abaixo são aplicadas sobre o HTML já em minúsculas: sem
+# IGNORECASE o motor de regex consegue descartar posições muito mais rápido.
+_KEYWORD_RE = re.compile(
+    '|'.join(f'(?P<{name}>{pattern})' for name, pattern in _KEYWORD_GROUPS)
+)
+
+# Expressão mestre: tags de abertura, palavras-chave e padrões de conteúdo
+_TOKEN_RE = re.compile(
+    r'<(?P<tag>[a-z][a-z0-9]*)(?P<attrs>\s[^>]*)?>'
+    r'|(?P<price_text>r\$\s*[\d\.,]+)'
+    r'|(?P<area_text>(?:área|area)\s*:?\s*\d+\s*(?:m²|m2))'
+    r'|(?P<auction_date_text>data\s*do\s*leilão|leilão\s*em|data\s*:)'
+    '|' + '|'.join(f'(?P<{name}>{pattern})' for name, pattern in _KEYWORD_GROUPS)
+)
+
+_ATTR_RE = re.compile(r'\b(class|id)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+
+def _compile_signals(signals):
+    return [(name, re.compile(pattern)) for name, pattern in signals]
+
+
+class PageClassifier:
+    """
+    Classifica páginas como listagem ou detalhes percorrendo o HTML uma única vez.
+
+    As pontuações seguem os mesmos pesos da heurística original do spider:
+    cada sinal de classe/id vale 1 ponto e os sinais ponderados somam o peso
+    definido em LIST_WEIGHTED_SIGNALS e DETAIL_WEIGHTED_SIGNALS.
+    """
+
+    def __init__(self):
+        self.list_class_signals = _compile_signals(LIST_CLASS_SIGNALS)
+        self.detail_class_signals = _compile_signals(DETAIL_CLASS_SIGNALS)
+        self.class_signals = self.list_class_signals + self.detail_class_signals
+        self.div_id_signals = _compile_signals(LIST_DIV_ID_SIGNALS + DETAIL_DIV_ID_SIGNALS)
+
+        self.list_signal_names = (
+            [name for name, _ in LIST_CLASS_SIGNALS + LIST_DIV_ID_SIGNALS]
+        )
+        self.detail_signal_names = (
+            [name for name, _ in DETAIL_CLASS_SIGNALS + DETAIL_DIV_ID_SIGNALS]
+        )
+        self.feature_names = (
+            self.list_signal_names + self.detail_signal_names
+            + [name for name, _ in LIST_WEIGHTED_SIGNALS + DETAIL_WEIGHTED_SIGNALS]
+        )
+
+    def extract_features(self, html_content, lowered=False):
+        """
+        Extrai o vetor de features do HTML em uma única passagem.
+
+        Args:
+            html_content: Conteúdo HTML da página
+            lowered: True se html_content já está em minúsculas (evita uma cópia)
+
+        Returns:
+            dict: Nome da feature -> 0 ou 1 (card_count traz a contagem de cards,
+            limitada a MIN_CARDS_FOR_LIST)
+        """
+        fired = set()
+        seen_class_values = set()
+        seen_div_ids = set()
+        card_count = 0
+        pending_class = len(self.class_signals)
+        pending_keywords = len(_KEYWORD_GROUPS)
+
+        if not lowered:
+            html_content = html_content.lower()
+
+        for match in _TOKEN_RE.finditer(html_content):
+            tag = match.group('tag')
+
+            if tag is None:
+                # Palavra-chave ou padrão de conteúdo fora de tags
+                fired.add(match.lastgroup)
+                continue
+
+            if tag == 'h1':
+                fired.add('h1')
+
+            attrs = match.group('attrs')
+            if not attrs:
+                continue
+
+            # Palavras-chave também contam quando aparecem dentro de atributos
+            if pending_keywords:
+                for keyword in _KEYWORD_RE.finditer(attrs):
+                    fired.add(keyword.lastgroup)
+                pending_keywords = sum(1 for name, _ in _KEYWORD_GROUPS if name not in fired)
+
+            for attr_match in _ATTR_RE.finditer(attrs):
+                attr_name = attr_match.group(1)
+                value = attr_match.group(2) or attr_match.group(3) or ''
+
+                if attr_name == 'class':
+                    if tag == 'div' and card_count < MIN_CARDS_FOR_LIST and _CARD_CLASS_RE.search(value):
+                        card_count += 1
+
+                    if value in seen_class_values:
+                        continue
+                    seen_class_values.add(value)
+
+                    if 'pagination' not in fired and _PAGINATION_CLASS_RE.search(value):
+                        fired.add('pagination')
+
+                    if pending_class:
+                        for name, pattern in self.class_signals:
+                            if name not in fired and pattern.search(value):
+                                fired.add(name)
+                                pending_class -= 1
+                elif tag == 'div' and value not in seen_div_ids:
+                    seen_div_ids.add(value)
+                    for name, pattern in self.div_id_signals:
+                        if name not in fired and pattern.search(value):
+                            fired.add(name)
+
+        if card_count >= MIN_CARDS_FOR_LIST:
+            fired.add('multiple_items')
+
+        features = {name: int(name in fired) for name in self.feature_names}
+        features['card_count'] = card_count
+        return features
+
+    def score(self, features):
+        """
+        Calcula as pontuações de lista e detalhe a partir do vetor de features.
+
+        Returns:
+            tuple: (list_score, detail_score)
+        """
+        list_score = sum(features[name] for name in self.list_signal_names)
+        list_score += sum(features[name] * weight for name, weight in LIST_WEIGHTED_SIGNALS)
+
+        detail_score = sum(features[name] for name in self.detail_signal_names)
+        detail_score += sum(features[name] * weight for name, weight in DETAIL_WEIGHTED_SIGNALS)
+
+        return list_score, detail_score
+
+    def classify(self, html_content, lowered=False):
+        """
+        Classifica o HTML como 'list' ou 'detail'.
+
+        Args:
+            html_content: Conteúdo HTML da página
+            lowered: True se html_content já está em minúsculas
+
+        Returns:
+            ClassificationResult: Tipo detectado, pontuações e features
+        """
+        features = self.extract_features(html_content, lowered)
+        list_score, detail_score = self.score(features)
+        page_type = 'detail' if detail_score > list_score else 'list'
+        return ClassificationResult(page_type, list_score, detail_score, features)
+
+
+# Instância compartilhada (os padrões são imutáveis após a compilação)
+page_classifier = PageClassifier()
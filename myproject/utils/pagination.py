@@ -0,0 +1,270 @@
+"""
+Paginação das páginas de listagem.
+
+Na primeira listagem de um domínio em que há um link de próxima página
+(rel="next", texto "Próxima"/"Seguinte"/"»" ou classe "next"), o detector
+compara a URL atual com a da próxima página e aprende a regra de paginação do
+domínio: um parâmetro de consulta numérico (?page=2, ?pagina=2, ?offset=20)
+ou um trecho do caminho (/page/2, /pagina/2). Sem link de próxima página, a
+regra também pode vir dos links numerados da paginação.
+
+Com a regra aprendida, as páginas seguintes de cada listagem são geradas
+diretamente, uma por vez, até o orçamento de páginas do domínio. Uma
+sequência termina na primeira página que não traz nenhum link de detalhe
+novo (já gravado, já agendado nesta execução ou página além da última).
+Em sites cuja paginação não segue uma regra (ex.: cursores opacos), o link de
+próxima página de cada listagem é seguido.
+"""
+import re
+import logging
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+logger = logging.getLogger(__name__)
+
+# Páginas de listagem seguidas por domínio
+DEFAULT_MAX_PAGES = 20
+
+# Nomes de parâmetros de consulta usados para paginar
+PAGE_PARAMS = ('page', 'pagina', 'pag', 'pg', 'p', 'paged', 'pagenum', 'page_num',
+               'pageindex', 'numpagina', 'offset', 'start', 'inicio')
+
+# Trecho de caminho com o número da página: /page/2, /pagina/2, /p/2
+_PATH_PAGE_RE = re.compile(r'/(page|pagina|pag|p)/(\d+)(?=/|$)', re.IGNORECASE)
+
+# Texto, título ou aria-label de um link de próxima página
+_NEXT_TEXT_RE = re.compile(r'^(pr[oó]xim[ao]|seguinte|avan[cç]ar|next)\b|^(›|»|>|>>|→)$', re.IGNORECASE)
+_NEXT_CLASS_RE = re.compile(r'next|pr[oó]xim', re.IGNORECASE)
+
+
+class PaginationRule:
+    """
+    Regra de paginação de um domínio.
+
+    Args:
+        kind: 'query' (parâmetro de consulta), 'path' (trecho do caminho) ou
+            'link' (segue o link de próxima página de cada listagem)
+        name: Nome do parâmetro ou do trecho do caminho
+        step: Incremento entre páginas (1 para números de página, N para offsets)
+        first: Valor da primeira página, quando a URL não traz o parâmetro
+    """
+
+    __slots__ = ('kind', 'name', 'step', 'first')
+
+    def __init__(self, kind, name=None, step=1, first=1):
+        self.kind = kind
+        self.name = name
+        self.step = step
+        self.first = first
+
+    def __repr__(self):
+        return f'PaginationRule({self.kind!r}, {self.name!r}, step={self.step}, first={self.first})'
+
+    def current_value(self, url):
+        """Valor de página da URL (first se a URL não tiver o parâmetro)."""
+        parsed = urlparse(url)
+        if self.kind == 'query':
+            for key, value in parse_qsl(parsed.query, keep_blank_values=True):
+                if key == self.name and value.isdigit():
+                    return int(value)
+        elif self.kind == 'path':
+            for match in _PATH_PAGE_RE.finditer(parsed.path):
+                if match.group(1) == self.name:
+                    return int(match.group(2))
+        return self.first
+
+    def url_for(self, url, value):
+        """Monta a URL da listagem com o valor de página indicado."""
+        parsed = urlparse(url)
+        if self.kind == 'query':
+            query = [(key, val) for key, val in parse_qsl(parsed.query, keep_blank_values=True) if key != self.name]
+            query.append((self.name, str(value)))
+            return urlunparse(parsed._replace(query=urlencode(query), fragment=''))
+        path = parsed.path
+        segment = f'/{self.name}/{value}'
+        replaced, count = re.subn(rf'/{re.escape(self.name)}/\d+(?=/|$)', segment, path, count=1)
+        if not count:
+            replaced = path.rstrip('/') + segment
+        return urlunparse(parsed._replace(path=replaced, fragment=''))
+
+    def next_url(self, url):
+        """URL da página seguinte à da URL informada."""
+        return self.url_for(url, self.current_value(url) + self.step)
+
+
+def _page_values(url):
+    """Parâmetros e trechos de caminho numéricos de paginação da URL."""
+    parsed = urlparse(url)
+    values = {}
+    for key, value in parse_qsl(parsed.query, keep_blank_values=True):
+        if key.lower() in PAGE_PARAMS and value.isdigit():
+            values[('query', key)] = int(value)
+    for match in _PATH_PAGE_RE.finditer(parsed.path):
+        values[('path', match.group(1))] = int(match.group(2))
+    return values
+
+
+def _listing_path(url):
+    """Caminho da listagem sem o trecho de número de página."""
+    return _PATH_PAGE_RE.sub('', urlparse(url).path).rstrip('/')
+
+
+def infer_rule(current_url, next_url):
+    """
+    Deduz a regra de paginação comparando a URL atual com a da próxima página.
+
+    Returns:
+        PaginationRule: Regra deduzida ou None se as URLs não diferem por um número de página
+    """
+    current, following = urlparse(current_url), urlparse(next_url)
+    if current.netloc != following.netloc:
+        return None
+    current_values = _page_values(current_url)
+    for (kind, name), value in _page_values(next_url).items():
+        first = 0 if name.lower() in ('offset', 'start', 'inicio') else 1
+        previous = current_values.get((kind, name), first)
+        if value > previous:
+            # Offsets partem de 0 na primeira página: o passo é o próprio valor
+            step = value - previous
+            return PaginationRule(kind, name, step=step, first=first)
+    return None
+
+
+def find_next_link(response):
+    """
+    Procura o link de próxima página da listagem.
+
+    Returns:
+        str: URL absoluta do link ou None
+    """
+    href = response.css('link[rel~="next"]::attr(href), a[rel~="next"]::attr(href)').get()
+    if href:
+        return urljoin(response.url, href.strip())
+
+    for anchor in response.css('a[href]'):
+        href = anchor.attrib.get('href', '').strip()
+        if not href or href.startswith(('#', 'javascript:')):
+            continue
+        text = ' '.join(anchor.css('::text').getall()).strip()
+        label = anchor.attrib.get('aria-label') or anchor.attrib.get('title') or ''
+        if _NEXT_TEXT_RE.search(text) or _NEXT_TEXT_RE.search(label.strip()) or \
+                _NEXT_CLASS_RE.search(anchor.attrib.get('class', '')):
+            return urljoin(response.url, href)
+    return None
+
+
+def rule_from_numbered_links(response):
+    """
+    Deduz a regra a partir dos links numerados da paginação (1, 2, 3...).
+
+    Returns:
+        PaginationRule: Regra deduzida ou None
+    """
+    listing = _listing_path(response.url)
+    seen = {}
+    for href in response.css('a::attr(href)').getall():
+        url = urljoin(response.url, href.strip())
+        if _listing_path(url) != listing:
+            continue
+        for key, value in _page_values(url).items():
+            seen.setdefault(key, set()).add(value)
+    for (kind, name), values in sorted(seen.items(), key=lambda entry: -len(entry[1])):
+        ordered = sorted(values)
+        if len(ordered) < 2:
+            continue
+        step = min(b - a for a, b in zip(ordered, ordered[1:]))
+        first = 0 if name.lower() in ('offset', 'start', 'inicio') else 1
+        return PaginationRule(kind, name, step=step, first=first)
+    return None
+
+
+class PaginationFollower:
+    """
+    Aprende a regra de paginação de cada domínio e decide a próxima listagem a agendar.
+
+    Args:
+        max_pages: Páginas de listagem seguidas por domínio (orçamento)
+    """
+
+    def __init__(self, max_pages=DEFAULT_MAX_PAGES):
+        self.max_pages = max_pages
+        self.rules = {}
+        self._pages = {}
+        self._scheduled = set()
+        self._details = {}
+
+        # Estatísticas
+        self.pages_scheduled = 0
+        self.stopped_empty = 0
+        self.stopped_budget = 0
+        self.no_next = 0
+
+    def rule(self, response, domain):
+        """
+        Retorna a regra do domínio, detectando-a na primeira listagem que a revelar.
+
+        Returns:
+            PaginationRule: Regra do domínio ou None se a página não tem paginação
+        """
+        rule = self.rules.get(domain)
+        if rule is not None and rule.kind != 'link':
+            return rule
+        next_link = find_next_link(response)
+        detected = (infer_rule(response.url, next_link) if next_link else None) or rule_from_numbered_links(response)
+        if detected is None and next_link:
+            detected = PaginationRule('link')
+        if detected is not None and rule is None:
+            logger.info(f"Paginação detectada em {domain}: {detected}")
+        if detected is not None:
+            self.rules[domain] = detected
+        return detected
+
+    def new_details(self, domain, detail_urls):
+        """Registra os links de detalhe da página e retorna quantos são novos nesta execução."""
+        seen = self._details.setdefault(domain, set())
+        new = [url for url in detail_urls if url not in seen]
+        seen.update(new)
+        return len(new)
+
+    def next_page(self, response, domain, detail_urls):
+        """
+        Decide a próxima página da listagem.
+
+        Args:
+            response: Resposta da listagem atual
+            domain: Domínio da listagem
+            detail_urls: Links de detalhe da página que ainda não estão gravados
+
+        Returns:
+            str: URL da próxima página ou None se a sequência termina aqui
+        """
+        self._scheduled.add(response.url)
+        if not self.new_details(domain, detail_urls):
+            self.stopped_empty += 1
+            return None
+        if self._pages.get(domain, 0) >= self.max_pages:
+            self.stopped_budget += 1
+            return None
+
+        rule = self.rule(response, domain)
+        if rule is None:
+            self.no_next += 1
+            return None
+        next_url = find_next_link(response) if rule.kind == 'link' else rule.next_url(response.url)
+        if not next_url or next_url in self._scheduled:
+            self.no_next += 1
+            return None
+
+        self._scheduled.add(next_url)
+        self._pages[domain] = self._pages.get(domain, 0) + 1
+        self.pages_scheduled += 1
+        return next_url
+
+    def get_stats(self):
+        """Retorna as estatísticas da paginação."""
+        return {
+            'domains_with_rule': len(self.rules),
+            'pages_scheduled': self.pages_scheduled,
+            'stopped_empty': self.stopped_empty,
+            'stopped_budget': self.stopped_budget,
+            'no_next': self.no_next,
+        }
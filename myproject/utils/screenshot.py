@@ -2,30 +2,61 @@
 Módulo para capturar screenshots de páginas web.
 """
 import os
-import time
+import atexit
 import logging
+import threading
 from datetime import datetime
+from functools import partial
 from urllib.parse import urlparse
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import WebDriverException
+from selenium.common.exceptions import WebDriverException, TimeoutException
+from myproject.utils.webdriver_pool import WebDriverPool, create_chrome_driver
+from myproject.utils.screenshot_store import store_from_config
 
 logger = logging.getLogger(__name__)
 
+# Pools compartilhados por caminho do driver (criados no primeiro uso)
+_default_pools = {}
+_default_pools_lock = threading.Lock()
+
+
+def get_default_pool(driver_path=None):
+    """
+    Retorna o pool de navegadores compartilhado pelo processo.
+
+    Args:
+        driver_path: Caminho para o driver do Chrome (opcional)
+    """
+    with _default_pools_lock:
+        pool = _default_pools.get(driver_path)
+        if pool is None:
+            pool = WebDriverPool(driver_factory=partial(create_chrome_driver, driver_path))
+            _default_pools[driver_path] = pool
+        return pool
+
+
+@atexit.register
+def _close_default_pools():
+    for pool in list(_default_pools.values()):
+        pool.close()
+
 class ScreenshotManager:
     """Gerencia a captura de screenshots de páginas web."""
     
-    def __init__(self, output_dir="prints", driver_path=None):
+    def __init__(self, output_dir="prints", driver_path=None, pool=None, store=None):
         """
         Inicializa o gerenciador de screenshots.
         
         Args:
             output_dir: Diretório para salvar os screenshots (padrão: "prints")
             driver_path: Caminho para o driver do Chrome (opcional)
+            pool: Pool de navegadores (padrão: o pool compartilhado do processo)
+            store: Armazenamento dos screenshots (padrão: ScreenshotStore em output_dir
+                com as configurações de myproject.config)
         """
         self.output_dir = output_dir
         self.driver_path = driver_path
+        self.pool = pool or get_default_pool(driver_path)
+        self.store = store or store_from_config(output_dir)
         self.ensure_output_dir()
         
     def ensure_output_dir(self):
@@ -67,74 +98,63 @@ class ScreenshotManager:
         
         return filename
     
-    def capture_screenshot(self, url, wait_time=3):
+    def capture_screenshot(self, url, wait_time=None):
         """
         Captura um screenshot da página web.
         
         Args:
             url: URL da página
-            wait_time: Tempo de espera em segundos após carregar a página
+            wait_time: Tempo máximo de espera em segundos pelo carregamento da página
+                (None usa o ready_timeout do pool)
             
         Returns:
             str: Caminho do arquivo salvo ou None se falhar
         """
-        driver = None
         try:
-            # Configura as opções do Chrome em modo headless
-            chrome_options = Options()
-            chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--window-size=1920,1080")
+            with self.pool.driver() as driver:
+                # Carrega a página
+                logger.info(f"Capturando screenshot de: {url}")
+                try:
+                    driver.get(url)
+                except TimeoutException:
+                    logger.warning(f"Timeout ao carregar a página {url}, continuando mesmo assim")
+                
+                # Aguarda o carregamento da página (documento completo e rede ociosa)
+                self.pool.wait_until_ready(driver, timeout=wait_time)
+                
+                png_data = driver.get_screenshot_as_png()
+                self.pool.record_screenshot()
             
-            # Inicializa o driver
-            if self.driver_path:
-                service = Service(executable_path=self.driver_path)
-                driver = webdriver.Chrome(service=service, options=chrome_options)
+            # Codifica e salva fora do empréstimo, liberando o navegador mais cedo
+            stored = self.store.save(png_data)
+            if stored.duplicate:
+                logger.info(f"Screenshot de {url} idêntico a um já armazenado: {stored.path}")
             else:
-                driver = webdriver.Chrome(options=chrome_options)
-            
-            # Carrega a página
-            logger.info(f"Capturando screenshot de: {url}")
-            driver.get(url)
-            
-            # Aguarda o carregamento da página
-            time.sleep(wait_time)
-            
-            # Gera o nome do arquivo e salva o screenshot
-            filename = self.get_filename(url)
-            file_path = os.path.join(self.output_dir, filename)
-            
-            # Salva o screenshot
-            driver.save_screenshot(file_path)
-            logger.info(f"Screenshot salvo em: {file_path}")
+                logger.info(f"Screenshot salvo em: {stored.path} ({stored.size / 1024:.0f} KB)")
             
-            return file_path
+            return stored.path
         except WebDriverException as e:
             logger.error(f"Erro ao capturar screenshot de {url}: {str(e)}")
             return None
         except Exception as e:
             logger.error(f"Erro inesperado ao capturar screenshot de {url}: {str(e)}")
             return None
-        finally:
-            # Garante que o driver seja fechado
-            if driver:
-                driver.quit()
 
 # Função de conveniência para uso em outros módulos
-def capture_property_screenshot(url, output_dir="prints", wait_time=3, driver_path=None):
+def capture_property_screenshot(url, output_dir="prints", wait_time=None, driver_path=None, pool=None):
     """
     Captura um screenshot de uma página de detalhes de imóvel.
     
     Args:
         url: URL da página
         output_dir: Diretório para salvar os screenshots
-        wait_time: Tempo de espera em segundos após carregar a página
+        wait_time: Tempo máximo de espera em segundos pelo carregamento da página
+            (None usa o ready_timeout do pool)
         driver_path: Caminho para o driver do Chrome (opcional)
+        pool: Pool de navegadores (opcional)
         
     Returns:
         str: Caminho do arquivo salvo ou None se falhar
     """
-    manager = ScreenshotManager(output_dir=output_dir, driver_path=driver_path)
+    manager = ScreenshotManager(output_dir=output_dir, driver_path=driver_path, pool=pool)
     return manager.capture_screenshot(url, wait_time=wait_time) 
\ No newline at end of file
@@ -0,0 +1,443 @@
+"""
+Fila persistente de screenshots processada fora dos callbacks do Scrapy.
+
+O spider apenas registra a URL na fila (uma inserção no SQLite local) e segue
+o crawl. Um grupo de threads (ScreenshotWorker) consome a fila usando o pool
+de navegadores e, ao concluir cada captura, grava o caminho da imagem em
+AuctionData.screenshot_path. Trabalhos interrompidos voltam para a fila na
+próxima execução e podem ser processados também pelo utilitário
+myproject.tools.screenshot_worker.
+
+A política de amostragem define quais páginas merecem screenshot (por
+exemplo, as primeiras N de cada domínio ou apenas as que falharam na extração).
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from sqlalchemy import update
+
+logger = logging.getLogger(__name__)
+
+# Tentativas por screenshot antes de desistir
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Screenshots por domínio na política 'first_n'
+DEFAULT_PER_DOMAIN = 3
+
+# Screenshots concluídos há mais tempo que isso sem imóvel correspondente não são mais gravados no banco
+BACKFILL_MAX_AGE = 24 * 3600
+
+# Modos da política de amostragem
+SAMPLING_MODES = ('all', 'first_n', 'failed', 'first_n_or_failed')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS screenshot_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    domain TEXT NOT NULL,
+    reason TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    screenshot_path TEXT,
+    backfilled INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_screenshot_jobs_status ON screenshot_jobs (status, id);
+CREATE INDEX IF NOT EXISTS idx_screenshot_jobs_domain ON screenshot_jobs (domain);
+"""
+
+
+class ScreenshotQueue:
+    """
+    Fila de screenshots em SQLite, segura para uso em várias threads.
+
+    Args:
+        path: Caminho do arquivo SQLite (':memory:' para testes)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+        # Estatísticas
+        self.enqueued = 0
+        self.duplicates = 0
+
+    def _connect(self):
+        if self._conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def enqueue(self, url, domain, reason=None, backfill=True):
+        """
+        Adiciona uma URL à fila (URLs já enfileiradas são ignoradas).
+
+        Args:
+            url: URL da página
+            domain: Domínio da página
+            reason: Motivo da captura (registrado para consulta)
+            backfill: Se o caminho deve ser gravado em AuctionData (False quando
+                a página não gerou item, por exemplo em falhas de extração)
+
+        Returns:
+            bool: True se a URL foi adicionada
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                cursor = self._connect().execute(
+                    "INSERT OR IGNORE INTO screenshot_jobs (url, domain, reason, backfilled, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, domain, reason, 0 if backfill else 1, now, now)
+                )
+                if cursor.rowcount:
+                    self.enqueued += 1
+                    return True
+                self.duplicates += 1
+                return False
+            except Exception as e:
+                logger.warning(f"Erro ao enfileirar screenshot de {url}: {str(e)}")
+                return False
+
+    def claim(self):
+        """
+        Retira o próximo trabalho pendente, marcando-o como em execução.
+
+        Returns:
+            tuple: (id, url, domain) ou None se a fila estiver vazia
+        """
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT id, url, domain FROM screenshot_jobs WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE screenshot_jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (time.time(), row[0])
+            )
+            return row
+
+    def complete(self, job_id, screenshot_path):
+        """Marca um trabalho como concluído com o caminho da imagem."""
+        with self._lock:
+            self._connect().execute(
+                "UPDATE screenshot_jobs SET status = 'done', screenshot_path = ?, error = NULL, updated_at = ? "
+                "WHERE id = ?",
+                (screenshot_path, time.time(), job_id)
+            )
+
+    def fail(self, job_id, error, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """
+        Registra uma falha: o trabalho volta para a fila até esgotar as tentativas.
+
+        Returns:
+            bool: True se o trabalho será tentado novamente
+        """
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT attempts FROM screenshot_jobs WHERE id = ?", (job_id,)).fetchone()
+            retry = row is not None and row[0] < max_attempts
+            conn.execute(
+                "UPDATE screenshot_jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                ('pending' if retry else 'failed', str(error)[:500], time.time(), job_id)
+            )
+            return retry
+
+    def recover(self):
+        """
+        Devolve para a fila os trabalhos interrompidos por um encerramento anterior.
+
+        Returns:
+            int: Trabalhos recuperados
+        """
+        with self._lock:
+            cursor = self._connect().execute(
+                "UPDATE screenshot_jobs SET status = 'pending', updated_at = ? WHERE status = 'running'",
+                (time.time(),)
+            )
+            return max(cursor.rowcount, 0)
+
+    def pending_backfills(self, limit=100):
+        """
+        Lista os screenshots concluídos cujo caminho ainda não foi gravado no banco.
+
+        Returns:
+            list: Tuplas (id, url, screenshot_path)
+        """
+        with self._lock:
+            return self._connect().execute(
+                "SELECT id, url, screenshot_path FROM screenshot_jobs "
+                "WHERE status = 'done' AND backfilled = 0 AND updated_at > ? ORDER BY id DESC LIMIT ?",
+                (time.time() - BACKFILL_MAX_AGE, limit)
+            ).fetchall()
+
+    def mark_backfilled(self, job_ids):
+        """Marca os trabalhos cujo caminho já foi gravado no banco."""
+        if not job_ids:
+            return
+        with self._lock:
+            self._connect().executemany(
+                "UPDATE screenshot_jobs SET backfilled = 1 WHERE id = ?",
+                [(job_id,) for job_id in job_ids]
+            )
+
+    def domain_count(self, domain):
+        """Retorna quantas URLs do domínio já passaram pela fila (em qualquer execução)."""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT COUNT(*) FROM screenshot_jobs WHERE domain = ?", (domain,)
+            ).fetchone()[0]
+
+    def counts(self):
+        """Retorna a quantidade de trabalhos por situação."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT status, COUNT(*) FROM screenshot_jobs GROUP BY status"
+            ).fetchall()
+        counts = {'pending': 0, 'running': 0, 'done': 0, 'failed': 0}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self):
+        """Fecha a conexão com o arquivo."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self):
+        """Retorna as estatísticas da fila."""
+        stats = {'enqueued': self.enqueued, 'duplicates': self.duplicates}
+        stats.update(self.counts())
+        return stats
+
+
+class ScreenshotSamplingPolicy:
+    """
+    Decide quais páginas de detalhe recebem screenshot.
+
+    Modos:
+        all: todas as páginas
+        first_n: as primeiras per_domain páginas de cada domínio
+        failed: apenas páginas cuja extração falhou
+        first_n_or_failed: as primeiras per_domain de cada domínio e todas as falhas
+
+    A contagem por domínio começa do total já registrado na fila, de modo que
+    as primeiras N valem entre execuções.
+
+    Args:
+        mode: Modo de amostragem
+        per_domain: Limite por domínio nos modos first_n
+        queue: Fila usada para recuperar as contagens anteriores (opcional)
+    """
+
+    def __init__(self, mode='first_n', per_domain=DEFAULT_PER_DOMAIN, queue=None):
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Modo de amostragem inválido: {mode} (use {', '.join(SAMPLING_MODES)})")
+        self.mode = mode
+        self.per_domain = per_domain
+        self.queue = queue
+        self._counts = {}
+
+    def _domain_count(self, domain):
+        count = self._counts.get(domain)
+        if count is None:
+            count = self.queue.domain_count(domain) if self.queue is not None else 0
+            self._counts[domain] = count
+        return count
+
+    def should_capture(self, domain, extraction_ok=True):
+        """
+        Indica se a página deve receber screenshot.
+
+        Args:
+            domain: Domínio da página
+            extraction_ok: Se a extração de dados da página teve sucesso
+
+        Returns:
+            str: Motivo da captura ('all', 'first_n' ou 'failed') ou None
+        """
+        if self.mode == 'all':
+            reason = 'all'
+        elif not extraction_ok and self.mode in ('failed', 'first_n_or_failed'):
+            reason = 'failed'
+        elif self.mode in ('first_n', 'first_n_or_failed') and self._domain_count(domain) < self.per_domain:
+            reason = 'first_n'
+        else:
+            return None
+
+        self._counts[domain] = self._domain_count(domain) + 1
+        return reason
+
+
+def backfill_screenshot_paths(pairs):
+    """
+    Grava os caminhos dos screenshots nos imóveis já salvos.
+
+    Args:
+        pairs: Lista de tuplas (url, screenshot_path)
+
+    Returns:
+        set: URLs cujos registros foram atualizados
+    """
+    from myproject.database.connection import engine
+    from myproject.database.models import AuctionData
+
+    updated = set()
+    with engine.begin() as conn:
+        for url, screenshot_path in pairs:
+            result = conn.execute(
+                update(AuctionData).where(AuctionData.url == url).values(screenshot_path=screenshot_path)
+            )
+            if result.rowcount:
+                updated.add(url)
+    return updated
+
+
+class ScreenshotWorker:
+    """
+    Threads que consomem a fila de screenshots.
+
+    Args:
+        queue: Fila de screenshots
+        manager: ScreenshotManager usado nas capturas
+        workers: Número de threads (normalmente o tamanho do pool de navegadores)
+        backfill: Função que grava os caminhos no banco (recebe pares (url, caminho))
+        max_attempts: Tentativas por screenshot
+        poll_interval: Espera entre verificações quando a fila está vazia
+    """
+
+    def __init__(self, queue, manager, workers=2, backfill=backfill_screenshot_paths,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, poll_interval=1.0):
+        self.queue = queue
+        self.manager = manager
+        self.workers = workers
+        self.backfill = backfill
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+
+        self._threads = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._backfill_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        # Estatísticas
+        self.captured = 0
+        self.capture_errors = 0
+        self.backfilled = 0
+
+    def start(self):
+        """Inicia as threads de captura."""
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'screenshot-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"{self.workers} threads de screenshot iniciadas")
+
+    def notify(self):
+        """Acorda as threads após um novo enfileiramento."""
+        self._wakeup.set()
+
+    def run_pending(self):
+        """
+        Processa na thread atual os trabalhos pendentes até esvaziar a fila.
+
+        Returns:
+            int: Trabalhos processados
+        """
+        processed = 0
+        while not self._stop.is_set():
+            job = self.queue.claim()
+            if job is None:
+                break
+            self._process(job)
+            processed += 1
+        self.backfill_pending()
+        return processed
+
+    def _run(self):
+        while not self._stop.is_set():
+            job = self.queue.claim()
+            if job is None:
+                self.backfill_pending()
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._process(job)
+
+    def _process(self, job):
+        job_id, url, domain = job
+        try:
+            screenshot_path = self.manager.capture_screenshot(url)
+        except Exception as e:
+            screenshot_path = None
+            logger.error(f"Erro ao capturar screenshot de {url}: {str(e)}")
+
+        if screenshot_path:
+            self.queue.complete(job_id, screenshot_path)
+            with self._stats_lock:
+                self.captured += 1
+        else:
+            retry = self.queue.fail(job_id, 'captura sem resultado', self.max_attempts)
+            with self._stats_lock:
+                self.capture_errors += 1
+            if not retry:
+                logger.warning(f"Screenshot de {url} descartado após {self.max_attempts} tentativas")
+
+    def backfill_pending(self):
+        """
+        Grava no banco os caminhos dos screenshots concluídos.
+
+        Imóveis que ainda não foram salvos pelo pipeline ficam para a próxima
+        rodada.
+
+        Returns:
+            int: Registros atualizados
+        """
+        if not self._backfill_lock.acquire(blocking=False):
+            return 0
+        try:
+            jobs = self.queue.pending_backfills()
+            if not jobs:
+                return 0
+            updated = self.backfill([(url, path) for _, url, path in jobs])
+            self.queue.mark_backfilled([job_id for job_id, url, _ in jobs if url in updated])
+            with self._stats_lock:
+                self.backfilled += len(updated)
+            return len(updated)
+        except Exception as e:
+            logger.error(f"Erro ao gravar caminhos de screenshots no banco: {str(e)}")
+            return 0
+        finally:
+            self._backfill_lock.release()
+
+    def stop(self, timeout=30):
+        """
+        Encerra as threads após as capturas em andamento.
+
+        Os trabalhos ainda pendentes continuam na fila para a próxima execução.
+        """
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.backfill_pending()
+
+    def get_stats(self):
+        """Retorna as estatísticas das threads e da fila."""
+        stats = {'captured': self.captured, 'capture_errors': self.capture_errors, 'backfilled': self.backfilled}
+        stats.update(self.queue.get_stats())
+        return stats
@@ -0,0 +1,298 @@
+"""
+Armazenamento compacto e sem duplicatas dos screenshots.
+
+Cada captura é reduzida à largura máxima, codificada em WebP (ou JPEG) com
+qualidade configurável e gravada com o hash do conteúdo como nome, em
+subdiretórios de dois níveis (ab/cd/abcd....webp). Uma miniatura é gerada ao
+lado, em thumbs/. Páginas idênticas (ou visualmente equivalentes, no modo
+perceptual) resultam no mesmo arquivo e não ocupam espaço de novo.
+
+Os arquivos são gravados de forma atômica (arquivo temporário + rename), então
+capturas simultâneas não colidem. Arquivos mais antigos que o prazo de
+retenção, ou os menos usados quando o total passa do limite, são removidos.
+"""
+import io
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import namedtuple
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Configurações padrão
+DEFAULT_FORMAT = 'webp'
+DEFAULT_QUALITY = 60
+DEFAULT_MAX_WIDTH = 1280
+DEFAULT_THUMB_WIDTH = 320
+DEFAULT_RETENTION_DAYS = 90
+DEFAULT_MAX_MB = 2048
+
+# Formatos suportados: nome -> (formato do PIL, extensão)
+FORMATS = {
+    'webp': ('WEBP', '.webp'),
+    'jpeg': ('JPEG', '.jpg'),
+}
+
+# Modos de deduplicação
+DEDUPE_MODES = ('pixels', 'perceptual')
+
+# Lado da grade usada no hash perceptual (dHash de HASH_SIZE² bits)
+HASH_SIZE = 16
+
+# Verifica retenção e limite de tamanho a cada N gravações
+BUDGET_CHECK_INTERVAL = 50
+
+THUMBS_DIR = 'thumbs'
+
+StoredScreenshot = namedtuple('StoredScreenshot', ['path', 'thumbnail_path', 'key', 'size', 'duplicate'])
+
+
+def perceptual_hash(image, hash_size=HASH_SIZE):
+    """
+    Calcula o dHash da imagem: compara o brilho de pixels vizinhos em uma
+    versão reduzida em tons de cinza.
+
+    Returns:
+        str: Hash hexadecimal de hash_size² bits
+    """
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = small.tobytes()
+    bits = 0
+    width = hash_size + 1
+    for row in range(hash_size):
+        offset = row * width
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f'{bits:0{hash_size * hash_size // 4}x}'
+
+
+def pixel_hash(image):
+    """Hash SHA-1 dos pixels (captura idêntica = mesmo hash, independente da codificação)."""
+    digest = hashlib.sha1(f'{image.mode}{image.size}'.encode('ascii'))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def store_from_config(root=None):
+    """
+    Cria o armazenamento com as configurações de myproject.config (variáveis de ambiente).
+
+    Args:
+        root: Diretório base (padrão: SCREENSHOT_DIR)
+    """
+    from myproject import config
+
+    return ScreenshotStore(
+        root=root or config.SCREENSHOT_DIR,
+        fmt=config.SCREENSHOT_FORMAT,
+        quality=config.SCREENSHOT_QUALITY,
+        max_width=config.SCREENSHOT_MAX_WIDTH or None,
+        thumb_width=config.SCREENSHOT_THUMB_WIDTH or None,
+        dedupe=config.SCREENSHOT_DEDUPE,
+        retention_days=config.SCREENSHOT_RETENTION_DAYS or None,
+        max_bytes=int(config.SCREENSHOT_MAX_MB * 1024 * 1024) or None,
+    )
+
+
+class ScreenshotStore:
+    """
+    Armazenamento endereçado por conteúdo dos screenshots.
+
+    Args:
+        root: Diretório base
+        fmt: 'webp' ou 'jpeg'
+        quality: Qualidade da codificação (1-100)
+        max_width: Largura máxima da imagem armazenada (None mantém o original)
+        thumb_width: Largura das miniaturas (None desativa)
+        dedupe: 'pixels' (capturas idênticas) ou 'perceptual' (visualmente equivalentes)
+        retention_days: Idade máxima dos arquivos (None desativa)
+        max_bytes: Tamanho total máximo (None desativa)
+    """
+
+    def __init__(self, root='prints', fmt=DEFAULT_FORMAT, quality=DEFAULT_QUALITY, max_width=DEFAULT_MAX_WIDTH,
+                 thumb_width=DEFAULT_THUMB_WIDTH, dedupe='pixels', retention_days=DEFAULT_RETENTION_DAYS,
+                 max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato de screenshot inválido: {fmt} (use {', '.join(FORMATS)})")
+        if dedupe not in DEDUPE_MODES:
+            raise ValueError(f"Modo de deduplicação inválido: {dedupe} (use {', '.join(DEDUPE_MODES)})")
+        self.root = root
+        self.fmt = fmt
+        self.quality = quality
+        self.max_width = max_width
+        self.thumb_width = thumb_width
+        self.dedupe = dedupe
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        self._saves_since_check = 0
+
+        # Estatísticas
+        self.saved = 0
+        self.duplicates = 0
+        self.bytes_in = 0
+        self.bytes_written = 0
+        self.removed = 0
+
+    @property
+    def extension(self):
+        return FORMATS[self.fmt][1]
+
+    def _path_for(self, key, thumbnail=False):
+        parts = [self.root]
+        if thumbnail:
+            parts.append(THUMBS_DIR)
+        parts.extend((key[:2], key[2:4], key + self.extension))
+        return os.path.join(*parts)
+
+    def _encode(self, image):
+        buffer = io.BytesIO()
+        pil_format = FORMATS[self.fmt][0]
+        if pil_format == 'WEBP':
+            image.save(buffer, pil_format, quality=self.quality, method=4)
+        else:
+            image.save(buffer, pil_format, quality=self.quality, optimize=True, progressive=True)
+        return buffer.getvalue()
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def save(self, png_data):
+        """
+        Armazena um screenshot.
+
+        Args:
+            png_data: Bytes da imagem capturada (PNG do Selenium ou outro formato do PIL)
+
+        Returns:
+            StoredScreenshot: Caminho, miniatura, chave, bytes gravados e se era duplicata
+        """
+        image = Image.open(io.BytesIO(png_data))
+        image = image.convert('RGB')
+        if self.max_width and image.width > self.max_width:
+            height = round(image.height * self.max_width / image.width)
+            image = image.resize((self.max_width, height), Image.LANCZOS)
+
+        key = perceptual_hash(image) if self.dedupe == 'perceptual' else pixel_hash(image)
+        path = self._path_for(key)
+        thumbnail_path = self._path_for(key, thumbnail=True) if self.thumb_width else None
+
+        with self._lock:
+            self.bytes_in += len(png_data)
+
+        if os.path.exists(path):
+            # Já armazenado: apenas renova a data de uso para a retenção
+            now = time.time()
+            for existing in (path, thumbnail_path):
+                if existing and os.path.exists(existing):
+                    os.utime(existing, (now, now))
+            with self._lock:
+                self.duplicates += 1
+            return StoredScreenshot(path, thumbnail_path, key, 0, True)
+
+        data = self._encode(image)
+        self._write_atomic(path, data)
+        written = len(data)
+
+        if thumbnail_path:
+            thumb = image.copy()
+            thumb.thumbnail((self.thumb_width, self.thumb_width * 4), Image.LANCZOS)
+            thumb_data = self._encode(thumb)
+            self._write_atomic(thumbnail_path, thumb_data)
+            written += len(thumb_data)
+
+        with self._lock:
+            self.saved += 1
+            self.bytes_written += written
+            if self._total_bytes is not None:
+                self._total_bytes += written
+            self._saves_since_check += 1
+            check = self._saves_since_check >= BUDGET_CHECK_INTERVAL
+            if check:
+                self._saves_since_check = 0
+
+        if check:
+            self.enforce_budget()
+        return StoredScreenshot(path, thumbnail_path, key, written, False)
+
+    def _scan(self):
+        """Lista (mtime, tamanho, caminho da imagem, caminho da miniatura) das imagens armazenadas."""
+        entries = []
+        thumbs_root = os.path.join(self.root, THUMBS_DIR)
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if dirpath == self.root and THUMBS_DIR in dirnames:
+                dirnames.remove(THUMBS_DIR)
+            for filename in filenames:
+                if not filename.endswith(self.extension):
+                    continue
+                path = os.path.join(dirpath, filename)
+                thumbnail_path = os.path.join(thumbs_root, os.path.relpath(path, self.root))
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                size = stat.st_size
+                try:
+                    size += os.path.getsize(thumbnail_path)
+                except OSError:
+                    thumbnail_path = None
+                entries.append((stat.st_mtime, size, path, thumbnail_path))
+        return entries
+
+    def enforce_budget(self):
+        """
+        Remove as imagens mais antigas que a retenção e, se o total passar do
+        limite, as usadas há mais tempo.
+
+        Returns:
+            int: Imagens removidas
+        """
+        if not os.path.isdir(self.root):
+            return 0
+        entries = self._scan()
+        total = sum(entry[1] for entry in entries)
+        entries.sort()
+
+        cutoff = time.time() - self.retention_days * 86400 if self.retention_days else None
+        removed = 0
+        for mtime, size, path, thumbnail_path in entries:
+            expired = cutoff is not None and mtime < cutoff
+            over_budget = self.max_bytes is not None and total > self.max_bytes
+            if not expired and not over_budget:
+                break
+            for victim in (path, thumbnail_path):
+                if victim:
+                    try:
+                        os.remove(victim)
+                    except OSError as e:
+                        logger.warning(f"Erro ao remover screenshot {victim}: {str(e)}")
+            total -= size
+            removed += 1
+
+        with self._lock:
+            self._total_bytes = total
+            self.removed += removed
+        if removed:
+            logger.info(f"{removed} screenshots removidos por retenção/limite de tamanho")
+        return removed
+
+    def get_stats(self):
+        """Retorna as estatísticas do armazenamento."""
+        with self._lock:
+            return {
+                'saved': self.saved,
+                'duplicates': self.duplicates,
+                'removed': self.removed,
+                'bytes_in': self.bytes_in,
+                'bytes_written': self.bytes_written,
+                'total_bytes': self._total_bytes,
+            }
@@ -0,0 +1,80 @@
+"""
+Coalescência de operações simultâneas por chave (single-flight).
+
+Quando várias páginas do mesmo domínio chegam juntas sem seletores, apenas a
+primeira (a "líder") chama o LLM; as demais aguardam o resultado dela em vez
+de repetir a mesma chamada.
+"""
+import logging
+from twisted.internet import defer
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Registro de operações em andamento indexadas por chave.
+
+    Uso típico:
+        waiter = flight.join(key)
+        if waiter is not None:
+            result = yield waiter  # outra chamada já está gerando
+        else:
+            try:
+                result = ...  # gera o resultado
+            finally:
+                flight.release(key, result)
+    """
+
+    def __init__(self):
+        # chave -> lista de Deferreds aguardando o resultado da líder
+        self._waiters = {}
+
+        # Estatísticas
+        self.leaders = 0
+        self.coalesced = 0
+
+    def __contains__(self, key):
+        return key in self._waiters
+
+    def join(self, key):
+        """
+        Entra na operação da chave.
+
+        Returns:
+            None se o chamador é a líder e deve gerar o resultado; caso
+            contrário, um Deferred disparado com o resultado da líder
+        """
+        waiters = self._waiters.get(key)
+        if waiters is None:
+            self._waiters[key] = []
+            self.leaders += 1
+            return None
+
+        self.coalesced += 1
+        waiter = defer.Deferred()
+        waiters.append(waiter)
+        return waiter
+
+    def release(self, key, result):
+        """
+        Encerra a operação da chave e entrega o resultado às chamadas em espera.
+
+        Returns:
+            int: Número de chamadas que aguardavam o resultado
+        """
+        waiters = self._waiters.pop(key, [])
+        for waiter in waiters:
+            try:
+                waiter.callback(result)
+            except Exception as e:
+                logger.error(f"Erro ao entregar resultado single-flight para {key}: {str(e)}")
+        return len(waiters)
+
+    def get_stats(self):
+        """Retorna as estatísticas de coalescência."""
+        return {
+            'leaders': self.leaders,
+            'llm_calls_avoided': self.coalesced,
+            'in_flight': len(self._waiters),
+        }
@@ -0,0 +1,257 @@
+"""
+Filtro de Bloom persistente das URLs de imóveis já gravados.
+
+Nas re-execuções diárias a maior parte dos links de detalhe aponta para
+imóveis que já estão em auction_data. O spider consulta este filtro no laço de
+links do parse e deixa de agendar esses links, economizando download,
+classificação, extração e chamadas ao LLM.
+
+O filtro ocupa cerca de 1,8 MB para 1 milhão de URLs com 0,1% de falsos
+positivos. Ele nunca dá falso negativo: uma URL ausente do filtro
+certamente não está no banco. Um falso positivo faria o spider pular um
+imóvel novo, por isso os links marcados como conhecidos podem ser
+confirmados no banco com uma consulta por página de listagem (confirm_known).
+Essa consulta também mede a taxa real de falsos positivos.
+
+O filtro fica desligado por padrão (URL_FILTER_ENABLED): pular os imóveis
+conhecidos também impede as requisições condicionais e o registro das
+mudanças de preço nas re-coletas. Ele serve às coletas que buscam apenas
+imóveis novos.
+
+O filtro é carregado de arquivo na abertura do spider, atualizado pelo
+pipeline a cada lote gravado e salvo no fechamento. Se o arquivo não existir
+ou estiver cheio, é reconstruído a partir do banco (rebuild_from_db).
+"""
+import os
+import math
+import struct
+import hashlib
+import logging
+import threading
+from urllib.parse import urldefrag
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAPACITY = 1_000_000
+DEFAULT_ERROR_RATE = 0.001
+
+# Cabeçalho do arquivo: marca, versão, bits, hashes, capacidade, itens, taxa de erro
+_MAGIC = b'URLBLOOM'
+_HEADER = struct.Struct('<8sHQIQQd')
+_VERSION = 1
+
+# URLs lidas do banco por consulta na reconstrução
+REBUILD_CHUNK_SIZE = 5000
+
+
+def normalize_url(url):
+    """Remove o fragmento (#...) da URL, que não muda a página baixada."""
+    return urldefrag(url)[0]
+
+
+class UrlBloomFilter:
+    """
+    Filtro de Bloom de URLs com hashing duplo sobre um único BLAKE2b.
+
+    Args:
+        capacity: Número de URLs previsto
+        error_rate: Taxa de falsos positivos desejada com o filtro na capacidade
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self._lock = threading.Lock()
+
+        # Estatísticas
+        self.checks = 0
+        self.maybe_known = 0
+        self.confirmed = 0
+        self.false_positives = 0
+        self.skipped = 0
+
+    def _positions(self, url):
+        digest = hashlib.blake2b(normalize_url(url).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, url):
+        """
+        Acrescenta uma URL ao filtro.
+
+        Returns:
+            bool: True se a URL ainda não estava no filtro
+        """
+        new = False
+        with self._lock:
+            for position in self._positions(url):
+                byte, bit = divmod(position, 8)
+                if not self.bits[byte] & (1 << bit):
+                    self.bits[byte] |= 1 << bit
+                    new = True
+            if new:
+                self.count += 1
+        return new
+
+    def update(self, urls):
+        """Acrescenta várias URLs; retorna quantas eram novas."""
+        return sum(self.add(url) for url in urls)
+
+    def __contains__(self, url):
+        bits = self.bits
+        for position in self._positions(url):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def might_contain(self, url):
+        """Consulta o filtro registrando a estatística (False = certamente ausente)."""
+        self.checks += 1
+        if url in self:
+            self.maybe_known += 1
+            return True
+        return False
+
+    def record_confirmation(self, checked, known):
+        """Registra o resultado da confirmação no banco de URLs que o filtro indicou."""
+        self.confirmed += known
+        self.false_positives += checked - known
+
+    @property
+    def is_full(self):
+        return self.count >= self.capacity
+
+    def estimated_error_rate(self):
+        """Taxa de falsos positivos esperada para o número atual de URLs."""
+        if not self.count:
+            return 0.0
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def save(self, path):
+        """Grava o filtro em arquivo (de forma atômica)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with self._lock:
+            header = _HEADER.pack(_MAGIC, _VERSION, self.num_bits, self.num_hashes,
+                                  self.capacity, self.count, self.error_rate)
+            with open(tmp_path, 'wb') as f:
+                f.write(header)
+                f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Lê um filtro gravado por save.
+
+        Returns:
+            UrlBloomFilter
+
+        Raises:
+            ValueError: Se o arquivo não for um filtro válido
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < _HEADER.size:
+            raise ValueError(f"Arquivo de filtro de URLs truncado: {path}")
+        magic, version, num_bits, num_hashes, capacity, count, error_rate = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Arquivo de filtro de URLs inválido: {path}")
+        bloom = cls(capacity=capacity, error_rate=error_rate)
+        if (bloom.num_bits, bloom.num_hashes) != (num_bits, num_hashes) or \
+                len(data) - _HEADER.size != len(bloom.bits):
+            raise ValueError(f"Arquivo de filtro de URLs inconsistente: {path}")
+        bloom.bits[:] = data[_HEADER.size:]
+        bloom.count = count
+        return bloom
+
+    def get_stats(self):
+        """Retorna as estatísticas do filtro, incluindo a taxa de falsos positivos medida."""
+        # Falsos positivos entre as URLs consultadas que não estavam no banco
+        absent = self.checks - self.confirmed
+        return {
+            'urls': self.count,
+            'capacity': self.capacity,
+            'size_bytes': len(self.bits),
+            'checks': self.checks,
+            'maybe_known': self.maybe_known,
+            'confirmed': self.confirmed,
+            'false_positives': self.false_positives,
+            'skipped': self.skipped,
+            'measured_fp_rate': round(self.false_positives / absent, 6) if absent else 0.0,
+            'estimated_fp_rate': round(self.estimated_error_rate(), 6),
+        }
+
+
+def rebuild_from_db(engine, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+    """
+    Reconstrói o filtro com todas as URLs de auction_data.
+
+    A capacidade é aumentada se o banco já tiver mais URLs que o previsto.
+
+    Returns:
+        UrlBloomFilter
+    """
+    from sqlalchemy import func, select
+    from myproject.database.models import AuctionData
+
+    table = AuctionData.__table__
+    with engine.connect() as conn:
+        total = conn.execute(select(func.count()).select_from(table)).scalar() or 0
+        bloom = UrlBloomFilter(capacity=max(capacity, total * 2), error_rate=error_rate)
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                select(table.c.id, table.c.url).where(table.c.id > last_id).order_by(table.c.id).limit(REBUILD_CHUNK_SIZE)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            bloom.update(row.url for row in rows if row.url)
+    logger.info(f"Filtro de URLs reconstruído a partir do banco: {bloom.count} URLs")
+    return bloom
+
+
+def load_or_rebuild(path, engine, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+    """
+    Carrega o filtro do arquivo ou o reconstrói do banco se o arquivo faltar,
+    estiver corrompido ou cheio.
+
+    Returns:
+        UrlBloomFilter
+    """
+    if os.path.exists(path):
+        try:
+            bloom = UrlBloomFilter.load(path)
+            if not bloom.is_full:
+                logger.info(f"Filtro de URLs carregado de {path}: {bloom.count} URLs")
+                return bloom
+            logger.info("Filtro de URLs atingiu a capacidade; reconstruindo")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Erro ao carregar filtro de URLs, reconstruindo do banco: {str(e)}")
+    return rebuild_from_db(engine, capacity=capacity, error_rate=error_rate)
+
+
+def confirm_known(engine, urls):
+    """
+    Confirma no banco quais URLs indicadas pelo filtro estão gravadas.
+
+    Returns:
+        set: URLs presentes em auction_data
+    """
+    if not urls:
+        return set()
+    from sqlalchemy import select
+    from myproject.database.models import AuctionData
+
+    table = AuctionData.__table__
+    with engine.connect() as conn:
+        rows = conn.execute(select(table.c.url).where(table.c.url.in_(list(urls)))).all()
+    return {row.url for row in rows}
@@ -0,0 +1,204 @@
+"""
+Identificação de URLs de páginas de detalhes.
+
+Os padrões genéricos são combinados em uma única expressão pré-compilada,
+avaliada uma vez por link. Além disso, o matcher aprende modelos de URL por
+domínio (por exemplo '/lote/{id}' ou '/imovel-{slug}') a partir das URLs que
+efetivamente produziram itens; esses modelos têm prioridade sobre a lista
+genérica. Um modelo só passa a valer depois de produzir itens em
+MIN_TEMPLATE_URLS URLs diferentes, e modelos sem nenhum trecho fixo (ex.:
+'/{slug}') não são aprendidos, pois também corresponderiam aos links de
+navegação do site.
+"""
+import re
+from urllib.parse import urlparse
+
+# Padrões comuns em URLs de páginas de detalhe
+DETAIL_URL_PATTERNS = [
+    r'/imovel/\d+', r'/detalhe', r'/detalhes', r'/item/\d+', r'/lote/\d+',
+    r'/auction/\d+', r'/leilao/\d+', r'/lance/\d+', r'/bem/\d+',
+    r'/property/\d+', r'/ficha', r'/info', r'/produto/\d+',
+    r'/imovel-', r'/lote-', r'/bem-', r'/propriedade-', r'/id-\d+',
+    r'/codigo-\d+', r'/ref-\d+', r'/oferta/\d+', r'/oportunidade/\d+'
+]
+
+# Expressão única com um grupo nomeado por padrão (p0, p1, ...)
+DETAIL_URL_RE = re.compile(
+    '|'.join(f'(?P<p{i}>{pattern})' for i, pattern in enumerate(DETAIL_URL_PATTERNS))
+)
+
+# Marcadores usados nos modelos aprendidos e suas expressões equivalentes
+TEMPLATE_PLACEHOLDERS = {
+    '{id}': r'\d+',
+    '{slug}': r'[^/]+',
+}
+
+_PLACEHOLDER_RE = re.compile(r'\{id\}|\{slug\}')
+
+# URLs diferentes que precisam produzir itens antes de um modelo ser usado
+MIN_TEMPLATE_URLS = 2
+
+# Prefixos de trecho que costumam anteceder o identificador do imóvel
+SLUG_PREFIXES = {
+    'imovel', 'imoveis', 'lote', 'bem', 'propriedade', 'id', 'codigo', 'ref',
+    'oferta', 'oportunidade', 'produto', 'item', 'leilao', 'property', 'auction',
+    'detalhe', 'detalhes',
+}
+
+
+def match_generic_pattern(url):
+    """
+    Verifica a URL contra os padrões genéricos de detalhe.
+
+    Args:
+        url: URL completa ou caminho
+
+    Returns:
+        str: Padrão que correspondeu ou None
+    """
+    match = DETAIL_URL_RE.search(url)
+    if match:
+        return DETAIL_URL_PATTERNS[int(match.lastgroup[1:])]
+    return None
+
+
+def url_template(url):
+    """
+    Deriva um modelo de URL a partir do caminho, generalizando os trechos variáveis.
+
+    Exemplos:
+        /lote/12345 -> /lote/{id}
+        /imovel-apartamento-centro-987 -> /imovel-{slug}
+        /leiloes/2025/casa-jardim-america -> /leiloes/{id}/{slug}
+
+    Args:
+        url: URL completa
+
+    Returns:
+        str: Modelo do caminho ou None se não houver trecho variável ou se todos
+            os trechos forem variáveis (ex.: /{slug})
+    """
+    segments = [segment for segment in urlparse(url).path.split('/') if segment]
+    if not segments:
+        return None
+
+    template_segments = []
+    for index, segment in enumerate(segments):
+        prefix = segment.split('-', 1)[0].lower()
+        is_last = index == len(segments) - 1
+
+        if segment.isdigit():
+            template_segments.append('{id}')
+        elif '-' in segment and prefix in SLUG_PREFIXES:
+            # Prefixo fixo seguido de identificador (ex.: imovel-casa-123)
+            template_segments.append(f'{segment.split("-", 1)[0]}-{{slug}}')
+        elif any(char.isdigit() for char in segment) or (is_last and '-' in segment):
+            template_segments.append('{slug}')
+        else:
+            template_segments.append(segment)
+
+    if all(segment in TEMPLATE_PLACEHOLDERS for segment in template_segments):
+        # Sem trecho fixo o modelo aceitaria qualquer página do site
+        return None
+
+    template = '/' + '/'.join(template_segments)
+    if not _PLACEHOLDER_RE.search(template):
+        return None
+    return template
+
+
+def template_to_regex(template):
+    """Converte um modelo de URL em expressão regular ancorada no caminho."""
+    parts = _PLACEHOLDER_RE.split(template)
+    placeholders = _PLACEHOLDER_RE.findall(template)
+
+    pattern = re.escape(parts[0])
+    for placeholder, part in zip(placeholders, parts[1:]):
+        pattern += TEMPLATE_PLACEHOLDERS[placeholder] + re.escape(part)
+    return f'^{pattern}/?$'
+
+
+class DetailUrlMatcher:
+    """
+    Classifica links como páginas de detalhe.
+
+    Modelos aprendidos por domínio são verificados primeiro; se nenhum
+    corresponder, a URL é avaliada pela expressão genérica combinada.
+
+    Args:
+        min_urls: URLs diferentes que precisam produzir itens antes de um modelo ser usado
+    """
+
+    def __init__(self, min_urls=MIN_TEMPLATE_URLS):
+        self.min_urls = min_urls
+        # domínio -> {modelo: número de URLs que produziram itens}
+        self.templates = {}
+        # (domínio, modelo) -> última URL contada, para não contar a mesma URL duas vezes
+        self._last_urls = {}
+        # domínio -> (expressão combinada, lista de modelos na ordem dos grupos)
+        self._compiled = {}
+
+    def learn(self, url, domain=None):
+        """
+        Registra uma URL que produziu um item para aprender o modelo do domínio.
+
+        Returns:
+            str: Modelo aprendido ou None se a URL não tem trecho variável
+        """
+        template = url_template(url)
+        if not template:
+            return None
+
+        domain = domain or urlparse(url).netloc
+        if self._last_urls.get((domain, template)) == url:
+            return template
+        self._last_urls[(domain, template)] = url
+
+        domain_templates = self.templates.setdefault(domain, {})
+        count = domain_templates.get(template, 0) + 1
+        domain_templates[template] = count
+        if count == self.min_urls:
+            # O modelo acaba de ser confirmado
+            self._compiled.pop(domain, None)
+        return template
+
+    def _compiled_templates(self, domain):
+        compiled = self._compiled.get(domain)
+        if compiled is None:
+            # Apenas modelos confirmados, os mais frequentes primeiro
+            counts = self.templates.get(domain, {})
+            ordered = sorted((template for template, count in counts.items() if count >= self.min_urls),
+                             key=counts.get, reverse=True)
+            if not ordered:
+                return None
+            regex = re.compile('|'.join(
+                f'(?P<t{i}>{template_to_regex(template)})' for i, template in enumerate(ordered)
+            ))
+            compiled = (regex, ordered)
+            self._compiled[domain] = compiled
+        return compiled
+
+    def match(self, url, domain=None):
+        """
+        Retorna o modelo aprendido ou o padrão genérico que corresponde à URL.
+
+        Args:
+            url: URL do link
+            domain: Domínio do link (opcional, extraído da URL se ausente)
+
+        Returns:
+            str: Modelo/padrão correspondente ou None se não parece ser detalhe
+        """
+        parsed = urlparse(url)
+        compiled = self._compiled_templates(domain or parsed.netloc)
+        if compiled:
+            regex, ordered = compiled
+            match = regex.match(parsed.path)
+            if match:
+                return ordered[int(match.lastgroup[1:])]
+
+        return match_generic_pattern(url)
+
+    def is_detail(self, url, domain=None):
+        """Indica se a URL parece ser de uma página de detalhes."""
+        return self.match(url, domain) is not None
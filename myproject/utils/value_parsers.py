@@ -0,0 +1,182 @@
+"""
+Conversão dos campos de texto dos imóveis em valores tipados.
+
+Os sites exibem preço, área e data do leilão em formatos variados
+("R$ 1.500.000,00", "1.234,56 m²", "10/03/2025 às 14h00", "10 de março de
+2025"). Estas funções extraem o valor numérico ou a data para as colunas
+indexadas de auction_data (price_cents, area_m2 e auction_at). Valores que
+não podem ser interpretados resultam em None.
+
+Os textos costumam trazer outros números antes do valor ("1º Leilão: R$
+500.000,00", "3 quartos, 120 m²"): o preço é o número que segue "R$" e a
+área é o número seguido de uma unidade; só sem esses marcadores o primeiro
+número do texto é usado.
+"""
+import re
+from datetime import datetime
+
+_NUMBER_RE = re.compile(r'\d[\d.,]*')
+
+# Número com multiplicador opcional ("350 mil", "1,2 milhão"); ordinais ("1º", "2ª") são ignorados
+_AMOUNT = r'(\d[\d.,]*)(?![\d.,]*[º°ª])(?:\s*(mil|milh[õoã][oe]s?)(?![a-z]))?'
+_PRICE_RE = re.compile(r'R\$\s*' + _AMOUNT, re.IGNORECASE)
+_AMOUNT_RE = re.compile(_AMOUNT, re.IGNORECASE)
+
+_AREA_RE = re.compile(r'(\d[\d.,]*)\s*(m²|m2|mts|metros|ha|hectares?)(?![a-z0-9])', re.IGNORECASE)
+_BARE_NUMBER_RE = re.compile(r'\d[\d.,]*')
+
+_NUMERIC_DATE_RE = re.compile(
+    r'(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})(?:\D{1,6}?(\d{1,2})\s*[:h]\s*(\d{2})?)?', re.IGNORECASE
+)
+_ISO_DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})(?:[T\s](\d{2}):(\d{2}))?')
+_WRITTEN_DATE_RE = re.compile(r'(\d{1,2})\s+de\s+([a-zç]+)\s+de\s+(\d{4})', re.IGNORECASE)
+
+MONTHS = {
+    'janeiro': 1, 'fevereiro': 2, 'março': 3, 'marco': 3, 'abril': 4, 'maio': 5, 'junho': 6,
+    'julho': 7, 'agosto': 8, 'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12,
+}
+
+# Fatores de conversão das unidades de área para m²
+AREA_UNITS = {'ha': 10000.0, 'hectare': 10000.0, 'hectares': 10000.0}
+
+# Multiplicadores escritos por extenso nos preços
+AMOUNT_MULTIPLIERS = {'mil': 1000, 'milhão': 1000000, 'milhao': 1000000, 'milhões': 1000000, 'milhoes': 1000000}
+
+
+def parse_decimal(text):
+    """
+    Converte um número em formato brasileiro ou internacional para float.
+
+    Com ponto e vírgula, o último separador é o decimal ("1.500.000,00",
+    "1,500,000.00"). Com apenas um tipo de separador, ele é decimal quando
+    aparece uma vez seguido de 1 ou 2 dígitos ("1500,5", "1500.00") e de
+    milhar nos demais casos ("1.500", "1.500.000").
+
+    Returns:
+        float ou None
+    """
+    if not text:
+        return None
+    match = _NUMBER_RE.search(str(text))
+    if not match:
+        return None
+    number = match.group(0).rstrip('.,')
+
+    if ',' in number and '.' in number:
+        decimal = ',' if number.rfind(',') > number.rfind('.') else '.'
+        thousands = '.' if decimal == ',' else ','
+        number = number.replace(thousands, '').replace(decimal, '.')
+    else:
+        for separator in (',', '.'):
+            if separator not in number:
+                continue
+            integer, _, fraction = number.rpartition(separator)
+            if number.count(separator) == 1 and len(fraction) in (1, 2):
+                number = f"{integer}.{fraction}"
+            else:
+                number = number.replace(separator, '')
+
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+def parse_price_cents(text):
+    """
+    Converte um preço em centavos ("R$ 1.500.000,00" -> 150000000, "R$ 350 mil" -> 35000000).
+
+    O valor é o número que segue "R$"; sem "R$", o primeiro número que não é
+    um ordinal ("1º Leilão", "2ª Praça").
+
+    Returns:
+        int ou None
+    """
+    if not text:
+        return None
+    text = str(text)
+    match = _PRICE_RE.search(text) or _AMOUNT_RE.search(text)
+    if not match:
+        return None
+    value = parse_decimal(match.group(1))
+    if value is None:
+        return None
+    multiplier = AMOUNT_MULTIPLIERS.get((match.group(2) or '').lower(), 1)
+    return int(round(value * multiplier * 100))
+
+
+def parse_area_m2(text):
+    """
+    Converte uma área em metros quadrados ("1.234,56 m²" -> 1234.56, "2 ha" -> 20000.0).
+
+    O valor é o número seguido de uma unidade ("3 quartos, 120 m²" -> 120.0);
+    o primeiro número do texto só é usado quando nenhuma unidade aparece.
+
+    Returns:
+        float ou None
+    """
+    if not text:
+        return None
+    text = str(text)
+    match = _AREA_RE.search(text)
+    if match:
+        number, unit = match.group(1), match.group(2).lower()
+    else:
+        match = _BARE_NUMBER_RE.search(text)
+        if not match:
+            return None
+        number, unit = match.group(0), ''
+    value = parse_decimal(number)
+    if value is None:
+        return None
+    return value * AREA_UNITS.get(unit, 1.0)
+
+
+def parse_auction_datetime(text):
+    """
+    Converte a data do leilão ("10/03/2025 às 14h00", "2025-03-10", "10 de março de 2025").
+
+    Returns:
+        datetime ou None
+    """
+    if not text:
+        return None
+    text = str(text)
+    try:
+        match = _NUMERIC_DATE_RE.search(text)
+        if match:
+            day, month, year, hour, minute = match.groups()
+            hour, minute = int(hour or 0), int(minute or 0)
+            if hour > 23 or minute > 59:
+                hour, minute = 0, 0
+            return datetime(int(year), int(month), int(day), hour, minute)
+
+        match = _ISO_DATE_RE.search(text)
+        if match:
+            year, month, day, hour, minute = match.groups()
+            return datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0))
+
+        match = _WRITTEN_DATE_RE.search(text)
+        if match:
+            day, month_name, year = match.groups()
+            month = MONTHS.get(month_name.lower())
+            if month:
+                return datetime(int(year), month, int(day))
+    except ValueError:
+        # Data impossível (ex.: 31/02/2025)
+        return None
+    return None
+
+
+def typed_values(price, area, auction_date):
+    """
+    Calcula as colunas tipadas de um imóvel a partir dos textos coletados.
+
+    Returns:
+        dict: price_cents, area_m2 e auction_at
+    """
+    return {
+        'price_cents': parse_price_cents(price),
+        'area_m2': parse_area_m2(area),
+        'auction_at': parse_auction_datetime(auction_date),
+    }
@@ -0,0 +1,438 @@
+"""
+Pool de instâncias do Chrome headless para screenshots e renderização.
+
+Abrir o Chrome custa de um a três segundos por captura. O pool mantém alguns
+navegadores abertos e os empresta para cada captura:
+
+- os navegadores podem ser abertos antecipadamente (warm_up) na abertura do spider;
+- cada empréstimo passa por uma verificação de saúde e navegadores travados
+  são substituídos;
+- um navegador é reciclado depois de N páginas ou quando o consumo de memória
+  passa do limite;
+- a espera pelo carregamento é feita por eventos (document.readyState e
+  ausência de novas requisições), com um teto, em vez de pausas fixas.
+"""
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
+
+logger = logging.getLogger(__name__)
+
+# Configurações padrão
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_PAGES = 50
+DEFAULT_MAX_MEMORY_MB = 1024
+DEFAULT_ACQUIRE_TIMEOUT = 60
+DEFAULT_PAGE_LOAD_TIMEOUT = 30
+DEFAULT_READY_TIMEOUT = 10
+DEFAULT_IDLE_TIME = 0.5
+DEFAULT_POLL_INTERVAL = 0.1
+
+DEFAULT_USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                      '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+
+# Estado do documento e quantidade de recursos carregados até o momento
+_READY_SCRIPT = "return [document.readyState, performance.getEntriesByType('resource').length];"
+
+# Heap JavaScript usado (apenas Chrome); alternativa quando /proc não está disponível
+_HEAP_SCRIPT = "return (window.performance && performance.memory) ? performance.memory.usedJSHeapSize : null;"
+
+
+def create_chrome_driver(driver_path=None, user_agent=DEFAULT_USER_AGENT, page_load_timeout=DEFAULT_PAGE_LOAD_TIMEOUT):
+    """
+    Abre um Chrome headless com as opções usadas pelo projeto.
+
+    Args:
+        driver_path: Caminho para o driver do Chrome (opcional)
+        user_agent: User agent do navegador
+        page_load_timeout: Tempo máximo de carregamento de página em segundos
+
+    Returns:
+        webdriver.Chrome: Navegador aberto
+    """
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    if user_agent:
+        options.add_argument(f'--user-agent={user_agent}')
+    # driver.get retorna no DOMContentLoaded; o restante é aguardado por wait_until_ready
+    options.page_load_strategy = 'eager'
+
+    if driver_path:
+        driver = webdriver.Chrome(service=Service(executable_path=driver_path), options=options)
+    else:
+        driver = webdriver.Chrome(options=options)
+    driver.set_page_load_timeout(page_load_timeout)
+    return driver
+
+
+def wait_until_ready(driver, timeout=DEFAULT_READY_TIMEOUT, idle_time=DEFAULT_IDLE_TIME,
+                     poll_interval=DEFAULT_POLL_INTERVAL):
+    """
+    Aguarda o documento ficar completo e a rede ficar ociosa, com um teto.
+
+    A rede é considerada ociosa quando a quantidade de recursos carregados não
+    muda por idle_time segundos.
+
+    Args:
+        driver: Navegador
+        timeout: Tempo máximo de espera em segundos
+        idle_time: Tempo sem novos recursos para considerar a rede ociosa
+        poll_interval: Intervalo entre verificações
+
+    Returns:
+        bool: True se a página ficou pronta antes do teto
+    """
+    deadline = time.monotonic() + timeout
+    last_count = None
+    stable_since = None
+    while True:
+        try:
+            state, count = driver.execute_script(_READY_SCRIPT)
+        except WebDriverException as e:
+            logger.warning(f"Erro ao verificar carregamento da página: {str(e)}")
+            return False
+
+        now = time.monotonic()
+        if state == 'complete':
+            if count != last_count:
+                last_count = count
+                stable_since = now
+            elif now - stable_since >= idle_time:
+                return True
+
+        if now >= deadline:
+            return False
+        time.sleep(poll_interval)
+
+
+def _process_tree_rss_mb(pid):
+    """Soma a memória residente de um processo e de seus descendentes (Linux)."""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # O nome do processo pode conter espaços; os campos seguintes vêm após ')'
+                fields = f.read().rsplit(')', 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+
+    total_kb = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            pass
+        pending.extend(children.get(current, ()))
+    return total_kb / 1024
+
+
+def driver_memory_mb(driver):
+    """
+    Estima a memória usada pelo navegador em MB.
+
+    Usa a soma da memória residente do chromedriver e dos processos do Chrome
+    quando /proc está disponível; caso contrário, o heap JavaScript da página.
+
+    Returns:
+        float: Memória em MB ou None se não for possível medir
+    """
+    try:
+        pid = driver.service.process.pid
+        if os.path.isdir('/proc'):
+            return _process_tree_rss_mb(pid)
+    except (AttributeError, OSError):
+        pass
+    try:
+        heap = driver.execute_script(_HEAP_SCRIPT)
+        return heap / 1024 / 1024 if heap else None
+    except WebDriverException:
+        return None
+
+
+class PooledDriver:
+    """Navegador do pool com a contagem de páginas carregadas."""
+
+    __slots__ = ('driver', 'pages', 'created_at')
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.monotonic()
+
+
+class WebDriverPool:
+    """
+    Pool de navegadores reutilizáveis, seguro para uso em várias threads.
+
+    Args:
+        size: Número máximo de navegadores abertos
+        max_pages: Páginas por navegador antes da reciclagem
+        max_memory_mb: Memória máxima por navegador antes da reciclagem (None desativa)
+        driver_factory: Função que abre um navegador
+        memory_probe: Função que mede a memória de um navegador em MB
+        acquire_timeout: Tempo máximo de espera por um navegador livre
+        ready_timeout: Teto padrão da espera pelo carregamento das páginas
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES, max_memory_mb=DEFAULT_MAX_MEMORY_MB,
+                 driver_factory=create_chrome_driver, memory_probe=driver_memory_mb,
+                 acquire_timeout=DEFAULT_ACQUIRE_TIMEOUT, ready_timeout=DEFAULT_READY_TIMEOUT):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.driver_factory = driver_factory
+        self.memory_probe = memory_probe
+        self.acquire_timeout = acquire_timeout
+        self.ready_timeout = ready_timeout
+
+        self._idle = []
+        # Navegadores abertos ou sendo abertos (livres + emprestados)
+        self._open = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+        # Estatísticas
+        self.created = 0
+        self.recycled = 0
+        self.failed_health_checks = 0
+        self.creation_errors = 0
+        self.pages = 0
+        self.screenshots = 0
+        self.ready_waits = 0
+        self.ready_timeouts = 0
+        self.ready_wait_time = 0.0
+        self._first_use = None
+
+    def _create(self):
+        """Abre um navegador; a vaga já deve ter sido reservada em _open."""
+        try:
+            driver = self.driver_factory()
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self.creation_errors += 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.created += 1
+        return PooledDriver(driver)
+
+    def _quit(self, pooled):
+        """Fecha um navegador e libera sua vaga."""
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.warning(f"Erro ao fechar navegador do pool: {str(e)}")
+        with self._condition:
+            self._open -= 1
+            self._condition.notify()
+
+    def _is_healthy(self, pooled):
+        """Verifica se o navegador ainda responde."""
+        try:
+            return pooled.driver.execute_script('return 1;') == 1
+        except Exception:
+            return False
+
+    def _needs_recycling(self, pooled):
+        """Indica se o navegador atingiu o limite de páginas ou de memória."""
+        if self.max_pages and pooled.pages >= self.max_pages:
+            return True
+        if self.max_memory_mb and self.memory_probe:
+            memory = self.memory_probe(pooled.driver)
+            if memory is not None and memory > self.max_memory_mb:
+                logger.info(f"Navegador usando {memory:.0f} MB (limite {self.max_memory_mb} MB), reciclando")
+                return True
+        return False
+
+    def _reset(self, pooled):
+        """Limpa cookies e a página atual antes de devolver o navegador ao pool."""
+        driver = pooled.driver
+        try:
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        except Exception:
+            try:
+                driver.delete_all_cookies()
+            except Exception:
+                pass
+        driver.get('about:blank')
+
+    def warm_up(self, count=None):
+        """
+        Abre navegadores antecipadamente até completar o pool.
+
+        Args:
+            count: Quantidade de navegadores a abrir (padrão: o tamanho do pool)
+
+        Returns:
+            int: Navegadores abertos
+        """
+        opened = []
+        for _ in range(count if count is not None else self.size):
+            with self._condition:
+                if self._closed or self._open >= self.size:
+                    break
+                self._open += 1
+            try:
+                opened.append(self._create())
+            except Exception as e:
+                logger.error(f"Erro ao abrir navegador no aquecimento do pool: {str(e)}")
+                break
+        with self._condition:
+            self._idle.extend(opened)
+            self._condition.notify_all()
+        if opened:
+            logger.info(f"Pool de navegadores aquecido com {len(opened)} instâncias")
+        return len(opened)
+
+    def acquire(self):
+        """
+        Empresta um navegador saudável, abrindo um novo se houver vaga.
+
+        Returns:
+            PooledDriver: Navegador emprestado
+
+        Raises:
+            TimeoutError: Se nenhum navegador ficar livre dentro de acquire_timeout
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise RuntimeError("Pool de navegadores fechado")
+                if self._first_use is None:
+                    self._first_use = time.monotonic()
+
+                pooled = None
+                if self._idle:
+                    pooled = self._idle.pop()
+                elif self._open < self.size:
+                    self._open += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("Nenhum navegador livre no pool")
+                    self._condition.wait(remaining)
+                    continue
+
+            if pooled is None:
+                return self._create()
+            if self._is_healthy(pooled):
+                return pooled
+
+            with self._condition:
+                self.failed_health_checks += 1
+            logger.warning("Navegador do pool não respondeu à verificação de saúde, substituindo")
+            self._quit(pooled)
+
+    def release(self, pooled, broken=False):
+        """
+        Devolve um navegador ao pool, reciclando-o se necessário.
+
+        Args:
+            pooled: Navegador emprestado
+            broken: True se ocorreu um erro durante o uso
+        """
+        with self._condition:
+            closed = self._closed
+        if broken or closed or self._needs_recycling(pooled):
+            if not broken and not closed:
+                with self._condition:
+                    self.recycled += 1
+            self._quit(pooled)
+            return
+
+        try:
+            self._reset(pooled)
+        except Exception as e:
+            logger.warning(f"Erro ao limpar navegador do pool: {str(e)}")
+            self._quit(pooled)
+            return
+
+        with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    @contextmanager
+    def driver(self):
+        """
+        Empresta um navegador durante o bloco with.
+
+        Exemplo:
+            with pool.driver() as driver:
+                pool.load(driver, url)
+        """
+        pooled = self.acquire()
+        broken = False
+        try:
+            yield pooled.driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            pooled.pages += 1
+            with self._condition:
+                self.pages += 1
+            self.release(pooled, broken=broken)
+
+    def wait_until_ready(self, driver, timeout=None, idle_time=DEFAULT_IDLE_TIME):
+        """Aguarda a página ficar pronta (teto padrão: ready_timeout) e registra o tempo de espera."""
+        start = time.monotonic()
+        ready = wait_until_ready(driver, timeout=timeout or self.ready_timeout, idle_time=idle_time)
+        with self._condition:
+            self.ready_waits += 1
+            self.ready_wait_time += time.monotonic() - start
+            if not ready:
+                self.ready_timeouts += 1
+        return ready
+
+    def record_screenshot(self):
+        """Registra um screenshot capturado (usado na taxa por minuto)."""
+        with self._condition:
+            self.screenshots += 1
+
+    def close(self):
+        """Fecha todos os navegadores livres; os emprestados são fechados ao serem devolvidos."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._quit(pooled)
+
+    def get_stats(self):
+        """Retorna as estatísticas do pool."""
+        with self._condition:
+            elapsed = time.monotonic() - self._first_use if self._first_use else 0.0
+            return {
+                'size': self.size,
+                'open': self._open,
+                'idle': len(self._idle),
+                'created': self.created,
+                'recycled': self.recycled,
+                'failed_health_checks': self.failed_health_checks,
+                'creation_errors': self.creation_errors,
+                'pages': self.pages,
+                'screenshots': self.screenshots,
+                'screenshots_per_minute': round(self.screenshots * 60 / elapsed, 2) if elapsed > 0 else 0.0,
+                'ready_timeouts': self.ready_timeouts,
+                'avg_ready_wait': round(self.ready_wait_time / self.ready_waits, 3) if self.ready_waits else 0.0,
+            }
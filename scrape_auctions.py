@@ -47,7 +47,6 @@ def main():
     os.makedirs("logs", exist_ok=True)
     os.makedirs("prints", exist_ok=True)
     os.makedirs("cache", exist_ok=True)
-    os.makedirs("cache/llm_responses", exist_ok=True)
     
     # Exibe informações sobre a execução
     print("\n===== SCRAPER DE LEILÕES DE IMÓVEIS =====")
@@ -0,0 +1,53 @@
+"""
+Script para testar o cliente não bloqueante do LLM contra o servidor Ollama falso.
+"""
+import sys
+import time
+import subprocess
+
+def check_async_llm(reactor):
+    """
+    Dispara chamadas simultâneas com latência injetada e verifica que o reactor
+    continua livre e que o limite de concorrência é respeitado.
+    """
+    from twisted.internet import defer, task
+    from myproject.llm.async_api import AsyncLlmApi
+    from myproject.tools.fake_ollama import start_fake_ollama
+
+    server = start_fake_ollama(latency=1.0)
+    client = AsyncLlmApi(max_concurrency=2)
+    client.api_url = server.url
+
+    ticks = []
+    heartbeat = task.LoopingCall(lambda: ticks.append(time.monotonic()))
+    heartbeat.start(0.05)
+
+    start = time.monotonic()
+    calls = [client.call_api(f"Prompt {i} com list_selector") for i in range(4)]
+
+    def finish(results):
+        heartbeat.stop()
+        server.shutdown()
+        elapsed = time.monotonic() - start
+
+        assert all('list_selector' in result for result in results), results
+        # 4 chamadas de 1s com 2 simultâneas: duas ondas, não quatro chamadas em série
+        assert 1.9 <= elapsed < 3.5, elapsed
+        assert server.max_in_flight == 2, server.max_in_flight
+        # O reactor seguiu processando outros eventos durante a espera
+        assert len(ticks) >= 20, len(ticks)
+        print(f"4 chamadas em {elapsed:.1f}s, {len(ticks)} ticks do reactor")
+
+    return defer.gatherResults(calls, consumeErrors=True).addCallback(finish)
+
+def test_async_llm():
+    """
+    Executa a verificação em um processo separado (o reactor não pode ser reiniciado).
+    """
+    result = subprocess.run([sys.executable, __file__], capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stdout + result.stderr
+    print(result.stdout)
+
+if __name__ == "__main__":
+    from twisted.internet import task
+    task.react(check_async_llm)
@@ -0,0 +1,85 @@
+"""
+Script para testar a gravação dos itens em lotes com upsert.
+"""
+import os
+import time
+import tempfile
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from myproject.database.models import Base, AuctionData
+from myproject.pipelines import DatabasePipeline
+
+def test_batched_pipeline():
+    """
+    Testa gravação por tamanho, tempo e fechamento, upsert por URL e thread de gravação.
+    """
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'itens.db')}")
+    Base.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    Session = sessionmaker(bind=engine)
+
+    # Um INSERT por lote de 3 itens; o restante fica pendente até o close_spider
+    pipeline = DatabasePipeline(engine=engine, batch_size=3, flush_interval=60)
+    pipeline.open_spider(None)
+    for i in range(7):
+        pipeline.process_item({'url': f'https://a.com/imovel/{i}', 'title': f'Casa {i}',
+                               'price': 'R$ 1.500.000,00'}, None)
+    inserts = [s for s in statements if s.startswith('INSERT INTO auction_data')]
+    assert len(inserts) == 2
+    assert 'ON CONFLICT' in inserts[0]
+    assert pipeline.get_stats()['pending'] == 1
+    pipeline.close_spider(None)
+
+    session = Session()
+    assert session.query(AuctionData).count() == 7
+    row = session.query(AuctionData).filter_by(url='https://a.com/imovel/0').one()
+    assert row.price == '1500000.00'
+    assert row.source_domain == 'a.com'
+    session.close()
+
+    # Upsert: atualiza o item existente sem apagar campos que chegaram vazios
+    with engine.begin() as conn:
+        conn.execute(AuctionData.__table__.update()
+                     .where(AuctionData.url == 'https://a.com/imovel/0')
+                     .values(screenshot_path='prints/0.webp'))
+    pipeline = DatabasePipeline(engine=engine, batch_size=100, flush_interval=0.05)
+    pipeline.open_spider(None)
+    pipeline.process_item({'url': 'https://a.com/imovel/0', 'title': 'Casa antiga', 'price': 'R$ 900,00'}, None)
+    pipeline.process_item({'url': 'https://a.com/imovel/0', 'title': 'Casa reformada', 'price': 'R$ 950,00'}, None)
+    assert pipeline.get_stats()['coalesced'] == 1
+
+    # Gravação por tempo
+    time.sleep(0.1)
+    pipeline.process_item({'url': 'https://b.com/imovel/1', 'title': 'Terreno'}, None)
+    assert pipeline.get_stats()['batches'] == 1
+    pipeline.close_spider(None)
+
+    session = Session()
+    row = session.query(AuctionData).filter_by(url='https://a.com/imovel/0').one()
+    assert row.title == 'Casa reformada'
+    assert row.price == '950.00'
+    assert row.screenshot_path == 'prints/0.webp'
+    assert session.query(AuctionData).count() == 8
+    session.close()
+
+    # Thread de gravação: tudo gravado até o fim do close_spider
+    pipeline = DatabasePipeline(engine=engine, batch_size=10, writer_thread=True)
+    pipeline.open_spider(None)
+    for i in range(100, 155):
+        pipeline.process_item({'url': f'https://c.com/imovel/{i}', 'title': 'Sala'}, None)
+    pipeline.close_spider(None)
+    stats = pipeline.get_stats()
+    assert stats['rows_written'] == 55
+    assert stats['batches'] == 6
+    assert stats['failed'] == 0
+
+    session = Session()
+    assert session.query(AuctionData).count() == 63
+    session.close()
+
+    print("Teste do pipeline em lotes concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_batched_pipeline()
@@ -0,0 +1,61 @@
+"""
+Script para testar o detector de CAPTCHA/anti-bot.
+"""
+import time
+from scrapy.http import HtmlResponse
+from myproject.tools.captcha_fixtures import CAPTCHA_FIXTURES
+from myproject.utils.captcha_detector import CaptchaDetector, captcha_detector, normalize_headers
+from myproject.utils.page_analysis import PageAnalysis
+
+class BodylessDetector(CaptchaDetector):
+    """Detector que registra se o corpo chegou a ser varrido."""
+
+    def __init__(self):
+        super().__init__()
+        self.scans = 0
+
+    def scan_body(self, body_lower):
+        self.scans += 1
+        return super().scan_body(body_lower)
+
+def test_captcha_detector():
+    """
+    Testa o detector contra o conjunto rotulado e o caminho rápido por cabeçalhos.
+    """
+    # Todos os exemplos rotulados são classificados corretamente
+    for example in CAPTCHA_FIXTURES:
+        response = HtmlResponse(url=example['url'], status=example['status'], headers=example['headers'],
+                                body=example['body'].encode('utf-8'), encoding='utf-8')
+        verdict = PageAnalysis.of(response).captcha
+        assert verdict.is_captcha == example['expected'], (example['name'], verdict)
+
+    # Cabeçalhos de desafio decidem sem varrer o corpo
+    detector = BodylessDetector()
+    headers = normalize_headers({b'cf-mitigated': [b'challenge'], b'Server': [b'cloudflare']})
+    verdict = detector.detect(403, headers, '<html><body>' + 'x' * 1000 + '</body></html>')
+    assert verdict.is_captcha
+    assert detector.scans == 0
+    assert 'header:cf-mitigated' in verdict.reasons
+
+    # Palavras genéricas fora de título, formulários e iframes não contam
+    body = '<html><head><title>Leilão</title></head><body><p>are you a robot? captcha</p></body></html>'
+    assert not captcha_detector.detect(body_lower=body).is_captcha
+    body = '<html><head><title>are you a robot?</title></head><body></body></html>'
+    assert captcha_detector.detect(body_lower=body).is_captcha
+
+    # Cookies de proteção só contam em respostas de bloqueio
+    headers = normalize_headers({'Set-Cookie': ['datadome=abc; Path=/']})
+    assert captcha_detector.detect(200, headers, '').score == 0
+    assert captcha_detector.detect(403, headers, '').score > 0
+
+    # Formulários sem fechamento não tornam a varredura quadrática
+    body = '<form action="/busca">' + 'a' * 20
+    start = time.monotonic()
+    captcha_detector.scan_body(body * 3000)
+    assert time.monotonic() - start < 1
+    assert captcha_detector.scan_body(body + '<div class="g-recaptcha"></div>')[1] == ['form:g-recaptcha']
+
+    print("Teste do detector de CAPTCHA concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_captcha_detector()
@@ -0,0 +1,94 @@
+"""
+Script para testar a camada de conexão: PRAGMAs do SQLite, sessões por thread e COPY.
+"""
+import os
+import tempfile
+import threading
+from sqlalchemy import table, text
+from myproject.database.connection import create_db_engine, copy_rows, get_scoped_session, remove_scoped_session
+from myproject.database.models import Base
+from myproject.pipelines import DatabasePipeline
+from myproject.tools.benchmark import gerar_item
+
+class FakeCopyCursor:
+    """Cursor no estilo do psycopg2 que guarda o conteúdo enviado por COPY."""
+
+    def __init__(self, sink):
+        self.sink = sink
+
+    def copy_expert(self, sql, buffer):
+        self.sink.append((sql, buffer.read()))
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    """Connection do SQLAlchemy reduzida ao acesso à conexão DBAPI."""
+
+    def __init__(self, sink):
+        cursor = FakeCopyCursor(sink)
+        self.connection = type('Pooled', (), {'dbapi_connection': type('DBAPI', (), {'cursor': lambda self: cursor})()})()
+
+def test_connection():
+    """
+    Testa WAL e timeouts por conexão, gravação concorrente, sessões por thread e o CSV do COPY.
+    """
+    path = os.path.join(tempfile.mkdtemp(), 'itens.db')
+    engine = create_db_engine(f'sqlite:///{path}', busy_timeout_ms=15000, synchronous='normal', mmap_mb=64)
+    with engine.connect() as conn:
+        assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert conn.execute(text('PRAGMA busy_timeout')).scalar() == 15000
+        assert conn.execute(text('PRAGMA synchronous')).scalar() == 1
+        assert conn.execute(text('PRAGMA mmap_size')).scalar() == 64 * 1024 * 1024
+    Base.metadata.create_all(engine)
+
+    # Várias threads gravando no mesmo arquivo sem "database is locked"
+    pipeline = DatabasePipeline(engine=engine)
+    pipeline.open_spider(None)
+    statement = pipeline._build_upsert()
+    errors = []
+
+    def writer(n):
+        for batch in range(10):
+            rows = [pipeline._row_from_item(gerar_item(i), gerar_item(i)['url'])
+                    for i in range((n * 10 + batch) * 10, (n * 10 + batch + 1) * 10)]
+            try:
+                with engine.begin() as conn:
+                    conn.execute(statement, rows)
+            except Exception as e:
+                errors.append(str(e))
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT COUNT(*) FROM auction_data')).scalar() == 400
+
+    # A sessão é a mesma dentro da thread e diferente entre threads
+    session = get_scoped_session()
+    assert get_scoped_session() is session
+    other = []
+    thread = threading.Thread(target=lambda: other.append(get_scoped_session()))
+    thread.start()
+    thread.join()
+    assert other[0] is not session
+    remove_scoped_session()
+    assert get_scoped_session() is not session
+    remove_scoped_session()
+
+    # COPY: NULL sem aspas, string vazia entre aspas
+    sink = []
+    copied = copy_rows(FakeConnection(sink), table('auction_data_stage'),
+                       [{'url': 'https://a.com/1', 'title': '', 'price_cents': 150000, 'area': None}])
+    assert copied == 1
+    sql, data = sink[0]
+    assert sql == 'COPY auction_data_stage ("url", "title", "price_cents", "area") FROM STDIN WITH (FORMAT csv)'
+    assert data == '"https://a.com/1","",150000,\n'
+
+    print("Teste da camada de conexão concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_connection()
@@ -0,0 +1,59 @@
+"""
+Script para testar a impressão digital estrutural de páginas.
+"""
+import time
+from myproject.tools.benchmark import gerar_pagina_listagem
+from myproject.utils.dom_fingerprint import dom_fingerprint, structural_tokens
+
+DETAIL_TEMPLATE = """
+<html><head><title>{titulo}</title><script>var lote = {lote};</script></head><body>
+<header class="topo"><nav class="menu">Início</nav></header>
+<main id="conteudo" class="container lote-{lote}">
+  <h1 class="titulo-imovel">{titulo}</h1>
+  <div class="galeria"><img src="/fotos/{lote}.jpg"></div>
+  <span class="preco-lance">R$ {preco}</span>
+  <div class="descricao"><p>{descricao}</p><b>Área:</b> {area} m²</div>
+  <div class="endereco">{endereco}</div>
+  <div class="data-leilao">{data}</div>
+</main>
+<footer class="rodape"></footer>
+</body></html>
+"""
+
+def _detail_page(lote, **overrides):
+    fields = {
+        'lote': lote, 'titulo': f'Casa {lote}', 'preco': f'{lote * 1000},00',
+        'descricao': 'Imóvel desocupado', 'area': 100 + lote, 'endereco': f'Rua {lote}',
+        'data': '10/11/2025',
+    }
+    fields.update(overrides)
+    return DETAIL_TEMPLATE.format(**fields)
+
+def test_dom_fingerprint():
+    """
+    Testa que páginas do mesmo modelo compartilham a impressão digital e modelos diferentes não.
+    """
+    # Textos, números e quantidade de cards não alteram a impressão digital
+    assert dom_fingerprint(_detail_page(1)) == dom_fingerprint(_detail_page(2, descricao='Ocupado'))
+    assert dom_fingerprint(gerar_pagina_listagem(5, seed=1)) == dom_fingerprint(gerar_pagina_listagem(40, seed=2))
+
+    # Estrutura diferente gera impressão digital diferente
+    assert dom_fingerprint(_detail_page(1)) != dom_fingerprint(gerar_pagina_listagem(5))
+    other = _detail_page(1).replace('class="endereco"', 'class="localizacao"')
+    assert dom_fingerprint(_detail_page(1)) != dom_fingerprint(other)
+
+    # Páginas quase vazias não têm impressão digital confiável
+    assert dom_fingerprint('<html><body><h1>Erro 404</h1></body></html>') is None
+    assert dom_fingerprint('') is None
+
+    # Comentários e scripts sem fechamento não tornam a varredura quadrática
+    for unclosed in ('<script>var a = 1;', '<!-- aviso '):
+        start = time.monotonic()
+        structural_tokens(unclosed * 8000)
+        assert time.monotonic() - start < 1
+    assert structural_tokens('<div class="card"><!-- x --><script>"<p class=falso>"</script></div>') == {'div', 'div.card'}
+
+    print("Teste da impressão digital estrutural concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_dom_fingerprint()
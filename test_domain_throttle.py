@@ -0,0 +1,79 @@
+"""
+Script para testar o throttling adaptativo por domínio.
+"""
+import os
+import tempfile
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from scrapy import Request
+from scrapy.core.downloader import Slot
+from scrapy.http import HtmlResponse
+from sqlalchemy import create_engine
+from myproject.database.migrations import migrate
+from myproject.spiders.auction_spider import AuctionSpider
+from myproject.utils.domain_throttle import ADJUST_EVERY, DomainThrottle, parse_retry_after
+
+def test_domain_throttle():
+    """
+    Testa o aumento em domínios rápidos, o recuo em 429/Retry-After, os limites por domínio e a persistência.
+    """
+    # Retry-After em segundos ou como data HTTP
+    now = datetime(2025, 3, 10, 12, 0, tzinfo=timezone.utc)
+    assert parse_retry_after(b'120') == 120.0
+    assert parse_retry_after('Mon, 10 Mar 2025 12:00:30 GMT', now=now) == 30.0
+    assert parse_retry_after('amanhã') is None
+
+    throttle = DomainThrottle(start_delay=1.5, start_concurrency=4, max_concurrency=8,
+                              domain_limits={'gov.br': {'min_delay': 0.1, 'max_concurrency': 16},
+                                             'pequeno.com.br': {'min_delay': 3.0, 'max_concurrency': 1}})
+
+    # Portal rápido: a concorrência sobe e o atraso cai até os limites do domínio
+    for _ in range(40 * ADJUST_EVERY):
+        state = throttle.observe('www.tjsp.gov.br', 0.3, 200)
+    assert (state.concurrency, state.delay) == (16, 0.1)
+
+    # Site pequeno: os limites por domínio valem desde a primeira requisição
+    state = throttle.state('www.pequeno.com.br')
+    assert (state.concurrency, state.delay) == (1, 3.0)
+
+    # 429 com Retry-After: concorrência pela metade, atraso no mínimo o pedido, sem aumento imediato
+    for _ in range(40 * ADJUST_EVERY):
+        throttle.observe('leiloes.com', 0.3, 200)
+    before = throttle.state('leiloes.com').concurrency
+    state = throttle.observe('leiloes.com', 0.3, 429, retry_after=20)
+    assert state.concurrency == before // 2 and state.delay == 20.0
+    for _ in range(ADJUST_EVERY):
+        throttle.observe('leiloes.com', 0.3, 200)
+    assert state.concurrency == before // 2
+
+    # Latência alta reduz a carga
+    for _ in range(2 * ADJUST_EVERY):
+        state = throttle.observe('lento.com', 9.0, 200)
+    assert state.concurrency < 4 and state.delay > 1.5
+    stats = throttle.get_stats()
+    assert stats['backoffs'] == 1 and stats['retry_after_hits'] == 1 and stats['decreases'] >= 1
+
+    # Os parâmetros aprendidos valem na próxima coleta
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'throttle.db')}")
+    migrate(engine)
+    assert throttle.save(engine) == 3
+    tuned = DomainThrottle(max_concurrency=8, domain_limits=throttle.domain_limits)
+    assert tuned.load(engine) == 3
+    state = tuned.state('www.tjsp.gov.br')
+    assert state.learned and (state.concurrency, state.delay) == (16, 0.1)
+
+    # No spider, o slot do downloader recebe os parâmetros a cada resposta
+    spider = AuctionSpider()
+    spider.throttle = DomainThrottle()
+    slot = Slot(4, 1.5, 0.5)
+    spider.crawler = SimpleNamespace(engine=SimpleNamespace(downloader=SimpleNamespace(slots={'a.com': slot})))
+    request = Request('https://a.com/imovel/1', meta={'download_slot': 'a.com', 'download_latency': 0.2})
+    response = HtmlResponse(request.url, status=503, headers={'Retry-After': '10'}, body=b'', request=request)
+    spider._on_response_downloaded(response, request, spider)
+    assert (slot.concurrency, slot.delay) == (2, 10.0)
+    spider.session.close()
+
+    print("Teste do throttling adaptativo por domínio concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_domain_throttle()
@@ -0,0 +1,67 @@
+"""
+Script para testar a contabilidade de custo por domínio e as prioridades das requisições.
+"""
+import os
+import tempfile
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from sqlalchemy import create_engine, text
+from myproject.database.migrations import migrate
+from myproject.spiders.auction_spider import AuctionSpider
+from myproject.utils.domain_yield import DomainYieldTracker, format_report
+
+def test_domain_yield():
+    """
+    Testa a ordem das prioridades, o rebaixamento automático, a persistência e o relatório.
+    """
+    tracker = DomainYieldTracker(demote_threshold=0.02, min_requests=50)
+
+    # Um item a cada detalhe contra nenhum item em 60 respostas
+    for _ in range(20):
+        tracker.record_response('bom.com.br', 40000, is_detail=True)
+        tracker.record_item('bom.com.br')
+    for _ in range(60):
+        tracker.record_response('vazio.com.br', 80000, is_detail=True)
+    tracker.record_llm('vazio.com.br', 12.5)
+    assert tracker.domain('vazio.com.br').demoted and not tracker.domain('bom.com.br').demoted
+
+    # Detalhes antes de listagens; domínios produtivos antes; rebaixados depois de todas as listagens
+    assert tracker.priority('bom.com.br', True) > tracker.priority('novo.com.br', True) > tracker.priority('bom.com.br', False)
+    assert tracker.priority('novo.com.br', False) > tracker.priority('vazio.com.br', True)
+
+    # Itens novos tiram o domínio do rebaixamento
+    for _ in range(10):
+        tracker.record_item('vazio.com.br')
+    assert not tracker.domain('vazio.com.br').demoted
+    assert (tracker.get_stats()['demotions'], tracker.get_stats()['promotions']) == (1, 1)
+
+    # O histórico faz a próxima coleta começar com as mesmas prioridades
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'rendimento.db')}")
+    migrate(engine)
+    assert tracker.save(engine) == 2
+    next_run = DomainYieldTracker()
+    assert next_run.load(engine) == 2
+    assert next_run.priority('bom.com.br', False) > next_run.priority('novo.com.br', False)
+    for _ in range(20):
+        next_run.record_response('bom.com.br', 40000, is_detail=True)
+    assert next_run.save(engine) == 1
+    with engine.connect() as conn:
+        runs, requests = conn.execute(text("SELECT runs, requests FROM domain_yield WHERE domain = 'bom.com.br'")).one()
+    assert runs == 2 and requests == 30.0  # 20 desta coleta + metade dos 20 gravados antes
+
+    report = format_report(tracker.report_rows())
+    assert report.splitlines()[2].startswith('bom.com.br') and 'vazio.com.br' in report
+
+    # No spider, as respostas recebidas entram na conta do domínio da requisição
+    spider = AuctionSpider()
+    request = Request('https://a.com/imovel/1', meta={'domain': 'a.com', 'is_detail_page': True})
+    spider._on_response_received(HtmlResponse(request.url, body=b'x' * 2048, request=request), request, spider)
+    cost = spider.yield_tracker.domain('a.com')
+    assert (cost.requests, cost.detail_requests, cost.bytes) == (1, 1, 2048)
+    assert spider._request_priority('a.com', True) > spider._request_priority('a.com', False)
+    spider.session.close()
+
+    print("Teste do rendimento por domínio concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_domain_yield()
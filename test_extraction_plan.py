@@ -0,0 +1,47 @@
+"""
+Script para testar os planos de extração compilados.
+"""
+from parsel import Selector
+from myproject.tools.benchmark import gerar_pagina_detalhe, legacy_extract_fields, SELETORES_DETALHE
+from myproject.utils.extraction_plan import ExtractionPlanCache
+
+def test_extraction_plan():
+    """
+    Testa a equivalência com a extração original, os fallbacks e o cache de planos.
+    """
+    base_url = 'https://exemplo.com.br/imovel/1'
+    plans = ExtractionPlanCache()
+
+    # Mesmo resultado da extração original nas páginas sintéticas
+    for seed in range(5):
+        selector = Selector(text=gerar_pagina_detalhe(seed=seed))
+        expected = legacy_extract_fields(selector, SELETORES_DETALHE, base_url)
+        assert plans.get(dict(SELETORES_DETALHE)).extract(selector.root, base_url) == expected
+
+    # Um único plano compilado é reutilizado para o mesmo conjunto de seletores
+    assert plans.get_stats() == {'plans': 1, 'hits': 4, 'compiled': 1}
+
+    html = (
+        '<html><head><meta name="titulo" content="Casa no  centro"></head><body>'
+        '<div class="preco"><span>R$</span> <b>100.000,00</b></div>'
+        '<div class="fotos"><img src="a.jpg"><img src="//cdn.com/b.jpg"><img src="a.jpg"></div>'
+        '</body></html>'
+    )
+    root = Selector(text=html).root
+    plan = plans.get({'title': 'meta[name=titulo]', 'price': '.preco',
+                      'area': 'div[[invalido', 'image_url': '.fotos img'})
+    data = plan.extract(root, base_url)
+
+    # Atributo content (meta tags)
+    assert data['title'] == 'Casa no centro'
+    # Sem texto direto não vazio, usa o texto completo do elemento
+    assert data['price'] == 'R$ 100.000,00'
+    # Seletor inválido não interrompe os demais campos
+    assert data['area'] is None
+    # Imagens relativas normalizadas e sem duplicatas
+    assert data['images'] == ['https://exemplo.com.br/imovel/a.jpg', 'https://cdn.com/b.jpg']
+
+    print("Teste dos planos de extração concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_extraction_plan()
@@ -0,0 +1,81 @@
+"""
+Script para testar as re-coletas incrementais com requisições condicionais e hash do corpo.
+"""
+import os
+import asyncio
+import tempfile
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from sqlalchemy import create_engine
+from myproject.database.fetch_state import DUPLICATE, NOT_MODIFIED, UNCHANGED, FetchStateStore, body_hash
+from myproject.database.migrations import migrate
+from myproject.spiders.auction_spider import AuctionSpider
+
+URL = 'https://a.com/imovel/1'
+BODY = b'<html><body><h1>Casa</h1><p>R$ 100.000,00</p><a href="/foto?jsessionid=AAA">foto</a></body></html>'
+
+def detail_response(url, body=BODY, status=200, headers=None, meta=None):
+    """Monta a resposta de uma página de detalhe agendada pelo spider."""
+    request = Request(url, meta=dict(meta or {'is_detail_page': True, 'page_type': 'detail', 'domain': 'a.com'}))
+    return HtmlResponse(url, status=status, body=body, headers=headers or {}, request=request)
+
+async def collect(generator):
+    """Consome um callback assíncrono do spider."""
+    return [result async for result in generator]
+
+def test_fetch_state():
+    """
+    Testa o hash normalizado, os cabeçalhos condicionais, os 304, os corpos iguais e as duplicatas.
+    """
+    # Identificadores de sessão e espaços não mudam o hash
+    assert body_hash(BODY) == body_hash(BODY.replace(b'jsessionid=AAA', b'jsessionid=BBB').replace(b'<p>', b'  <p>'))
+    assert body_hash(BODY) != body_hash(BODY.replace(b'100.000', b'90.000'))
+
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'estado.db')}")
+    migrate(engine)
+
+    # Primeira coleta: sem validadores, a página é processada e o estado gravado
+    store = FetchStateStore(engine)
+    assert store.conditional_headers(URL) == {}
+    first = detail_response(URL, headers={'ETag': '"v1"', 'Last-Modified': 'Mon, 10 Mar 2025 10:00:00 GMT'})
+    assert store.check(first) is None
+    store.record(first)
+    assert store.flush() == 1
+
+    # Re-coleta: cabeçalhos condicionais e respostas sem mudança ignoradas
+    store = FetchStateStore(engine)
+    store.load([URL, 'https://a.com/imovel/2'])
+    assert store.conditional_headers(URL) == {'If-None-Match': '"v1"',
+                                              'If-Modified-Since': 'Mon, 10 Mar 2025 10:00:00 GMT'}
+    assert store.conditional_headers('https://a.com/imovel/2') == {}
+    assert store.check(detail_response(URL, body=b'', status=304)) == NOT_MODIFIED
+    assert store.check(detail_response(URL)) == UNCHANGED
+    assert store.check(detail_response(URL, body=BODY.replace(b'100.000', b'90.000'))) is None
+
+    # O mesmo conteúdo em outra URL (parâmetro de sessão) é duplicado
+    session_url = f'{URL}?jsessionid=XYZ'
+    assert store.check(detail_response(session_url, body=BODY.replace(b'AAA', b'XYZ'))) == DUPLICATE
+    store.flush()
+    stats = store.get_stats()
+    assert (stats['not_modified'], stats['unchanged'], stats['duplicates'], stats['changed']) == (1, 1, 1, 1)
+
+    # No spider, a requisição leva os validadores e o 304 não chega à extração
+    spider = AuctionSpider()
+    spider.fetch_state = FetchStateStore(engine)
+    meta = {'domain': 'a.com', 'is_detail_page': True, 'page_type': 'detail'}
+    headers = spider._conditional_request(URL, meta)
+    assert headers['If-None-Match'] == '"v1"' and 304 in meta['handle_httpstatus_list']
+
+    def fail_extraction(*args, **kwargs):
+        raise AssertionError("Página sem mudança não deve ser extraída")
+    spider._extract_property_data = fail_extraction
+    assert asyncio.run(collect(spider.parse_detail(detail_response(URL, body=b'', status=304, meta=meta)))) == []
+    assert asyncio.run(collect(spider.parse(detail_response(URL)))) == []
+    assert spider.fetch_state.get_stats()['not_modified'] == 1
+    assert spider.fetch_state.get_stats()['unchanged'] == 1
+    spider.session.close()
+
+    print("Teste das re-coletas incrementais concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_fetch_state()
@@ -0,0 +1,42 @@
+"""
+Script para testar o condensador de HTML usado nos prompts do LLM.
+"""
+from myproject.tools.benchmark import gerar_pagina_listagem
+from myproject.utils.html_condenser import condense_html
+
+def test_html_condenser():
+    """
+    Testa a remoção de nós sem conteúdo, a redução de cards repetidos e os limites.
+    """
+    html = gerar_pagina_listagem(200)
+    condensed = condense_html(html)
+
+    # Scripts e atributos irrelevantes são removidos; o esqueleto de classes permanece
+    assert '<script' not in condensed and 'tracking' not in condensed
+    assert 'data-id' not in condensed
+    assert 'class="link-imovel"' in condensed and 'id="lista-imoveis"' in condensed
+
+    # Apenas alguns cards são mantidos, com a contagem dos omitidos
+    assert condensed.count('card-imovel') == 3
+    assert '+197 elementos semelhantes' in condensed
+    assert 'pagination' in condensed
+    assert len(html) / len(condensed) > 10
+
+    # Textos longos são truncados
+    long_text = 'Descrição ' * 100
+    page = f'<html><body><div class="descricao"><p>{long_text}</p></div><svg><path d="M0"/></svg></body></html>'
+    condensed = condense_html(page, max_text=50)
+    assert '<svg' not in condensed
+    assert len(condensed) < 150
+
+    # Limite de tamanho interrompe a saída
+    assert len(condense_html(gerar_pagina_listagem(50), max_chars=300, max_siblings=50)) < 1000
+
+    # Declaração de codificação e HTML vazio não quebram a análise
+    assert 'Olá' in condense_html('<?xml version="1.0" encoding="utf-8"?><html><body><p class="x">Olá</p></body></html>')
+    assert condense_html('') == ''
+
+    print("Teste do condensador de HTML concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_html_condenser()
@@ -0,0 +1,58 @@
+"""
+Script para testar o cache persistente de respostas do LLM.
+"""
+import os
+import time
+from myproject.llm.response_store import LlmResponseStore, response_key
+
+def test_llm_response_store():
+    """
+    Testa chaves pelo prompt completo, TTL, compressão e descarte por tamanho.
+    """
+    preamble = "Analise o HTML a seguir e retorne os seletores. " * 20
+
+    # Prompts com o mesmo preâmbulo longo não colidem
+    key_a = response_key(preamble + "<html>pagina A</html>", 'modelo')
+    key_b = response_key(preamble + "<html>pagina B</html>", 'modelo')
+    assert key_a != key_b
+    # Modelo e opções fazem parte da chave
+    assert response_key("p", 'modelo') != response_key("p", 'outro')
+    assert response_key("p", 'modelo', {'temperature': 0.3}) != response_key("p", 'modelo')
+
+    store = LlmResponseStore(':memory:', ttl=3600, max_bytes=10_000)
+    assert store.get(key_a) is None
+
+    response = '{"title": "h1", "price": ".preco"}' * 50
+    store.set(key_a, response)
+    assert store.get(key_a) == response
+    # Valor comprimido ocupa menos que o texto original
+    assert store.get_stats()['bytes'] < len(response)
+
+    # Entradas expiradas não são retornadas
+    store.ttl = 0
+    assert store.get(key_a) is None
+    store.ttl = 3600
+
+    # Ao exceder o limite, a entrada usada há mais tempo é descartada
+    store.max_bytes = 2_500
+    payloads = {}
+    for i in range(3):
+        key = response_key(f"prompt {i}", 'modelo')
+        payloads[key] = os.urandom(600).hex() + str(i)
+        store.set(key, payloads[key])
+        time.sleep(0.01)
+    keys = list(payloads)
+    # A primeira volta a ser usada, então a segunda é a menos recente
+    store.get(keys[0])
+    store.set(response_key("prompt extra", 'modelo'), os.urandom(600).hex())
+
+    stats = store.get_stats()
+    assert stats['evictions'] >= 1
+    assert stats['bytes'] <= store.max_bytes
+    assert store.get(keys[1]) is None
+    assert store.get(keys[0]) == payloads[keys[0]]
+
+    print(f"Teste do cache de respostas do LLM concluído com sucesso: {store.get_stats()}")
+
+if __name__ == "__main__":
+    test_llm_response_store()
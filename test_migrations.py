@@ -0,0 +1,56 @@
+"""
+Script para testar as migrações versionadas e os índices das consultas frequentes.
+"""
+import os
+import tempfile
+from sqlalchemy import create_engine, inspect, text
+from myproject.database.migrations import MIGRATIONS, check_query_plans, current_version, migrate
+
+def test_migrations():
+    """
+    Testa a migração de um banco antigo, a idempotência e o uso dos índices nos planos.
+    """
+    # Banco criado antes das migrações: tabelas originais, sem índices compostos
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'antigo.db')}")
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE selector_cache (id INTEGER PRIMARY KEY, url VARCHAR UNIQUE, domain VARCHAR, '
+                          'page_type VARCHAR, selectors TEXT, success_rate FLOAT, created_at DATETIME, '
+                          'last_used DATETIME, use_count INTEGER, is_valid BOOLEAN)'))
+        conn.execute(text('CREATE TABLE auction_data (id INTEGER PRIMARY KEY, url VARCHAR UNIQUE, title VARCHAR, '
+                          'price VARCHAR, description TEXT, address VARCHAR, auction_date VARCHAR, area VARCHAR, '
+                          'property_type VARCHAR, image_url VARCHAR, extracted_at DATETIME, source_domain VARCHAR, '
+                          'screenshot_path VARCHAR, latitude FLOAT, longitude FLOAT, success_bid VARCHAR)'))
+        conn.execute(text("INSERT INTO auction_data (url, price, source_domain) VALUES ('https://a.com/1', '100.00', 'a.com')"))
+
+    # Todas as migrações são aplicadas em ordem, sem perder dados
+    assert current_version(engine) == 0
+    assert migrate(engine, target=2) == [1, 2]
+    assert migrate(engine) == [migration.version for migration in MIGRATIONS[2:]]
+    assert current_version(engine) == MIGRATIONS[-1].version
+    assert migrate(engine) == []
+
+    inspector = inspect(engine)
+    assert 'ix_selector_cache_lookup' in {index['name'] for index in inspector.get_indexes('selector_cache')}
+    assert {'ix_auction_data_domain_extracted', 'ix_auction_data_price_cents'} <= \
+        {index['name'] for index in inspector.get_indexes('auction_data')}
+    assert inspector.has_table('auction_price_history') and inspector.has_table('page_templates')
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT COUNT(*) FROM auction_data')).scalar() == 1
+
+    # As consultas frequentes usam os índices no banco migrado e em um banco novo
+    for database in (engine, create_engine('sqlite://')):
+        migrate(database)
+        plans = check_query_plans(database)
+        assert plans and all(plan.uses_index for plan in plans), [p for p in plans if not p.uses_index]
+
+    # Sem o índice, a verificação acusa a varredura
+    with engine.begin() as conn:
+        conn.execute(text('DROP INDEX ix_selector_cache_lookup'))
+    engine.dispose()
+    plans = {plan.name: plan for plan in check_query_plans(engine)}
+    assert not plans['selector_cache_lookup'].uses_index
+
+    print("Teste das migrações concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_migrations()
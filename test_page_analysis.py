@@ -0,0 +1,54 @@
+"""
+Script para testar a análise compartilhada de respostas.
+"""
+from scrapy.http import HtmlResponse, Response
+from myproject.tools.benchmark import gerar_pagina_listagem
+from myproject.utils.page_analysis import PageAnalysis, lower_text
+from myproject.utils.page_classifier import page_classifier
+
+class CountingClassifier:
+    """Classificador que conta quantas vezes foi chamado."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def classify(self, html, lowered=False):
+        self.calls += 1
+        return page_classifier.classify(html, lowered)
+
+def test_page_analysis():
+    """
+    Testa que cada resultado é calculado uma única vez e compartilhado entre as etapas.
+    """
+    html = gerar_pagina_listagem(50)
+    response = HtmlResponse(url='https://a.com/leiloes', body=html.encode('utf-8'), encoding='utf-8',
+                            headers={'Content-Type': 'text/html; charset=utf-8'})
+
+    # A mesma instância é devolvida para a mesma resposta
+    analysis = PageAnalysis.of(response)
+    assert PageAnalysis.of(response) is analysis
+
+    counting = CountingClassifier()
+    analysis.classifier = counting
+    for _ in range(3):
+        assert analysis.is_text
+        assert not analysis.is_captcha
+        assert analysis.classification.page_type == 'list'
+        assert analysis.fingerprint is not None
+    assert counting.calls == 1
+    assert analysis.lower is analysis.lower
+    assert analysis.classification == page_classifier.classify(html)
+
+    # Respostas binárias não são analisadas como texto
+    binary = Response(url='https://a.com/foto.jpg', body=b'\xff\xd8\xff', headers={'Content-Type': 'image/jpeg'})
+    assert not PageAnalysis.of(binary).is_text
+    assert PageAnalysis.of(binary).fingerprint is None
+
+    # A conversão em blocos equivale a str.lower()
+    text = 'Leilão de IMÓVEIS ' * 10000
+    assert lower_text(text) == text.lower()
+
+    print("Teste da análise compartilhada concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_page_analysis()
@@ -0,0 +1,44 @@
+"""
+Script para testar o classificador de tipo de página.
+"""
+from myproject.utils.page_classifier import page_classifier
+from myproject.tools.benchmark import gerar_pagina_listagem, legacy_detect_page_type
+
+DETAIL_HTML = """
+<html><body>
+<h1 class="titulo-imovel">Casa em Campinas</h1>
+<div id="detalhe-imovel" class="detalhes">
+  <span class="valor-lance">R$ 350.000,00</span>
+  <p>Área: 120 m²</p>
+  <p>Data do leilão: 10/04/2025</p>
+  <div class="galeria"><img src="/f/1.jpg"></div>
+  <a href="https://wa.me/55">Compartilhar no WhatsApp</a>
+</div>
+</body></html>
+"""
+
+def test_page_classifier():
+    """
+    Testa a classificação de páginas de listagem e detalhes e compara com a heurística original.
+    """
+    listing = gerar_pagina_listagem(num_cards=50)
+
+    result = page_classifier.classify(listing)
+    assert result.page_type == 'list'
+    assert result.features['multiple_items'] == 1
+    assert result.features['pagination'] == 1
+
+    result = page_classifier.classify(DETAIL_HTML)
+    assert result.page_type == 'detail'
+    assert result.features['price_text'] == 1
+    assert result.features['area_text'] == 1
+
+    # O tipo detectado deve coincidir com a heurística original
+    # (as pontuações podem diferir: os padrões antigos com .*? vazavam para além do atributo)
+    for html in (listing, DETAIL_HTML):
+        assert page_classifier.classify(html).page_type == legacy_detect_page_type(html)[0]
+
+    print("Teste do classificador de páginas concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_page_classifier()
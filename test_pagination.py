@@ -0,0 +1,77 @@
+"""
+Script para testar a detecção de paginação e o orçamento de páginas por domínio.
+"""
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from myproject.spiders.auction_spider import AuctionSpider
+from myproject.utils.pagination import PaginationFollower, PaginationRule, find_next_link, infer_rule, rule_from_numbered_links
+
+def listing(url, page, pagination_html, lots=3):
+    """Monta uma listagem com links de detalhe e o bloco de paginação."""
+    cards = ''.join(f'<div class="card"><a href="/imovel/{page * 100 + i}">Lote {i}</a></div>' for i in range(lots))
+    body = f'<html><body>{cards}<ul class="pagination">{pagination_html}</ul></body></html>'
+    return HtmlResponse(url, body=body.encode('utf-8'), encoding='utf-8', request=Request(url, meta={'domain': 'a.com'}))
+
+def test_pagination():
+    """
+    Testa as regras por parâmetro, offset, caminho e links numerados, o orçamento e a parada sem imóveis novos.
+    """
+    # Link "Próxima" e regra por parâmetro de consulta, mantendo os filtros da listagem
+    response = listing('https://a.com/imoveis?cidade=sp', 1, '<li><a href="?cidade=sp&page=2">Próxima »</a></li>')
+    assert find_next_link(response) == 'https://a.com/imoveis?cidade=sp&page=2'
+    rule = infer_rule(response.url, find_next_link(response))
+    assert (rule.kind, rule.name, rule.step) == ('query', 'page', 1)
+    assert rule.next_url('https://a.com/imoveis?cidade=sp&page=7') == 'https://a.com/imoveis?cidade=sp&page=8'
+
+    # Offsets e caminhos
+    rule = infer_rule('https://b.com/lotes', 'https://b.com/lotes?offset=24')
+    assert (rule.name, rule.step, rule.first) == ('offset', 24, 0)
+    assert rule.next_url('https://b.com/lotes?offset=24') == 'https://b.com/lotes?offset=48'
+    rule = infer_rule('https://c.com/leiloes/sp', 'https://c.com/leiloes/sp/pagina/2')
+    assert rule.next_url('https://c.com/leiloes/sp') == 'https://c.com/leiloes/sp/pagina/2'
+    assert rule.next_url('https://c.com/leiloes/sp/pagina/2/') == 'https://c.com/leiloes/sp/pagina/3/'
+
+    # Sem link "Próxima": regra pelos links numerados; rel="next" tem prioridade
+    numbered = listing('https://d.com/busca', 1, ''.join(f'<li><a href="/busca?pg={n}">{n}</a></li>' for n in (1, 2, 3)))
+    assert (rule_from_numbered_links(numbered).kind, rule_from_numbered_links(numbered).name) == ('query', 'pg')
+    rel_next = HtmlResponse('https://e.com/x', body=b'<html><head><link rel="next" href="/x?cursor=abc"></head></html>')
+    assert find_next_link(rel_next) == 'https://e.com/x?cursor=abc'
+    assert infer_rule(rel_next.url, find_next_link(rel_next)) is None
+
+    # A regra é aprendida uma vez por domínio e vale para as demais listagens
+    follower = PaginationFollower(max_pages=3)
+    first = listing('https://a.com/imoveis', 1, '<li><a href="/imoveis?page=2">Próxima</a></li>')
+    assert follower.next_page(first, 'a.com', ['https://a.com/imovel/100']) == 'https://a.com/imoveis?page=2'
+    other = listing('https://a.com/apartamentos', 1, '')
+    assert follower.next_page(other, 'a.com', ['https://a.com/imovel/900']) == 'https://a.com/apartamentos?page=2'
+
+    # Página sem imóveis novos encerra a sequência; o orçamento limita o domínio
+    repeated = listing('https://a.com/imoveis?page=2', 2, '')
+    assert follower.next_page(repeated, 'a.com', ['https://a.com/imovel/100']) is None
+    page3 = listing('https://a.com/apartamentos?page=2', 2, '')
+    assert follower.next_page(page3, 'a.com', ['https://a.com/imovel/901']) == 'https://a.com/apartamentos?page=3'
+    page4 = listing('https://a.com/apartamentos?page=3', 3, '')
+    assert follower.next_page(page4, 'a.com', ['https://a.com/imovel/902']) is None
+    stats = follower.get_stats()
+    assert (stats['pages_scheduled'], stats['stopped_empty'], stats['stopped_budget']) == (3, 1, 1)
+
+    # Cursores opacos: o link de próxima página de cada listagem é seguido
+    follower.rules.clear()
+    assert follower.next_page(rel_next, 'e.com', ['https://e.com/imovel/1']) == 'https://e.com/x?cursor=abc'
+    assert follower.rules['e.com'].kind == 'link'
+
+    # No spider, a próxima página mantém a profundidade de navegação e reinicia a do Scrapy
+    spider = AuctionSpider()
+    spider.pagination = PaginationFollower()
+    request = spider._next_listing_request(first, 'a.com', 1, ['https://a.com/imovel/100'])
+    assert request.url == 'https://a.com/imoveis?page=2'
+    assert request.meta['crawl_depth'] == 1 and request.meta['depth_reset'] and request.meta['page_type'] == 'list'
+    spider.items_count['a.com'] = spider.max_items_per_site
+    assert spider._next_listing_request(page3, 'a.com', 1, ['https://a.com/imovel/999']) is None
+    assert isinstance(spider.pagination.rules['a.com'], PaginationRule)
+    spider.session.close()
+
+    print("Teste da paginação concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_pagination()
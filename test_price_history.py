@@ -0,0 +1,73 @@
+"""
+Script para testar a detecção de mudanças e o histórico de preços dos imóveis.
+"""
+import os
+import tempfile
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from myproject.database.models import Base, AuctionData
+from myproject.database.price_history import content_hash, ensure_tracking_schema, get_latest_price, get_price_history
+from myproject.pipelines import DatabasePipeline
+
+URL = 'https://a.com/imovel/1'
+
+def crawl(engine, items):
+    """Executa o pipeline sobre os itens, como em uma nova coleta."""
+    pipeline = DatabasePipeline(engine=engine, batch_size=100)
+    pipeline.open_spider(None)
+    for item in items:
+        pipeline.process_item(item, None)
+    pipeline.close_spider(None)
+    return pipeline.get_stats()
+
+def test_price_history():
+    """
+    Testa o hash normalizado, as re-coletas sem escrita e o histórico da 1ª/2ª praça.
+    """
+    # Diferenças só de espaços ou maiúsculas não mudam o hash
+    assert content_hash({'title': 'Casa  Centro', 'price': '100.00'}) == content_hash({'title': ' casa centro', 'price': '100.00'})
+    assert content_hash({'price': '100.00'}) != content_hash({'price': '90.00'})
+
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'itens.db')}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    first_round = {'url': URL, 'title': 'Casa', 'price': 'R$ 300.000,00', 'auction_date': '10/03/2025'}
+    stats = crawl(engine, [first_round, {'url': 'https://a.com/imovel/2', 'title': 'Sala', 'price': 'R$ 90.000,00'}])
+    assert stats['rows_written'] == 2
+
+    # Re-coleta sem mudança: nenhuma instrução de escrita chega ao banco
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', listener)
+    stats = crawl(engine, [dict(first_round, title='  casa ')])
+    event.remove(engine, 'before_cursor_execute', listener)
+    assert stats['unchanged'] == 1 and stats['rows_written'] == 0
+    assert not any(s.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')) for s in statements)
+
+    # 2ª praça com preço menor: atualiza o imóvel e acrescenta ao histórico
+    stats = crawl(engine, [dict(first_round, price='R$ 180.000,00', auction_date='24/03/2025')])
+    assert stats['rows_written'] == 1
+
+    session = Session()
+    row = session.query(AuctionData).filter_by(url=URL).one()
+    assert row.price == '180000.00'
+    history = get_price_history(session, URL)
+    assert [h.price for h in history] == ['300000.00', '180000.00']
+    assert history[1].previous_price == '300000.00'
+    assert history[1].auction_date == '24/03/2025'
+    assert get_latest_price(session, URL).price == '180000.00'
+    assert get_latest_price(session, 'https://b.com/inexistente') is None
+    session.close()
+
+    # Bancos antigos recebem a coluna e a tabela de histórico
+    old = create_engine('sqlite://')
+    with old.begin() as conn:
+        conn.execute(text('CREATE TABLE auction_data (id INTEGER PRIMARY KEY, url VARCHAR UNIQUE, price VARCHAR)'))
+    assert ensure_tracking_schema(old)
+    assert not ensure_tracking_schema(old)
+
+    print("Teste do histórico de preços concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_price_history()
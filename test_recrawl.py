@@ -0,0 +1,89 @@
+"""
+Script para testar a re-coleta de imóveis já gravados com as configurações padrão do projeto.
+"""
+import os
+import json
+import asyncio
+import tempfile
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from myproject.database.migrations import migrate
+from myproject.database.models import ScrapingRule
+from myproject.database.price_history import get_price_history
+from myproject import settings as project_settings
+from myproject.pipelines import DatabasePipeline
+from myproject.spiders.auction_spider import AuctionSpider
+
+LISTING_URL = 'https://a.com/imoveis'
+DETAIL_URL = 'https://a.com/imovel/1'
+HEADERS = {'Content-Type': 'text/html; charset=utf-8'}
+
+def listing_response():
+    """Listagem com um único imóvel."""
+    body = f'<html><body><div class="card"><a href="{DETAIL_URL}">Casa</a></div></body></html>'
+    request = Request(LISTING_URL, meta={'domain': 'a.com', 'page_type': 'list', 'crawl_depth': 1})
+    return HtmlResponse(LISTING_URL, body=body.encode('utf-8'), headers=HEADERS, request=request)
+
+def detail_response(request, price):
+    """Página de detalhe do imóvel com o preço informado."""
+    body = (f'<html><body><h1>Casa no centro</h1><span class="preco">{price}</span>'
+            f'<p class="data">10/03/2025</p></body></html>')
+    return HtmlResponse(request.url, body=body.encode('utf-8'), headers=HEADERS, request=request)
+
+async def collect(generator):
+    """Consome um callback assíncrono do spider."""
+    return [result async for result in generator]
+
+def crawl(engine, price):
+    """Executa uma coleta da listagem e do imóvel com as configurações padrão do projeto."""
+    # Configurações do projeto; o reactor fica a cargo do get_crawler (os callbacks são
+    # executados diretamente pelo teste)
+    settings_dict = {key: getattr(project_settings, key) for key in dir(project_settings)
+                     if key.isupper() and key not in ('TWISTED_REACTOR', 'ASYNCIO_EVENT_LOOP')}
+    crawler = get_crawler(AuctionSpider, settings_dict=settings_dict)
+    spider = AuctionSpider.from_crawler(crawler, max_items_per_site=10, config_depth=2)
+    spider.session.bind = engine
+    spider.spider_opened(spider)
+    pipeline = DatabasePipeline(engine=engine)
+    pipeline.open_spider(spider)
+
+    requests = [result for result in asyncio.run(collect(spider.parse(listing_response())))
+                if isinstance(result, Request) and result.url == DETAIL_URL]
+    assert len(requests) == 1, "Imóvel já gravado deve ser visitado de novo"
+    items = asyncio.run(collect(spider.parse_detail(detail_response(requests[0], price))))
+    for item in items:
+        pipeline.process_item(item, spider)
+
+    pipeline.close_spider(spider)
+    spider.spider_closed(spider, 'finished')
+    return items
+
+def test_recrawl():
+    """
+    Testa que a segunda coleta revisita o imóvel e registra a queda de preço da 2ª praça.
+    """
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'itens.db')}")
+    migrate(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    session.add(ScrapingRule(domain='a.com', list_selector='.card a',
+                             detail_selectors=json.dumps({'title': 'h1', 'price': '.preco', 'auction_date': '.data'})))
+    session.commit()
+    session.close()
+
+    assert len(crawl(engine, 'R$ 300.000,00')) == 1
+    assert len(crawl(engine, 'R$ 180.000,00')) == 1
+
+    session = Session()
+    history = get_price_history(session, DETAIL_URL)
+    assert len(history) == 2
+    assert history[1].previous_price == history[0].price != history[1].price
+    session.close()
+
+    print("Teste da re-coleta de imóveis concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_recrawl()
@@ -0,0 +1,110 @@
+"""
+Script para testar a fila persistente de screenshots e as threads de captura.
+"""
+import os
+import time
+import tempfile
+import threading
+from myproject.utils.screenshot_queue import ScreenshotQueue, ScreenshotSamplingPolicy, ScreenshotWorker
+
+class SlowManager:
+    """Gerenciador falso que simula uma captura demorada."""
+
+    def __init__(self, latency=0.2, failing=()):
+        self.latency = latency
+        self.failing = set(failing)
+        self.captured = []
+        self.lock = threading.Lock()
+
+    def capture_screenshot(self, url, wait_time=None):
+        time.sleep(self.latency)
+        if url in self.failing:
+            return None
+        with self.lock:
+            self.captured.append(url)
+        return f"prints/{url.rsplit('/', 1)[-1]}.png"
+
+class FakeDatabase:
+    """Tabela de imóveis falsa para o preenchimento de screenshot_path."""
+
+    def __init__(self, urls):
+        self.paths = {url: None for url in urls}
+
+    def backfill(self, pairs):
+        updated = set()
+        for url, path in pairs:
+            if url in self.paths:
+                self.paths[url] = path
+                updated.add(url)
+        return updated
+
+def test_screenshot_queue():
+    """
+    Testa amostragem, persistência, captura fora do callback e preenchimento do caminho.
+    """
+    path = os.path.join(tempfile.mkdtemp(), 'screenshot_queue.db')
+    queue = ScreenshotQueue(path)
+
+    # Política 'first_n': apenas as primeiras 2 páginas de cada domínio
+    policy = ScreenshotSamplingPolicy('first_n', per_domain=2, queue=queue)
+    urls = [f'https://a.com/imovel/{i}' for i in range(5)] + ['https://b.com/imovel/1']
+    for url in urls:
+        domain = url.split('/')[2]
+        reason = policy.should_capture(domain)
+        if reason:
+            queue.enqueue(url, domain, reason)
+    assert queue.counts()['pending'] == 3
+    assert not queue.enqueue('https://a.com/imovel/0', 'a.com')
+
+    # A contagem por domínio sobrevive a uma nova execução
+    queue.close()
+    queue = ScreenshotQueue(path)
+    policy = ScreenshotSamplingPolicy('first_n_or_failed', per_domain=2, queue=queue)
+    assert policy.should_capture('a.com', extraction_ok=True) is None
+    assert policy.should_capture('a.com', extraction_ok=False) == 'failed'
+    assert ScreenshotSamplingPolicy('failed').should_capture('c.com', extraction_ok=True) is None
+
+    # Trabalhos interrompidos voltam para a fila
+    assert queue.claim() is not None
+    assert queue.counts()['running'] == 1
+    queue.close()
+    queue = ScreenshotQueue(path)
+    assert queue.recover() == 1
+    assert queue.counts()['pending'] == 3
+
+    # Enfileirar não espera pela captura (o callback do spider não é bloqueado)
+    manager = SlowManager(latency=0.2, failing={'https://c.com/imovel/9'})
+    database = FakeDatabase(['https://a.com/imovel/0', 'https://a.com/imovel/1'])
+    worker = ScreenshotWorker(queue, manager, workers=2, backfill=database.backfill, max_attempts=2, poll_interval=0.05)
+    worker.start()
+    start = time.monotonic()
+    for i in range(10, 20):
+        queue.enqueue(f'https://d.com/imovel/{i}', 'd.com', 'all', backfill=False)
+        worker.notify()
+    queue.enqueue('https://c.com/imovel/9', 'c.com', 'all')
+    assert time.monotonic() - start < 0.5
+
+    deadline = time.monotonic() + 10
+    while (queue.counts()['pending'] or queue.counts()['running']) and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    # O imóvel salvo depois da captura também recebe o caminho
+    database.paths['https://b.com/imovel/1'] = None
+    worker.stop()
+
+    counts = queue.counts()
+    assert counts['done'] == 13
+    assert counts['failed'] == 1
+    assert len(manager.captured) == 13
+    assert database.paths['https://a.com/imovel/0'] == 'prints/0.png'
+    assert database.paths['https://b.com/imovel/1'] == 'prints/1.png'
+    assert queue.pending_backfills() == []
+    stats = worker.get_stats()
+    assert stats['captured'] == 13
+    assert stats['capture_errors'] == 2
+    queue.close()
+
+    print("Teste da fila de screenshots concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_screenshot_queue()
@@ -0,0 +1,73 @@
+"""
+Script para testar o armazenamento compacto de screenshots.
+"""
+import io
+import os
+import time
+import tempfile
+import threading
+from PIL import Image
+from myproject.tools.benchmark import gerar_screenshot
+from myproject.utils.screenshot_store import ScreenshotStore
+
+def png_with_pixel(color):
+    """Gera um PNG de página com um único pixel alterado."""
+    image = Image.open(io.BytesIO(gerar_screenshot(seed=1)))
+    image.putpixel((5, 5), color)
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+def test_screenshot_store():
+    """
+    Testa codificação, miniaturas, deduplicação, gravação concorrente e retenção.
+    """
+    root = tempfile.mkdtemp()
+    store = ScreenshotStore(root, fmt='webp', quality=60, max_width=1280, thumb_width=320)
+    png = gerar_screenshot(seed=0)
+
+    # Imagem reduzida, codificada em WebP e guardada em subdiretórios pelo hash
+    stored = store.save(png)
+    assert not stored.duplicate
+    assert stored.path.endswith('.webp')
+    assert os.path.relpath(stored.path, root).split(os.sep)[:2] == [stored.key[:2], stored.key[2:4]]
+    assert stored.size * 5 < len(png)
+    with Image.open(stored.path) as image:
+        assert image.size == (1280, 720)
+    with Image.open(stored.thumbnail_path) as thumb:
+        assert thumb.width == 320
+
+    # A mesma captura não ocupa espaço de novo, nem quando gravada em paralelo
+    threads = [threading.Thread(target=store.save, args=(png,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.save(png).path == stored.path
+    assert store.get_stats()['duplicates'] >= 1
+    files = [name for _, _, names in os.walk(root) for name in names]
+    assert len(files) == 2
+    assert not any(name.endswith('.tmp') for name in files)
+
+    # Modo por pixels distingue um pixel diferente; o perceptual considera a mesma página
+    assert store.save(png_with_pixel((255, 0, 0))).key != store.save(png_with_pixel((0, 0, 255))).key
+    perceptual = ScreenshotStore(tempfile.mkdtemp(), fmt='jpeg', dedupe='perceptual')
+    first = perceptual.save(png_with_pixel((255, 0, 0)))
+    assert first.path.endswith('.jpg')
+    assert perceptual.save(png_with_pixel((0, 0, 255))).duplicate
+
+    # Retenção remove arquivos antigos e o limite de tamanho remove os menos usados
+    old = time.time() - 100 * 86400
+    os.utime(stored.path, (old, old))
+    store.retention_days = 90
+    assert store.enforce_budget() == 1
+    assert not os.path.exists(stored.path) and not os.path.exists(stored.thumbnail_path)
+
+    store.max_bytes = 1
+    store.enforce_budget()
+    assert store.get_stats()['total_bytes'] == 0
+
+    print("Teste do armazenamento de screenshots concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_screenshot_store()
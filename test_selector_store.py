@@ -0,0 +1,73 @@
+"""
+Script para testar o cache em memória de regras e seletores.
+"""
+import json
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from myproject.database.models import Base, ScrapingRule, SelectorCache, PageTemplate
+from myproject.database.selector_store import SelectorStore
+
+def test_selector_store():
+    """
+    Testa a carga inicial, a leitura sem acesso ao banco, o descarte LRU e o limite de URLs por par.
+    """
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    session.add(ScrapingRule(domain='a.com', list_selector='.card a',
+                             detail_selectors=json.dumps({'title': 'h1'})))
+    session.add(SelectorCache(domain='a.com', url='https://a.com/lote/1', page_type='detail',
+                              selectors=json.dumps({'title': '.titulo'}), success_rate=0.9))
+    session.add(PageTemplate(fingerprint='f1', domain='a.com', page_type='list',
+                             selectors=json.dumps({'list_selector': 'a.link-imovel'})))
+    session.commit()
+
+    store = SelectorStore(session, max_entries=3)
+    assert store.load_all() == 2
+    reads = store.db_reads
+
+    assert store.get_rule('a.com', 'list') == '.card a'
+    assert store.get_rule('a.com', 'detail') == {'title': 'h1'}
+    assert store.get_cached('https://a.com/lote/1', 'a.com', 'detail') == ({'title': '.titulo'}, True)
+    # URL diferente reaproveita o seletor do domínio com taxa de sucesso alta
+    assert store.get_cached('https://a.com/lote/2', 'a.com', 'detail') == ({'title': '.titulo'}, False)
+    assert store.db_reads == reads
+
+    # Modelo de página conhecido vale para qualquer domínio, mas só para o mesmo tipo de página
+    assert store.get_template('f1', 'list') == 'a.link-imovel'
+    assert store.get_template('f1', 'detail') is None
+    store.set_template('f2', 'detail', {'title': 'h1.nome'})
+    assert store.get_template('f2', 'detail') == {'title': 'h1.nome'}
+    # Modelo com taxa de sucesso baixa deixa de ser reutilizado
+    store.find_template('f2')['success_rate'] = 0.1
+    assert store.get_template('f2', 'detail') is None
+    assert store.db_reads == reads
+
+    # Domínio desconhecido é lido sob demanda e a entrada mais antiga é descartada
+    assert store.get_rule('b.com', 'list') is None
+    assert store.db_reads == reads + 1
+    store.get_rule('c.com', 'list')
+    assert store.evictions == 1
+    assert len(store) == 3
+
+    # Cada par mantém apenas os seletores por URL de maior taxa de sucesso
+    for i, rate in enumerate((0.8, 0.2, 0.95, 0.4)):
+        session.add(SelectorCache(domain='d.com', url=f'https://d.com/lote/{i}', page_type='detail',
+                                  selectors=json.dumps({'title': f'.t{i}'}), success_rate=rate))
+    session.commit()
+    store = SelectorStore(session, max_urls_per_entry=2)
+    store.load_all()
+    assert store.url_evictions == 2
+    assert store.get_cached('https://d.com/lote/2', 'd.com', 'detail') == ({'title': '.t2'}, True)
+    assert store.get_cached('https://d.com/lote/1', 'd.com', 'detail') == ({'title': '.t2'}, False)
+    # Um seletor novo entra no lugar do pior, sem ultrapassar o limite
+    store.set_cached('https://d.com/lote/9', 'd.com', 'detail', {'title': '.t9'})
+    assert store.find_url('https://d.com/lote/9', 'd.com')['success_rate'] == 0.5
+    assert store.find_url('https://d.com/lote/0', 'd.com') is None
+    assert store.get_stats()['url_evictions'] == 3
+
+    print("Teste do cache de seletores concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_selector_store()
@@ -0,0 +1,41 @@
+"""
+Script para testar a coalescência de gerações simultâneas de seletores.
+"""
+from myproject.utils.single_flight import SingleFlight
+
+def test_single_flight():
+    """
+    Testa que apenas a primeira chamada por chave gera o resultado e as demais o recebem.
+    """
+    flight = SingleFlight()
+    key = ('a.com', 'detail')
+
+    # A primeira chamada é a líder; as seguintes aguardam
+    assert flight.join(key) is None
+    waiters = [flight.join(key) for _ in range(4)]
+    assert all(waiter is not None for waiter in waiters)
+
+    # Outra chave não é afetada
+    assert flight.join(('a.com', 'list')) is None
+
+    results = []
+    for waiter in waiters:
+        waiter.addCallback(results.append)
+
+    selectors = {'title': 'h1', 'price': '.preco'}
+    assert flight.release(key, selectors) == 4
+    assert results == [selectors] * 4
+    assert key not in flight
+
+    # Após a liberação, uma nova chamada volta a ser líder
+    assert flight.join(key) is None
+    flight.release(key, None)
+
+    stats = flight.get_stats()
+    assert stats['leaders'] == 3
+    assert stats['llm_calls_avoided'] == 4
+
+    print("Teste de single-flight concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_single_flight()
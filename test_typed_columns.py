@@ -0,0 +1,86 @@
+"""
+Script para testar as colunas tipadas de preço, área e data do leilão.
+"""
+import os
+import tempfile
+from datetime import datetime
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from myproject.database.models import AuctionData
+from myproject.database.typed_columns import backfill_typed_columns, ensure_typed_columns
+from myproject.pipelines import DatabasePipeline
+from myproject.utils.value_parsers import parse_area_m2, parse_auction_datetime, parse_price_cents
+
+def test_typed_columns():
+    """
+    Testa a conversão dos textos, o preenchimento no pipeline e em blocos e o uso dos índices.
+    """
+    assert parse_price_cents('R$ 1.500.000,00') == 150000000
+    assert parse_price_cents('1500000.00') == 150000000
+    assert parse_price_cents('R$ 90.000') == 9000000
+    assert parse_price_cents('sob consulta') is None
+    assert parse_price_cents('1º Leilão: R$ 500.000,00') == 50000000
+    assert parse_price_cents('2ª Praça: R$ 300.000,00') == 30000000
+    assert parse_price_cents('R$ 350 mil') == 35000000
+    assert parse_price_cents('R$ 1,2 milhão') == 120000000
+    assert parse_price_cents('2ª Praça: 300.000,00') == 30000000
+    assert parse_area_m2('1.234,56 m²') == 1234.56
+    assert parse_area_m2('2 ha') == 20000.0
+    assert parse_area_m2('3 quartos, 120 m²') == 120.0
+    assert parse_area_m2('Lote 5 - 450 m²') == 450.0
+    assert parse_area_m2('2 dormitórios, 85,5 m2 de área útil') == 85.5
+    assert parse_area_m2('450') == 450.0
+    assert parse_auction_datetime('10/03/2025 às 14h00') == datetime(2025, 3, 10, 14, 0)
+    assert parse_auction_datetime('10 de março de 2025') == datetime(2025, 3, 10)
+    assert parse_auction_datetime('31/02/2025') is None
+
+    # Banco antigo, sem as colunas tipadas, com linhas já gravadas
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'itens.db')}")
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE auction_data (id INTEGER PRIMARY KEY, url VARCHAR UNIQUE, title VARCHAR, '
+                          'price VARCHAR, description TEXT, address VARCHAR, auction_date VARCHAR, area VARCHAR, '
+                          'property_type VARCHAR, image_url VARCHAR, extracted_at DATETIME, source_domain VARCHAR, '
+                          'screenshot_path VARCHAR, latitude FLOAT, longitude FLOAT, success_bid VARCHAR)'))
+        for i in range(25):
+            conn.execute(text("INSERT INTO auction_data (url, price, area, auction_date) VALUES (:url, :price, :area, :date)"),
+                         {'url': f'https://a.com/imovel/{i}', 'price': f'{(i + 1) * 10000}.00',
+                          'area': f'{50 + i} m²', 'date': f'{i % 28 + 1:02d}/03/2025'})
+
+    # O pipeline acrescenta as colunas e preenche os itens novos
+    pipeline = DatabasePipeline(engine=engine)
+    pipeline.open_spider(None)
+    pipeline.process_item({'url': 'https://b.com/imovel/1', 'price': 'R$ 1.500.000,00', 'area': '1.234,56 m²',
+                           'auction_date': '10/03/2025 às 14h00'}, None)
+    pipeline.close_spider(None)
+
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    row = session.query(AuctionData).filter_by(url='https://b.com/imovel/1').one()
+    assert (row.price_cents, row.area_m2, row.auction_at) == (150000000, 1234.56, datetime(2025, 3, 10, 14, 0))
+    assert session.query(AuctionData).filter(AuctionData.price_cents.is_(None)).count() == 25
+    session.close()
+
+    # Preenchimento em blocos; uma segunda execução não encontra pendências
+    stats = backfill_typed_columns(engine, chunk_size=10)
+    assert stats == {'scanned': 25, 'updated': 25, 'chunks': 3}
+    assert backfill_typed_columns(engine, chunk_size=10)['updated'] == 0
+
+    session = Session()
+    cheap = session.query(AuctionData).filter(AuctionData.price_cents.between(1000000, 5000000)).count()
+    assert cheap == 5
+    assert session.query(AuctionData).filter(AuctionData.area_m2 >= 70).count() == 6
+    assert session.query(AuctionData).filter(AuctionData.auction_at < datetime(2025, 3, 3)).count() == 2
+    session.close()
+
+    # Consultas por faixa usam os índices (sem varrer a tabela)
+    assert not ensure_typed_columns(engine)
+    with engine.connect() as conn:
+        for column in ('price_cents', 'area_m2', 'auction_at'):
+            plan = conn.execute(text(f'EXPLAIN QUERY PLAN SELECT * FROM auction_data WHERE {column} > 0')).all()
+            detail = ' '.join(str(step[-1]) for step in plan)
+            assert f'ix_auction_data_{column}' in detail, detail
+
+    print("Teste das colunas tipadas concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_typed_columns()
@@ -0,0 +1,70 @@
+"""
+Script para testar o filtro de Bloom persistente das URLs já gravadas.
+"""
+import os
+import tempfile
+from sqlalchemy import create_engine
+from myproject.database.migrations import migrate
+from myproject.pipelines import DatabasePipeline
+from myproject.spiders.auction_spider import AuctionSpider
+from myproject.utils.url_filter import UrlBloomFilter, load_or_rebuild, rebuild_from_db
+
+def test_url_filter():
+    """
+    Testa a taxa de falsos positivos, a persistência, a reconstrução e o descarte de links conhecidos.
+    """
+    # Sem falsos negativos e com falsos positivos perto da taxa configurada
+    bloom = UrlBloomFilter(capacity=10000, error_rate=0.01)
+    known = [f'https://a.com/imovel/{i}' for i in range(10000)]
+    bloom.update(known)
+    assert all(url in bloom for url in known)
+    false_positives = sum(f'https://a.com/imovel/novo-{i}' in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.02
+    assert 0.005 < bloom.estimated_error_rate() < 0.02
+    assert 'https://a.com/imovel/1#fotos' in bloom
+
+    # Persistência: o arquivo tem o tamanho do vetor de bits e volta igual
+    path = os.path.join(tempfile.mkdtemp(), 'url_filter.bloom')
+    bloom.save(path)
+    loaded = UrlBloomFilter.load(path)
+    assert loaded.count == bloom.count and loaded.bits == bloom.bits
+    assert os.path.getsize(path) < 15000
+
+    # Reconstrução a partir do banco quando o arquivo falta ou está corrompido
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'itens.db')}")
+    migrate(engine)
+    spider = AuctionSpider()
+    spider.url_filter = rebuild_from_db(engine, capacity=1000)
+    assert spider.url_filter.count == 0
+    with open(path, 'wb') as f:
+        f.write(b'corrompido')
+    assert load_or_rebuild(path, engine, capacity=1000).count == 0
+
+    # O pipeline acrescenta os imóveis gravados ao filtro do spider
+    pipeline = DatabasePipeline(engine=engine)
+    pipeline.open_spider(spider)
+    for i in range(50):
+        pipeline.process_item({'url': f'https://a.com/imovel/{i}', 'title': f'Casa {i}'}, spider)
+    pipeline.close_spider(spider)
+    assert 'https://a.com/imovel/10' in spider.url_filter
+    assert rebuild_from_db(engine, capacity=1000).count == 50
+
+    # Links de imóveis já gravados não são agendados; os novos seguem
+    spider.session.bind = engine
+    links = [f'https://a.com/imovel/{i}' for i in range(40, 60)]
+    remaining = spider._skip_known_urls(links)
+    assert remaining == links[10:]
+    stats = spider.url_filter.get_stats()
+    assert stats['skipped'] == 10 and stats['confirmed'] == 10
+    assert stats['checks'] == 20
+
+    # Um falso positivo é confirmado no banco e o link não é perdido
+    spider.url_filter.add('https://a.com/imovel/falso')
+    assert spider._skip_known_urls(['https://a.com/imovel/falso']) == ['https://a.com/imovel/falso']
+    assert spider.url_filter.get_stats()['false_positives'] == 1
+    spider.session.close()
+
+    print("Teste do filtro de URLs concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_url_filter()
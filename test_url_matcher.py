@@ -0,0 +1,42 @@
+"""
+Script para testar a identificação de URLs de páginas de detalhes.
+"""
+from myproject.utils.url_matcher import DetailUrlMatcher, url_template
+
+def test_url_matcher():
+    """
+    Testa os padrões genéricos e os modelos de URL aprendidos por domínio.
+    """
+    matcher = DetailUrlMatcher()
+
+    # Padrões genéricos
+    assert matcher.match("https://leiloes.com.br/lote/123") == r'/lote/\d+'
+    assert matcher.is_detail("https://leiloes.com.br/imovel-casa-jardim")
+    assert not matcher.is_detail("https://leiloes.com.br/busca?cidade=sp")
+    assert not matcher.is_detail("https://leiloes.com.br/anuncio/SP-4431")
+
+    # Modelos derivados das URLs
+    assert url_template("https://leiloes.com.br/lote/12345") == "/lote/{id}"
+    assert url_template("https://leiloes.com.br/imovel-apartamento-centro-987") == "/imovel-{slug}"
+    assert url_template("https://leiloes.com.br/busca") is None
+
+    # Modelo aprendido passa a valer apenas depois de duas URLs e só no domínio de origem
+    assert matcher.learn("https://leiloes.com.br/anuncio/SP-4431") == "/anuncio/{slug}"
+    assert not matcher.is_detail("https://leiloes.com.br/anuncio/RJ-1002")
+    assert matcher.learn("https://leiloes.com.br/anuncio/SP-4431") == "/anuncio/{slug}"
+    assert not matcher.is_detail("https://leiloes.com.br/anuncio/RJ-1002")
+    assert matcher.learn("https://leiloes.com.br/anuncio/MG-0077") == "/anuncio/{slug}"
+    assert matcher.match("https://leiloes.com.br/anuncio/RJ-1002") == "/anuncio/{slug}"
+    assert not matcher.is_detail("https://outro.com.br/anuncio/RJ-1002")
+
+    # Modelo sem trecho fixo não é aprendido (corresponderia à navegação do site)
+    assert url_template("https://a.com/apartamento-centro-sp-123") is None
+    assert matcher.learn("https://a.com/apartamento-centro-sp-123", "a.com") is None
+    assert matcher.learn("https://a.com/casa-jardim-sp-456", "a.com") is None
+    for url in ("https://a.com/contato", "https://a.com/busca", "https://a.com/leiloes-judiciais"):
+        assert not matcher.is_detail(url, "a.com")
+
+    print("Teste de identificação de URLs concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_url_matcher()
@@ -0,0 +1,142 @@
+"""
+Script para testar o pool de navegadores usado nos screenshots.
+"""
+import io
+import os
+import time
+import tempfile
+import threading
+from PIL import Image
+from myproject.utils.webdriver_pool import WebDriverPool, wait_until_ready
+from myproject.utils.screenshot import ScreenshotManager
+
+class FakeDriver:
+    """Navegador falso que simula o carregamento de uma página."""
+
+    def __init__(self, loading_polls=2):
+        self.loading_polls = loading_polls
+        self.polls = 0
+        self.alive = True
+        self.closed = False
+        self.urls = []
+
+    def get(self, url):
+        self.urls.append(url)
+        self.polls = 0
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("navegador travado")
+        if script == 'return 1;':
+            return 1
+        self.polls += 1
+        if self.polls <= self.loading_polls:
+            return ['loading', self.polls]
+        return ['complete', self.loading_polls]
+
+    def execute_cdp_cmd(self, cmd, params):
+        return {}
+
+    def get_screenshot_as_png(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (640, 360), color=(255, 255, 255)).save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def quit(self):
+        self.closed = True
+
+class FakeFactory:
+    """Fábrica que conta os navegadores abertos."""
+
+    def __init__(self):
+        self.drivers = []
+
+    def __call__(self):
+        driver = FakeDriver()
+        self.drivers.append(driver)
+        return driver
+
+def test_webdriver_pool():
+    """
+    Testa reutilização, reciclagem, verificação de saúde e espera por eventos.
+    """
+    output_dir = tempfile.mkdtemp()
+
+    # Navegadores são reutilizados e reciclados após max_pages
+    factory = FakeFactory()
+    pool = WebDriverPool(size=1, max_pages=3, driver_factory=factory, memory_probe=None)
+    manager = ScreenshotManager(output_dir=output_dir, pool=pool)
+    for i in range(5):
+        path = manager.capture_screenshot(f'https://a.com/imovel/{i}', wait_time=2)
+        assert path and os.path.exists(path)
+    stats = pool.get_stats()
+    assert len(factory.drivers) == 2
+    assert stats['recycled'] == 1
+    assert stats['screenshots'] == 5
+    assert stats['screenshots_per_minute'] > 0
+    assert factory.drivers[0].closed
+
+    # Um navegador travado é substituído no próximo empréstimo
+    factory.drivers[1].alive = False
+    with pool.driver() as driver:
+        assert driver is factory.drivers[2]
+    assert pool.get_stats()['failed_health_checks'] == 1
+
+    # Reciclagem por memória
+    factory = FakeFactory()
+    pool = WebDriverPool(size=1, max_memory_mb=100, driver_factory=factory, memory_probe=lambda d: 500)
+    for _ in range(2):
+        with pool.driver():
+            pass
+    assert len(factory.drivers) == 2
+
+    # Aquecimento abre os navegadores antes do primeiro uso e o pool respeita o tamanho
+    factory = FakeFactory()
+    pool = WebDriverPool(size=2, driver_factory=factory, memory_probe=None)
+    assert pool.warm_up() == 2
+    in_use = []
+    peak = []
+    lock = threading.Lock()
+
+    def worker():
+        with pool.driver() as driver:
+            with lock:
+                in_use.append(driver)
+                peak.append(len(in_use))
+            time.sleep(0.05)
+            with lock:
+                in_use.remove(driver)
+
+    workers = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    assert len(factory.drivers) == 2
+    assert max(peak) <= 2
+    pool.close()
+    assert all(driver.closed for driver in factory.drivers)
+
+    # A espera termina assim que a página fica pronta, sem pausas fixas
+    start = time.monotonic()
+    assert wait_until_ready(FakeDriver(), timeout=5, idle_time=0.1, poll_interval=0.01)
+    assert time.monotonic() - start < 1
+
+    # E respeita o teto quando a página nunca termina de carregar
+    start = time.monotonic()
+    assert not wait_until_ready(FakeDriver(loading_polls=10 ** 6), timeout=0.2, poll_interval=0.01)
+    assert time.monotonic() - start < 1
+
+    # Sem wait_time, a captura usa o ready_timeout do pool como teto
+    pool = WebDriverPool(size=1, ready_timeout=0.3, driver_factory=lambda: FakeDriver(loading_polls=10 ** 6),
+                         memory_probe=None)
+    start = time.monotonic()
+    assert ScreenshotManager(output_dir=output_dir, pool=pool).capture_screenshot('https://a.com/imovel/lento')
+    assert 0.3 <= time.monotonic() - start < 2
+    assert pool.get_stats()['ready_timeouts'] == 1
+    pool.close()
+
+    print("Teste do pool de navegadores concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_webdriver_pool()
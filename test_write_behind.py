@@ -0,0 +1,64 @@
+"""
+Script para testar o buffer write-behind das gravações de controle do spider.
+"""
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from myproject.database.models import Base, ProblemSite, SelectorCache
+from myproject.database.write_behind import MAX_ATTEMPTS, WriteBehindBuffer
+
+def test_write_behind():
+    """
+    Testa a mescla de atualizações repetidas, a gravação em lote e a recuperação de linhas inválidas.
+    """
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(SelectorCache(domain='a.com', url='https://a.com/1', page_type='list',
+                              selectors='{}', success_rate=0.5))
+    session.commit()
+
+    buffer = WriteBehindBuffer(session, max_pending=10, flush_interval=3600)
+
+    # Três falhas do mesmo domínio viram uma única linha com 3 tentativas
+    for error in ('timeout', '403', '503'):
+        buffer.upsert(ProblemSite, 'domain', 'b.com', values={'last_error': error}, increments={'attempts': 1})
+
+    # Atualizações sucessivas da taxa de sucesso: a última vence
+    for rate in (0.6, 0.7, 0.8):
+        buffer.update(SelectorCache, 'url', 'https://a.com/1', values={'success_rate': rate})
+
+    assert len(buffer) == 2
+    assert session.query(ProblemSite).count() == 0
+    assert buffer.coalesced == 4
+
+    assert buffer.flush() == 2
+    site = session.query(ProblemSite).filter_by(domain='b.com').one()
+    assert (site.attempts, site.last_error) == (3, '503')
+    assert session.query(SelectorCache).filter_by(url='https://a.com/1').one().success_rate == 0.8
+
+    # Linha existente recebe o incremento somado ao valor atual
+    buffer.upsert(ProblemSite, 'domain', 'b.com', increments={'attempts': 2})
+    buffer.flush()
+    assert session.query(ProblemSite).filter_by(domain='b.com').one().attempts == 5
+
+    # Uma linha inválida não descarta as demais do lote: ela volta ao buffer e é
+    # descartada só depois de MAX_ATTEMPTS gravações com falha
+    buffer.upsert(ProblemSite, 'domain', 'c.com', increments={'attempts': 1})
+    buffer.upsert(ProblemSite, 'domain', 'd.com', values={'first_error': 'ontem'}, increments={'attempts': 1})
+    buffer.update(SelectorCache, 'url', 'https://a.com/1', increments={'use_count': 1})
+    assert buffer.flush() == 2
+    assert session.query(ProblemSite).filter_by(domain='c.com').one().attempts == 1
+    assert session.query(SelectorCache).filter_by(url='https://a.com/1').one().use_count == 2
+    assert len(buffer) == 1 and buffer.retried == 1
+
+    buffer.upsert(ProblemSite, 'domain', 'd.com', increments={'attempts': 1})
+    assert len(buffer) == 1
+    for attempt in range(MAX_ATTEMPTS - 1):
+        assert buffer.flush() == 0
+    assert len(buffer) == 0 and buffer.failed == 1
+    assert session.query(ProblemSite).filter_by(domain='d.com').count() == 0
+
+    print("Teste do buffer write-behind concluído com sucesso.")
+
+if __name__ == "__main__":
+    test_write_behind()